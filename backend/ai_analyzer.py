@@ -6,7 +6,9 @@ from openai import OpenAI
 from anthropic import Anthropic
 import math
 import requests
+import time
 from datetime import datetime
+import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -440,6 +442,12 @@ Transcript:
     
     def analyze_chunk(self, chunk: str) -> Dict[str, Any]:
         """Analyze a text chunk using the configured AI provider"""
+        started = time.perf_counter()
+        result = self._analyze_chunk(chunk)
+        metrics.record_llm_request(self.api_provider, time.perf_counter() - started, result is not None)
+        return result
+    
+    def _analyze_chunk(self, chunk: str) -> Dict[str, Any]:
         # Check if this is already a custom prompt (for meeting boundaries)
         if "start_time" in chunk and "end_time" in chunk:
             # This is a meeting boundary detection prompt, use it directly
@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-from flask import Flask, request, jsonify, make_response
+from flask import Flask, request, jsonify, make_response, g
 from flask_cors import CORS
 import json
 import os
@@ -7,6 +7,15 @@ import sys
 import urllib.parse
 from dotenv import load_dotenv
 from ftp_manager import FTPManager
+from remote_file_validator import RemoteFileValidator
+from remote_path_cache import remote_path_cache, server_key
+from schedule_export_state import schedule_export_state, hash_schedule_lines
+from schedule_seed import parse_seed
+from content_availability import ContentAvailabilityIndex
+from template_timeline import TemplateTimeline
+from theme_window import ThemeWindow
+from castus_schedule_parser import (CastusScheduleParser, parse_castus_schedule,
+                                    convert_to_24hour_format, calculate_duration_from_times)
 from file_scanner import FileScanner
 from config_manager import ConfigManager
 from file_analyzer import file_analyzer
@@ -22,6 +31,11 @@ from scheduler_jobs import SchedulerJobs
 from email_notifier import EmailNotifier
 from meeting_logger import MeetingLogger
 import logging
+import async_logging
+from async_logging import LogChannel, SessionLog
+import metrics
+import query_tracer
+from sampling_profiler import profiler, profiled, recent_profiles, profile_path
 from bson import ObjectId
 from datetime import datetime, timedelta
 import uuid
@@ -277,6 +291,13 @@ gap_logger.setLevel(logging.DEBUG)
 gap_logger.addHandler(file_handler)
 gap_logger.propagate = False  # Don't also send to console
 
+# Console and gap filling debug output are written by a background thread
+async_logging.route_through_queue(logging.getLogger())
+async_logging.route_through_queue(gap_logger)
+
+# Sampled channels for the per-candidate logging in fill_template_gaps
+fill_candidate_log = LogChannel('fill_template_gaps.candidates', max_per_second=20)
+
 # Global managers
 ftp_managers = {}
 config_manager = ConfigManager()
@@ -303,6 +324,7 @@ def get_next_meeting_logger():
         logger.addHandler(handler)
         logger.setLevel(logging.INFO)
         logger.propagate = False
+        async_logging.route_through_queue(logger)
     
     return logger
 
@@ -328,6 +350,7 @@ def get_theme_logger():
         logger.addHandler(handler)
         logger.setLevel(logging.INFO)
         logger.propagate = False
+        async_logging.route_through_queue(logger)
     
     return logger
 
@@ -338,184 +361,13 @@ app_start_time = time.time()
 # Initialize database connection
 db_manager.connect()
 
-def should_block_content_for_theme(content, recent_items, current_position, schedule_type, remaining_seconds=None):
-    """
-    Check if content should be blocked due to theme conflicts with recent items.
-    Only applies to spots content.
-    
-    Args:
-        content: The content being considered
-        recent_items: List of recently scheduled items
-        current_position: Current position in seconds
-        schedule_type: Type of schedule ('daily' or 'weekly')
-        remaining_seconds: Seconds remaining until end of day/schedule
-    
-    Returns tuple: (should_block, reason)
-    """
-    theme_logger = get_theme_logger()
-    
-    try:
-        # Only check spots, ID, and short_form content (not long_form)
-        content_category = content.get('duration_category', '')
-        if content_category not in ['spots', 'id', 'short_form']:
-            return False, None
-            
-        # If we're within 2 hours of end-of-day, relax theme conflict requirements
-        # This prevents infinite loops when trying to fill end-of-day gaps
-        if remaining_seconds is not None and remaining_seconds < 7200:  # 2 hours = 7200 seconds
-            remaining_hours = remaining_seconds / 3600
-            theme_logger.info(f"Relaxing theme conflict check near end-of-day ({remaining_hours:.1f}h remaining)")
-            return False, None
-            
-        theme_logger.info("\n" + "="*80)
-        theme_logger.info("THEME ACCEPTANCE CHECK")
-        theme_logger.info("="*80)
-        
-        # Get content theme/topic information
-        content_title = content.get('content_title', content.get('file_name', ''))
-        content_category = content.get('duration_category', '')
-        content_tags = content.get('tags', {})
-        content_topics = content_tags.get('topics', []) if isinstance(content_tags, dict) else []
-        
-        # Try to extract theme from database field, tags, and title
-        content_themes = set()
-        
-        # First check the 'theme' field from database
-        db_theme = content.get('theme')
-        if db_theme:
-            content_themes.add(db_theme.lower().strip())
-        
-        # Add topics from tags
-        if content_topics:
-            content_themes.update([topic.lower() for topic in content_topics])
-        
-        # Extract theme keywords from title as fallback
-        theme_keywords = extract_theme_from_title(content_title)
-        if theme_keywords:
-            content_themes.update(theme_keywords)
-        
-        theme_logger.info(f"Content being evaluated: '{content_title}'")
-        theme_logger.info(f"  Category: {content_category}")
-        theme_logger.info(f"  Detected themes: {list(content_themes)}")
-        theme_logger.info(f"  Position: {current_position/3600:.2f}h")
-        
-        if not content_themes:
-            theme_logger.info("No themes detected in content")
-            return False, None
-        
-        # Check recent items for theme conflicts
-        # For short-form content (spots, id, short_form), we need to ensure
-        # same-theme content is separated by at least one long_form item
-        
-        # Look backwards through recent items to find content with same theme
-        theme_logger.info(f"Checking theme conflicts for short-form content")
-        
-        # Search backwards through recent items
-        for i, item in enumerate(reversed(recent_items)):
-            item_category = item.get('duration_category', '')
-            item_title = item.get('title', item.get('content_title', ''))
-            
-            theme_logger.info(f"  Checking item -{i+1}: '{item_title}' (category: {item_category})")
-            
-            # If we find a long_form content before finding same-theme short content, we're good
-            if item_category == 'long_form':
-                theme_logger.info(f"  Found long_form content at position -{i+1}, theme separation satisfied")
-                break
-            
-            # Skip meetings from theme checking  
-            item_content_type = item.get('content_type', '')
-            item_file_name = item.get('file_name', '')
-            
-            is_meeting = ('SDI' in item_title or 
-                         'Live Input' in item_title or 
-                         item_content_type == 'MTG' or 
-                         '_MTG_' in item_file_name)
-            
-            if is_meeting:
-                theme_logger.info(f"  Skipping meeting from theme check: '{item_title}'")
-                continue
-                
-            # Only check theme conflicts for short-form content
-            if item_category not in ['spots', 'id', 'short_form']:
-                continue
-            
-            # Get themes from database field first, then from title
-            item_themes = set()
-            
-            # Check the 'theme' field from database
-            db_theme = item.get('theme')
-            if db_theme:
-                item_themes.add(db_theme.lower().strip())
-            
-            # Also extract from title as fallback
-            title_themes = extract_theme_from_title(item_title)
-            if title_themes:
-                item_themes.update(title_themes)
-            
-            # Check if any themes match
-            if item_themes:
-                matching_themes = content_themes.intersection(item_themes)
-                if matching_themes:
-                    # Found short-form content with same theme before any long_form - that's a conflict
-                    reason = f"Short-form theme conflict: '{content_title}' has theme '{list(matching_themes)[0]}' matching recent {item_category} item '{item_title}' - must be separated by long_form content"
-                    theme_logger.info(f"Decision: REJECTED - {reason}")
-                    return True, reason
-        
-        theme_logger.info(f"Decision: ACCEPTED - No theme conflicts found")
-        return False, None
-        
-    except Exception as e:
-        theme_logger.error(f"Error checking theme conflicts: {str(e)}")
-        logger.error(f"Error in should_block_content_for_theme: {str(e)}")
-        return False, None
-
-def extract_theme_from_title(title):
-    """Extract theme keywords from content title"""
-    if not title:
-        return set()
-    
-    # Common theme keywords to look for
-    theme_patterns = [
-        'gun', 'firearm', 'weapon', 'shooting',
-        'safety', 'violence', 'crime', 'police',
-        'health', 'medical', 'covid', 'vaccine',
-        'education', 'school', 'student', 'teacher',
-        'housing', 'homeless', 'affordable', 'rent',
-        'environment', 'climate', 'green', 'pollution',
-        'election', 'vote', 'campaign', 'political',
-        'budget', 'tax', 'finance', 'money',
-        'transport', 'traffic', 'transit', 'road',
-        'community', 'neighborhood', 'resident',
-        'business', 'economy', 'job', 'employment',
-        'arts', 'culture', 'music', 'festival',
-        'park', 'recreation', 'sport', 'fitness'
-    ]
-    
-    title_lower = title.lower()
-    themes = set()
-    
-    for pattern in theme_patterns:
-        if pattern in title_lower:
-            themes.add(pattern)
-    
-    # Also check for compound themes
-    if 'gun' in title_lower and 'safe' in title_lower:
-        themes.add('gun_safety')
-    if 'public' in title_lower and 'safe' in title_lower:
-        themes.add('public_safety')
-    
-    return themes
-
-def is_strong_theme(theme):
-    """Check if a theme is considered 'strong' (should have stricter spacing)"""
-    strong_themes = {'gun', 'firearm', 'weapon', 'violence', 'crime', 'covid', 'election', 'political'}
-    return theme.lower() in strong_themes
-
-def should_block_meeting_after_live(content, original_items, current_position, schedule_type, base_date):
+def should_block_meeting_after_live(content, timeline, current_position, schedule_type, base_date):
     """
     Check if content should be blocked because it's a recording of the same meeting
     that just aired live.
     
+    timeline is the TemplateTimeline of the template's original items.
+    
     Returns tuple: (should_block, reason)
     """
     next_meeting_logger = get_next_meeting_logger()
@@ -539,31 +391,15 @@ def should_block_meeting_after_live(content, original_items, current_position, s
             return False, None
             
         # Look for the most recent live meeting before current position
-        recent_live_meeting = None
-        live_meeting_distance = float('inf')
-        
-        for item in original_items:
-            # Check if this is a live meeting
-            if not item.get('is_live_input'):
-                continue
-                
-            # Check if it's before current position
-            item_end = item.get('end', 0)
-            if item_end > current_position:
-                continue
-                
-            # Check distance from current position
-            distance = current_position - item_end
-            
-            # Use 120 minutes (2 hours) as the buffer
-            if distance < 7200 and distance < live_meeting_distance:  # 7200 seconds = 120 minutes
-                recent_live_meeting = item
-                live_meeting_distance = distance
+        # Use 120 minutes (2 hours) as the buffer
+        recent_live_meeting = timeline.live.last_ending_before(current_position, 7200)
         
         if not recent_live_meeting:
             next_meeting_logger.info(f"No recent live meeting found within 120 minutes before position {current_position/3600:.2f}h")
             return False, None
             
+        live_meeting_distance = current_position - recent_live_meeting['end']
+        
         # Get the live meeting details
         live_start_time = recent_live_meeting.get('start_time', '')
         live_title = recent_live_meeting.get('title', '')
@@ -758,59 +594,93 @@ def extract_meeting_name_from_title(title):
     # If no pattern matches, return the title as-is
     return title.strip()
 
-def convert_to_24hour_format(time_str):
-    """Convert 12-hour format to 24-hour format"""
-    if not time_str:
-        return "00:00:00"
-        
-    time_str = str(time_str).strip()
-    
-    # Already in 24-hour format
-    if not any(marker in time_str.lower() for marker in [' am', ' pm']):
-        # Check if it looks like 24-hour format
-        if ':' in time_str:
-            parts = time_str.split(':')
-            if len(parts) >= 2:
-                try:
-                    hour = int(parts[0])
-                    if 0 <= hour <= 23:
-                        return time_str
-                except:
-                    pass
-        return time_str
-        
-    # Parse 12-hour format
-    import re
-    # Updated regex to be more flexible with spaces
-    match = re.match(r'^(\d{1,2}):(\d{2})(?::(\d{2}(?:\.\d+)?))?\s*(am|pm)$', time_str.lower().strip())
-    if not match:
-        # Try without seconds
-        match = re.match(r'^(\d{1,2}):(\d{2})\s*(am|pm)$', time_str.lower().strip())
-        if not match:
-            logger.warning(f"Could not parse time format: '{time_str}'")
-            return time_str
-        hours = int(match.group(1))
-        minutes = int(match.group(2))
-        seconds = 0
-        am_pm = match.group(3)
-    else:
-        hours = int(match.group(1))
-        minutes = int(match.group(2))
-        seconds = float(match.group(3) or 0)
-        am_pm = match.group(4)
-    
-    # Convert to 24-hour
-    if am_pm == 'pm' and hours != 12:
-        hours += 12
-    elif am_pm == 'am' and hours == 12:
-        hours = 0
-        
-    # Format with proper seconds handling
-    if seconds == int(seconds):
-        return f"{hours:02d}:{minutes:02d}:{int(seconds):02d}"
-    else:
-        # Include milliseconds
-        return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}"
+@app.before_request
+def start_request_log_budget():
+    """Cap the sampled debug logging a single request can produce"""
+    g.log_budget_token = async_logging.begin_log_budget(f"{request.method} {request.path}")
+
+@app.teardown_request
+def end_request_log_budget(exc):
+    token = g.pop('log_budget_token', None)
+    if token is not None:
+        async_logging.end_log_budget(token)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def observe_request_latency(response):
+    """Record request latency per route pattern (not per concrete path)"""
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.http_request_duration.labels(request.method, route, str(response.status_code)).observe(
+            time.perf_counter() - started)
+    return response
+
+# Query count / DB time response headers, always on when running with debug=True
+QUERY_TRACE_HEADERS = os.environ.get('QUERY_TRACE_HEADERS', 'false').lower() == 'true'
+
+def request_route_label():
+    """METHOD and route pattern of the current request"""
+    return f"{request.method} {request.url_rule.rule if request.url_rule else 'unmatched'}"
+
+@app.before_request
+def start_query_trace():
+    g.query_trace_token = query_tracer.begin_request(request_route_label())
+
+@app.after_request
+def add_query_trace_headers(response):
+    queries = query_tracer.current_request()
+    if queries is not None and (app.debug or QUERY_TRACE_HEADERS):
+        response.headers['X-DB-Queries'] = str(queries.count)
+        response.headers['X-DB-Time-Ms'] = f"{queries.seconds * 1000:.1f}"
+        response.headers['X-DB-Connections'] = str(queries.checkouts)
+        response.headers['X-DB-Slowest'] = '; '.join(
+            f"{entry['ms']}ms {entry['family']}" for entry in queries.slowest_statements())
+        repeated = queries.repeated_statements()
+        if repeated:
+            response.headers['X-DB-Repeated'] = str(len(repeated))
+    return response
+
+@app.teardown_request
+def end_query_trace(exc):
+    token = g.pop('query_trace_token', None)
+    if token is not None:
+        query_tracer.end_request(token)
+
+@app.before_request
+def start_request_profile():
+    """Profile this request if its route or X-Request-ID is armed in the profiler"""
+    if not profiler.armed:
+        return
+    targets = [request_route_label()]
+    request_id = request.headers.get('X-Request-ID')
+    if request_id:
+        targets.insert(0, f"request:{request_id}")
+    g.profile_session = profiler.start(targets, f"{request_route_label()} {request_id or ''}".strip())
+
+@app.after_request
+def add_profile_header(response):
+    session = g.get('profile_session')
+    if session is not None:
+        response.headers['X-Profile'] = session.name
+    return response
+
+@app.teardown_request
+def end_request_profile(exc):
+    session = g.pop('profile_session', None)
+    if session is not None:
+        profiler.finish(session)
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics"""
+    body, content_type = metrics.render_metrics()
+    response = make_response(body)
+    response.headers['Content-Type'] = content_type
+    return response
 
 @app.route('/api/status', methods=['GET'])
 def get_status():
@@ -882,6 +752,89 @@ def get_database_stats():
         })
 
 
+@app.route('/api/admin/remote-path-cache', methods=['GET', 'DELETE'])
+def remote_path_cache_stats():
+    """Hit/miss statistics for the remote path existence cache; DELETE clears it"""
+    try:
+        if request.method == 'DELETE':
+            remote_path_cache.clear()
+            logger.info("Remote path cache cleared")
+        return jsonify({
+            'success': True,
+            'stats': remote_path_cache.stats()
+        })
+    except Exception as e:
+        logger.error(f"Error getting remote path cache stats: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        })
+
+
+@app.route('/api/admin/query-report', methods=['GET', 'DELETE'])
+def get_query_report():
+    """Slowest endpoints by DB time and N+1 suspects over recent requests; DELETE clears it"""
+    try:
+        if request.method == 'DELETE':
+            query_tracer.query_report.clear()
+            logger.info("Query report cleared")
+        limit = request.args.get('limit', 25, type=int)
+        return jsonify({
+            'success': True,
+            'report': query_tracer.query_report.report(limit=limit)
+        })
+    except Exception as e:
+        logger.error(f"Error getting query report: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        })
+
+
+@app.route('/api/admin/profiles', methods=['GET', 'POST', 'DELETE'])
+def admin_profiles():
+    """Sampling profiler: GET lists armed targets and recent profiles, POST arms a target, DELETE disarms"""
+    try:
+        target = None
+        if request.method == 'POST':
+            data = request.json or {}
+            try:
+                target = profiler.arm(
+                    data.get('target'),
+                    runs=int(data.get('runs', 1)),
+                    interval=float(data.get('interval_ms', 10)) / 1000,
+                    max_seconds=float(data.get('max_seconds', 900))
+                )
+            except (TypeError, ValueError) as e:
+                return jsonify({'success': False, 'message': str(e)}), 400
+        elif request.method == 'DELETE':
+            profiler.disarm(request.args.get('target'))
+        
+        response = {
+            'success': True,
+            'status': profiler.status(),
+            'profiles': recent_profiles(request.args.get('limit', 50, type=int))
+        }
+        if target:
+            # Normalized form of the target that was armed
+            response['target'] = target
+        return jsonify(response)
+    except Exception as e:
+        logger.error(f"Error handling profiler request: {str(e)}")
+        return jsonify({'success': False, 'message': str(e)})
+
+
+@app.route('/api/admin/profiles/<name>', methods=['GET'])
+def download_profile(name):
+    """Download a collapsed-stack profile (or its .json details)"""
+    from flask import send_file
+    
+    path = profile_path(name)
+    if not path:
+        return jsonify({'success': False, 'message': 'Profile not found'}), 404
+    return send_file(path, mimetype='text/plain', as_attachment=True, download_name=name)
+
+
 @app.route('/api/admin/logs', methods=['GET'])
 def get_admin_logs():
     """Get recent application logs for admin panel"""
@@ -1183,6 +1136,21 @@ def copy_expirations_from_castus():
                     assets = cursor.fetchall()
                     logger.info(f"Found {len(assets)} {ct} assets to sync")
                     
+                    # If expiration_days is 0, read Castus metadata for all assets up front
+                    castus_windows = {}
+                    if expiration_days == 0:
+                        ftp = FTPManager(config)
+                        if not ftp.connect():
+                            logger.error(f"Failed to connect to {server} server")
+                            total_errors += len(assets)
+                            continue
+                        try:
+                            castus_windows = CastusMetadataHandler(ftp).read_content_windows_batch(
+                                asset['file_path'] or asset['file_name'] for asset in assets
+                            )
+                        finally:
+                            ftp.disconnect()
+                    
                     # Process each asset
                     for asset in assets:
                         asset_id = asset['id']
@@ -1199,22 +1167,11 @@ def copy_expirations_from_castus():
                             
                             # If expiration_days is 0, copy from Castus metadata
                             if expiration_days == 0:
-                                # Connect to FTP
-                                ftp = FTPManager(config)
-                                if not ftp.connect():
-                                    logger.error(f"Failed to connect to {server} server")
-                                    total_errors += 1
-                                    continue
-                                
-                                try:
-                                    # Get Castus metadata
-                                    handler = CastusMetadataHandler(ftp)
-                                    expiry_date = handler.get_content_window_close(file_path)
-                                    go_live_date = handler.get_content_window_open(file_path)
-                                    logger.info(f"Copying Castus metadata for {asset['file_name']}: go_live={go_live_date}, expiry={expiry_date}")
-                                    
-                                finally:
-                                    ftp.disconnect()
+                                # Castus metadata read in the batch above
+                                windows = castus_windows.get(file_path, {})
+                                expiry_date = windows.get('close')
+                                go_live_date = windows.get('open')
+                                logger.info(f"Copying Castus metadata for {asset['file_name']}: go_live={go_live_date}, expiry={expiry_date}")
                             else:
                                 # Calculate expiration based on creation date + expiration_days
                                 creation_date = None
@@ -1743,8 +1700,9 @@ def sync_single_content_metadata():
         try:
             # Get Castus metadata
             handler = CastusMetadataHandler(ftp)
-            expiry_date = handler.get_content_window_close(file_path)
-            go_live_date = handler.get_content_window_open(file_path)
+            windows = handler.get_content_windows(file_path)
+            expiry_date = windows['close']
+            go_live_date = windows['open']
             
             # Update database
             conn = db_manager._get_connection()
@@ -1864,6 +1822,7 @@ def copy_expirations_to_castus():
         # Initialize results
         total_processed = 0
         total_updated = 0
+        total_unchanged = 0
         total_errors = 0
         details = []
         
@@ -1904,74 +1863,72 @@ def copy_expirations_to_castus():
                         assets = cursor.fetchall()
                         logger.info(f"Found {len(assets)} {ct} assets to process for {server}")
                         
-                        # Process each asset
+                        # Collect the desired windows for every asset
+                        windows_by_file = {}
+                        assets_by_file = {}
                         for asset in assets:
-                            asset_id = asset['id']
                             file_path = asset['file_path'] or asset['file_name']
-                            expiry_date = asset['content_expiry_date']
-                            go_live_date = asset['go_live_date']
-                            
                             if not file_path:
-                                logger.warning(f"No file path for asset {asset_id}")
+                                logger.warning(f"No file path for asset {asset['id']}")
                                 total_errors += 1
                                 continue
+                            windows_by_file[file_path] = (asset['go_live_date'], asset['content_expiry_date'])
+                            assets_by_file[file_path] = asset
+                        
+                        if not windows_by_file:
+                            continue
+                        
+                        # One connection per content type; only metadata whose
+                        # dates differ is uploaded
+                        ftp = FTPManager(config)
+                        if not ftp.connect():
+                            logger.error(f"Failed to connect to {server} server")
+                            total_errors += len(windows_by_file)
+                            continue
+                        
+                        try:
+                            handler = CastusMetadataHandler(ftp)
+                            write_results = handler.write_content_windows_batch(windows_by_file)
+                        except Exception as e:
+                            logger.error(f"Error writing {ct} metadata on {server}: {str(e)}")
+                            write_results = {file_path: 'failed' for file_path in windows_by_file}
+                        finally:
+                            ftp.disconnect()
+                        
+                        for file_path, status in write_results.items():
+                            asset = assets_by_file[file_path]
+                            go_live_date, expiry_date = windows_by_file[file_path]
+                            total_processed += 1
                             
-                            try:
-                                # Connect to FTP
-                                ftp = FTPManager(config)
-                                if not ftp.connect():
-                                    logger.error(f"Failed to connect to {server} server")
-                                    total_errors += 1
-                                    continue
-                                
-                                try:
-                                    # Write both dates to Castus metadata
-                                    handler = CastusMetadataHandler(ftp)
-                                    success = handler.write_content_windows(file_path, go_live_date, expiry_date)
-                                    
-                                    # Create result object
-                                    write_result = {'success': success}
-                                    
-                                    if write_result['success']:
-                                        total_updated += 1
-                                        details.append({
-                                            'asset_id': asset_id,
-                                            'title': asset['content_title'] or asset['file_name'],
-                                            'expiry_date': expiry_date.isoformat() if expiry_date and hasattr(expiry_date, 'isoformat') else str(expiry_date) if expiry_date else None,
-                                            'go_live_date': go_live_date.isoformat() if go_live_date and hasattr(go_live_date, 'isoformat') else str(go_live_date) if go_live_date else None,
-                                            'server': server,
-                                            'status': 'updated' if (expiry_date or go_live_date) else 'cleared'
-                                        })
-                                        if expiry_date or go_live_date:
-                                            logger.info(f"Updated Castus metadata for {asset['file_name']} on {server}: go_live={go_live_date}, expiry={expiry_date}")
-                                        else:
-                                            logger.info(f"Cleared Castus metadata for {asset['file_name']} on {server}")
-                                    else:
-                                        logger.error(f"Failed to write metadata for {asset['file_name']}: {write_result.get('message', 'Unknown error')}")
-                                        total_errors += 1
-                                        details.append({
-                                            'asset_id': asset_id,
-                                            'title': asset['content_title'] or asset['file_name'],
-                                            'server': server,
-                                            'status': 'error',
-                                            'error': write_result.get('message', 'Failed to write metadata')
-                                        })
-                                    
-                                    total_processed += 1
-                                    
-                                finally:
-                                    ftp.disconnect()
-                                    
-                            except Exception as e:
-                                logger.error(f"Error processing asset {asset_id} on {server}: {str(e)}")
+                            if status == 'failed':
+                                logger.error(f"Failed to write metadata for {asset['file_name']} on {server}")
                                 total_errors += 1
                                 details.append({
-                                    'asset_id': asset_id,
+                                    'asset_id': asset['id'],
                                     'title': asset['content_title'] or asset['file_name'],
                                     'server': server,
                                     'status': 'error',
-                                    'error': str(e)
+                                    'error': 'Failed to write metadata'
                                 })
+                                continue
+                            
+                            if status == 'unchanged':
+                                total_unchanged += 1
+                                continue
+                            
+                            total_updated += 1
+                            details.append({
+                                'asset_id': asset['id'],
+                                'title': asset['content_title'] or asset['file_name'],
+                                'expiry_date': expiry_date.isoformat() if expiry_date and hasattr(expiry_date, 'isoformat') else str(expiry_date) if expiry_date else None,
+                                'go_live_date': go_live_date.isoformat() if go_live_date and hasattr(go_live_date, 'isoformat') else str(go_live_date) if go_live_date else None,
+                                'server': server,
+                                'status': 'updated' if (expiry_date or go_live_date) else 'cleared'
+                            })
+                            if expiry_date or go_live_date:
+                                logger.info(f"Updated Castus metadata for {asset['file_name']} on {server}: go_live={go_live_date}, expiry={expiry_date}")
+                            else:
+                                logger.info(f"Cleared Castus metadata for {asset['file_name']} on {server}")
                 
             finally:
                 db_manager._put_connection(conn)
@@ -1982,6 +1939,8 @@ def copy_expirations_to_castus():
             message_parts.append(f"Processed {total_processed} items")
         if total_updated > 0:
             message_parts.append(f"Updated {total_updated} in Castus")
+        if total_unchanged > 0:
+            message_parts.append(f"{total_unchanged} already up to date")
         if total_errors > 0:
             message_parts.append(f"{total_errors} errors")
         
@@ -1993,6 +1952,7 @@ def copy_expirations_to_castus():
             'summary': {
                 'total_processed': total_processed,
                 'total_updated': total_updated,
+                'total_unchanged': total_unchanged,
                 'total_errors': total_errors
             },
             'details': details[:10]  # Return first 10 for UI display
@@ -2871,6 +2831,49 @@ def get_analyzed_content():
                     'message': 'Failed to connect to database'
                 })
         
+        # Paginated mode: keyset cursor, server-side sort and optional projection.
+        # 'mode': 'durations' returns only ids + durations for gap filling callers.
+        mode = data.get('mode', 'full')
+        if 'limit' in data or 'cursor' in data or mode == 'durations':
+            fields = data.get('fields')
+            if fields is not None and not isinstance(fields, list):
+                return jsonify({'success': False, 'message': 'fields must be a list'}), 400
+            try:
+                page = db_manager.get_analyzed_content_page(
+                    content_type=content_type,
+                    duration_category=duration_category,
+                    search=search,
+                    featured_filter=featured_filter,
+                    sort=data.get('sort', 'priority'),
+                    direction=data.get('direction'),
+                    limit=validate_numeric(data.get('limit', 100), default=100, name='limit',
+                                           min_value=1, max_value=1000),
+                    cursor=data.get('cursor'),
+                    fields=fields,
+                    durations_only=(mode == 'durations')
+                )
+            except ValueError as e:
+                return jsonify({'success': False, 'message': str(e)}), 400
+            
+            content = page['content']
+            if mode != 'durations':
+                content = convert_objectid_to_string(content)
+            
+            logger.info(f"Returning page of {len(content)} content items (has_more={page['has_more']})")
+            return jsonify({
+                'success': True,
+                'content': content,
+                'count': len(content),
+                'next_cursor': page['next_cursor'],
+                'has_more': page['has_more'],
+                'filters_applied': {
+                    'content_type': content_type,
+                    'duration_category': duration_category,
+                    'search': search,
+                    'featured_filter': featured_filter
+                }
+            })
+        
         # Get analyzed content from PostgreSQL
         content_list = db_manager.get_analyzed_content_for_scheduling(
             content_type=content_type,
@@ -2891,7 +2894,8 @@ def get_analyzed_content():
             'filters_applied': {
                 'content_type': content_type,
                 'duration_category': duration_category,
-                'search': search
+                'search': search,
+                'featured_filter': featured_filter
             }
         })
         
@@ -2921,8 +2925,14 @@ def create_schedule():
         scheduling_config = config_manager.get_scheduling_settings()
         max_errors = scheduling_config.get('max_consecutive_errors', 100)
         
+        # Optional seed for a reproducible schedule
+        try:
+            seed = parse_seed(data.get('seed'))
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        
         # Create schedule using PostgreSQL scheduler
-        result = scheduler_postgres.create_daily_schedule(schedule_date, schedule_name, max_errors)
+        result = scheduler_postgres.create_daily_schedule(schedule_date, schedule_name, max_errors, seed=seed)
         
         return jsonify(result)
         
@@ -3561,7 +3571,7 @@ def rename_content():
                         
                         # Rename/move the file using FTP rename command
                         # This works across directories and acts as a move
-                        ftp.ftp.rename(old_file_path_absolute, new_file_path)
+                        ftp.rename_file(old_file_path_absolute, new_file_path)
                         rename_messages.append(f"{server_type}: renamed successfully")
                         logger.info(f"Renamed on {server_type} server")
                     except Exception as e:
@@ -4309,11 +4319,18 @@ def create_weekly_schedule():
         scheduling_config = config_manager.get_scheduling_settings()
         max_errors = scheduling_config.get('max_consecutive_errors', 100)
         
+        # Optional seed for a reproducible schedule
+        try:
+            seed = parse_seed(data.get('seed'))
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        
         # Create weekly schedule using PostgreSQL scheduler
         if schedule_type == 'single':
-            result = scheduler_postgres.create_single_weekly_schedule(start_date, None, max_errors)
+            result = scheduler_postgres.create_single_weekly_schedule(start_date, None, max_errors,
+                                                                      parallel=data.get('parallel'), seed=seed)
         else:
-            result = scheduler_postgres.create_weekly_schedule(start_date)
+            result = scheduler_postgres.create_weekly_schedule(start_date, seed=seed)
         
         return jsonify(result)
         
@@ -4344,8 +4361,15 @@ def create_monthly_schedule():
         scheduling_config = config_manager.get_scheduling_settings()
         max_errors = scheduling_config.get('max_consecutive_errors', 100)
         
+        # Optional seed for a reproducible schedule
+        try:
+            seed = parse_seed(data.get('seed'))
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        
         # Create monthly schedule using PostgreSQL scheduler
-        result = scheduler_postgres.create_monthly_schedule(year, month, max_errors)
+        result = scheduler_postgres.create_monthly_schedule(year, month, max_errors,
+                                                            parallel=data.get('parallel'), seed=seed)
         
         return jsonify(result)
         
@@ -5056,6 +5080,7 @@ def export_schedule():
         export_path = data.get('export_path')
         filename = data.get('filename')
         format_type = data.get('format', 'castus')
+        force = data.get('force', False)
         
         logger.info(f"Exporting schedule for {date} to {export_server}:{export_path}")
         
@@ -5100,7 +5125,6 @@ def export_schedule():
                 export_format = 'monthly'
             else:
                 export_format = 'daily'
-            schedule_content = generate_castus_schedule(schedule, items, date, export_format)
             
             # Use provided filename or generate default
             if not filename:
@@ -5111,342 +5135,380 @@ def export_schedule():
             # Full path for export
             full_path = f"{export_path}/{filename}"
             
-            # Write to temporary file first - explicitly preserve TABs
-            import tempfile
-            with tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix='.sch') as temp_file:
-                # Write as binary to ensure no text processing happens
-                temp_file.write(schedule_content.encode('utf-8'))
-                temp_file_path = temp_file.name
+            ftp_manager = ftp_managers[export_server]
+            server = server_key(ftp_manager.config)
+            
+            # Hash the generated content first (this also catches overlaps
+            # before anything is sent). If it matches the last export and the
+            # remote file still has the size and modify time seen after that
+            # upload, there is nothing to upload or import.
+            try:
+                content_hash, content_size = hash_schedule_lines(
+                    iter_castus_schedule_lines(schedule, items, date, export_format)
+                )
+            except ScheduleOverlapError as e:
+                return jsonify({
+                    'success': False,
+                    'message': f'ERROR: {str(e)}'
+                })
             
-            # Debug: Check if TABs are in the generated content
-            logger.debug(f"Schedule content contains TABs: {chr(9) in schedule_content}")
-            logger.debug(f"First item block sample: {repr(schedule_content[200:300])}")
+            if not force:
+                remote_stat = ftp_manager.stat_file(full_path)
+                if schedule_export_state.is_unchanged(server, full_path, content_hash, remote_stat):
+                    logger.info(f"Schedule {full_path} on {export_server} unchanged since last export, "
+                                f"skipping upload and auto-import")
+                    return jsonify({
+                        'success': True,
+                        'skipped': True,
+                        'message': f'Schedule unchanged, {full_path} on {export_server} is already up to date',
+                        'file_path': full_path,
+                        'file_size': remote_stat.get('size')
+                    })
             
+            # Stream the generated schedule straight to the FTP server (TABs
+            # are preserved since the content is encoded bytes, no text mode)
             try:
-                # Upload to FTP server
-                ftp_manager = ftp_managers[export_server]
-                success = ftp_manager.upload_file(temp_file_path, full_path)
+                file_size = ftp_manager.upload_stream(
+                    iter_castus_schedule_chunks(schedule, items, date, export_format),
+                    full_path
+                )
+                success = True
+            except ScheduleOverlapError as e:
+                return jsonify({
+                    'success': False,
+                    'message': f'ERROR: {str(e)}'
+                })
+            except Exception as e:
+                logger.error(f"Failed to upload schedule to {full_path}: {str(e)}")
+                success = False
+            
+            if success:
+                remote_stat = ftp_manager.stat_file(full_path)
+                if file_size != content_size:
+                    # Generation is not deterministic for this schedule, don't trust the hash
+                    logger.warning(f"Uploaded {file_size} bytes but hashed {content_size}, not recording export hash")
+                    schedule_export_state.forget(server, full_path)
+                elif not remote_stat:
+                    logger.warning(f"Could not stat {full_path} after upload, not recording export hash")
+                    schedule_export_state.forget(server, full_path)
+                else:
+                    schedule_export_state.record(server, full_path, content_hash, remote_stat)
                 
-                if success:
-                    file_size = os.path.getsize(temp_file_path)
+                logger.info(f"Export successful - checking auto-import eligibility")
+                logger.info(f"Export server: '{export_server}'")
+                logger.info(f"Export path: '{export_path}'")
+                
+                # Auto-import the schedule from castus1 after successful export
+                auto_import_result = None
+                # Always try auto-import regardless of which server was used for export
+                if True:  # Changed from: if export_server == 'source' or export_server == 'target':
+                    # Create debug log for import process
+                    import_log_path = f"logs/schedule_import_debug_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+                    os.makedirs('logs', exist_ok=True)
                     
-                    logger.info(f"Export successful - checking auto-import eligibility")
-                    logger.info(f"Export server: '{export_server}'")
-                    logger.info(f"Export path: '{export_path}'")
+                    with open(import_log_path, 'w') as import_log:
+                        import_log.write(f"=== SCHEDULE AUTO-IMPORT DEBUG LOG ===\n")
+                        import_log.write(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+                        import_log.write(f"Export Server: {export_server}\n")
+                        import_log.write(f"Export Path: {export_path}\n")
+                        import_log.write(f"Export Filename: {filename}\n")
+                        import_log.write(f"Schedule Date: {date}\n")
+                        import_log.write(f"\n")
                     
-                    # Auto-import the schedule from castus1 after successful export
-                    auto_import_result = None
-                    # Always try auto-import regardless of which server was used for export
-                    if True:  # Changed from: if export_server == 'source' or export_server == 'target':
-                        # Create debug log for import process
-                        import_log_path = f"logs/schedule_import_debug_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-                        os.makedirs('logs', exist_ok=True)
+                    try:
+                        logger.info("Auto-importing exported schedule from castus1...")
+                        with open(import_log_path, 'a') as import_log:
+                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Starting auto-import process...\n")
                         
-                        with open(import_log_path, 'w') as import_log:
-                            import_log.write(f"=== SCHEDULE AUTO-IMPORT DEBUG LOG ===\n")
-                            import_log.write(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                            import_log.write(f"Export Server: {export_server}\n")
-                            import_log.write(f"Export Path: {export_path}\n")
-                            import_log.write(f"Export Filename: {filename}\n")
-                            import_log.write(f"Schedule Date: {date}\n")
-                            import_log.write(f"\n")
+                        # Find the newest schedule file in the Master directory
+                        master_path = '/mnt/md127/Schedules/Master'
+                        with open(import_log_path, 'a') as import_log:
+                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Master path: {master_path}\n")
                         
-                        try:
-                            logger.info("Auto-importing exported schedule from castus1...")
+                        # Connect to source (castus1) server
+                        if 'source' not in ftp_managers:
+                            logger.warning("Source server not connected for auto-import")
                             with open(import_log_path, 'a') as import_log:
-                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Starting auto-import process...\n")
-                            
-                            # Find the newest schedule file in the Master directory
-                            master_path = '/mnt/md127/Schedules/Master'
+                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] ERROR: Source server not in ftp_managers\n")
+                                import_log.write(f"Available managers: {list(ftp_managers.keys())}\n")
+                        else:
+                            source_ftp = ftp_managers['source']
                             with open(import_log_path, 'a') as import_log:
-                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Master path: {master_path}\n")
+                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Source FTP manager found\n")
+                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] FTP connected: {source_ftp.connected}\n")
+                                if hasattr(source_ftp, 'config'):
+                                    import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] FTP host: {source_ftp.config.get('host', 'unknown')}\n")
+                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Listing files in: {master_path}\n")
                             
-                            # Connect to source (castus1) server
-                            if 'source' not in ftp_managers:
-                                logger.warning("Source server not connected for auto-import")
+                            try:
+                                files = source_ftp.list_files(master_path)
                                 with open(import_log_path, 'a') as import_log:
-                                    import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] ERROR: Source server not in ftp_managers\n")
-                                    import_log.write(f"Available managers: {list(ftp_managers.keys())}\n")
-                            else:
-                                source_ftp = ftp_managers['source']
+                                    import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Found {len(files)} total files\n")
+                            
+                            except Exception as list_error:
                                 with open(import_log_path, 'a') as import_log:
-                                    import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Source FTP manager found\n")
-                                    import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] FTP connected: {source_ftp.connected}\n")
-                                    if hasattr(source_ftp, 'config'):
-                                        import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] FTP host: {source_ftp.config.get('host', 'unknown')}\n")
-                                    import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Listing files in: {master_path}\n")
+                                    import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] ERROR listing files: {str(list_error)}\n")
+                                raise list_error
+                            
+                            # Filter for .sch files and sort by modification time
+                            sch_files = [f for f in files if f['name'].endswith('.sch')]
+                            with open(import_log_path, 'a') as import_log:
+                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Found {len(sch_files)} .sch files\n")
+                                if sch_files:
+                                    import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Schedule files found:\n")
+                                    for idx, f in enumerate(sch_files[:10]):  # Show first 10
+                                        import_log.write(f"  [{idx+1}] {f['name']} (size: {f.get('size', 0)} bytes)\n")
+                                    if len(sch_files) > 10:
+                                        import_log.write(f"  ... and {len(sch_files) - 10} more\n")
+                            
+                            if sch_files:
+                                # Sort by name to get the newest (assuming date-based naming)
+                                sch_files.sort(key=lambda x: x['name'], reverse=True)
+                                newest_file = sch_files[0]
                                 
-                                try:
-                                    files = source_ftp.list_files(master_path)
-                                    with open(import_log_path, 'a') as import_log:
-                                        import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Found {len(files)} total files\n")
+                                logger.info(f"Found newest schedule file: {newest_file['name']}")
+                                with open(import_log_path, 'a') as import_log:
+                                    import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Selected newest file: {newest_file['name']}\n")
                                 
-                                except Exception as list_error:
-                                    with open(import_log_path, 'a') as import_log:
-                                        import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] ERROR listing files: {str(list_error)}\n")
-                                    raise list_error
+                                # Import the schedule
+                                import_path = f"{master_path}/{newest_file['name']}".replace('//', '/')
+                                with open(import_log_path, 'a') as import_log:
+                                    import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Import path: {import_path}\n")
+                                
+                                # Download to temporary file
+                                with tempfile.NamedTemporaryFile(mode='w+', suffix='.sch', delete=False) as import_temp_file:
+                                    import_temp_path = import_temp_file.name
                                 
-                                # Filter for .sch files and sort by modification time
-                                sch_files = [f for f in files if f['name'].endswith('.sch')]
                                 with open(import_log_path, 'a') as import_log:
-                                    import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Found {len(sch_files)} .sch files\n")
-                                    if sch_files:
-                                        import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Schedule files found:\n")
-                                        for idx, f in enumerate(sch_files[:10]):  # Show first 10
-                                            import_log.write(f"  [{idx+1}] {f['name']} (size: {f.get('size', 0)} bytes)\n")
-                                        if len(sch_files) > 10:
-                                            import_log.write(f"  ... and {len(sch_files) - 10} more\n")
+                                    import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Temp file created: {import_temp_path}\n")
                                 
-                                if sch_files:
-                                    # Sort by name to get the newest (assuming date-based naming)
-                                    sch_files.sort(key=lambda x: x['name'], reverse=True)
-                                    newest_file = sch_files[0]
-                                    
-                                    logger.info(f"Found newest schedule file: {newest_file['name']}")
-                                    with open(import_log_path, 'a') as import_log:
-                                        import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Selected newest file: {newest_file['name']}\n")
-                                    
-                                    # Import the schedule
-                                    import_path = f"{master_path}/{newest_file['name']}".replace('//', '/')
+                                try:
+                                    # Download file
                                     with open(import_log_path, 'a') as import_log:
-                                        import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Import path: {import_path}\n")
+                                        import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Downloading file...\n")
                                     
-                                    # Download to temporary file
-                                    with tempfile.NamedTemporaryFile(mode='w+', suffix='.sch', delete=False) as import_temp_file:
-                                        import_temp_path = import_temp_file.name
+                                    download_success = source_ftp.download_file(import_path, import_temp_path)
                                     
                                     with open(import_log_path, 'a') as import_log:
-                                        import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Temp file created: {import_temp_path}\n")
+                                        import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Download result: {download_success}\n")
                                     
-                                    try:
-                                        # Download file
+                                    if download_success:
+                                        # Check file size
+                                        file_size = os.path.getsize(import_temp_path)
+                                        with open(import_log_path, 'a') as import_log:
+                                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Downloaded file size: {file_size} bytes\n")
+                                        
+                                        # Parse schedule file
+                                        with open(import_temp_path, 'r') as f:
+                                            import_content = f.read()
+                                        
                                         with open(import_log_path, 'a') as import_log:
-                                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Downloading file...\n")
+                                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] File content length: {len(import_content)} chars\n")
+                                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] First 200 chars:\n{import_content[:200]}\n")
                                         
-                                        download_success = source_ftp.download_file(import_path, import_temp_path)
+                                        # Parse the Castus schedule format
+                                        schedule_data = parse_castus_schedule(import_content)
                                         
                                         with open(import_log_path, 'a') as import_log:
-                                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Download result: {download_success}\n")
+                                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Parse result:\n")
+                                            import_log.write(f"  Type: {schedule_data.get('type', 'unknown')}\n")
+                                            import_log.write(f"  Items: {len(schedule_data.get('items', []))}\n")
                                         
-                                        if download_success:
-                                            # Check file size
-                                            file_size = os.path.getsize(import_temp_path)
+                                        # Actually save the schedule to the database
+                                        try:
+                                            # Determine schedule date from filename or use export date
+                                            import_date = date  # Use the exported schedule date
+                                            
+                                            # For weekly schedules, adjust to Sunday
+                                            if schedule_data['type'] == 'weekly':
+                                                from datetime import timedelta
+                                                schedule_date_obj = datetime.strptime(import_date, '%Y-%m-%d')
+                                                days_since_sunday = (schedule_date_obj.weekday() + 1) % 7
+                                                sunday_date = schedule_date_obj - timedelta(days=days_since_sunday)
+                                                import_date = sunday_date.strftime('%Y-%m-%d')
+                                                
+                                                with open(import_log_path, 'a') as import_log:
+                                                    import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Weekly schedule - adjusted date to Sunday: {import_date}\n")
+                                            
+                                            # Process schedule items
+                                            schedule_items = []
+                                            matched_count = 0
+                                            unmatched_count = 0
+                                            
                                             with open(import_log_path, 'a') as import_log:
-                                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Downloaded file size: {file_size} bytes\n")
+                                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Processing {len(schedule_data['items'])} items for database import\n")
                                             
-                                            # Parse schedule file
-                                            with open(import_temp_path, 'r') as f:
-                                                import_content = f.read()
+                                            for idx, item in enumerate(schedule_data['items']):
+                                                file_path = item['file_path']
+                                                file_name = item['filename']
+                                                
+                                                # Look up asset in database
+                                                asset_match = db_manager.find_asset_by_filename(file_name)
+                                                
+                                                if asset_match:
+                                                    schedule_items.append({
+                                                        'file_path': file_path,
+                                                        'file_name': file_name,
+                                                        'asset_id': asset_match['id'],
+                                                        'duration_seconds': asset_match.get('duration_seconds', 0),
+                                                        'content_type': asset_match.get('content_type'),
+                                                        'content_title': asset_match.get('content_title'),
+                                                        'start_time': item.get('start_time'),
+                                                        'end_time': item.get('end_time'),
+                                                        'guid': item.get('guid')
+                                                    })
+                                                    matched_count += 1
+                                                else:
+                                                    # Still add unmatched items
+                                                    schedule_items.append({
+                                                        'file_path': file_path,
+                                                        'file_name': file_name,
+                                                        'asset_id': None,
+                                                        'duration_seconds': item.get('duration_seconds', 0),
+                                                        'content_type': None,
+                                                        'content_title': file_name,
+                                                        'start_time': item.get('start_time'),
+                                                        'end_time': item.get('end_time'),
+                                                        'guid': item.get('guid')
+                                                    })
+                                                    unmatched_count += 1
                                             
                                             with open(import_log_path, 'a') as import_log:
-                                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] File content length: {len(import_content)} chars\n")
-                                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] First 200 chars:\n{import_content[:200]}\n")
+                                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Asset matching complete:\n")
+                                                import_log.write(f"  Matched: {matched_count}\n")
+                                                import_log.write(f"  Unmatched: {unmatched_count}\n")
                                             
-                                            # Parse the Castus schedule format
-                                            schedule_data = parse_castus_schedule(import_content)
+                                            # Create the schedule
+                                            schedule_name = f"[AUTO-IMPORTED] {newest_file['name']}"
+                                            if schedule_data['type'] == 'weekly':
+                                                schedule_name = f"[WEEKLY] {schedule_name}"
                                             
                                             with open(import_log_path, 'a') as import_log:
-                                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Parse result:\n")
-                                                import_log.write(f"  Type: {schedule_data.get('type', 'unknown')}\n")
-                                                import_log.write(f"  Items: {len(schedule_data.get('items', []))}\n")
+                                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Creating schedule in database:\n")
+                                                import_log.write(f"  Name: {schedule_name}\n")
+                                                import_log.write(f"  Date: {import_date}\n")
                                             
-                                            # Actually save the schedule to the database
-                                            try:
-                                                # Determine schedule date from filename or use export date
-                                                import_date = date  # Use the exported schedule date
-                                                
-                                                # For weekly schedules, adjust to Sunday
-                                                if schedule_data['type'] == 'weekly':
-                                                    from datetime import timedelta
-                                                    schedule_date_obj = datetime.strptime(import_date, '%Y-%m-%d')
-                                                    days_since_sunday = (schedule_date_obj.weekday() + 1) % 7
-                                                    sunday_date = schedule_date_obj - timedelta(days=days_since_sunday)
-                                                    import_date = sunday_date.strftime('%Y-%m-%d')
-                                                    
-                                                    with open(import_log_path, 'a') as import_log:
-                                                        import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Weekly schedule - adjusted date to Sunday: {import_date}\n")
-                                                
-                                                # Process schedule items
-                                                schedule_items = []
-                                                matched_count = 0
-                                                unmatched_count = 0
-                                                
+                                            created_schedule = scheduler_postgres.create_schedule_from_template(
+                                                schedule_date=import_date,
+                                                items=schedule_items,
+                                                schedule_name=schedule_name,
+                                                channel='Comcast Channel 26',
+                                                created_by='auto_import',
+                                                template_name=newest_file['name']
+                                            )
+                                            
+                                            if created_schedule:
                                                 with open(import_log_path, 'a') as import_log:
-                                                    import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Processing {len(schedule_data['items'])} items for database import\n")
+                                                    import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Schedule created successfully!\n")
+                                                    import_log.write(f"  Schedule ID: {created_schedule['id']}\n")
+                                                    import_log.write(f"  Items saved: {created_schedule.get('items_count', 0)}\n")
                                                 
-                                                for idx, item in enumerate(schedule_data['items']):
-                                                    file_path = item['file_path']
-                                                    file_name = item['filename']
+                                                # Create holiday greeting daily assignments for the imported schedule
+                                                try:
+                                                    from holiday_greeting_daily_assignments import HolidayGreetingDailyAssignments
+                                                    daily_assignments = HolidayGreetingDailyAssignments(db_manager)
+                                                    
+                                                    # Convert import_date string to datetime
+                                                    import_date_obj = datetime.strptime(import_date, '%Y-%m-%d')
                                                     
-                                                    # Look up asset in database
-                                                    asset_match = db_manager.find_asset_by_filename(file_name)
+                                                    # For weekly schedules, create assignments for 7 days
+                                                    num_days = 7 if schedule_type == 'weekly' else 1
                                                     
-                                                    if asset_match:
-                                                        schedule_items.append({
-                                                            'file_path': file_path,
-                                                            'file_name': file_name,
-                                                            'asset_id': asset_match['id'],
-                                                            'duration_seconds': asset_match.get('duration_seconds', 0),
-                                                            'content_type': asset_match.get('content_type'),
-                                                            'content_title': asset_match.get('content_title'),
-                                                            'start_time': item.get('start_time'),
-                                                            'end_time': item.get('end_time'),
-                                                            'guid': item.get('guid')
-                                                        })
-                                                        matched_count += 1
+                                                    success = daily_assignments.assign_greetings_for_schedule(
+                                                        created_schedule['id'],
+                                                        import_date_obj,
+                                                        num_days=num_days
+                                                    )
+                                                    
+                                                    if success:
+                                                        with open(import_log_path, 'a') as import_log:
+                                                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Holiday greeting daily assignments created successfully!\n")
+                                                        logger.info(f"Created holiday greeting daily assignments for schedule {created_schedule['id']}")
                                                     else:
-                                                        # Still add unmatched items
-                                                        schedule_items.append({
-                                                            'file_path': file_path,
-                                                            'file_name': file_name,
-                                                            'asset_id': None,
-                                                            'duration_seconds': item.get('duration_seconds', 0),
-                                                            'content_type': None,
-                                                            'content_title': file_name,
-                                                            'start_time': item.get('start_time'),
-                                                            'end_time': item.get('end_time'),
-                                                            'guid': item.get('guid')
-                                                        })
-                                                        unmatched_count += 1
-                                                
-                                                with open(import_log_path, 'a') as import_log:
-                                                    import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Asset matching complete:\n")
-                                                    import_log.write(f"  Matched: {matched_count}\n")
-                                                    import_log.write(f"  Unmatched: {unmatched_count}\n")
-                                                
-                                                # Create the schedule
-                                                schedule_name = f"[AUTO-IMPORTED] {newest_file['name']}"
-                                                if schedule_data['type'] == 'weekly':
-                                                    schedule_name = f"[WEEKLY] {schedule_name}"
-                                                
-                                                with open(import_log_path, 'a') as import_log:
-                                                    import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Creating schedule in database:\n")
-                                                    import_log.write(f"  Name: {schedule_name}\n")
-                                                    import_log.write(f"  Date: {import_date}\n")
-                                                
-                                                created_schedule = scheduler_postgres.create_schedule_from_template(
-                                                    schedule_date=import_date,
-                                                    items=schedule_items,
-                                                    schedule_name=schedule_name,
-                                                    channel='Comcast Channel 26',
-                                                    created_by='auto_import',
-                                                    template_name=newest_file['name']
-                                                )
+                                                        with open(import_log_path, 'a') as import_log:
+                                                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] WARNING: Failed to create holiday greeting daily assignments\n")
+                                                        logger.warning(f"Failed to create holiday greeting daily assignments for schedule {created_schedule['id']}")
                                                 
-                                                if created_schedule:
+                                                except Exception as hg_error:
+                                                    # Log but don't fail the import if holiday greeting assignment fails
                                                     with open(import_log_path, 'a') as import_log:
-                                                        import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Schedule created successfully!\n")
-                                                        import_log.write(f"  Schedule ID: {created_schedule['id']}\n")
-                                                        import_log.write(f"  Items saved: {created_schedule.get('items_count', 0)}\n")
-                                                    
-                                                    # Create holiday greeting daily assignments for the imported schedule
-                                                    try:
-                                                        from holiday_greeting_daily_assignments import HolidayGreetingDailyAssignments
-                                                        daily_assignments = HolidayGreetingDailyAssignments(db_manager)
-                                                        
-                                                        # Convert import_date string to datetime
-                                                        import_date_obj = datetime.strptime(import_date, '%Y-%m-%d')
-                                                        
-                                                        # For weekly schedules, create assignments for 7 days
-                                                        num_days = 7 if schedule_type == 'weekly' else 1
-                                                        
-                                                        success = daily_assignments.assign_greetings_for_schedule(
-                                                            created_schedule['id'],
-                                                            import_date_obj,
-                                                            num_days=num_days
-                                                        )
-                                                        
-                                                        if success:
-                                                            with open(import_log_path, 'a') as import_log:
-                                                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Holiday greeting daily assignments created successfully!\n")
-                                                            logger.info(f"Created holiday greeting daily assignments for schedule {created_schedule['id']}")
-                                                        else:
-                                                            with open(import_log_path, 'a') as import_log:
-                                                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] WARNING: Failed to create holiday greeting daily assignments\n")
-                                                            logger.warning(f"Failed to create holiday greeting daily assignments for schedule {created_schedule['id']}")
-                                                    
-                                                    except Exception as hg_error:
-                                                        # Log but don't fail the import if holiday greeting assignment fails
-                                                        with open(import_log_path, 'a') as import_log:
-                                                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] ERROR creating holiday greeting assignments: {str(hg_error)}\n")
-                                                        logger.error(f"Error creating holiday greeting daily assignments: {str(hg_error)}")
-                                                    
-                                                    auto_import_result = {
-                                                        'imported': True,
-                                                        'filename': newest_file['name'],
-                                                        'type': schedule_data.get('type', 'unknown'),
-                                                        'items_count': len(schedule_data.get('items', [])),
-                                                        'schedule_id': created_schedule['id'],
-                                                        'schedule_name': schedule_name,
-                                                        'matched_assets': matched_count,
-                                                        'unmatched_assets': unmatched_count
-                                                    }
-                                                else:
-                                                    raise Exception("Failed to create schedule in database")
+                                                        import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] ERROR creating holiday greeting assignments: {str(hg_error)}\n")
+                                                    logger.error(f"Error creating holiday greeting daily assignments: {str(hg_error)}")
                                                 
-                                            except Exception as db_error:
-                                                with open(import_log_path, 'a') as import_log:
-                                                    import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] ERROR saving to database:\n")
-                                                    import_log.write(f"  Error: {str(db_error)}\n")
-                                                raise db_error
-                                            
-                                            logger.info(f"Auto-import successful: {auto_import_result}")
+                                                auto_import_result = {
+                                                    'imported': True,
+                                                    'filename': newest_file['name'],
+                                                    'type': schedule_data.get('type', 'unknown'),
+                                                    'items_count': len(schedule_data.get('items', [])),
+                                                    'schedule_id': created_schedule['id'],
+                                                    'schedule_name': schedule_name,
+                                                    'matched_assets': matched_count,
+                                                    'unmatched_assets': unmatched_count
+                                                }
+                                            else:
+                                                raise Exception("Failed to create schedule in database")
                                             
+                                        except Exception as db_error:
                                             with open(import_log_path, 'a') as import_log:
-                                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] AUTO-IMPORT SUCCESSFUL\n")
-                                                import_log.write(f"  Result: {auto_import_result}\n")
-                                        else:
-                                            logger.warning("Failed to download schedule file for auto-import")
-                                            with open(import_log_path, 'a') as import_log:
-                                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] ERROR: Download failed\n")
-                                    finally:
-                                        if os.path.exists(import_temp_path):
-                                            os.unlink(import_temp_path)
-                                            with open(import_log_path, 'a') as import_log:
-                                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Temp file cleaned up\n")
-                                else:
-                                    logger.info("No schedule files found in Master directory for auto-import")
-                                    with open(import_log_path, 'a') as import_log:
-                                        import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] No .sch files found in directory\n")
-                                    
-                        except Exception as import_error:
-                            logger.error(f"Auto-import error: {str(import_error)}")
-                            with open(import_log_path, 'a') as import_log:
-                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] EXCEPTION during auto-import:\n")
-                                import_log.write(f"  Type: {type(import_error).__name__}\n")
-                                import_log.write(f"  Message: {str(import_error)}\n")
-                                import traceback
-                                import_log.write(f"  Traceback:\n")
-                                import_log.write(traceback.format_exc())
-                            # Don't fail the export if auto-import fails
-                        
-                        # Log final status
+                                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] ERROR saving to database:\n")
+                                                import_log.write(f"  Error: {str(db_error)}\n")
+                                            raise db_error
+                                        
+                                        logger.info(f"Auto-import successful: {auto_import_result}")
+                                        
+                                        with open(import_log_path, 'a') as import_log:
+                                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] AUTO-IMPORT SUCCESSFUL\n")
+                                            import_log.write(f"  Result: {auto_import_result}\n")
+                                    else:
+                                        logger.warning("Failed to download schedule file for auto-import")
+                                        with open(import_log_path, 'a') as import_log:
+                                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] ERROR: Download failed\n")
+                                finally:
+                                    if os.path.exists(import_temp_path):
+                                        os.unlink(import_temp_path)
+                                        with open(import_log_path, 'a') as import_log:
+                                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Temp file cleaned up\n")
+                            else:
+                                logger.info("No schedule files found in Master directory for auto-import")
+                                with open(import_log_path, 'a') as import_log:
+                                    import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] No .sch files found in directory\n")
+                                
+                    except Exception as import_error:
+                        logger.error(f"Auto-import error: {str(import_error)}")
                         with open(import_log_path, 'a') as import_log:
-                            import_log.write(f"\n[{datetime.now().strftime('%H:%M:%S')}] === AUTO-IMPORT COMPLETE ===\n")
-                            import_log.write(f"Log file saved to: {import_log_path}\n")
-                        
-                        logger.info(f"Auto-import debug log saved to: {import_log_path}")
+                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] EXCEPTION during auto-import:\n")
+                            import_log.write(f"  Type: {type(import_error).__name__}\n")
+                            import_log.write(f"  Message: {str(import_error)}\n")
+                            import traceback
+                            import_log.write(f"  Traceback:\n")
+                            import_log.write(traceback.format_exc())
+                        # Don't fail the export if auto-import fails
                     
-                    response_data = {
-                        'success': True,
-                        'message': f'Schedule exported successfully to {export_server} at {full_path}',
-                        'file_path': full_path,
-                        'file_size': file_size
-                    }
-                    
-                    # Add auto-import result if available
-                    if auto_import_result:
-                        response_data['auto_import'] = auto_import_result
+                    # Log final status
+                    with open(import_log_path, 'a') as import_log:
+                        import_log.write(f"\n[{datetime.now().strftime('%H:%M:%S')}] === AUTO-IMPORT COMPLETE ===\n")
+                        import_log.write(f"Log file saved to: {import_log_path}\n")
                     
-                    return jsonify(response_data)
-                else:
-                    return jsonify({
-                        'success': False,
-                        'message': 'Failed to upload schedule file to FTP server'
-                    })
-            finally:
-                # Clean up temp file
-                os.unlink(temp_file_path)
+                    logger.info(f"Auto-import debug log saved to: {import_log_path}")
+                
+                response_data = {
+                    'success': True,
+                    'message': f'Schedule exported successfully to {export_server} at {full_path}',
+                    'file_path': full_path,
+                    'file_size': file_size
+                }
+                
+                # Add auto-import result if available
+                if auto_import_result:
+                    response_data['auto_import'] = auto_import_result
+                
+                return jsonify(response_data)
+            else:
+                schedule_export_state.forget(server, full_path)
+                return jsonify({
+                    'success': False,
+                    'message': 'Failed to upload schedule file to FTP server'
+                })
         else:
             return jsonify({
                 'success': False,
@@ -5527,10 +5589,14 @@ def generate_simple_playlist_content(files):
     
     return '\n'.join(lines)
 
-def generate_castus_schedule(schedule, items, date, format_type='daily', template=None):
+class ScheduleOverlapError(ValueError):
+    """Raised while generating a Castus schedule whose items overlap"""
+
+
+def iter_castus_schedule_lines(schedule, items, date, format_type='daily', template=None):
+    """Generate schedule content in Castus format, one line at a time"""
     # Reset day counter for weekly schedules
-    generate_castus_schedule.current_day = 0
-    """Generate schedule content in Castus format"""
+    iter_castus_schedule_lines.current_day = 0
     logger.info(f"=== GENERATE CASTUS SCHEDULE CALLED ===")
     logger.info(f"Format type: {format_type}, Items count: {len(items)}")
     
@@ -5538,8 +5604,6 @@ def generate_castus_schedule(schedule, items, date, format_type='daily', templat
     for i, item in enumerate(items[:3]):
         logger.info(f"Item {i}: file_name={item.get('file_name')}, file_path={item.get('file_path')}, title={item.get('title')}")
     
-    lines = []
-    
     # Parse the date to get day of week
     schedule_date = datetime.strptime(date, '%Y-%m-%d')
     day_of_week = schedule_date.weekday()  # 0=Monday, 6=Sunday
@@ -5547,27 +5611,27 @@ def generate_castus_schedule(schedule, items, date, format_type='daily', templat
     
     if format_type == 'monthly':
         # Monthly format header
-        lines.append("*monthly")
-        lines.append("defaults, day of the month{")
-        lines.append("}")
-        lines.append("year = ")  # Empty as per sample
-        lines.append(f"month = {schedule_date.month}")
-        lines.append(f"day = {schedule_date.day}")
-        lines.append("time slot length = 30")
-        lines.append("scrolltime = 12:00 am")
-        lines.append("filter script = ")
-        lines.append("global default=")
-        lines.append("text encoding = UTF-8")
-        lines.append("schedule format version = 5.0.0.4 2021/01/15")
+        yield "*monthly"
+        yield "defaults, day of the month{"
+        yield "}"
+        yield "year = "  # Empty as per sample
+        yield f"month = {schedule_date.month}"
+        yield f"day = {schedule_date.day}"
+        yield "time slot length = 30"
+        yield "scrolltime = 12:00 am"
+        yield "filter script = "
+        yield "global default="
+        yield "text encoding = UTF-8"
+        yield "schedule format version = 5.0.0.4 2021/01/15"
     elif format_type == 'weekly':
         # Weekly format header
-        lines.append("defaults, day of the week{")
-        lines.append("}")
+        yield "defaults, day of the week{"
+        yield "}"
         # Weekly schedules always start on Sunday (day 0 in Castus)
-        lines.append("day = 0")
-        lines.append("time slot length = 30")
-        lines.append("scrolltime = 12:00 am")
-        lines.append("filter script = ")
+        yield "day = 0"
+        yield "time slot length = 30"
+        yield "scrolltime = 12:00 am"
+        yield "filter script = "
         # Use template defaults if available, otherwise use empty string
         if template and 'defaults' in template and 'global_default' in template['defaults']:
             global_default = template['defaults']['global_default']
@@ -5609,23 +5673,23 @@ def generate_castus_schedule(schedule, items, date, format_type='daily', templat
                 except Exception as e:
                     logger.error(f"Error finding newest video via FTP: {str(e)}")
             
-            lines.append(f"global default={global_default}")
+            yield f"global default={global_default}"
         else:
-            lines.append("global default=")
-        lines.append("global default section=item duration=;")
-        lines.append("text encoding = UTF-8")
-        lines.append("schedule format version = 5.0.0.4 2021/01/15")
+            yield "global default="
+        yield "global default section=item duration=;"
+        yield "text encoding = UTF-8"
+        yield "schedule format version = 5.0.0.4 2021/01/15"
     else:
         # Daily format header
-        lines.append("*daily")
-        lines.append("defaults, of the day{")
-        lines.append("}")
-        lines.append("time slot length = 30")
-        lines.append("scrolltime = 12:00 am")
-        lines.append("filter script = ")
-        lines.append("global default=")
-        lines.append("text encoding = UTF-8")
-        lines.append("schedule format version = 5.0.0.4 2021/01/15")
+        yield "*daily"
+        yield "defaults, of the day{"
+        yield "}"
+        yield "time slot length = 30"
+        yield "scrolltime = 12:00 am"
+        yield "filter script = "
+        yield "global default="
+        yield "text encoding = UTF-8"
+        yield "schedule format version = 5.0.0.4 2021/01/15"
     
     # Track previous end time for overlap detection
     previous_end_seconds = 0.0
@@ -5928,10 +5992,10 @@ def generate_castus_schedule(schedule, items, date, format_type='daily', templat
                 
                 # If current hour is less than previous, we've crossed midnight
                 if db_hours < prev_hours:
-                    current_day = getattr(generate_castus_schedule, 'current_day', 0) + 1
-                    generate_castus_schedule.current_day = current_day
+                    current_day = getattr(iter_castus_schedule_lines, 'current_day', 0) + 1
+                    iter_castus_schedule_lines.current_day = current_day
                 else:
-                    current_day = getattr(generate_castus_schedule, 'current_day', 0)
+                    current_day = getattr(iter_castus_schedule_lines, 'current_day', 0)
                 
                 # Calculate exact start time including day offset
                 item_start_seconds = (current_day * 24 * 60 * 60) + (db_hours * 3600) + (db_minutes * 60) + db_seconds
@@ -5960,7 +6024,7 @@ def generate_castus_schedule(schedule, items, date, format_type='daily', templat
                         overlap = -gap_or_overlap
                         logger.error(f"OVERLAP DETECTED at item {idx}: Previous end={previous_end_ms:.6f}, Current start={item_start_ms:.6f}, Overlap={overlap:.6f} seconds")
                         # Abort export with error message
-                        return f"ERROR: Schedule has overlapping items at position {idx}. Item starts {overlap:.3f} seconds before previous item ends."
+                        raise ScheduleOverlapError(f"Schedule has overlapping items at position {idx}. Item starts {overlap:.3f} seconds before previous item ends.")
                     elif abs(gap_or_overlap) <= OVERLAP_TOLERANCE:
                         # Within tolerance - treat as continuous
                         logger.debug(f"  Note: Tiny gap/overlap of {gap_or_overlap:.9f}s is within tolerance")
@@ -6197,30 +6261,55 @@ def generate_castus_schedule(schedule, items, date, format_type='daily', templat
             
             logger.info("=== VIDEO REPLACEMENT COMPLETE ===")
         
-        lines.append("{")
+        yield "{"
         # Explicitly use TAB character (ASCII 9) to ensure it's not converted
         TAB = chr(9)
-        lines.append(f"{TAB}item={file_path}")
+        yield f"{TAB}item={file_path}"
         
         # Get loop value from metadata for live inputs, default to 0
         loop_value = (metadata.get('loop', '0') if metadata and metadata.get('is_live_input') else '0')
-        lines.append(f"{TAB}loop={loop_value}")
+        yield f"{TAB}loop={loop_value}"
         
         # Use GUID if available from assets or metadata
         guid = (metadata.get('guid') if metadata and metadata.get('is_live_input') else item.get('guid', str(uuid.uuid4())))
-        lines.append(f"{TAB}guid={{{guid}}}")
+        yield f"{TAB}guid={{{guid}}}"
         
         # Daily format times
-        lines.append(f"{TAB}start={start_time_formatted}")
-        lines.append(f"{TAB}end={end_time_formatted}")
-        lines.append("}")
+        yield f"{TAB}start={start_time_formatted}"
+        yield f"{TAB}end={end_time_formatted}"
+        yield "}"
         
         # Update previous end time for overlap detection
         if format_type == 'weekly':
             # Round to millisecond precision to match overlap detection
             previous_end_seconds = round((item_start_seconds + duration_seconds) * 1000) / 1000
-    
-    return "\n".join(lines)
+
+
+
+def iter_castus_schedule_chunks(schedule, items, date, format_type='daily', template=None,
+                                chunk_size=65536):
+    """
+    Castus schedule encoded as UTF-8 byte chunks of about chunk_size bytes
+
+    Lines are joined with LF and no trailing newline, so the concatenated
+    chunks are byte for byte what joining all lines would produce. Used to
+    stream exports to the FTP server without building the file in memory.
+    Raises ScheduleOverlapError if items overlap.
+    """
+    buffer = []
+    buffered = 0
+    separator = b''
+    for line in iter_castus_schedule_lines(schedule, items, date, format_type, template):
+        encoded = separator + line.encode('utf-8')
+        separator = b'\n'
+        buffer.append(encoded)
+        buffered += len(encoded)
+        if buffered >= chunk_size:
+            yield b''.join(buffer)
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield b''.join(buffer)
 
 @app.route('/api/list-schedule-files', methods=['POST'])
 def list_schedule_files():
@@ -6289,391 +6378,152 @@ def load_schedule_template():
         ftp_manager = ftp_managers[server]
         logger.info(f"Using FTP manager for {server}")
         
-        # Download file to temporary location
-        import tempfile
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.sch') as temp_file:
-            temp_file_path = temp_file.name
-        
-        logger.info(f"Downloading {file_path} to temp file {temp_file_path}")
-        success = ftp_manager.download_file(file_path, temp_file_path)
+        # Parse the schedule as it downloads - no temp file
+        parser = CastusScheduleParser()
+        parsed_items = []
+        logger.info(f"Streaming {file_path} from {server}")
+        success = ftp_manager.retrieve_file(file_path, lambda chunk: parsed_items.extend(parser.feed_bytes(chunk)))
         
         if not success:
             logger.error("Failed to download file from FTP")
-            os.unlink(temp_file_path)
             return jsonify({
                 'success': False,
                 'message': 'Failed to download template file'
             })
         
-        try:
-            # Parse the schedule file
-            logger.info(f"Reading downloaded file from {temp_file_path}")
-            with open(temp_file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            logger.info(f"File content length: {len(content)} chars")
-            logger.debug(f"First 200 chars: {content[:200]}")
-            
-            # Parse Castus schedule format
-            schedule_data = parse_castus_schedule(content)
-            
-            logger.info(f"Parsed schedule: type={schedule_data['type']}, items={len(schedule_data['items'])}")
-            
-            # Debug: Log first few items to see their times
-            if schedule_data['type'] == 'weekly' and schedule_data['items']:
-                logger.info("First 3 items from parsed weekly schedule:")
-                for i, item in enumerate(schedule_data['items'][:3]):
-                    logger.info(f"  Item {i}: start_time='{item.get('start_time')}', filename='{item.get('filename')}'")
-            
-            # Try to match items with database assets using batch lookup
-            filenames = [item.get('filename') for item in schedule_data['items'] if item.get('filename')]
-            if filenames:
-                logger.info(f"Batch looking up {len(filenames)} assets for template")
-                asset_matches = db_manager.find_assets_by_filenames_batch(filenames)
-            else:
-                asset_matches = {}
-            
-            for item in schedule_data['items']:
-                filename = item.get('filename')
-                if filename:
-                    logger.debug(f"Processing asset for: {filename}")
+        parsed_items.extend(parser.finish())
+        schedule_data = parser.schedule_data(parsed_items)
+        
+        logger.info(f"Parsed schedule: type={schedule_data['type']}, items={len(schedule_data['items'])}")
+        
+        # Debug: Log first few items to see their times
+        if schedule_data['type'] == 'weekly' and schedule_data['items']:
+            logger.info("First 3 items from parsed weekly schedule:")
+            for i, item in enumerate(schedule_data['items'][:3]):
+                logger.info(f"  Item {i}: start_time='{item.get('start_time')}', filename='{item.get('filename')}'")
+        
+        # Try to match items with database assets using batch lookup
+        filenames = [item.get('filename') for item in schedule_data['items'] if item.get('filename')]
+        if filenames:
+            logger.info(f"Batch looking up {len(filenames)} assets for template")
+            asset_matches = db_manager.find_assets_by_filenames_batch(filenames)
+        else:
+            asset_matches = {}
+        
+        for item in schedule_data['items']:
+            filename = item.get('filename')
+            if filename:
+                logger.debug(f"Processing asset for: {filename}")
+                
+                # Special handling for placeholder video - find the newest video instead
+                if filename == '251107_RANDOM.mp4':
+                    logger.info(f"=== PLACEHOLDER VIDEO DETECTION ===")
+                    logger.info(f"Detected placeholder video {filename}, finding newest FILL video...")
                     
-                    # Special handling for placeholder video - find the newest video instead
-                    if filename == '251107_RANDOM.mp4':
-                        logger.info(f"=== PLACEHOLDER VIDEO DETECTION ===")
-                        logger.info(f"Detected placeholder video {filename}, finding newest FILL video...")
+                    # Query for the newest video file directly
+                    conn = db_manager._get_connection()
+                    try:
+                        cursor = conn.cursor()
+                        # Find newest video based on filename pattern (YYMMDDHHMI_FILL_*.mp4)
+                        logger.info("Executing query to find newest FILL video...")
                         
-                        # Query for the newest video file directly
-                        conn = db_manager._get_connection()
-                        try:
-                            cursor = conn.cursor()
-                            # Find newest video based on filename pattern (YYMMDDHHMI_FILL_*.mp4)
-                            logger.info("Executing query to find newest FILL video...")
-                            
-                            # First, let's see what FILL videos exist
-                            cursor.execute("""
-                                SELECT i.file_name 
-                                FROM instances i 
-                                WHERE i.file_name LIKE '%_FILL_%%.mp4' 
-                                ORDER BY i.file_name DESC 
-                                LIMIT 10
-                            """)
-                            fill_videos = cursor.fetchall()
-                            logger.info(f"Top 10 FILL videos in database:")
-                            for video in fill_videos:
-                                logger.info(f"  - {video[0]}")
-                            
-                            cursor.execute("""
-                                SELECT 
-                                    a.id,
-                                    a.guid,
-                                    a.content_type,
-                                    a.content_title,
-                                    a.duration_seconds,
-                                    i.file_name,
-                                    i.file_path
-                                FROM assets a
-                                JOIN instances i ON a.id = i.asset_id
-                                WHERE i.file_name LIKE '%_FILL_%%.mp4'
-                                ORDER BY i.file_name DESC
-                                LIMIT 1
-                            """)
-                            
-                            newest_video = cursor.fetchone()
-                            cursor.close()
-                            
-                            if newest_video:
-                                asset_match = {
-                                    'id': newest_video[0],
-                                    'guid': newest_video[1],
-                                    'content_type': newest_video[2],
-                                    'content_title': newest_video[3],
-                                    'duration_seconds': newest_video[4],
-                                    'file_name': newest_video[5],
-                                    'file_path': newest_video[6]
-                                }
-                                item['asset_id'] = asset_match['id']
-                                item['content_id'] = asset_match['id']  # For backwards compatibility
-                                item['content_type'] = asset_match.get('content_type')
-                                item['content_title'] = asset_match.get('content_title')
-                                # Update the filename to the actual newest video
-                                item['filename'] = asset_match['file_name']
-                                item['file_name'] = asset_match['file_name']
-                                # Use the duration from the database
-                                if asset_match.get('duration_seconds'):
-                                    item['duration_seconds'] = asset_match['duration_seconds']
-                                item['matched'] = True
-                                logger.info(f"✓ FOUND NEWEST FILL VIDEO: {asset_match['file_name']}")
-                                logger.info(f"  Asset ID: {asset_match['id']}")
-                                logger.info(f"  Duration: {asset_match['duration_seconds']} seconds")
-                                logger.info(f"=== PLACEHOLDER REPLACEMENT COMPLETE ===")
-                            else:
-                                item['matched'] = False
-                                logger.warning(f"✗ NO FILL VIDEOS FOUND in database for placeholder {filename}")
-                                logger.warning(f"=== PLACEHOLDER REPLACEMENT FAILED ===")
-                        finally:
-                            db_manager._put_connection(conn)
-                    else:
-                        # Normal asset lookup
-                        asset_match = asset_matches.get(filename)
-                        if asset_match:
+                        # First, let's see what FILL videos exist
+                        cursor.execute("""
+                            SELECT i.file_name 
+                            FROM instances i 
+                            WHERE i.file_name LIKE '%_FILL_%%.mp4' 
+                            ORDER BY i.file_name DESC 
+                            LIMIT 10
+                        """)
+                        fill_videos = cursor.fetchall()
+                        logger.info(f"Top 10 FILL videos in database:")
+                        for video in fill_videos:
+                            logger.info(f"  - {video[0]}")
+                        
+                        cursor.execute("""
+                            SELECT 
+                                a.id,
+                                a.guid,
+                                a.content_type,
+                                a.content_title,
+                                a.duration_seconds,
+                                i.file_name,
+                                i.file_path
+                            FROM assets a
+                            JOIN instances i ON a.id = i.asset_id
+                            WHERE i.file_name LIKE '%_FILL_%%.mp4'
+                            ORDER BY i.file_name DESC
+                            LIMIT 1
+                        """)
+                        
+                        newest_video = cursor.fetchone()
+                        cursor.close()
+                        
+                        if newest_video:
+                            asset_match = {
+                                'id': newest_video[0],
+                                'guid': newest_video[1],
+                                'content_type': newest_video[2],
+                                'content_title': newest_video[3],
+                                'duration_seconds': newest_video[4],
+                                'file_name': newest_video[5],
+                                'file_path': newest_video[6]
+                            }
                             item['asset_id'] = asset_match['id']
                             item['content_id'] = asset_match['id']  # For backwards compatibility
                             item['content_type'] = asset_match.get('content_type')
                             item['content_title'] = asset_match.get('content_title')
+                            # Update the filename to the actual newest video
+                            item['filename'] = asset_match['file_name']
+                            item['file_name'] = asset_match['file_name']
                             # Use the duration from the database
                             if asset_match.get('duration_seconds'):
                                 item['duration_seconds'] = asset_match['duration_seconds']
                             item['matched'] = True
-                            logger.debug(f"Found match for {filename}: asset_id={asset_match['id']}, duration={asset_match.get('duration_seconds')}")
+                            logger.info(f"✓ FOUND NEWEST FILL VIDEO: {asset_match['file_name']}")
+                            logger.info(f"  Asset ID: {asset_match['id']}")
+                            logger.info(f"  Duration: {asset_match['duration_seconds']} seconds")
+                            logger.info(f"=== PLACEHOLDER REPLACEMENT COMPLETE ===")
                         else:
                             item['matched'] = False
-                            logger.debug(f"No match found for {filename}")
-            
-            # Final debug before sending
-            if schedule_data['type'] == 'weekly':
-                logger.info("Sending weekly template to frontend with items:")
-                for i, item in enumerate(schedule_data['items'][:3]):
-                    logger.info(f"  Item {i}: start_time='{item.get('start_time')}'")
-            
-            return jsonify({
-                'success': True,
-                'template': schedule_data,
-                'filename': os.path.basename(file_path)
-            })
-            
-        finally:
-            os.unlink(temp_file_path)
-        
-    except Exception as e:
-        error_msg = f"Load template error: {str(e)}"
-        logger.error(error_msg, exc_info=True)
-        return jsonify({'success': False, 'message': error_msg})
-
-def parse_castus_schedule(content):
-    """Parse Castus schedule file format"""
-    lines = content.strip().split('\n')
-    
-    schedule_data = {
-        'type': 'daily',  # default
-        'items': [],
-        'header': {}
-    }
-    
-    current_item = None
-    in_item_block = False
-    
-    for line in lines:
-        line = line.strip()
-        
-        # Detect schedule type
-        if line == '*daily':
-            schedule_data['type'] = 'daily'
-        elif line == '*weekly':
-            schedule_data['type'] = 'weekly'
-        elif line.startswith('day = '):
-            # Weekly format without *weekly header
-            schedule_data['type'] = 'weekly'
-            schedule_data['header']['day'] = line.split('=')[1].strip()
-        
-        # Start of item block
-        elif line == '{':
-            in_item_block = True
-            current_item = {}
-        
-        # End of item block
-        elif line == '}' and in_item_block:
-            if current_item and 'item' in current_item:
-                # Extract filename from path
-                file_path = current_item['item']
-                filename = os.path.basename(file_path)
-                
-                # Convert to schedule item format
-                item = {
-                    'file_path': file_path,
-                    'filename': filename,
-                    'start_time': current_item.get('start', ''),
-                    'end_time': current_item.get('end', ''),
-                    'guid': current_item.get('guid', '').strip('{}'),
-                    'loop': current_item.get('loop', '0')
-                }
-                
-                # Debug logging for weekly schedules
-                if schedule_data['type'] == 'weekly':
-                    logger.debug(f"Weekly item raw start_time: '{item['start_time']}'")
-                
-                # Calculate duration from start/end times if available
-                if item['start_time'] and item['end_time']:
-                    logger.info(f"Parsing template item: {filename}")
-                    logger.info(f"  Raw start_time: '{item['start_time']}'")
-                    logger.info(f"  Raw end_time: '{item['end_time']}'")
-                    
-                    duration = calculate_duration_from_times(item['start_time'], item['end_time'])
-                    item['duration_seconds'] = duration
-                    
-                    # Debug logging for duration calculation
-                    logger.info(f"Duration calculation for {filename}:")
-                    logger.info(f"  Start: {item['start_time']}")
-                    logger.info(f"  End: {item['end_time']}")
-                    logger.info(f"  Calculated duration: {duration} seconds ({duration/60:.2f} minutes, {duration/3600:.2f} hours)")
-                    
-                    if duration > 86400:  # More than 24 hours
-                        logger.error(f"  ERROR: Duration exceeds 24 hours! This is likely a bug.")
-                    
-                    # For weekly schedules, preserve the day prefix
-                    if schedule_data['type'] == 'weekly' and ' ' in item['start_time']:
-                        # Parse weekly format like "wed 12:00:15.040 am"
-                        parts = item['start_time'].split(' ', 1)
-                        if len(parts[0]) <= 3:  # Likely a day abbreviation
-                            day_prefix = parts[0]
-                            time_part = parts[1]
-                            # Convert time part to 24-hour format
-                            time_24h = convert_to_24hour_format(time_part)
-                            # Reconstruct with day prefix
-                            item['start_time'] = f"{day_prefix} {time_24h}"
-                        else:
-                            # No day prefix, just convert to 24-hour format
-                            item['start_time'] = convert_to_24hour_format(item['start_time'])
+                            logger.warning(f"✗ NO FILL VIDEOS FOUND in database for placeholder {filename}")
+                            logger.warning(f"=== PLACEHOLDER REPLACEMENT FAILED ===")
+                    finally:
+                        db_manager._put_connection(conn)
+                else:
+                    # Normal asset lookup
+                    asset_match = asset_matches.get(filename)
+                    if asset_match:
+                        item['asset_id'] = asset_match['id']
+                        item['content_id'] = asset_match['id']  # For backwards compatibility
+                        item['content_type'] = asset_match.get('content_type')
+                        item['content_title'] = asset_match.get('content_title')
+                        # Use the duration from the database
+                        if asset_match.get('duration_seconds'):
+                            item['duration_seconds'] = asset_match['duration_seconds']
+                        item['matched'] = True
+                        logger.debug(f"Found match for {filename}: asset_id={asset_match['id']}, duration={asset_match.get('duration_seconds')}")
                     else:
-                        # For daily schedules, convert to 24-hour format
-                        item['start_time'] = convert_to_24hour_format(item['start_time'])
-                
-                schedule_data['items'].append(item)
-            
-            in_item_block = False
-            current_item = None
-        
-        # Inside item block
-        elif in_item_block and current_item is not None:
-            # Remove leading TAB or spaces
-            line_content = line.lstrip('\t ')
-            if '=' in line_content:
-                key, value = line_content.split('=', 1)
-                current_item[key.strip()] = value.strip()
-        
-        # Header information
-        elif '=' in line and not in_item_block:
-            key, value = line.split('=', 1)
-            schedule_data['header'][key.strip()] = value.strip()
-    
-    return schedule_data
-
-def convert_to_24hour_format(time_str):
-    """Convert Castus time format (12-hour with am/pm) to 24-hour format (HH:MM:SS or HH:MM:SS.mmm)"""
-    try:
-        import re
-        from datetime import datetime
-        
-        # Extract milliseconds if present
-        milliseconds_match = re.search(r'\.(\d+)', time_str)
-        milliseconds = milliseconds_match.group(1) if milliseconds_match else None
-        
-        # Remove milliseconds for parsing
-        time_clean = re.sub(r'\.\d+', '', time_str)
-        
-        # Try different time formats
-        for fmt in ["%I:%M:%S %p", "%I:%M %p"]:
-            try:
-                dt = datetime.strptime(time_clean, fmt)
-                result = dt.strftime("%H:%M:%S")
-                # Add milliseconds back if they were present
-                if milliseconds:
-                    result += f".{milliseconds}"
-                return result
-            except ValueError:
-                continue
+                        item['matched'] = False
+                        logger.debug(f"No match found for {filename}")
         
-        # If no format works, return as-is (might already be 24-hour)
-        return time_str
-    except Exception as e:
-        logger.error(f"Error converting time format: {e}")
-        return "00:00:00"
-
-def calculate_duration_from_times(start_time, end_time):
-    """Calculate duration in seconds from start/end time strings"""
-    logger.debug(f"calculate_duration_from_times called with start='{start_time}', end='{end_time}'")
-    try:
-        # Parse times like "12:00 am", "12:30:45.123 pm", "wed 12:00:15.040 am"
-        import re
-        from datetime import datetime, timedelta
+        # Final debug before sending
+        if schedule_data['type'] == 'weekly':
+            logger.info("Sending weekly template to frontend with items:")
+            for i, item in enumerate(schedule_data['items'][:3]):
+                logger.info(f"  Item {i}: start_time='{item.get('start_time')}'")
         
-        def parse_time_with_day(time_str):
-            """Parse time and return day index (if present), datetime, and milliseconds"""
-            day_index = None
-            day_map = {'sun': 0, 'mon': 1, 'tue': 2, 'wed': 3, 'thu': 4, 'fri': 5, 'sat': 6}
-            
-            # Handle weekly format by extracting day prefix
-            if ' ' in time_str:
-                parts = time_str.split(' ', 1)
-                # Check if first part is a day abbreviation
-                if len(parts[0]) <= 3 and parts[0].lower() in day_map:
-                    day_index = day_map[parts[0].lower()]
-                    time_str = parts[1]
-            
-            # Extract milliseconds if present
-            milliseconds_match = re.search(r'\.(\d+)', time_str)
-            milliseconds = float(f"0.{milliseconds_match.group(1)}") if milliseconds_match else 0.0
-            
-            # Remove milliseconds for parsing
-            time_clean = re.sub(r'\.\d+', '', time_str).strip()
-            
-            # Try different time formats
-            for fmt in ["%I:%M:%S %p", "%I:%M %p", "%H:%M:%S", "%H:%M"]:
-                try:
-                    dt = datetime.strptime(time_clean, fmt)
-                    # Return day index, datetime and milliseconds separately for precision
-                    return day_index, dt, milliseconds
-                except ValueError:
-                    continue
-            
-            raise ValueError(f"Unable to parse time: {time_str}")
+        return jsonify({
+            'success': True,
+            'template': schedule_data,
+            'filename': os.path.basename(file_path)
+        })
         
-        start_day, start_dt, start_ms = parse_time_with_day(start_time)
-        end_day, end_dt, end_ms = parse_time_with_day(end_time)
-        
-        # If we have day indices, use them to calculate the actual duration
-        if start_day is not None and end_day is not None:
-            # Calculate day difference
-            day_diff = end_day - start_day
-            if day_diff < 0:
-                day_diff += 7  # Wrap around week
-            
-            # Add the day difference to the end datetime
-            end_dt = end_dt + timedelta(days=day_diff)
-            
-            logger.debug(f"Weekly schedule: start_day={start_day}, end_day={end_day}, day_diff={day_diff}")
-        else:
-            # Handle day boundary for non-weekly schedules
-            if end_dt < start_dt:
-                end_dt = end_dt.replace(day=end_dt.day + 1)
-        
-        # Calculate duration with full precision
-        # Use total_seconds() for the datetime difference and add millisecond difference
-        duration_seconds = (end_dt - start_dt).total_seconds()
-        millisecond_diff = end_ms - start_ms
-        total_duration = duration_seconds + millisecond_diff
-        
-        # Log for debugging
-        logger.debug(f"Duration calculation detail:")
-        logger.debug(f"  Start: {start_dt} + {start_ms}s (day={start_day})")
-        logger.debug(f"  End: {end_dt} + {end_ms}s (day={end_day})")
-        logger.debug(f"  Duration: {total_duration}s ({total_duration/60:.6f} minutes)")
-        
-        # Validate the calculated duration
-        if total_duration < 0:
-            logger.error(f"Negative duration calculated: {total_duration}s. Start: {start_time}, End: {end_time}")
-            logger.error(f"This usually means end time is before start time or day boundaries are incorrect")
-            return 0
-        
-        if total_duration > 604800:  # More than 7 days
-            logger.error(f"Duration exceeds 7 days: {total_duration}s. Start: {start_time}, End: {end_time}")
-            return 0
-            
-        return total_duration
         
     except Exception as e:
-        logger.error(f"Error calculating duration: {e}")
-        return 0
+        error_msg = f"Load template error: {str(e)}"
+        logger.error(error_msg, exc_info=True)
+        return jsonify({'success': False, 'message': error_msg})
 
 @app.route('/api/validate-template-files', methods=['POST'])
 def validate_template_files():
@@ -6691,6 +6541,7 @@ def validate_template_files():
         
         missing_files = []
         checked_paths = set()  # Avoid checking the same path multiple times
+        items_to_check = []
         
         for idx, item in enumerate(items):
             # Skip live inputs
@@ -6702,55 +6553,27 @@ def validate_template_files():
                 continue
                 
             checked_paths.add(file_path)
-            
-            # Check on both servers
-            exists_on_source = False
-            exists_on_target = False
-            
-            # If file_path doesn't start with /mnt/, try common base paths
-            paths_to_check = [file_path]
-            if not file_path.startswith('/mnt/'):
-                # Common base paths where content might be stored
-                # Note: /mnt/main and /mnt/md127 are the same via symbolic link
-                base_paths = [
-                    '/mnt/main/ATL26 On-Air Content/',
-                    '/mnt/main/'
-                ]
-                for base in base_paths:
-                    paths_to_check.append(base + file_path)
-            
-            # Check source server
-            source_ftp = FTPManager(source_config)
-            if source_ftp.connect():
-                try:
-                    for check_path in paths_to_check:
-                        try:
-                            source_ftp.ftp.size(check_path)  # Try to get file size
-                            exists_on_source = True
-                            logger.debug(f"File found on source server at: {check_path}")
-                            break
-                        except:
-                            pass
-                finally:
-                    source_ftp.disconnect()
-            
-            # Check target server
-            target_ftp = FTPManager(target_config)
-            if target_ftp.connect():
-                try:
-                    for check_path in paths_to_check:
-                        try:
-                            target_ftp.ftp.size(check_path)  # Try to get file size
-                            exists_on_target = True
-                            logger.debug(f"File found on target server at: {check_path}")
-                            break
-                        except:
-                            pass
-                finally:
-                    target_ftp.disconnect()
-            
+            items_to_check.append((idx, item, file_path))
+        
+        # Check all paths on the source server first, then only the
+        # remaining ones on the target server. Each directory is listed once.
+        found = {}
+        for server_config in (source_config, target_config):
+            remaining = [path for path in checked_paths if not found.get(path)]
+            if not remaining:
+                break
+            validator = RemoteFileValidator(FTPManager(server_config))
+            try:
+                for path, match in validator.find_existing(remaining).items():
+                    if match:
+                        found[path] = match
+                        logger.debug(f"File found on {server_config.get('host')} at: {match}")
+            finally:
+                validator.close()
+        
+        for idx, item, file_path in items_to_check:
             # If file doesn't exist on either server, add to missing list
-            if not exists_on_source and not exists_on_target:
+            if not found.get(file_path):
                 missing_files.append({
                     'asset_id': item.get('asset_id'),
                     'title': item.get('title', 'Unknown'),
@@ -7486,6 +7309,7 @@ def fill_template_gaps():
     
     # Reset cancellation state and progress
     fill_gaps_cancelled = False
+    fill_started = time.perf_counter()
     fill_gaps_progress = {
         'files_searched': 0,
         'files_accepted': 0,
@@ -7511,56 +7335,57 @@ def fill_template_gaps():
         json_debug_log_path = os.path.join(logs_dir, f'fill_gaps_json_debug_{timestamp}.log')
         bump_scheduling_log_path = os.path.join(logs_dir, f'bump_scheduling_{timestamp}.log')
         
-        # Open log files for writing
-        expiration_log = open(expiration_log_path, 'w')
-        json_debug_log = open(json_debug_log_path, 'w')
-        bump_scheduling_log = open(bump_scheduling_log_path, 'w')
+        # Log files for this fill, written by the background log writer
+        expiration_log = SessionLog('fill_gaps.expiration', expiration_log_path)
+        json_debug_log = SessionLog('fill_gaps.json_debug', json_debug_log_path,
+                                    fmt='[%(asctime)s.%(msecs)03d] %(message)s')
+        bump_scheduling_log = SessionLog('fill_gaps.bump_scheduling', bump_scheduling_log_path)
+        # Per-candidate bump accept/reject decisions, rate limited
+        bump_decision_log = LogChannel(bump_scheduling_log.logger, max_per_second=50)
         
         def log_expiration(message):
             """Log to both expiration log file and regular logger"""
-            expiration_log.write(f"[{dt.now().strftime('%Y-%m-%d %H:%M:%S')}] {message}\n")
-            expiration_log.flush()  # Ensure immediate write
-            logger.info(f"[EXPIRATION] {message}")
+            expiration_log.write(message)
+            logger.info("[EXPIRATION] %s", message)
         
         def log_json_debug(message, obj=None):
             """Log JSON-related debugging information"""
-            json_debug_log.write(f"[{dt.now().strftime('%Y-%m-%d %H:%M:%S.%f')}] {message}\n")
+            lines = [message]
             if obj is not None:
                 # Check for non-JSON serializable values
                 try:
-                    json_debug_log.write(f"  Object type: {type(obj)}\n")
-                    json_debug_log.write(f"  String repr: {repr(obj)}\n")
+                    lines.append(f"  Object type: {type(obj)}")
+                    lines.append(f"  String repr: {repr(obj)}")
                     
                     # Try to serialize to detect issues
                     json.dumps(obj)
-                    json_debug_log.write(f"  JSON serializable: YES\n")
+                    lines.append(f"  JSON serializable: YES")
                 except Exception as e:
-                    json_debug_log.write(f"  JSON serializable: NO - {str(e)}\n")
+                    lines.append(f"  JSON serializable: NO - {str(e)}")
                     
                     # Deep inspect object for numeric issues
                     if isinstance(obj, dict):
-                        json_debug_log.write(f"  Dict inspection:\n")
+                        lines.append(f"  Dict inspection:")
                         for k, v in obj.items():
                             if isinstance(v, (int, float)):
-                                json_debug_log.write(f"    '{k}': {v} (type: {type(v).__name__}, finite: {v != float('inf') and v != float('-inf') and v == v})\n")
+                                lines.append(f"    '{k}': {v} (type: {type(v).__name__}, finite: {v != float('inf') and v != float('-inf') and v == v})")
                             elif isinstance(v, dict):
-                                json_debug_log.write(f"    '{k}': <nested dict with {len(v)} keys>\n")
+                                lines.append(f"    '{k}': <nested dict with {len(v)} keys>")
                             elif isinstance(v, list):
-                                json_debug_log.write(f"    '{k}': <list with {len(v)} items>\n")
+                                lines.append(f"    '{k}': <list with {len(v)} items>")
                             else:
-                                json_debug_log.write(f"    '{k}': {repr(v)[:100]} (type: {type(v).__name__})\n")
+                                lines.append(f"    '{k}': {repr(v)[:100]} (type: {type(v).__name__})")
                     elif isinstance(obj, list):
-                        json_debug_log.write(f"  List inspection: {len(obj)} items\n")
+                        lines.append(f"  List inspection: {len(obj)} items")
                         for i, item in enumerate(obj[:5]):  # First 5 items
-                            json_debug_log.write(f"    [{i}]: {type(item).__name__}\n")
-                
-            json_debug_log.flush()
+                            lines.append(f"    [{i}]: {type(item).__name__}")
+            
+            json_debug_log.write('\n'.join(lines))
         
         def log_bump_scheduling(message):
             """Log bump scheduling decisions"""
-            bump_scheduling_log.write(f"[{dt.now().strftime('%Y-%m-%d %H:%M:%S')}] {message}\n")
-            bump_scheduling_log.flush()  # Ensure immediate write
-            logger.info(f"[BUMP_SCHEDULING] {message}")
+            bump_scheduling_log.write(message)
+            logger.info("[BUMP_SCHEDULING] %s", message)
         
         log_expiration(f"=== FILL TEMPLATE GAPS SESSION STARTED ===")
         log_json_debug("=== JSON DEBUG LOG STARTED ===")
@@ -7610,10 +7435,41 @@ def fill_template_gaps():
         
         data = request.json
         template = data.get('template')
-        available_content = data.get('available_content', [])
+        available_content = data.get('available_content') or []
+        content_filters = data.get('content_filters')
         gaps = data.get('gaps', [])
         post_meeting_delay = data.get('post_meeting_delay', 0)
         
+        # Optional seed for a reproducible fill
+        try:
+            seed = parse_seed(data.get('seed'))
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        
+        # When the client sends filter criteria instead of the content list,
+        # build the candidate set here. Dates come back from the database as
+        # datetimes, so nothing has to be parsed from strings per item.
+        if not available_content and content_filters is not None:
+            if not isinstance(content_filters, dict):
+                return jsonify({
+                    'success': False,
+                    'message': 'content_filters must be an object'
+                }), 400
+            if not db_manager.connected:
+                success = db_manager.connect()
+                if not success:
+                    return jsonify({
+                        'success': False,
+                        'message': 'Failed to connect to database'
+                    })
+            available_content = db_manager.get_analyzed_content_for_scheduling(
+                content_type=content_filters.get('content_type', ''),
+                duration_category=content_filters.get('duration_category', ''),
+                search=(content_filters.get('search') or '').lower(),
+                featured_filter=content_filters.get('featured_filter', '')
+            )
+            logger.info(f"Built fill candidate set from database filters {content_filters}: {len(available_content)} items")
+        
         # Get schedule_id from template if available and set in holiday greeting integration
         schedule_id = template.get('id') if template else None
         if schedule_id and hasattr(scheduler_postgres, 'holiday_integration') and scheduler_postgres.holiday_integration:
@@ -7656,22 +7512,6 @@ def fill_template_gaps():
             expiry_date_str = scheduling.get('content_expiry_date')
             if expiry_date_str:
                 content_with_expiry += 1
-                # Parse and check if it expires during this week
-                try:
-                    if isinstance(expiry_date_str, str):
-                        if 'T' in expiry_date_str:
-                            expiry_date = datetime.fromisoformat(expiry_date_str.replace('Z', '+00:00'))
-                        else:
-                            expiry_date = datetime.strptime(expiry_date_str, '%Y-%m-%d')
-                    else:
-                        expiry_date = expiry_date_str
-                    
-                    # Remove timezone if present
-                    if hasattr(expiry_date, 'tzinfo') and expiry_date.tzinfo:
-                        expiry_date = expiry_date.replace(tzinfo=None)
-                    
-                except Exception as e:
-                    logger.warning(f"Error parsing expiration date for debug: {e}")
             else:
                 content_without_expiry += 1
         
@@ -7939,6 +7779,7 @@ def fill_template_gaps():
             logger.info(f"  Duration: {duration}s ({duration/3600:.6f}h), exact end: {end_seconds}s")
         
         logger.info(f"Found {len(original_items)} original items to preserve")
+        template_timeline = TemplateTimeline(original_items)
         
         # If gaps are provided, use them. Otherwise calculate total duration
         if gaps:
@@ -8035,24 +7876,19 @@ def fill_template_gaps():
                 
                 # Note if this gap starts at the exact time a Live Input starts
                 # but don't skip it - we'll handle it by splitting around Live Inputs
-                gap_starts_at_live_input = False
-                for orig_item in original_items:
-                    if 'Live Input' in orig_item.get('title', '') or 'SDI' in orig_item.get('title', ''):
-                        # Check if gap starts at the exact time (within 1 second tolerance) as Live Input
-                        if abs(gap_start - orig_item['start']) < 1.0:
-                            gap_logger.info(f"  NOTE: Gap starts at exact time as Live Input '{orig_item['title']}' at {orig_item['start']}s")
-                            gap_logger.info(f"  This gap will be split to exclude the Live Input times.")
-                            gap_starts_at_live_input = True
-                            break
+                # Check if gap starts at the exact time (within 1 second tolerance) as Live Input
+                live_at_gap_start = template_timeline.live_titled.starting_near(gap_start, 1.0)
+                gap_starts_at_live_input = live_at_gap_start is not None
+                if gap_starts_at_live_input:
+                    gap_logger.info(f"  NOTE: Gap starts at exact time as Live Input '{live_at_gap_start['title']}' at {live_at_gap_start['start']}s")
+                    gap_logger.info(f"  This gap will be split to exclude the Live Input times.")
                 
                 # Check if this gap overlaps with any original items
                 # and split it into sub-gaps if necessary
                 sub_gaps = [(gap_start, gap_end)]
                 
-                for orig_item in original_items:
-                    if orig_item.get('is_gap', False):
-                        continue  # Skip gap items
-                    
+                # Only content items overlapping the gap can split it (gap items are skipped)
+                for orig_item in template_timeline.content.overlapping(gap_start, gap_end):
                     # Log live input items specially
                     if 'SDI' in orig_item['title'] or 'Live Input' in orig_item['title']:
                         logger.info(f"    Checking gap against live input: '{orig_item['title']}' at {orig_item['start']/3600:.2f}h-{orig_item['end']/3600:.2f}h")
@@ -8151,15 +7987,9 @@ def fill_template_gaps():
                 
                 # Find meetings (Live Input/SDI items) with end time close to current time
                 # The edited end time will always be within 5 minutes of current time
-                recently_ended_meeting = None
-                for item in original_items:
-                    # Check if this is a meeting (Live Input or SDI)
-                    if 'SDI' in item['title'] or 'Live Input' in item['title']:
-                        # Check if meeting end time is within 5 minutes of current time
-                        time_diff = abs(current_seconds_since_start - item['end'])
-                        if time_diff <= 300:  # Within 5 minutes (300 seconds)
-                            if recently_ended_meeting is None or time_diff < abs(current_seconds_since_start - recently_ended_meeting['end']):
-                                recently_ended_meeting = item
+                recently_ended_meeting = template_timeline.live_titled.closest_ending(
+                    current_seconds_since_start, 300  # Within 5 minutes (300 seconds)
+                )
                 
                 if recently_ended_meeting:
                     logger.info(f"Found meeting with end time close to current: '{recently_ended_meeting['title']}' ended at {recently_ended_meeting['end']/3600:.2f}h")
@@ -8220,6 +8050,7 @@ def fill_template_gaps():
         
         # Reset rotation to ensure consistent behavior between fills
         scheduler._reset_rotation()
+        scheduler._begin_build(seed, 'fill', schedule_id)
         
         # Convert available content to the format expected by scheduler
         # Filter out content from /mnt/main/Recordings and validate files exist
@@ -8240,11 +8071,8 @@ def fill_template_gaps():
         source_config = config.get('servers', {}).get('source', {})
         target_config = config.get('servers', {}).get('target', {})
         
-        # Create FTP connections once for batch validation
-        source_ftp = FTPManager(source_config)
-        target_ftp = FTPManager(target_config)
-        source_connected = source_ftp.connect()
-        target_connected = target_ftp.connect()
+        # Content that passed the duration/folder checks, validated in one batch below
+        content_to_validate = []
         
         # Log first few file paths to debug the issue
         if available_content and len(available_content) > 0:
@@ -8252,118 +8080,90 @@ def fill_template_gaps():
             for i, content in enumerate(available_content[:5]):
                 logger.info(f"  Sample {i+1}: {content.get('file_path', 'NO PATH')}")
         
-        try:
-            for content in available_content:
-                # Check for cancellation
-                if fill_gaps_cancelled:
-                    log_expiration("=== FILL GAPS CANCELLED BY USER ===")
-                    logger.info("Fill gaps operation cancelled by user during file validation")
-                    return jsonify({
-                        'success': False,
-                        'message': 'Operation cancelled by user',
-                        'items_added': 0,
-                        'cancelled': True
-                    })
-                
-                # Update progress
-                fill_gaps_progress['files_searched'] += 1
-                # Skip Live Input Placeholder and zero-duration content
-                content_title = content.get('content_title', content.get('title', ''))
-                # Check both duration_seconds and file_duration fields with validation
-                raw_duration = content.get('duration_seconds', content.get('file_duration', 0))
-                content_duration = validate_numeric(raw_duration, 
-                                                  default=0, 
-                                                  name=f"duration for '{content_title}'",
-                                                  min_value=0,
-                                                  max_value=86400)  # Max 24 hours
-                
-                if 'Live Input Placeholder' in content_title:
-                    logger.info(f"Skipping Live Input Placeholder from available content")
-                    fill_gaps_progress['files_rejected'] += 1
-                    continue
-                    
-                if content_duration <= 0:
-                    logger.info(f"Skipping zero-duration content: '{content_title}' (duration_seconds={content.get('duration_seconds')}, file_duration={content.get('file_duration')})")
-                    fill_gaps_progress['files_rejected'] += 1
-                    continue
-                
-                # Update the content object with the validated duration
-                content['duration_seconds'] = content_duration
-                
-                # Check if this content is from Recordings folder
-                file_path = content.get('file_path', '')
-                if file_path and '/mnt/main/Recordings' in file_path:
-                    filtered_count += 1
-                    fill_gaps_progress['files_rejected'] += 1
-                    continue  # Skip content from Recordings folder
-                
-                # Check if we've already validated this file
-                if file_path in validated_files:
-                    if validated_files[file_path]:
-                        content_by_id[content.get('id')] = content
-                        fill_gaps_progress['files_accepted'] += 1
-                    else:
-                        missing_files_count += 1
-                        fill_gaps_progress['files_rejected'] += 1
-                    continue
-                
-                # Validate file exists on at least one server
-                file_exists = False
-                
-                # If file_path doesn't start with /mnt/, try common base paths
-                paths_to_check = [file_path] if file_path else []
-                if file_path and not file_path.startswith('/mnt/'):
-                    # Common base paths where content might be stored
-                    # Note: /mnt/main and /mnt/md127 are the same via symbolic link
-                    base_paths = [
-                        '/mnt/main/ATL26 On-Air Content/',
-                        '/mnt/main/'
-                    ]
-                    for base in base_paths:
-                        paths_to_check.append(base + file_path)
-                
-                if source_connected:
-                    for check_path in paths_to_check:
-                        try:
-                            source_ftp.ftp.size(check_path)
-                            file_exists = True
-                            validated_files[file_path] = True
-                            logger.debug(f"File found on source server at: {check_path}")
-                            break
-                        except Exception as e:
-                            # Log the first attempt with more detail for debugging
-                            if check_path == paths_to_check[0]:
-                                logger.debug(f"File not found at {check_path}: {str(e)}")
-                            pass
-                
-                if not file_exists and target_connected:
-                    for check_path in paths_to_check:
-                        try:
-                            target_ftp.ftp.size(check_path)
-                            file_exists = True
-                            validated_files[file_path] = True
-                            logger.debug(f"File found on target server at: {check_path}")
-                            break
-                        except:
-                            pass
+        for content in available_content:
+            # Check for cancellation
+            if fill_gaps_cancelled:
+                log_expiration("=== FILL GAPS CANCELLED BY USER ===")
+                logger.info("Fill gaps operation cancelled by user during file validation")
+                return jsonify({
+                    'success': False,
+                    'message': 'Operation cancelled by user',
+                    'items_added': 0,
+                    'cancelled': True
+                })
+            
+            # Update progress
+            fill_gaps_progress['files_searched'] += 1
+            # Skip Live Input Placeholder and zero-duration content
+            content_title = content.get('content_title', content.get('title', ''))
+            # Check both duration_seconds and file_duration fields with validation
+            raw_duration = content.get('duration_seconds', content.get('file_duration', 0))
+            content_duration = validate_numeric(raw_duration, 
+                                              default=0, 
+                                              name=f"duration for '{content_title}'",
+                                              min_value=0,
+                                              max_value=86400)  # Max 24 hours
+            
+            if 'Live Input Placeholder' in content_title:
+                logger.info(f"Skipping Live Input Placeholder from available content")
+                fill_gaps_progress['files_rejected'] += 1
+                continue
                 
-                if not file_exists:
-                    validated_files[file_path] = False
-                    # For now, still include files we can't validate to avoid breaking scheduling
-                    # This allows us to debug while keeping the system functional
-                    content_by_id[content.get('id')] = content
-                    logger.warning(f"Could not validate file existence (including anyway): {file_path}")
-                    fill_gaps_progress['files_accepted'] += 1  # Accepting even if can't validate
-                else:
-                    content_by_id[content.get('id')] = content
-                    fill_gaps_progress['files_accepted'] += 1
+            if content_duration <= 0:
+                logger.info(f"Skipping zero-duration content: '{content_title}' (duration_seconds={content.get('duration_seconds')}, file_duration={content.get('file_duration')})")
+                fill_gaps_progress['files_rejected'] += 1
+                continue
+            
+            # Update the content object with the validated duration
+            content['duration_seconds'] = content_duration
+            
+            # Check if this content is from Recordings folder
+            file_path = content.get('file_path', '')
+            if file_path and '/mnt/main/Recordings' in file_path:
+                filtered_count += 1
+                fill_gaps_progress['files_rejected'] += 1
+                continue  # Skip content from Recordings folder
+            
+            content_to_validate.append(content)
+        
+        # Validate file existence with one directory listing per folder,
+        # checking the source server first and the target for the rest
+        fill_gaps_progress['message'] = 'Checking content files on servers...'
+        unique_paths = {content.get('file_path', '') for content in content_to_validate}
+        for server_config in (source_config, target_config):
+            remaining = [path for path in unique_paths if path and not validated_files.get(path)]
+            if not remaining:
+                break
+            validator = RemoteFileValidator(FTPManager(server_config),
+                                            should_cancel=lambda: fill_gaps_cancelled)
+            try:
+                for path, match in validator.find_existing(remaining).items():
+                    if match:
+                        validated_files[path] = True
+                        logger.debug(f"File found on {server_config.get('host')} at: {match}")
+            finally:
+                validator.close()
         
-        finally:
-            # Always disconnect FTP connections
-            if source_connected:
-                source_ftp.disconnect()
-            if target_connected:
-                target_ftp.disconnect()
+        # Check for cancellation (the validator stops listing once cancelled)
+        if fill_gaps_cancelled:
+            log_expiration("=== FILL GAPS CANCELLED BY USER ===")
+            logger.info("Fill gaps operation cancelled by user during file validation")
+            return jsonify({
+                'success': False,
+                'message': 'Operation cancelled by user',
+                'items_added': 0,
+                'cancelled': True
+            })
+        
+        for content in content_to_validate:
+            file_path = content.get('file_path', '')
+            if not validated_files.get(file_path):
+                missing_files_count += 1
+                # For now, still include files we can't validate to avoid breaking scheduling
+                # This allows us to debug while keeping the system functional
+                logger.warning(f"Could not validate file existence (including anyway): {file_path}")
+            content_by_id[content.get('id')] = content
+            fill_gaps_progress['files_accepted'] += 1  # Accepting even if can't validate
         
         # Debug: Log available content info
         logger.info(f"Available content count: {len(available_content)}")
@@ -8398,6 +8198,8 @@ def fill_template_gaps():
         # Track what we've scheduled
         scheduled_asset_ids = []  # We'll track this differently now
         items_added = []
+        # Themes of the short-form items added since the last long_form item
+        theme_window = ThemeWindow(get_theme_logger())
         
         # Track when each asset was last scheduled (for replay delays)
         # We need to track ALL items in the template (including previously filled items)
@@ -8532,128 +8334,26 @@ def fill_template_gaps():
                 'szl': 3, 'spp': 3
             }
         
-        # Update progress
-        fill_gaps_progress['message'] = 'Analyzing schedule gaps...'
-        
-        # Fill gaps using rotation logic
-        consecutive_errors = 0
-        max_errors = 100  # Same as in create schedule
-        total_cycles_without_content = 0
-        max_cycles = 20  # After trying all categories 20 times, stop
-        
-        # Reset rotation to ensure consistent starting point
-        scheduler._reset_rotation()
-        
-        # Force reload of configuration to ensure we have the latest rotation order
-        scheduler._config_loaded = False
-        scheduler._load_config_if_needed()
-        logger.info(f"Using rotation order: {scheduler.duration_rotation}")
-        
-        # Helper function to check if content is expired at a given position
-        def is_content_expired_at_position(content, position, schedule_type, base_date):
-            """Check if content is expired or not yet available for the given schedule position"""
-            # Calculate the actual air date for this position
-            if schedule_type == 'weekly':
-                days_offset = int(position // 86400)
-                air_date = base_date + timedelta(days=days_offset)
-            else:
-                air_date = base_date
-            
-            # Check expiration and go live dates
-            scheduling = content.get('scheduling', {})
-            expiry_date_str = scheduling.get('content_expiry_date')
-            go_live_date_str = scheduling.get('go_live_date')
-            content_title = content.get('content_title', content.get('file_name', 'Unknown'))
-            content_id = content.get('id', 'Unknown')
-            
-            # Log the evaluation
-            content_filename = content.get('file_name', 'Unknown')
-            log_expiration(f"\n--- EVALUATING CONTENT ---")
-            log_expiration(f"Content ID: {content_id}")
-            log_expiration(f"Filename: {content_filename}")
-            log_expiration(f"Air date: {air_date.strftime('%Y-%m-%d')}")
-            log_expiration(f"Position: {position/3600:.2f}h ({position}s)")
-            
-            # Check go live date first
-            if go_live_date_str:
-                try:
-                    if isinstance(go_live_date_str, str):
-                        if 'T' in go_live_date_str:
-                            go_live_date = datetime.fromisoformat(go_live_date_str.replace('Z', '+00:00'))
-                        else:
-                            go_live_date = datetime.strptime(go_live_date_str, '%Y-%m-%d')
-                    else:
-                        go_live_date = go_live_date_str
-                    
-                    # Make dates timezone-naive for comparison
-                    if hasattr(go_live_date, 'tzinfo') and go_live_date.tzinfo:
-                        go_live_date = go_live_date.replace(tzinfo=None)
-                    if hasattr(air_date, 'tzinfo') and air_date.tzinfo:
-                        air_date_check = air_date.replace(tzinfo=None)
-                    else:
-                        air_date_check = air_date
-                    
-                    log_expiration(f"Go live date: {go_live_date.strftime('%Y-%m-%d')}")
-                    
-                    if go_live_date > air_date_check:
-                        logger.info(f"GO LIVE CHECK: Content '{content_title}' not available until {go_live_date.strftime('%Y-%m-%d')}, cannot schedule for {air_date.strftime('%Y-%m-%d')} (position: {position/3600:.1f}h)")
-                        log_expiration(f"DECISION: REJECTED (not yet available - {go_live_date.strftime('%Y-%m-%d')} > {air_date.strftime('%Y-%m-%d')})")
-                        return True
-                except Exception as e:
-                    logger.warning(f"Error parsing go live date: {e}")
-                    log_expiration(f"Go live date: ERROR - {e}")
-            else:
-                log_expiration(f"Go live date: NONE")
-            
-            # Check expiration date
-            if not expiry_date_str:
-                log_expiration(f"Expiration date: NONE")
-                if 'MTG' in content_title or 'Meeting' in content_title:
-                    logger.warning(f"  MEETING WITHOUT EXPIRATION: '{content_title}' - This content has no expiration date set!")
-                    log_expiration(f"DECISION: ACCEPTED (no expiration date) - Scheduled at position {position/3600:.2f}h")
-                else:
-                    log_expiration(f"DECISION: ACCEPTED (no expiration date) - Scheduled at position {position/3600:.2f}h")
-                return False  # No expiration date means not expired
-                
-            try:
-                if isinstance(expiry_date_str, str):
-                    if 'T' in expiry_date_str:
-                        expiry_date = datetime.fromisoformat(expiry_date_str.replace('Z', '+00:00'))
-                    else:
-                        expiry_date = datetime.strptime(expiry_date_str, '%Y-%m-%d')
-                else:
-                    expiry_date = expiry_date_str
-                
-                # Make dates timezone-naive for comparison
-                if hasattr(expiry_date, 'tzinfo') and expiry_date.tzinfo:
-                    expiry_date = expiry_date.replace(tzinfo=None)
-                if hasattr(air_date, 'tzinfo') and air_date.tzinfo:
-                    air_date = air_date.replace(tzinfo=None)
-                
-                # Log details for debugging expired content
-                content_title = content.get('content_title', content.get('file_name', 'Unknown'))
-                log_expiration(f"Expiration date: {expiry_date.strftime('%Y-%m-%d')}")
-                
-                if expiry_date <= air_date:
-                    logger.info(f"EXPIRATION CHECK: Content '{content_title}' expires on {expiry_date.strftime('%Y-%m-%d')}, cannot schedule for {air_date.strftime('%Y-%m-%d')} (position: {position/3600:.1f}h)")
-                    if schedule_type == 'weekly':
-                        logger.info(f"  Weekly position details: base_date={base_date.strftime('%Y-%m-%d')}, days_offset={days_offset}, current_position={position}s")
-                    # Special debug logging for meetings
-                    if 'MTG' in content_title or 'Meeting' in content_title:
-                        logger.warning(f"  MEETING REJECTED: '{content_title}' - Expiry={expiry_date.strftime('%Y-%m-%d')}, Air date={air_date.strftime('%Y-%m-%d')}")
-                    log_expiration(f"DECISION: REJECTED (expired - {expiry_date.strftime('%Y-%m-%d')} <= {air_date.strftime('%Y-%m-%d')})")
-                    return True
-                else:
-                    # Log when meetings pass expiration check (this shouldn't happen for old meetings)
-                    if 'MTG' in content_title or 'Meeting' in content_title:
-                        logger.warning(f"  MEETING ALLOWED: '{content_title}' - Expiry={expiry_date.strftime('%Y-%m-%d')}, Air date={air_date.strftime('%Y-%m-%d')}, Position={position/3600:.1f}h")
-                        logger.warning(f"    This may indicate an issue with expiration date calculation")
-                    log_expiration(f"DECISION: ACCEPTED (not expired - {expiry_date.strftime('%Y-%m-%d')} > {air_date.strftime('%Y-%m-%d')}) - Scheduled at position {position/3600:.2f}h")
-            except Exception as e:
-                logger.warning(f"Error parsing expiration date: {e}")
-                log_expiration(f"Expiration date: ERROR - {e}")
-                log_expiration(f"DECISION: ACCEPTED (error) - Scheduled at position {position/3600:.2f}h")
-            return False
+        # Update progress
+        fill_gaps_progress['message'] = 'Analyzing schedule gaps...'
+        
+        # Fill gaps using rotation logic
+        consecutive_errors = 0
+        max_errors = 100  # Same as in create schedule
+        total_cycles_without_content = 0
+        max_cycles = 20  # After trying all categories 20 times, stop
+        
+        # Reset rotation to ensure consistent starting point
+        scheduler._reset_rotation()
+        
+        # Force reload of configuration to ensure we have the latest rotation order
+        scheduler._config_loaded = False
+        scheduler._load_config_if_needed()
+        logger.info(f"Using rotation order: {scheduler.duration_rotation}")
+        
+        # Go-live/expiry of every candidate as offsets from the template start,
+        # parsed once instead of at every slot
+        availability = ContentAvailabilityIndex(content_by_id, base_date, schedule_type)
         
         # Process each gap individually
         logger.info(f"\n=== PROCESSING {len(gaps)} GAPS ===")
@@ -8713,21 +8413,18 @@ def fill_template_gaps():
             gap_starts_after_item = False
             gap_starts_after_live_event = False
             
-            for orig_item in original_items:
-                if not orig_item.get('is_gap', False):  # Skip gap items
-                    orig_end = orig_item['end']  # Use the 'end' field directly
-                    # Check if gap starts exactly at or very close to item end time
-                    if abs(gap_start - orig_end) < 0.001:  # Within 1ms tolerance
-                        logger.info(f"  Gap starts immediately after item '{orig_item['title']}' that ends at {orig_end/3600:.6f}h")
-                        logger.info(f"  Adding {frame_buffer}s buffer to prevent overlap")
-                        gap_starts_after_item = True
-                        
-                        # Check if this was a live event
-                        if orig_item.get('is_live_input', False):
-                            logger.info(f"  Previous item was a LIVE EVENT - will reset rotation category")
-                            gap_starts_after_live_event = True
-                        
-                        break
+            # Check if gap starts exactly at or very close to a content item's end time (within 1ms)
+            orig_item = template_timeline.content.ending_near(gap_start, 0.001)
+            if orig_item:
+                orig_end = orig_item['end']
+                logger.info(f"  Gap starts immediately after item '{orig_item['title']}' that ends at {orig_end/3600:.6f}h")
+                logger.info(f"  Adding {frame_buffer}s buffer to prevent overlap")
+                gap_starts_after_item = True
+                
+                # Check if this was a live event
+                if orig_item.get('is_live_input', False):
+                    logger.info(f"  Previous item was a LIVE EVENT - will reset rotation category")
+                    gap_starts_after_live_event = True
             
             # Log date calculation for this gap
             if schedule_type == 'weekly':
@@ -8824,11 +8521,15 @@ def fill_template_gaps():
                         replay_delay_hours = replay_delay_hours / 2  # 50% of normal
                     else:  # 10 PM - 11 PM
                         replay_delay_hours = replay_delay_hours * 0.75  # 75% of normal
-                    logger.debug(f"Reduced replay delay for {duration_category} to {replay_delay_hours:.1f} hours at {current_hour:.1f}h")
+                    fill_candidate_log.debug("Reduced replay delay for %s to %.1f hours at %.1fh",
+                                             duration_category, replay_delay_hours, current_hour)
                 
                 replay_delay_seconds = replay_delay_hours * 3600
                 
-                for content_id, content in content_by_id.items():
+                # Drop content that has expired by this position's air date
+                availability.advance(current_position)
+                
+                for content_id, content in availability.active_items():
                     
                     # Check category - either duration_category or content_type
                     if is_duration_category:
@@ -8846,21 +8547,16 @@ def fill_template_gaps():
                     # Special debug logging for PSLA meeting
                     content_title = content.get('content_title', content.get('file_name', 'Unknown'))
                     if 'PSLA' in content_title:
-                        scheduling = content.get('scheduling', {})
-                        logger.warning(f"PSLA MEETING FOUND in category {duration_category}:")
-                        logger.warning(f"  Title: {content_title}")
-                        logger.warning(f"  Scheduling object: {scheduling}")
-                        logger.warning(f"  Current position: {current_position/3600:.1f}h")
+                        fill_candidate_log.debug("PSLA MEETING FOUND in category %s: title=%s, scheduling=%s, position=%.1fh",
+                                                 duration_category, content_title, content.get('scheduling', {}),
+                                                 current_position / 3600)
                     
-                    # Check expiration date
-                    if is_content_expired_at_position(content, current_position, schedule_type, base_date):
+                    # Check expiration and go live dates
+                    if availability.is_unavailable(content_id, current_position):
                         blocked_by_expiry += 1
                         continue
-                    else:
-                        # Content is not expired - but check if it has an expiration date
-                        scheduling = content.get('scheduling', {})
-                        if not scheduling.get('content_expiry_date'):
-                            no_expiry_date += 1
+                    elif not availability.has_expiry(content_id):
+                        no_expiry_date += 1
                     
                     # Check replay delay
                     content_id = content.get('id')
@@ -8875,7 +8571,8 @@ def fill_template_gaps():
                             if time_since_last < replay_delay_seconds:
                                 can_schedule = False
                                 blocked_by_delay += 1
-                                logger.debug(f"Content {content_id} blocked: {time_since_last/3600:.1f}h since last, need {replay_delay_seconds/3600:.1f}h")
+                                fill_candidate_log.debug("Content %s blocked: %.1fh since last, need %.1fh",
+                                                         content_id, time_since_last / 3600, replay_delay_seconds / 3600)
                                 break
                         
                         if not can_schedule:
@@ -8905,20 +8602,20 @@ def fill_template_gaps():
                         if 'DAY' in file_name and 'NIGHT' not in file_name:
                             # This is a DAY-only bump
                             if not is_daytime:
-                                log_bump_scheduling(f"REJECTED: DAY bump '{content_title}' at {air_datetime} (hour {hour_of_day}) - night time")
+                                bump_decision_log.info("REJECTED: DAY bump '%s' at %s (hour %d) - night time", content_title, air_datetime, hour_of_day)
                                 continue
                             else:
-                                log_bump_scheduling(f"ACCEPTED: DAY bump '{content_title}' at {air_datetime} (hour {hour_of_day}) - day time")
+                                bump_decision_log.info("ACCEPTED: DAY bump '%s' at %s (hour %d) - day time", content_title, air_datetime, hour_of_day)
                         elif 'NIGHT' in file_name and 'DAY' not in file_name:
                             # This is a NIGHT-only bump
                             if is_daytime:
-                                log_bump_scheduling(f"REJECTED: NIGHT bump '{content_title}' at {air_datetime} (hour {hour_of_day}) - day time")
+                                bump_decision_log.info("REJECTED: NIGHT bump '%s' at %s (hour %d) - day time", content_title, air_datetime, hour_of_day)
                                 continue
                             else:
-                                log_bump_scheduling(f"ACCEPTED: NIGHT bump '{content_title}' at {air_datetime} (hour {hour_of_day}) - night time")
+                                bump_decision_log.info("ACCEPTED: NIGHT bump '%s' at %s (hour %d) - night time", content_title, air_datetime, hour_of_day)
                         else:
                             # Generic bump without DAY/NIGHT restriction
-                            log_bump_scheduling(f"ACCEPTED: Generic bump '{content_title}' at {air_datetime} (hour {hour_of_day}) - no time restriction")
+                            bump_decision_log.info("ACCEPTED: Generic bump '%s' at %s (hour %d) - no time restriction", content_title, air_datetime, hour_of_day)
                     
                     category_content.append(content)
             
@@ -8933,8 +8630,8 @@ def fill_template_gaps():
                             if c.get('duration_category') == 'spots':
                                 spots_in_db += 1
                                 dur = c.get('duration_seconds', 0)
-                                title = c.get('content_title', c.get('file_name', 'Unknown'))
-                                logger.debug(f"  Found spots content: {title} ({dur}s / {dur/60:.1f}min)")
+                                fill_candidate_log.debug("  Found spots content: %s (%ss / %.1fmin)",
+                                                         c.get('content_title', c.get('file_name', 'Unknown')), dur, dur / 60)
                         if spots_in_db == 0:
                             logger.warning("  NO SPOTS CONTENT in available content pool!")
                         else:
@@ -8954,7 +8651,7 @@ def fill_template_gaps():
                         reduced_delay_seconds = replay_delay_seconds * factor
                         temp_category_content = []
                         
-                        for content_id, content in content_by_id.items():
+                        for content_id, content in availability.active_items():
                             # Check category match
                             category_match = False
                             if is_duration_category:
@@ -8964,7 +8661,7 @@ def fill_template_gaps():
                                 
                             if category_match:
                                 # ALWAYS check expiration first, even with reduced delays
-                                if is_content_expired_at_position(content, current_position, schedule_type, base_date):
+                                if availability.is_unavailable(content.get('id'), current_position):
                                     continue  # Skip expired content
                                 
                                 # Check with reduced delay
@@ -9002,18 +8699,18 @@ def fill_template_gaps():
                                             # Check if this is a DAY or NIGHT specific bump
                                             if 'DAY' in file_name and 'NIGHT' not in file_name:
                                                 if not is_daytime:
-                                                    log_bump_scheduling(f"REJECTED (reduced delay): DAY bump '{content_title}' at {air_datetime} (hour {hour_of_day}) - night time")
+                                                    bump_decision_log.info("REJECTED (reduced delay): DAY bump '%s' at %s (hour %d) - night time", content_title, air_datetime, hour_of_day)
                                                     continue
                                                 else:
-                                                    log_bump_scheduling(f"ACCEPTED (reduced delay): DAY bump '{content_title}' at {air_datetime} (hour {hour_of_day}) - day time")
+                                                    bump_decision_log.info("ACCEPTED (reduced delay): DAY bump '%s' at %s (hour %d) - day time", content_title, air_datetime, hour_of_day)
                                             elif 'NIGHT' in file_name and 'DAY' not in file_name:
                                                 if is_daytime:
-                                                    log_bump_scheduling(f"REJECTED (reduced delay): NIGHT bump '{content_title}' at {air_datetime} (hour {hour_of_day}) - day time")
+                                                    bump_decision_log.info("REJECTED (reduced delay): NIGHT bump '%s' at %s (hour %d) - day time", content_title, air_datetime, hour_of_day)
                                                     continue
                                                 else:
-                                                    log_bump_scheduling(f"ACCEPTED (reduced delay): NIGHT bump '{content_title}' at {air_datetime} (hour {hour_of_day}) - night time")
+                                                    bump_decision_log.info("ACCEPTED (reduced delay): NIGHT bump '%s' at %s (hour %d) - night time", content_title, air_datetime, hour_of_day)
                                             else:
-                                                log_bump_scheduling(f"ACCEPTED (reduced delay): Generic bump '{content_title}' at {air_datetime} (hour {hour_of_day}) - no time restriction")
+                                                bump_decision_log.info("ACCEPTED (reduced delay): Generic bump '%s' at %s (hour %d) - no time restriction", content_title, air_datetime, hour_of_day)
                                         
                                         temp_category_content.append(content)
                                 else:
@@ -9040,18 +8737,18 @@ def fill_template_gaps():
                                         # Check if this is a DAY or NIGHT specific bump
                                         if 'DAY' in file_name and 'NIGHT' not in file_name:
                                             if not is_daytime:
-                                                log_bump_scheduling(f"REJECTED (reduced delay): DAY bump '{content_title}' at {air_datetime} (hour {hour_of_day}) - night time")
+                                                bump_decision_log.info("REJECTED (reduced delay): DAY bump '%s' at %s (hour %d) - night time", content_title, air_datetime, hour_of_day)
                                                 continue
                                             else:
-                                                log_bump_scheduling(f"ACCEPTED (reduced delay): DAY bump '{content_title}' at {air_datetime} (hour {hour_of_day}) - day time")
+                                                bump_decision_log.info("ACCEPTED (reduced delay): DAY bump '%s' at %s (hour %d) - day time", content_title, air_datetime, hour_of_day)
                                         elif 'NIGHT' in file_name and 'DAY' not in file_name:
                                             if is_daytime:
-                                                log_bump_scheduling(f"REJECTED (reduced delay): NIGHT bump '{content_title}' at {air_datetime} (hour {hour_of_day}) - day time")
+                                                bump_decision_log.info("REJECTED (reduced delay): NIGHT bump '%s' at %s (hour %d) - day time", content_title, air_datetime, hour_of_day)
                                                 continue
                                             else:
-                                                log_bump_scheduling(f"ACCEPTED (reduced delay): NIGHT bump '{content_title}' at {air_datetime} (hour {hour_of_day}) - night time")
+                                                bump_decision_log.info("ACCEPTED (reduced delay): NIGHT bump '%s' at %s (hour %d) - night time", content_title, air_datetime, hour_of_day)
                                         else:
-                                            log_bump_scheduling(f"ACCEPTED (reduced delay): Generic bump '{content_title}' at {air_datetime} (hour {hour_of_day}) - no time restriction")
+                                            bump_decision_log.info("ACCEPTED (reduced delay): Generic bump '%s' at %s (hour %d) - no time restriction", content_title, air_datetime, hour_of_day)
                                     
                                     temp_category_content.append(content)
                         
@@ -9117,10 +8814,9 @@ def fill_template_gaps():
                 # For ID content, add variety by selecting from top candidates randomly
                 if is_duration_category and duration_category == 'id' and len(category_content) > 1:
                     # Take top 40% of available IDs (at least 3) to add variety
-                    import random
                     top_count = max(3, int(len(category_content) * 0.4))
                     top_candidates = category_content[:top_count]
-                    selected = random.choice(top_candidates)
+                    selected = scheduler.rng.choice(top_candidates)
                     logger.info(f"Selected ID from top {top_count} candidates for variety")
                 else:
                     # Select the best content for other categories
@@ -9129,7 +8825,7 @@ def fill_template_gaps():
                 # Check if we should block this meeting after a live meeting
                 if selected and duration_category == 'long_form':
                     should_block, block_reason = should_block_meeting_after_live(
-                        selected, original_items, current_position, schedule_type, base_date
+                        selected, template_timeline, current_position, schedule_type, base_date
                     )
                     if should_block:
                         logger.info(f"Blocking content: {block_reason}")
@@ -9139,7 +8835,7 @@ def fill_template_gaps():
                         for alt_content in category_content[1:]:
                             # Check if alternative should also be blocked
                             alt_should_block, alt_block_reason = should_block_meeting_after_live(
-                                alt_content, original_items, current_position, schedule_type, base_date
+                                alt_content, template_timeline, current_position, schedule_type, base_date
                             )
                             if not alt_should_block:
                                 selected = alt_content
@@ -9208,14 +8904,14 @@ def fill_template_gaps():
                         
                         if alt_duration <= remaining and fits_in_day:
                             # Check expiration before selecting alternative content
-                            if is_content_expired_at_position(alt_content, current_position, schedule_type, base_date):
+                            if availability.is_unavailable(alt_content.get('id'), current_position):
                                 logger.debug(f"Alternative content '{alt_content.get('content_title', alt_content.get('file_name'))}' is expired, skipping")
                                 continue
                             
                             # Check if we should block this meeting after a live meeting
                             if duration_category == 'long_form':
                                 should_block, block_reason = should_block_meeting_after_live(
-                                    alt_content, original_items, current_position, schedule_type, base_date
+                                    alt_content, template_timeline, current_position, schedule_type, base_date
                                 )
                                 if should_block:
                                     logger.info(f"Alternative blocked: {block_reason}")
@@ -9251,7 +8947,7 @@ def fill_template_gaps():
                             if try_category == duration_category:
                                 continue  # Already tried this category
                             
-                            for content_id, content in content_by_id.items():
+                            for content_id, content in availability.active_items():
                                 # Check if content is in the category we're trying
                                 if content.get('duration_category') != try_category:
                                     continue
@@ -9302,11 +8998,11 @@ def fill_template_gaps():
                                     
                                     if can_schedule and content_duration > best_duration:
                                         # Check expiration before selecting
-                                        if not is_content_expired_at_position(content, current_position, schedule_type, base_date):
+                                        if not availability.is_unavailable(content.get('id'), current_position):
                                             # Check if we should block this meeting after a live meeting
                                             if try_category == 'long_form':
                                                 should_block, block_reason = should_block_meeting_after_live(
-                                                    content, original_items, current_position, schedule_type, base_date
+                                                    content, template_timeline, current_position, schedule_type, base_date
                                                 )
                                                 if should_block:
                                                     logger.info(f"Best fit candidate blocked: {block_reason}")
@@ -9387,7 +9083,6 @@ def fill_template_gaps():
                                         
                                         # For ID content, shuffle to add variety
                                         if try_category == 'id' and len(category_content) > 1:
-                                            import random
                                             # Group by similar durations (within 1 second)
                                             duration_groups = {}
                                             for c in category_content:
@@ -9400,7 +9095,7 @@ def fill_template_gaps():
                                             category_content = []
                                             for dur in sorted(duration_groups.keys()):
                                                 group = duration_groups[dur]
-                                                random.shuffle(group)
+                                                scheduler.rng.shuffle(group)
                                                 category_content.extend(group)
                                             
                                             for content in category_content:
@@ -9440,7 +9135,7 @@ def fill_template_gaps():
                                                     
                                                     if can_schedule:
                                                         # Check expiration before selecting for end-of-day
-                                                        if not is_content_expired_at_position(content, current_position, schedule_type, base_date):
+                                                        if not availability.is_unavailable(content.get('id'), current_position):
                                                             selected = content
                                                             duration = content_duration
                                                             found_shorter_content = True
@@ -9488,7 +9183,7 @@ def fill_template_gaps():
                                                             
                                                             if can_schedule:
                                                                 # Check expiration before selecting with minimal delays
-                                                                if not is_content_expired_at_position(content, current_position, schedule_type, base_date):
+                                                                if not availability.is_unavailable(content.get('id'), current_position):
                                                                     selected = content
                                                                     duration = content_duration
                                                                     found_shorter_content = True
@@ -9570,30 +9265,27 @@ def fill_template_gaps():
                 overlap_found = False
                 skip_amount = 0
                 
-                for orig_item in original_items:
-                    # Don't skip any items - even zero-duration placeholders need to be respected
+                # Don't skip any items - even zero-duration placeholders need to be respected
+                # Check if new item would overlap with original item (with tolerance)
+                orig_item = template_timeline.all.first_overlapping(new_item_start + overlap_tolerance,
+                                                                    new_item_end - overlap_tolerance)
+                if orig_item:
+                    overlap_found = True
                     
-                    # Check if new item would overlap with original item (with tolerance)
-                    if (new_item_start < orig_item['end'] - overlap_tolerance and 
-                        new_item_end > orig_item['start'] + overlap_tolerance):
-                        overlap_found = True
-                        
-                        # Calculate how much we need to skip
-                        skip_to = orig_item['end']
-                        skip_amount = skip_to - new_item_start
-                        
-                        logger.warning(f"OVERLAP DETECTED! Item '{selected.get('content_title', selected.get('file_name'))}' " +
-                                     f"would overlap with '{orig_item['title']}' at {orig_item['start_time']}")
-                        logger.warning(f"  Would place at: {new_item_start/3600:.2f}h-{new_item_end/3600:.2f}h")
-                        logger.warning(f"  Original item: {orig_item['start']/3600:.2f}h-{orig_item['end']/3600:.2f}h")
-                        logger.warning(f"  Skipping to position after original item: {skip_to/3600:.2f}h")
-                        
-                        gap_logger.warning(f"OVERLAP PROTECTION: Skipping over '{orig_item['title']}'")
-                        gap_logger.warning(f"  Item would have been at: {new_item_start}s-{new_item_end}s")
-                        gap_logger.warning(f"  Original item occupies: {orig_item['start']}s-{orig_item['end']}s")
-                        gap_logger.warning(f"  Moving position from {current_position}s to {skip_to}s")
-                        
-                        break  # We found an overlap, no need to check more
+                    # Calculate how much we need to skip
+                    skip_to = orig_item['end']
+                    skip_amount = skip_to - new_item_start
+                    
+                    logger.warning(f"OVERLAP DETECTED! Item '{selected.get('content_title', selected.get('file_name'))}' " +
+                                 f"would overlap with '{orig_item['title']}' at {orig_item['start_time']}")
+                    logger.warning(f"  Would place at: {new_item_start/3600:.2f}h-{new_item_end/3600:.2f}h")
+                    logger.warning(f"  Original item: {orig_item['start']/3600:.2f}h-{orig_item['end']/3600:.2f}h")
+                    logger.warning(f"  Skipping to position after original item: {skip_to/3600:.2f}h")
+                    
+                    gap_logger.warning(f"OVERLAP PROTECTION: Skipping over '{orig_item['title']}'")
+                    gap_logger.warning(f"  Item would have been at: {new_item_start}s-{new_item_end}s")
+                    gap_logger.warning(f"  Original item occupies: {orig_item['start']}s-{orig_item['end']}s")
+                    gap_logger.warning(f"  Moving position from {current_position}s to {skip_to}s")
                 
                 if overlap_found:
                     # Skip ahead to after the overlapping item
@@ -9626,13 +9318,11 @@ def fill_template_gaps():
                     new_item_end = current_position + duration
                     
                     # Check again for any other overlaps
-                    another_overlap = False
-                    for orig_item in original_items:
-                        if (new_item_start < orig_item['end'] - overlap_tolerance and 
-                            new_item_end > orig_item['start'] + overlap_tolerance):
-                            another_overlap = True
-                            logger.warning(f"  After skip, still overlaps with '{orig_item['title']}' at {orig_item['start_time']}")
-                            break
+                    orig_item = template_timeline.all.first_overlapping(new_item_start + overlap_tolerance,
+                                                                        new_item_end - overlap_tolerance)
+                    another_overlap = orig_item is not None
+                    if another_overlap:
+                        logger.warning(f"  After skip, still overlaps with '{orig_item['title']}' at {orig_item['start_time']}")
                     
                     if another_overlap:
                         # This position also has an overlap, skip this content
@@ -9656,8 +9346,8 @@ def fill_template_gaps():
                     if selected.get('duration_category') in ['spots', 'id', 'short_form']:
                         # Calculate remaining seconds until end of day/gap
                         remaining_seconds_in_gap = gap_end - current_position
-                        should_block, block_reason = should_block_content_for_theme(
-                            selected, items_added, current_position, schedule_type, remaining_seconds_in_gap
+                        should_block, block_reason = theme_window.check(
+                            selected, items_added, current_position, remaining_seconds_in_gap
                         )
                         if should_block:
                             theme_conflict_attempts += 1
@@ -9678,8 +9368,8 @@ def fill_template_gaps():
                                 alt_duration = alt_content.get('duration_seconds', alt_content.get('file_duration', 0))
                                 if alt_duration <= remaining and alt_duration > 0:
                                     # Check theme conflict for alternative
-                                    alt_should_block, alt_block_reason = should_block_content_for_theme(
-                                        alt_content, items_added, current_position, schedule_type, remaining_seconds_in_gap
+                                    alt_should_block, alt_block_reason = theme_window.check(
+                                        alt_content, items_added, current_position, remaining_seconds_in_gap
                                     )
                                     if not alt_should_block:
                                         selected = alt_content
@@ -10095,6 +9785,8 @@ def fill_template_gaps():
         sanitized_items = deep_sanitize_for_json(items_added, "items_added")
         sanitized_duration = sanitize_numeric_value(total_filled_seconds, "total_filled_seconds")
         
+        metrics.record_fill_gaps(len(items_added), time.perf_counter() - fill_started)
+        
         response_data = {
             'success': True,
             'items_added': sanitized_items,
@@ -10351,333 +10043,321 @@ def export_template():
             'channel': 'Comcast Channel 26'
         }
         
-        # Generate Castus format - pass the template so it can access defaults
-        schedule_content = generate_castus_schedule(mock_schedule, template['items'], mock_schedule['air_date'], format_type, template)
+        # Full path for export
+        full_path = f"{export_path}/{filename}"
         
-        # Check if generate_castus_schedule returned an error (overlap detected)
-        if schedule_content.startswith("ERROR:"):
+        # Upload to FTP server - ensure fresh connection
+        # Check if FTP manager exists and is connected
+        if export_server not in ftp_managers:
+            # Get server config
+            server_config = config_manager.get_all_config().get('servers', {}).get(export_server)
+            if not server_config:
+                raise Exception(f"Server configuration not found for '{export_server}'")
+            ftp_managers[export_server] = FTPManager(server_config)
+        
+        ftp_manager = ftp_managers[export_server]
+        
+        # Ensure connection is active (reconnect if needed)
+        if not ftp_manager.connected:
+            logger.info(f"FTP connection to {export_server} not active, reconnecting...")
+            if not ftp_manager.connect():
+                raise Exception(f"Failed to connect to {export_server} server")
+        
+        # Generate Castus format - pass the template so it can access defaults.
+        # The schedule is streamed straight to the server as it is generated.
+        def schedule_chunks():
+            return iter_castus_schedule_chunks(mock_schedule, template['items'], mock_schedule['air_date'],
+                                               format_type, template)
+        
+        # Try upload with reconnection on failure
+        success = False
+        try:
+            file_size = ftp_manager.upload_stream(schedule_chunks(), full_path)
+            success = True
+        except ScheduleOverlapError as e:
             return jsonify({
                 'success': False,
-                'message': schedule_content
+                'message': f'ERROR: {str(e)}'
             })
+        except Exception as upload_error:
+            # If upload fails, try reconnecting once and retry
+            logger.warning(f"Upload failed: {str(upload_error)}. Attempting reconnection...")
+            try:
+                ftp_manager.disconnect()
+                if ftp_manager.connect():
+                    logger.info("Reconnected successfully, retrying upload...")
+                    file_size = ftp_manager.upload_stream(schedule_chunks(), full_path)
+                    success = True
+                else:
+                    raise Exception("Failed to reconnect to FTP server")
+            except Exception as retry_error:
+                logger.error(f"Upload retry failed: {str(retry_error)}")
+                raise
         
-        # Write to temporary file - explicitly preserve TABs
-        import tempfile
-        with tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix='.sch') as temp_file:
-            # Write as binary to ensure no text processing happens
-            temp_file.write(schedule_content.encode('utf-8'))
-            temp_file_path = temp_file.name
-        
-        try:
-            # Full path for export
-            full_path = f"{export_path}/{filename}"
-            
-            # Upload to FTP server - ensure fresh connection
-            # Check if FTP manager exists and is connected
-            if export_server not in ftp_managers:
-                # Get server config
-                server_config = config_manager.get_all_config().get('servers', {}).get(export_server)
-                if not server_config:
-                    raise Exception(f"Server configuration not found for '{export_server}'")
-                ftp_managers[export_server] = FTPManager(server_config)
+        if success:
+            logger.info(f"Template export successful")
+            logger.info(f"Export server: '{export_server}'")
+            logger.info(f"Export path: '{export_path}'")
             
-            ftp_manager = ftp_managers[export_server]
+            # Auto-import not needed - schedule already created by return to automation
+            response_data = {
+                'success': True,
+                'message': f'Template exported successfully to {export_server} at {full_path}',
+                'file_path': full_path,
+                'file_size': file_size
+            }
             
-            # Ensure connection is active (reconnect if needed)
-            if not ftp_manager.connected:
-                logger.info(f"FTP connection to {export_server} not active, reconnecting...")
-                if not ftp_manager.connect():
-                    raise Exception(f"Failed to connect to {export_server} server")
+            # Skip all the import code since schedule is created by return to automation
+            """
+            with open(import_log_path, 'w') as import_log:
+                import_log.write(f"=== SCHEDULE AUTO-IMPORT DEBUG LOG ===\n")
+                import_log.write(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+                import_log.write(f"Export Server: {export_server}\n")
+                import_log.write(f"Export Path: {export_path}\n")
+                import_log.write(f"Export Filename: {filename}\n")
+                import_log.write(f"Template Name: {template.get('name', 'Unknown')}\n")
+                import_log.write(f"\n")
             
-            # Try upload with reconnection on failure
-            success = False
             try:
-                success = ftp_manager.upload_file(temp_file_path, full_path)
-            except Exception as upload_error:
-                # If upload fails, try reconnecting once and retry
-                logger.warning(f"Upload failed: {str(upload_error)}. Attempting reconnection...")
-                try:
-                    ftp_manager.disconnect()
-                    if ftp_manager.connect():
-                        logger.info("Reconnected successfully, retrying upload...")
-                        success = ftp_manager.upload_file(temp_file_path, full_path)
-                    else:
-                        raise Exception("Failed to reconnect to FTP server")
-                except Exception as retry_error:
-                    logger.error(f"Upload retry failed: {str(retry_error)}")
-                    raise
-            
-            if success:
-                file_size = os.path.getsize(temp_file_path)
-                
-                logger.info(f"Template export successful")
-                logger.info(f"Export server: '{export_server}'")
-                logger.info(f"Export path: '{export_path}'")
-                
-                # Auto-import not needed - schedule already created by return to automation
-                auto_import_result = None
-                
-                response_data = {
-                    'success': True,
-                    'message': f'Template exported successfully to {export_server} at {full_path}',
-                    'file_path': full_path,
-                    'file_size': file_size
-                }
+                logger.info("Auto-importing exported schedule from castus1...")
+                with open(import_log_path, 'a') as import_log:
+                    import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Starting auto-import process...\n")
                 
-                # Skip all the import code since schedule is created by return to automation
-                """
-                with open(import_log_path, 'w') as import_log:
-                    import_log.write(f"=== SCHEDULE AUTO-IMPORT DEBUG LOG ===\n")
-                    import_log.write(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                    import_log.write(f"Export Server: {export_server}\n")
-                    import_log.write(f"Export Path: {export_path}\n")
-                    import_log.write(f"Export Filename: {filename}\n")
-                    import_log.write(f"Template Name: {template.get('name', 'Unknown')}\n")
-                    import_log.write(f"\n")
+                # Find the newest schedule file in the Master directory
+                master_path = '/mnt/md127/Schedules/Master'
+                with open(import_log_path, 'a') as import_log:
+                    import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Master path: {master_path}\n")
                 
-                try:
-                    logger.info("Auto-importing exported schedule from castus1...")
+                # Connect to source (castus1) server
+                if 'source' not in ftp_managers:
+                    logger.warning("Source server not connected for auto-import")
                     with open(import_log_path, 'a') as import_log:
-                        import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Starting auto-import process...\n")
-                    
-                    # Find the newest schedule file in the Master directory
-                    master_path = '/mnt/md127/Schedules/Master'
+                        import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] ERROR: Source server not in ftp_managers\n")
+                        import_log.write(f"Available managers: {list(ftp_managers.keys())}\n")
+                else:
+                    source_ftp = ftp_managers['source']
                     with open(import_log_path, 'a') as import_log:
-                        import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Master path: {master_path}\n")
+                        import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Source FTP manager found\n")
+                        import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] FTP connected: {source_ftp.connected}\n")
+                        import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Listing files in: {master_path}\n")
                     
-                    # Connect to source (castus1) server
-                    if 'source' not in ftp_managers:
-                        logger.warning("Source server not connected for auto-import")
+                    try:
+                        files = source_ftp.list_files(master_path)
                         with open(import_log_path, 'a') as import_log:
-                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] ERROR: Source server not in ftp_managers\n")
-                            import_log.write(f"Available managers: {list(ftp_managers.keys())}\n")
-                    else:
-                        source_ftp = ftp_managers['source']
+                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Found {len(files)} total files\n")
+                    except Exception as list_error:
                         with open(import_log_path, 'a') as import_log:
-                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Source FTP manager found\n")
-                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] FTP connected: {source_ftp.connected}\n")
-                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Listing files in: {master_path}\n")
-                        
-                        try:
-                            files = source_ftp.list_files(master_path)
-                            with open(import_log_path, 'a') as import_log:
-                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Found {len(files)} total files\n")
-                        except Exception as list_error:
-                            with open(import_log_path, 'a') as import_log:
-                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] ERROR listing files: {str(list_error)}\n")
-                            raise list_error
+                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] ERROR listing files: {str(list_error)}\n")
+                        raise list_error
+                    
+                    # Filter for .sch files
+                    sch_files = [f for f in files if f['name'].endswith('.sch')]
+                    with open(import_log_path, 'a') as import_log:
+                        import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Found {len(sch_files)} .sch files\n")
+                        if sch_files:
+                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Schedule files found:\n")
+                            for idx, f in enumerate(sch_files[:10]):
+                                import_log.write(f"  [{idx+1}] {f['name']} (size: {f.get('size', 0)} bytes)\n")
+                            if len(sch_files) > 10:
+                                import_log.write(f"  ... and {len(sch_files) - 10} more\n")
+                    
+                    if sch_files:
+                        # Sort by name to get the newest  
+                        sch_files.sort(key=lambda x: x['name'], reverse=True)
+                        newest_file = sch_files[0]
                         
-                        # Filter for .sch files
-                        sch_files = [f for f in files if f['name'].endswith('.sch')]
+                        logger.info(f"Found newest schedule file: {newest_file['name']}")
                         with open(import_log_path, 'a') as import_log:
-                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Found {len(sch_files)} .sch files\n")
-                            if sch_files:
-                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Schedule files found:\n")
-                                for idx, f in enumerate(sch_files[:10]):
-                                    import_log.write(f"  [{idx+1}] {f['name']} (size: {f.get('size', 0)} bytes)\n")
-                                if len(sch_files) > 10:
-                                    import_log.write(f"  ... and {len(sch_files) - 10} more\n")
-                        
-                        if sch_files:
-                            # Sort by name to get the newest  
-                            sch_files.sort(key=lambda x: x['name'], reverse=True)
-                            newest_file = sch_files[0]
+                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Selected newest file: {newest_file['name']}\n")
+                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Export template complete - schedule already created by return to automation\n")
+                            # Download and parse schedule file
+                            import_path = f"{master_path}/{newest_file['name']}".replace('//', '/')
                             
-                            logger.info(f"Found newest schedule file: {newest_file['name']}")
                             with open(import_log_path, 'a') as import_log:
-                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Selected newest file: {newest_file['name']}\n")
-                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Export template complete - schedule already created by return to automation\n")
-                                # Download and parse schedule file
-                                import_path = f"{master_path}/{newest_file['name']}".replace('//', '/')
-                                
-                                with open(import_log_path, 'a') as import_log:
-                                    import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Downloading from: {import_path}\n")
-                                
-                                # Download to temporary file
-                                with tempfile.NamedTemporaryFile(mode='w+', suffix='.sch', delete=False) as temp_import_file:
-                                    temp_import_path = temp_import_file.name
+                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Downloading from: {import_path}\n")
+                            
+                            # Download to temporary file
+                            with tempfile.NamedTemporaryFile(mode='w+', suffix='.sch', delete=False) as temp_import_file:
+                                temp_import_path = temp_import_file.name
+                            
+                            try:
+                                # Download file
+                                download_success = source_ftp.download_file(import_path, temp_import_path)
                                 
-                                try:
-                                    # Download file
-                                    download_success = source_ftp.download_file(import_path, temp_import_path)
+                                if download_success:
+                                    with open(import_log_path, 'a') as import_log:
+                                        import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Download successful\n")
                                     
-                                    if download_success:
-                                        with open(import_log_path, 'a') as import_log:
-                                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Download successful\n")
-                                        
-                                        # Parse schedule file
-                                        with open(temp_import_path, 'r') as f:
-                                            import_content = f.read()
-                                        
-                                        # Parse the Castus schedule format
-                                        schedule_data = parse_castus_schedule(import_content)
-                                        
-                                        with open(import_log_path, 'a') as import_log:
-                                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Schedule parsed:\n")
-                                            import_log.write(f"  Type: {schedule_data['type']}\n")
-                                            import_log.write(f"  Items: {len(schedule_data['items'])}\n")
-                                        
-                                        # Determine schedule date - use the template's date if available
-                                        schedule_date = template.get('schedule_date', datetime.now().strftime('%Y-%m-%d'))
-                                        
-                                        # For weekly schedules, adjust the date to the Sunday of that week
-                                        if schedule_data['type'] == 'weekly':
-                                            from datetime import timedelta
-                                            schedule_date_obj = datetime.strptime(schedule_date, '%Y-%m-%d')
-                                            days_since_sunday = (schedule_date_obj.weekday() + 1) % 7
-                                            sunday_date = schedule_date_obj - timedelta(days=days_since_sunday)
-                                            original_date = schedule_date
-                                            schedule_date = sunday_date.strftime('%Y-%m-%d')
-                                            
-                                            with open(import_log_path, 'a') as import_log:
-                                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Weekly schedule: Adjusted date from {original_date} to {schedule_date} (Sunday)\n")
-                                        
-                                        # Process the schedule items
-                                        schedule_items = []
-                                        matched_count = 0
-                                        unmatched_count = 0
-                                        
-                                        with open(import_log_path, 'a') as import_log:
-                                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Looking up assets in database...\n")
-                                        
-                                        for idx, item in enumerate(schedule_data['items']):
-                                            file_path = item['file_path']
-                                            file_name = item['filename']
-                                            
-                                            # Look up asset in database
-                                            asset_match = db_manager.find_asset_by_filename(file_name)
-                                            
-                                            if asset_match:
-                                                schedule_items.append({
-                                                    'file_path': file_path,
-                                                    'file_name': file_name,
-                                                    'asset_id': asset_match['id'],
-                                                    'duration_seconds': asset_match.get('duration_seconds', 0),
-                                                    'content_type': asset_match.get('content_type'),
-                                                    'content_title': asset_match.get('content_title'),
-                                                    'start_time': item.get('start_time'),
-                                                    'end_time': item.get('end_time'),
-                                                    'guid': item.get('guid')
-                                                })
-                                                matched_count += 1
-                                            else:
-                                                schedule_items.append({
-                                                    'file_path': file_path,
-                                                    'file_name': file_name,
-                                                    'asset_id': None,
-                                                    'duration_seconds': item.get('duration_seconds', 0),
-                                                    'content_type': None,
-                                                    'content_title': file_name,
-                                                    'start_time': item.get('start_time'),
-                                                    'end_time': item.get('end_time'),
-                                                    'guid': item.get('guid')
-                                                })
-                                                unmatched_count += 1
+                                    # Parse schedule file
+                                    with open(temp_import_path, 'r') as f:
+                                        import_content = f.read()
+                                    
+                                    # Parse the Castus schedule format
+                                    schedule_data = parse_castus_schedule(import_content)
+                                    
+                                    with open(import_log_path, 'a') as import_log:
+                                        import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Schedule parsed:\n")
+                                        import_log.write(f"  Type: {schedule_data['type']}\n")
+                                        import_log.write(f"  Items: {len(schedule_data['items'])}\n")
+                                    
+                                    # Determine schedule date - use the template's date if available
+                                    schedule_date = template.get('schedule_date', datetime.now().strftime('%Y-%m-%d'))
+                                    
+                                    # For weekly schedules, adjust the date to the Sunday of that week
+                                    if schedule_data['type'] == 'weekly':
+                                        from datetime import timedelta
+                                        schedule_date_obj = datetime.strptime(schedule_date, '%Y-%m-%d')
+                                        days_since_sunday = (schedule_date_obj.weekday() + 1) % 7
+                                        sunday_date = schedule_date_obj - timedelta(days=days_since_sunday)
+                                        original_date = schedule_date
+                                        schedule_date = sunday_date.strftime('%Y-%m-%d')
                                         
                                         with open(import_log_path, 'a') as import_log:
-                                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Asset lookup complete:\n")
-                                            import_log.write(f"  Matched: {matched_count}\n")
-                                            import_log.write(f"  Unmatched: {unmatched_count}\n")
+                                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Weekly schedule: Adjusted date from {original_date} to {schedule_date} (Sunday)\n")
+                                    
+                                    # Process the schedule items
+                                    schedule_items = []
+                                    matched_count = 0
+                                    unmatched_count = 0
+                                    
+                                    with open(import_log_path, 'a') as import_log:
+                                        import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Looking up assets in database...\n")
+                                    
+                                    for idx, item in enumerate(schedule_data['items']):
+                                        file_path = item['file_path']
+                                        file_name = item['filename']
                                         
-                                        # Create the schedule
-                                        schedule_name = f"[AUTO-IMPORTED] {newest_file['name']}"
-                                        if schedule_data['type'] == 'weekly':
-                                            schedule_name = f"[WEEKLY] {schedule_name}"
+                                        # Look up asset in database
+                                        asset_match = db_manager.find_asset_by_filename(file_name)
                                         
+                                        if asset_match:
+                                            schedule_items.append({
+                                                'file_path': file_path,
+                                                'file_name': file_name,
+                                                'asset_id': asset_match['id'],
+                                                'duration_seconds': asset_match.get('duration_seconds', 0),
+                                                'content_type': asset_match.get('content_type'),
+                                                'content_title': asset_match.get('content_title'),
+                                                'start_time': item.get('start_time'),
+                                                'end_time': item.get('end_time'),
+                                                'guid': item.get('guid')
+                                            })
+                                            matched_count += 1
+                                        else:
+                                            schedule_items.append({
+                                                'file_path': file_path,
+                                                'file_name': file_name,
+                                                'asset_id': None,
+                                                'duration_seconds': item.get('duration_seconds', 0),
+                                                'content_type': None,
+                                                'content_title': file_name,
+                                                'start_time': item.get('start_time'),
+                                                'end_time': item.get('end_time'),
+                                                'guid': item.get('guid')
+                                            })
+                                            unmatched_count += 1
+                                    
+                                    with open(import_log_path, 'a') as import_log:
+                                        import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Asset lookup complete:\n")
+                                        import_log.write(f"  Matched: {matched_count}\n")
+                                        import_log.write(f"  Unmatched: {unmatched_count}\n")
+                                    
+                                    # Create the schedule
+                                    schedule_name = f"[AUTO-IMPORTED] {newest_file['name']}"
+                                    if schedule_data['type'] == 'weekly':
+                                        schedule_name = f"[WEEKLY] {schedule_name}"
+                                    
+                                    with open(import_log_path, 'a') as import_log:
+                                        import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Creating schedule in database...\n")
+                                        import_log.write(f"  Name: {schedule_name}\n")
+                                        import_log.write(f"  Date: {schedule_date}\n")
+                                    
+                                    # Create schedule in database
+                                    created_schedule = scheduler_postgres.create_schedule_from_template(
+                                        schedule_date=schedule_date,
+                                        items=schedule_items,
+                                        schedule_name=schedule_name,
+                                        channel='Comcast Channel 26',
+                                        created_by='auto_import',
+                                        template_name=newest_file['name']
+                                    )
+                                    
+                                    if created_schedule and created_schedule.get('success'):
                                         with open(import_log_path, 'a') as import_log:
-                                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Creating schedule in database...\n")
-                                            import_log.write(f"  Name: {schedule_name}\n")
-                                            import_log.write(f"  Date: {schedule_date}\n")
+                                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Schedule created successfully!\n")
+                                            import_log.write(f"  Schedule ID: {created_schedule.get('schedule_id')}\n")
+                                            import_log.write(f"  Total duration: {created_schedule.get('total_duration_hours', 0):.1f} hours\n")
                                         
-                                        # Create schedule in database
-                                        created_schedule = scheduler_postgres.create_schedule_from_template(
-                                            schedule_date=schedule_date,
-                                            items=schedule_items,
-                                            schedule_name=schedule_name,
-                                            channel='Comcast Channel 26',
-                                            created_by='auto_import',
-                                            template_name=newest_file['name']
-                                        )
+                                        auto_import_result = {
+                                            'imported': True,
+                                            'filename': newest_file['name'],
+                                            'type': schedule_data.get('type', 'unknown'),
+                                            'items_count': len(schedule_data.get('items', [])),
+                                            'schedule_id': created_schedule.get('schedule_id'),
+                                            'schedule_name': schedule_name,
+                                            'matched_assets': matched_count,
+                                            'unmatched_assets': unmatched_count,
+                                            'total_duration_hours': created_schedule.get('total_duration_hours', 0)
+                                        }
                                         
-                                        if created_schedule and created_schedule.get('success'):
-                                            with open(import_log_path, 'a') as import_log:
-                                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] Schedule created successfully!\n")
-                                                import_log.write(f"  Schedule ID: {created_schedule.get('schedule_id')}\n")
-                                                import_log.write(f"  Total duration: {created_schedule.get('total_duration_hours', 0):.1f} hours\n")
-                                            
-                                            auto_import_result = {
-                                                'imported': True,
-                                                'filename': newest_file['name'],
-                                                'type': schedule_data.get('type', 'unknown'),
-                                                'items_count': len(schedule_data.get('items', [])),
-                                                'schedule_id': created_schedule.get('schedule_id'),
-                                                'schedule_name': schedule_name,
-                                                'matched_assets': matched_count,
-                                                'unmatched_assets': unmatched_count,
-                                                'total_duration_hours': created_schedule.get('total_duration_hours', 0)
-                                            }
-                                            
-                                            logger.info(f"Auto-import successful - Schedule ID: {created_schedule.get('schedule_id')}")
-                                        else:
-                                            raise Exception("Failed to create schedule in database")
+                                        logger.info(f"Auto-import successful - Schedule ID: {created_schedule.get('schedule_id')}")
                                     else:
-                                        raise Exception("Failed to download schedule file")
-                                        
-                                finally:
-                                    # Clean up temp file
-                                    if 'temp_import_path' in locals() and os.path.exists(temp_import_path):
-                                        os.unlink(temp_import_path)
+                                        raise Exception("Failed to create schedule in database")
+                                else:
+                                    raise Exception("Failed to download schedule file")
                                     
-                            except Exception as import_err:
-                                with open(import_log_path, 'a') as import_log:
-                                    import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] ERROR during import: {str(import_err)}\n")
-                                    import traceback
-                                    import_log.write(traceback.format_exc())
-                                raise import_err
-                        else:
-                            logger.info("No schedule files found in Master directory")
+                            finally:
+                                # Clean up temp file
+                                if 'temp_import_path' in locals() and os.path.exists(temp_import_path):
+                                    os.unlink(temp_import_path)
+                                
+                        except Exception as import_err:
                             with open(import_log_path, 'a') as import_log:
-                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] No .sch files found in directory\n")
-                        
-                except Exception as import_error:
-                    logger.error(f"Auto-import error: {str(import_error)}")
-                    with open(import_log_path, 'a') as import_log:
-                        import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] EXCEPTION during auto-import:\n")
-                        import_log.write(f"  Type: {type(import_error).__name__}\n") 
-                        import_log.write(f"  Message: {str(import_error)}\n")
-                        import traceback
-                        import_log.write(f"  Traceback:\n")
-                        import_log.write(traceback.format_exc())
-                    # Don't fail the export if auto-import fails
-                
-                # Log final status
+                                import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] ERROR during import: {str(import_err)}\n")
+                                import traceback
+                                import_log.write(traceback.format_exc())
+                            raise import_err
+                    else:
+                        logger.info("No schedule files found in Master directory")
+                        with open(import_log_path, 'a') as import_log:
+                            import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] No .sch files found in directory\n")
+                    
+            except Exception as import_error:
+                logger.error(f"Auto-import error: {str(import_error)}")
                 with open(import_log_path, 'a') as import_log:
-                    import_log.write(f"\n[{datetime.now().strftime('%H:%M:%S')}] === AUTO-IMPORT COMPLETE ===\n")
-                    import_log.write(f"Log file saved to: {import_log_path}\n")
-                
-                logger.info(f"Auto-import debug log saved to: {import_log_path}")
-                
-                response_data = {
-                    'success': True,
-                    'message': f'Template exported successfully to {export_server} at {full_path}',
-                    'file_path': full_path,
-                    'file_size': file_size
-                }
-                
-                # Add auto-import result if available
-                if auto_import_result:
-                    response_data['auto_import'] = auto_import_result
-                """
-                
-                return jsonify(response_data)
-            else:
-                return jsonify({
-                    'success': False,
-                    'message': 'Failed to upload template file to FTP server'
-                })
-        finally:
-            # Clean up temp file
-            os.unlink(temp_file_path)
+                    import_log.write(f"[{datetime.now().strftime('%H:%M:%S')}] EXCEPTION during auto-import:\n")
+                    import_log.write(f"  Type: {type(import_error).__name__}\n") 
+                    import_log.write(f"  Message: {str(import_error)}\n")
+                    import traceback
+                    import_log.write(f"  Traceback:\n")
+                    import_log.write(traceback.format_exc())
+                # Don't fail the export if auto-import fails
+            
+            # Log final status
+            with open(import_log_path, 'a') as import_log:
+                import_log.write(f"\n[{datetime.now().strftime('%H:%M:%S')}] === AUTO-IMPORT COMPLETE ===\n")
+                import_log.write(f"Log file saved to: {import_log_path}\n")
+            
+            logger.info(f"Auto-import debug log saved to: {import_log_path}")
+            
+            response_data = {
+                'success': True,
+                'message': f'Template exported successfully to {export_server} at {full_path}',
+                'file_path': full_path,
+                'file_size': file_size
+            }
+            
+            # Add auto-import result if available
+            if auto_import_result:
+                response_data['auto_import'] = auto_import_result
+            """
+            
+            return jsonify(response_data)
+        else:
+            return jsonify({
+                'success': False,
+                'message': 'Failed to upload template file to FTP server'
+            })
             
     except Exception as e:
         error_msg = f"Export template error: {str(e)}"
@@ -10758,6 +10438,9 @@ def get_meeting_recordings():
                     logger.error(f"Failed to connect to {server}: {str(e)}")
                     return jsonify({'status': 'error', 'message': f'Failed to connect to {server} server: {str(e)}'}), 500
             
+            # Trimmed files already on the server, from the shared listing cache
+            trimmed_names = RemoteFileValidator(ftp_manager).directory_names(trimmed_path) or set()
+            
             # Use FTP to scan directories
             logger.info(f"Using FTP to scan server {server} path: {recordings_path}")
             
@@ -10826,12 +10509,7 @@ def get_meeting_recordings():
                                         pass  # Keep original trimmed_name
                                     
                                     # Check if trimmed file exists
-                                    is_trimmed = False
-                                    try:
-                                        trimmed_files = ftp_manager.list_files(trimmed_path)
-                                        is_trimmed = any(f['name'] == trimmed_name for f in trimmed_files)
-                                    except:
-                                        pass
+                                    is_trimmed = trimmed_name in trimmed_names
                                     
                                     # Get file size from listing
                                     size = 0
@@ -10916,12 +10594,7 @@ def get_meeting_recordings():
                                                 pass  # Keep original trimmed_name
                                             
                                             # Check if trimmed file exists
-                                            is_trimmed = False
-                                            try:
-                                                trimmed_files = ftp_manager.list_files(trimmed_path)
-                                                is_trimmed = any(f['name'] == trimmed_name for f in trimmed_files)
-                                            except:
-                                                pass
+                                            is_trimmed = trimmed_name in trimmed_names
                                             
                                             # Get file size from listing
                                             size = 0
@@ -11377,15 +11050,18 @@ def check_file_exists():
         else:
             full_path = filename
         
-        # Check if file exists
-        try:
-            # Try to get file size - if it succeeds, file exists
-            ftp_manager.ftp.size(full_path)
-            exists = True
-            logger.info(f"File exists on {server}: {full_path}")
-        except:
-            exists = False
-            logger.info(f"File does not exist on {server}: {full_path}")
+        # Check if file exists, answering from the cached directory listing
+        # for absolute paths
+        if full_path.startswith('/'):
+            exists = RemoteFileValidator(ftp_manager).path_exists(full_path)
+        else:
+            try:
+                # Try to get file size - if it succeeds, file exists
+                ftp_manager.ftp.size(full_path)
+                exists = True
+            except:
+                exists = False
+        logger.info(f"File {'exists' if exists else 'does not exist'} on {server}: {full_path}")
         
         return jsonify({'status': 'success', 'exists': exists, 'path': full_path})
         
@@ -14563,14 +14239,14 @@ def sync_all_castus_expirations():
         limit = data.get('limit', None)  # optional limit for testing
         
         # Import here to avoid circular imports
-        from castus_metadata import CastusMetadataHandler
+        from castus_metadata import CastusMetadataHandler, as_utc
         
         # Get all content items that need syncing
         conn = db_manager._get_connection()
         try:
             with conn.cursor(cursor_factory=RealDictCursor) as cursor:
                 query = """
-                    SELECT a.id, a.file_path, a.file_name
+                    SELECT a.id, a.file_path, a.file_name, sm.content_expiry_date
                     FROM assets a
                     LEFT JOIN scheduling_metadata sm ON a.id = sm.asset_id
                     WHERE a.analysis_completed = true
@@ -14609,87 +14285,90 @@ def sync_all_castus_expirations():
                 'message': f'Failed to connect to {server} server'
             }), 500
         
-        # Process each asset
+        # Read all metadata up front, one download per file
         handler = CastusMetadataHandler(ftp)
         synced = 0
+        unchanged = 0
         failed = 0
         errors = []
         
+        try:
+            windows_by_file = handler.read_content_windows_batch(asset['file_path'] for asset in assets)
+        finally:
+            ftp.disconnect()
+        
+        conn = db_manager._get_connection()
         try:
             for asset in assets:
                 try:
                     asset_id = asset['id']
-                    file_path = asset['file_path']
+                    expiration_date = windows_by_file.get(asset['file_path'], {}).get('close')
                     
-                    # Get expiration date from metadata
-                    expiration_date = handler.get_content_window_close(file_path)
+                    if not expiration_date:
+                        failed += 1
+                        errors.append(f"No metadata found for {asset['file_name']}")
+                        continue
                     
-                    if expiration_date:
-                        # Update database
-                        conn = db_manager._get_connection()
-                        try:
-                            with conn.cursor() as cursor:
-                                # First get the old expiration date for audit logging
-                                cursor.execute("""
-                                    SELECT content_expiry_date FROM scheduling_metadata 
-                                    WHERE asset_id = %s
-                                """, (asset_id,))
-                                old_row = cursor.fetchone()
-                                old_expiry = old_row['content_expiry_date'] if old_row else None
-                                
-                                if old_row:
-                                    # Update existing record
-                                    cursor.execute("""
-                                        UPDATE scheduling_metadata 
-                                        SET content_expiry_date = %s,
-                                            metadata_synced_at = CURRENT_TIMESTAMP
-                                        WHERE asset_id = %s
-                                    """, (expiration_date, asset_id))
-                                else:
-                                    # Create new record
-                                    cursor.execute("""
-                                        INSERT INTO scheduling_metadata (asset_id, content_expiry_date, metadata_synced_at)
-                                        VALUES (%s, %s, CURRENT_TIMESTAMP)
-                                    """, (asset_id, expiration_date))
-                                
+                    old_expiry = asset['content_expiry_date']
+                    with conn.cursor() as cursor:
+                        # Compare as UTC: either side may be naive
+                        if as_utc(old_expiry) == as_utc(expiration_date):
+                            # Date already matches, only record the sync
+                            cursor.execute("""
+                                UPDATE scheduling_metadata
+                                SET metadata_synced_at = CURRENT_TIMESTAMP
+                                WHERE asset_id = %s
+                            """, (asset_id,))
                             conn.commit()
-                            
-                            # Log the change to audit trail
-                            if old_expiry != expiration_date:
-                                db_manager.log_metadata_change(
-                                    asset_id=asset_id,
-                                    field_name='content_expiry_date',
-                                    old_value=old_expiry,
-                                    new_value=expiration_date,
-                                    changed_by='castus_sync',
-                                    change_source='castus_sync_all',
-                                    change_reason='Batch sync expiration dates from Castus metadata'
-                                )
-                            
+                            unchanged += 1
                             synced += 1
-                            logger.debug(f"Synced asset {asset_id}: {expiration_date}")
-                        finally:
-                            db_manager._put_connection(conn)
-                    else:
-                        failed += 1
-                        errors.append(f"No metadata found for {asset['file_name']}")
+                            continue
+                        
+                        cursor.execute("""
+                            UPDATE scheduling_metadata 
+                            SET content_expiry_date = %s,
+                                metadata_synced_at = CURRENT_TIMESTAMP
+                            WHERE asset_id = %s
+                        """, (expiration_date, asset_id))
+                        if cursor.rowcount == 0:
+                            # Create new record
+                            cursor.execute("""
+                                INSERT INTO scheduling_metadata (asset_id, content_expiry_date, metadata_synced_at)
+                                VALUES (%s, %s, CURRENT_TIMESTAMP)
+                            """, (asset_id, expiration_date))
+                    conn.commit()
+                    
+                    # Log the change to audit trail
+                    db_manager.log_metadata_change(
+                        asset_id=asset_id,
+                        field_name='content_expiry_date',
+                        old_value=old_expiry,
+                        new_value=expiration_date,
+                        changed_by='castus_sync',
+                        change_source='castus_sync_all',
+                        change_reason='Batch sync expiration dates from Castus metadata'
+                    )
+                    
+                    synced += 1
+                    logger.debug(f"Synced asset {asset_id}: {expiration_date}")
                         
                 except Exception as e:
+                    conn.rollback()
                     failed += 1
                     error_msg = f"Failed to sync {asset.get('file_name', 'unknown')}: {str(e)}"
                     errors.append(error_msg)
                     logger.error(error_msg)
-                
         finally:
-            ftp.disconnect()
+            db_manager._put_connection(conn)
         
         # Return results
         return jsonify({
             'success': True,
-            'message': f'Sync completed: {synced} synced, {failed} failed',
+            'message': f'Sync completed: {synced} synced ({unchanged} unchanged), {failed} failed',
             'stats': {
                 'total': len(assets),
                 'synced': synced,
+                'unchanged': unchanged,
                 'failed': failed
             },
             'errors': errors[:10] if errors else []  # Return first 10 errors
@@ -14937,6 +14616,9 @@ import json
 loudness_queue = []
 loudness_processing = False
 current_loudness_task = None
+# The queue list is replaced when cleared, so the gauge looks it up when scraped
+metrics.watch_loudness_queue(lambda: loudness_queue)
+profiler.register_job('loudness')
 
 # Setup loudness analysis logger
 loudness_logger = logging.getLogger('loudness_analysis')
@@ -14981,7 +14663,7 @@ def analyze_loudness_single(asset_id):
         # Start processing if not already running
         if not loudness_processing:
             import threading
-            thread = threading.Thread(target=process_loudness_queue_sync)
+            thread = threading.Thread(target=profiled('loudness', process_loudness_queue_sync))
             thread.daemon = True
             thread.start()
         
@@ -15054,7 +14736,7 @@ def analyze_loudness_batch():
         # Start processing if not already running
         if not loudness_processing and loudness_queue:
             import threading
-            thread = threading.Thread(target=lambda: asyncio.run(process_loudness_queue()))
+            thread = threading.Thread(target=profiled('loudness', lambda: asyncio.run(process_loudness_queue())))
             thread.daemon = True
             thread.start()
         
@@ -15765,7 +15447,7 @@ def upload_normalized_file():
             logger.info(f"Creating backup of original file: {backup_path}")
             try:
                 # Use FTP RNFR/RNTO to rename
-                ftp_manager.ftp.rename(original_path, backup_path)
+                ftp_manager.rename_file(original_path, backup_path)
             except Exception as e:
                 logger.warning(f"Could not create backup: {str(e)}")
         
@@ -0,0 +1,288 @@
+"""
+Background log writing and sampled logging for hot paths.
+
+Handlers of the loggers routed here are moved behind a QueueHandler, and a
+single QueueListener thread formats records and writes them to the original
+handlers (console, gap filling debug file, per-fill session files). The
+scheduling code only pays for creating a record.
+
+Hot loops log through a LogChannel instead of a plain logger: the level is
+checked before anything is formatted, messages take %-style arguments (or a
+Lazy value) so they are only formatted by the writer thread, and each
+channel can be sampled and rate limited. A per-request log budget caps how
+many channel messages one request can produce; the excess is counted and
+reported once when the request ends.
+"""
+
+import atexit
+import contextvars
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+logger = logging.getLogger(__name__)
+
+LOG_QUEUE_SIZE = 50000
+
+# Channel messages (below WARNING) one request may log, overridable per deployment
+DEFAULT_REQUEST_LOG_BUDGET = int(os.environ.get('LOG_REQUEST_BUDGET', '5000'))
+
+
+class Lazy:
+    """Log argument evaluated only when the record is formatted"""
+
+    __slots__ = ('_func', '_args')
+
+    def __init__(self, func, *args):
+        self._func = func
+        self._args = args
+
+    def __str__(self):
+        return str(self._func(*self._args))
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Queue records unformatted, tagged with the route of the logger they came from"""
+
+    def __init__(self, log_queue, route):
+        super().__init__(log_queue)
+        self.route = route
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Formatting happens in the listener thread
+        record.log_route = self.route
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Never block scheduling on a slow disk
+            self.dropped += 1
+
+
+class _Router(logging.Handler):
+    """Runs in the listener thread, passing each record to the handlers of its route"""
+
+    def __init__(self):
+        super().__init__()
+        self._routes = {}  # route -> list of handlers
+        self._lock = threading.Lock()
+
+    def add(self, route, handlers):
+        with self._lock:
+            self._routes.setdefault(route, []).extend(handlers)
+
+    def handle(self, record):
+        route = getattr(record, 'log_route', None)
+        with self._lock:
+            handlers = list(self._routes.get(route, ()))
+            if getattr(record, 'close_route', False):
+                self._routes.pop(route, None)
+
+        if getattr(record, 'close_route', False):
+            for handler in handlers:
+                handler.close()
+            return
+
+        for handler in handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def emit(self, record):
+        self.handle(record)
+
+    def flush(self):
+        with self._lock:
+            handlers = [h for route_handlers in self._routes.values() for h in route_handlers]
+        for handler in handlers:
+            handler.flush()
+
+
+_queue = queue.Queue(LOG_QUEUE_SIZE)
+_router = _Router()
+_listener = None
+_start_lock = threading.Lock()
+_session_ids = itertools.count(1)
+
+
+def start():
+    """Start the background writer (idempotent)"""
+    global _listener
+    with _start_lock:
+        if _listener is None:
+            _listener = QueueListener(_queue, _router)
+            _listener.start()
+            atexit.register(stop)
+
+
+def stop():
+    """Write out everything queued and stop the background writer"""
+    global _listener
+    with _start_lock:
+        if _listener is not None:
+            _listener.stop()
+            _router.flush()
+            _listener = None
+
+
+def route_through_queue(target_logger):
+    """Move a logger's handlers to the background writer"""
+    start()
+    if any(isinstance(h, _DeferredQueueHandler) for h in target_logger.handlers):
+        return target_logger
+
+    handlers = list(target_logger.handlers)
+    for handler in handlers:
+        target_logger.removeHandler(handler)
+    _router.add(target_logger.name, handlers)
+    target_logger.addHandler(_DeferredQueueHandler(_queue, target_logger.name))
+    return target_logger
+
+
+class SessionLog:
+    """
+    A log file for one operation (e.g. one fill), written by the background writer
+
+    The logger is not registered with the logging module, so session logs
+    don't accumulate across requests.
+    """
+
+    def __init__(self, name, path, fmt='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S'):
+        start()
+        self.path = path
+        self.route = f"{name}#{next(_session_ids)}"
+
+        handler = logging.FileHandler(path)
+        handler.setFormatter(logging.Formatter(fmt, datefmt))
+        _router.add(self.route, [handler])
+
+        self.logger = logging.Logger(name, logging.DEBUG)
+        self.logger.propagate = False
+        self._queue_handler = _DeferredQueueHandler(_queue, self.route)
+        self.logger.addHandler(self._queue_handler)
+
+    def write(self, message, *args):
+        self.logger.info(message, *args)
+
+    def close(self):
+        """Close the file once everything logged before this call is written"""
+        record = self.logger.makeRecord(self.logger.name, logging.INFO, __file__, 0, '', (), None)
+        record.close_route = True
+        try:
+            _queue.put(record, timeout=5)
+        except queue.Full:
+            logger.warning(f"Log queue full, {self.path} is closed when the writer stops")
+        self.logger.removeHandler(self._queue_handler)
+
+
+class LogBudget:
+    """Channel messages one request may log"""
+
+    def __init__(self, limit, label):
+        self.limit = limit
+        self.label = label
+        self.used = 0
+        self.dropped = 0
+
+    def allow(self):
+        if self.used >= self.limit:
+            self.dropped += 1
+            return False
+        self.used += 1
+        return True
+
+
+_current_budget = contextvars.ContextVar('log_budget', default=None)
+
+
+def begin_log_budget(label, limit=None):
+    """Start a log budget for the current request, returning a token for end_log_budget"""
+    return _current_budget.set(LogBudget(DEFAULT_REQUEST_LOG_BUDGET if limit is None else limit, label))
+
+
+def end_log_budget(token):
+    budget = _current_budget.get()
+    try:
+        _current_budget.reset(token)
+    except ValueError:
+        # Ended from a different context than it began in
+        _current_budget.set(None)
+    if budget and budget.dropped:
+        logger.info(f"Log budget of {budget.limit} messages exceeded in {budget.label}, "
+                    f"{budget.dropped} debug messages dropped")
+
+
+class LogChannel:
+    """
+    Sampled, rate-limited logging for one hot-path subsystem
+
+    Args:
+        target: Logger or logger name to write to
+        sample_every: Log one in every N messages below WARNING
+        max_per_second: Cap on messages below WARNING per second (None for no cap)
+    """
+
+    def __init__(self, target, sample_every=1, max_per_second=None):
+        self.logger = logging.getLogger(target) if isinstance(target, str) else target
+        self.sample_every = max(1, sample_every)
+        self.max_per_second = max_per_second
+        self._lock = threading.Lock()
+        self._seen = 0
+        self._window_start = 0.0
+        self._window_count = 0
+        self._suppressed = 0
+
+    def is_enabled_for(self, level):
+        return self.logger.isEnabledFor(level)
+
+    def _admit(self, level):
+        """Decide whether a message goes out; returns (admit, suppressed since last admitted)"""
+        if level >= logging.WARNING:
+            return True, 0
+
+        with self._lock:
+            self._seen += 1
+            if self._seen % self.sample_every:
+                self._suppressed += 1
+                return False, 0
+            if self.max_per_second is not None:
+                now = time.monotonic()
+                if now - self._window_start >= 1.0:
+                    self._window_start = now
+                    self._window_count = 0
+                if self._window_count >= self.max_per_second:
+                    self._suppressed += 1
+                    return False, 0
+                self._window_count += 1
+
+            budget = _current_budget.get()
+            if budget is not None and not budget.allow():
+                return False, 0
+            suppressed, self._suppressed = self._suppressed, 0
+            return True, suppressed
+
+    def log(self, level, msg, *args):
+        if not self.logger.isEnabledFor(level):
+            return
+        admit, suppressed = self._admit(level)
+        if not admit:
+            return
+        if suppressed:
+            msg = f"{msg} [+%d similar suppressed]"
+            args = args + (suppressed,)
+        self.logger.log(level, msg, *args)
+
+    def debug(self, msg, *args):
+        self.log(logging.DEBUG, msg, *args)
+
+    def info(self, msg, *args):
+        self.log(logging.INFO, msg, *args)
+
+    def warning(self, msg, *args):
+        self.log(logging.WARNING, msg, *args)
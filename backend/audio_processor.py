@@ -5,6 +5,7 @@ import ffmpeg
 from faster_whisper import WhisperModel
 from datetime import datetime
 import json
+import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -253,6 +254,10 @@ class AudioProcessor:
                     "text": segment.text.strip()
                 })
             
+            # Segments are decoded while iterating, so the real work ends here
+            metrics.record_transcription(self.model_size, (datetime.now() - start_time).total_seconds(),
+                                         getattr(info, 'duration', None))
+            
             # Create full transcript
             full_transcript = " ".join([seg["text"] for seg in transcript_segments])
             
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+FTP scan, transfer and metadata benchmark against fake Castus servers.
+
+Builds a Castus style tree (see fake_castus_server.py) and, for each
+scenario, serves it from a fake source server and runs:
+
+  scan      FileScanner.scan_directory over the content root (files/sec)
+  metadata  CastusMetadataHandler.read_content_windows_batch for every file
+            and get_metadata_modify_times (files/sec)
+  download  FTPManager.download_file of the first --transfer-files files (MB/s)
+  sync      FTPManager.copy_file_to of the same files to a fake target
+            server with the same conditions (MB/s)
+
+Scenarios are given as name:key=value,... with the FakeCastusServer
+conditions mlsd (0/1), latency (seconds), bandwidth (bytes/sec) and
+disconnect_every (commands). Without --scenario a default set runs.
+
+Needs pyftpdlib for the fake servers (pip install -r
+benchmark_scripts/requirements.txt).
+
+Examples:
+  python benchmark_scripts/benchmark_ftp.py
+  python benchmark_scripts/benchmark_ftp.py --files-per-folder 100 \\
+      --scenario lan:mlsd=1 --scenario wan:latency=0.05,bandwidth=5000000 --json ftp.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# file_scanner opens its log file in logs/ of the working directory at import
+LAUNCH_DIR = os.getcwd()
+os.chdir(BACKEND_DIR)
+os.makedirs('logs', exist_ok=True)
+
+from castus_metadata import CastusMetadataHandler
+from fake_castus_server import CASTUS_MOUNT, CONTENT_ROOT, FakeCastusServer, build_castus_tree
+from file_scanner import FileScanner
+from ftp_manager import FTPManager
+
+DEFAULT_SCENARIOS = (
+    'mlsd:mlsd=1',
+    'list_only:mlsd=0',
+    'latency_20ms:latency=0.02',
+    'bandwidth_20MBps:bandwidth=20000000',
+    'flaky:disconnect_every=150',
+)
+
+CONDITION_TYPES = {'mlsd': lambda value: value not in ('0', 'false', 'no'),
+                   'latency': float, 'bandwidth': int, 'disconnect_every': int}
+
+MB = 1024 * 1024
+
+
+def parse_scenario(text):
+    """'name:key=value,...' -> (name, conditions)"""
+    name, _, spec = text.partition(':')
+    conditions = {}
+    for part in filter(None, spec.split(',')):
+        key, _, value = part.partition('=')
+        if key not in CONDITION_TYPES:
+            raise ValueError(f"Unknown condition '{key}' in scenario {name}")
+        conditions[key] = CONDITION_TYPES[key](value)
+    return name, conditions
+
+
+def timed(run):
+    started = time.perf_counter()
+    result = run()
+    return result, time.perf_counter() - started
+
+
+def rate(count, seconds):
+    return round(count / seconds, 1) if seconds else None
+
+
+def run_scenario(name, conditions, source_root, remote_paths, transfer_files):
+    result = {'scenario': name, 'conditions': conditions}
+    target_root = tempfile.mkdtemp(prefix='castus_target_')
+    os.makedirs(os.path.join(target_root, 'mnt/md127', CONTENT_ROOT), exist_ok=True)
+    download_dir = tempfile.mkdtemp(prefix='castus_download_')
+
+    try:
+        with FakeCastusServer(source_root, **conditions) as source, \
+                FakeCastusServer(target_root, path=f"/mnt/md127/{CONTENT_ROOT}", **conditions) as target:
+            source_ftp = FTPManager(source.config)
+            target_ftp = FTPManager(target.config)
+            source_ftp.connect()
+            target_ftp.connect()
+
+            files, seconds = timed(lambda: FileScanner(source_ftp).scan_directory(
+                source.path, {'extensions': ['mp4'], 'include_subdirs': True}))
+            result['scan'] = {'files': len(files), 'expected': len(remote_paths),
+                              'seconds': round(seconds, 3), 'files_per_sec': rate(len(files), seconds)}
+
+            handler = CastusMetadataHandler(source_ftp)
+            windows, seconds = timed(lambda: handler.read_content_windows_batch(remote_paths))
+            found = sum(1 for window in windows.values() if window.get('found'))
+            (modify_times, _), mtime_seconds = timed(lambda: handler.get_metadata_modify_times(remote_paths))
+            result['metadata'] = {'files': len(remote_paths), 'found': found,
+                                  'seconds': round(seconds, 3), 'files_per_sec': rate(len(remote_paths), seconds),
+                                  'modify_times': len(modify_times),
+                                  'modify_time_seconds': round(mtime_seconds, 3)}
+
+            selected = sorted(files, key=lambda f: f['full_path'])[:transfer_files]
+            downloaded = 0
+            started = time.perf_counter()
+            for file_info in selected:
+                local_path = os.path.join(download_dir, file_info['name'])
+                if source_ftp.download_file(file_info['full_path'], local_path):
+                    downloaded += os.path.getsize(local_path)
+                    os.remove(local_path)
+            seconds = time.perf_counter() - started
+            result['download'] = {'files': len(selected), 'mb': round(downloaded / MB, 1),
+                                  'seconds': round(seconds, 3), 'mb_per_sec': rate(downloaded / MB, seconds)}
+
+            synced = 0
+            copied = 0
+            started = time.perf_counter()
+            for file_info in selected:
+                if source_ftp.copy_file_to(file_info, target_ftp):
+                    synced += 1
+                    copied += file_info['size']
+            seconds = time.perf_counter() - started
+            result['sync'] = {'files': len(selected), 'synced': synced, 'mb': round(copied / MB, 1),
+                              'seconds': round(seconds, 3), 'mb_per_sec': rate(copied / MB, seconds)}
+
+            source_ftp.disconnect()
+            target_ftp.disconnect()
+    finally:
+        shutil.rmtree(target_root, ignore_errors=True)
+        shutil.rmtree(download_dir, ignore_errors=True)
+
+    return result
+
+
+def print_results(results):
+    print(f"\n{'scenario':<18} {'scan f/s':>9} {'found':>9} {'meta f/s':>9} {'mtimes':>7} "
+          f"{'dl MB/s':>8} {'sync MB/s':>10} {'synced':>7}")
+    for r in results:
+        print(f"{r['scenario']:<18} {r['scan']['files_per_sec'] or '-':>9} "
+              f"{r['scan']['files']:>4}/{r['scan']['expected']:<4} {r['metadata']['files_per_sec'] or '-':>9} "
+              f"{r['metadata']['modify_times']:>7} {r['download']['mb_per_sec'] or '-':>8} "
+              f"{r['sync']['mb_per_sec'] or '-':>10} {r['sync']['synced']:>3}/{r['sync']['files']:<3}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark FTP scan, transfer and metadata sync on fake Castus servers')
+    parser.add_argument('--scenario', action='append', help='name:key=value,... (repeatable)')
+    parser.add_argument('--files-per-folder', type=int, default=20)
+    parser.add_argument('--file-size', type=int, default=8 * MB, help='Content file size in bytes')
+    parser.add_argument('--transfer-files', type=int, default=10, help='Files downloaded and synced per scenario')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='Also write the results to this file')
+    parser.add_argument('--verbose', action='store_true', help='Show FTP manager and scanner logging')
+    args = parser.parse_args()
+
+    if args.verbose:
+        logging.basicConfig(level=logging.INFO)
+    else:
+        logging.disable(logging.CRITICAL)
+    scenarios = [parse_scenario(text) for text in (args.scenario or DEFAULT_SCENARIOS)]
+
+    source_root = tempfile.mkdtemp(prefix='castus_source_')
+    try:
+        remote_paths = build_castus_tree(source_root, args.files_per_folder, args.file_size,
+                                         mount=CASTUS_MOUNT, seed=args.seed)
+        print(f"Castus tree: {len(remote_paths)} files of {args.file_size / MB:.1f} MB")
+
+        results = []
+        for name, conditions in scenarios:
+            print(f"Running scenario {name} {conditions}")
+            results.append(run_scenario(name, conditions, source_root, remote_paths, args.transfer_files))
+    finally:
+        shutil.rmtree(source_root, ignore_errors=True)
+
+    print_results(results)
+    if args.json:
+        args.json = os.path.join(LAUNCH_DIR, args.json)
+        with open(args.json, 'w') as f:
+            json.dump({'files': len(remote_paths), 'file_size': args.file_size, 'results': results}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
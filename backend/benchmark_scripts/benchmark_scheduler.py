@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Scheduler benchmark on a synthetic content library.
+
+Backends:
+  postgres  Creates a throwaway database (dropped afterwards unless
+            --keep-database), loads the schema, the scheduling migrations and
+            a synthetic library, and times create_daily_schedule,
+            create_single_weekly_schedule, create_monthly_schedule and the
+            fill-template-gaps engine through the Flask test client. The
+            library is reloaded before every run so each starts from the same
+            airing history.
+  memory    No database: builds the same ranges (1 day, 7 days, a month)
+            with the day builder of parallel_schedule on the library in
+            memory. Featured content is the manually featured assets only,
+            and fill-gaps is skipped since it runs inside the web app.
+
+Reported per operation: scheduled slots (items), median seconds, slots/sec,
+database queries (cursor executes) and the peak Python memory of an extra
+run under tracemalloc.
+
+Examples:
+  python benchmark_scripts/benchmark_scheduler.py --backend memory --size 5000
+  python benchmark_scripts/benchmark_scheduler.py --admin-url postgresql://postgres@localhost/postgres \\
+      --operations daily weekly fill_gaps --repeat 3 --json results.json
+"""
+
+import argparse
+import getpass
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import parallel_schedule
+from config_manager import ConfigManager
+from synthetic_library import build_profile, generate_library, load_library, snapshot_rows
+
+OPERATIONS = ('daily', 'weekly', 'monthly', 'fill_gaps')
+
+# Schema of a benchmark database: the base schema and the migrations the
+# scheduler depends on, in order
+SCHEMA_FILES = (
+    'schema.sql',
+    'migrations/add_featured_field.sql',
+    'migrations/add_go_live_date.sql',
+    'migrations/add_metadata_synced_at.sql',
+    'migrations/add_castus_metadata_modified_at.sql',
+    'migrations/add_available_for_scheduling_to_items.sql',
+    'migrations/add_time_precision.sql',
+    'migrations/add_schedulable_assets_table.sql',
+    'migrations/add_holiday_greeting_flag.sql',
+    'migrations/add_holiday_greeting_rotation.sql',
+    'migrations/add_holiday_greetings_days_table.sql',
+    'migrations/make_holiday_greetings_schedule_id_nullable.sql',
+)
+
+# Asset columns added outside the migrations directory
+SCHEMA_PRELUDE = """
+    ALTER TABLE assets ADD COLUMN IF NOT EXISTS theme VARCHAR(255);
+    ALTER TABLE assets ADD COLUMN IF NOT EXISTS meeting_date DATE;
+"""
+
+
+class QueryCounter:
+    """Counts statements executed on connections handed out by db_manager"""
+
+    def __init__(self):
+        self.count = 0
+
+    def reset(self):
+        self.count = 0
+
+    def install(self, db_manager):
+        get_connection = db_manager._get_connection
+        put_connection = db_manager._put_connection
+        counter = self
+
+        def counted_get_connection():
+            return _CountingConnection(get_connection(), counter)
+
+        def counted_put_connection(conn):
+            put_connection(conn._conn if isinstance(conn, _CountingConnection) else conn)
+
+        db_manager._get_connection = counted_get_connection
+        db_manager._put_connection = counted_put_connection
+
+
+class _CountingConnection:
+    def __init__(self, conn, counter):
+        object.__setattr__(self, '_conn', conn)
+        object.__setattr__(self, '_counter', counter)
+
+    def cursor(self, *args, **kwargs):
+        return _CountingCursor(self._conn.cursor(*args, **kwargs), self._counter)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._conn.__exit__(*exc)
+
+
+class _CountingCursor:
+    def __init__(self, cursor, counter):
+        self._cursor = cursor
+        self._counter = counter
+
+    def execute(self, *args, **kwargs):
+        self._counter.count += 1
+        return self._cursor.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        self._counter.count += 1
+        return self._cursor.executemany(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+        return False
+
+
+def measure(name, run, reset, repeat, counter=None, trace_memory=True):
+    """Time run() (which returns the number of slots scheduled) repeat times"""
+    timings = []
+    slots = 0
+    queries = 0
+    for _ in range(repeat):
+        reset()
+        if counter:
+            counter.reset()
+        started = time.perf_counter()
+        slots = run()
+        timings.append(time.perf_counter() - started)
+        queries = counter.count if counter else 0
+
+    peak_memory = None
+    if trace_memory:
+        reset()
+        tracemalloc.start()
+        try:
+            run()
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    seconds = statistics.median(timings)
+    return {
+        'operation': name,
+        'slots': slots,
+        'seconds': round(seconds, 3),
+        'slots_per_sec': round(slots / seconds, 1) if seconds else None,
+        'queries': queries,
+        'peak_memory_mb': round(peak_memory / (1024 * 1024), 1) if peak_memory is not None else None,
+        'runs': repeat,
+    }
+
+
+def month_days(start):
+    next_month = (start.replace(day=1) + timedelta(days=32)).replace(day=1)
+    return (next_month - start.replace(day=1)).days
+
+
+# --- memory backend -------------------------------------------------------
+
+def build_snapshot(rows, start, days, seed, scheduling_config):
+    """ScheduleSnapshot of the library rows, filtered as _load_schedule_snapshot does"""
+    end = start + timedelta(days=days)
+    candidates = [parallel_schedule.snapshot_row(row) for row in rows
+                  if row['available_for_scheduling'] and
+                  (row['content_expiry_date'] is None or row['content_expiry_date'] > start) and
+                  (row['go_live_date'] is None or row['go_live_date'] <= end)]
+    featured_by_day = []
+    for day_index in range(days):
+        day_start = start + timedelta(days=day_index)
+        featured_by_day.append([candidate for candidate in candidates
+                                if candidate['featured'] and parallel_schedule.is_available_on(candidate, day_start)])
+
+    rotation = scheduling_config.get('rotation_order') or ['id', 'short_form', 'long_form', 'spots']
+    featured_config = scheduling_config.get('featured_content', {})
+    return parallel_schedule.ScheduleSnapshot(
+        start_date=start,
+        days=days,
+        rotation=rotation,
+        candidates=candidates,
+        featured_by_day=featured_by_day,
+        replay_delays={category: parallel_schedule.replay_delay_settings(category, scheduling_config)
+                       for category in rotation},
+        featured_delay=featured_config.get('minimum_spacing', 2.0),
+        featured_config=featured_config,
+        seed=seed
+    )
+
+
+def run_memory(args, library, start):
+    scheduling_config = ConfigManager().get_scheduling_settings()
+    rows = snapshot_rows(library)
+    ranges = {'daily': 1, 'weekly': 7, 'monthly': month_days(start)}
+    results = []
+
+    for operation in args.operations:
+        if operation not in ranges:
+            print(f"Skipping {operation}: needs the postgres backend")
+            continue
+
+        def run(days=ranges[operation]):
+            snapshot = build_snapshot(rows, start, days, args.seed, scheduling_config)
+            day_results = parallel_schedule.build_days(snapshot, args.workers)
+            stitched, _ = parallel_schedule.stitch(snapshot, day_results)
+            return sum(len(items) for items in stitched)
+
+        results.append(measure(operation, run, lambda: None, args.repeat, trace_memory=not args.no_memory))
+    return results
+
+
+# --- postgres backend -----------------------------------------------------
+
+def database_url(base_url, dbname):
+    from psycopg2.extensions import make_dsn, parse_dsn
+    params = parse_dsn(base_url)
+    params['dbname'] = dbname
+    return make_dsn(**params)
+
+
+def create_database(admin_url, dbname):
+    import psycopg2
+    conn = psycopg2.connect(admin_url)
+    conn.autocommit = True
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f'DROP DATABASE IF EXISTS "{dbname}"')
+        cursor.execute(f'CREATE DATABASE "{dbname}"')
+        cursor.close()
+    finally:
+        conn.close()
+
+
+def drop_database(admin_url, dbname):
+    import psycopg2
+    conn = psycopg2.connect(admin_url)
+    conn.autocommit = True
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f'DROP DATABASE IF EXISTS "{dbname}"')
+        cursor.close()
+    finally:
+        conn.close()
+
+
+def apply_schema(conn):
+    cursor = conn.cursor()
+    for index, path in enumerate(SCHEMA_FILES):
+        with open(os.path.join(BACKEND_DIR, path)) as f:
+            cursor.execute(f.read())
+        if index == 0:
+            cursor.execute(SCHEMA_PRELUDE)
+    conn.commit()
+    cursor.close()
+
+
+def run_postgres(args, library, start):
+    import psycopg2
+
+    dbname = args.database or f"ftp_media_sync_bench_{os.getpid()}"
+    bench_url = database_url(args.admin_url, dbname)
+    create_database(args.admin_url, dbname)
+    print(f"Created benchmark database {dbname}")
+
+    try:
+        setup_conn = psycopg2.connect(bench_url)
+        try:
+            apply_schema(setup_conn)
+
+            # The scheduler and app pick the database up at import
+            os.environ['USE_POSTGRESQL'] = 'true'
+            os.environ['DATABASE_URL'] = bench_url
+            from database import db_manager
+            from scheduler_postgres import scheduler_postgres
+            if not db_manager.connected and not db_manager.connect():
+                raise RuntimeError("Could not connect to the benchmark database")
+
+            counter = QueryCounter()
+            counter.install(db_manager)
+            scheduling_config = ConfigManager().get_scheduling_settings()
+            max_errors = scheduling_config.get('max_consecutive_errors', 100)
+            start_str = start.strftime('%Y-%m-%d')
+
+            def reset():
+                load_library(setup_conn, library)
+                scheduler_postgres._reset_rotation()
+
+            def daily():
+                result = scheduler_postgres.create_daily_schedule(start_str, 'Benchmark daily', max_errors,
+                                                                  seed=args.seed)
+                return result.get('total_items', 0)
+
+            def weekly():
+                result = scheduler_postgres.create_single_weekly_schedule(start_str, 'Benchmark weekly', max_errors,
+                                                                          parallel=args.parallel, seed=args.seed)
+                return result.get('total_items', 0)
+
+            def monthly():
+                result = scheduler_postgres.create_monthly_schedule(start.year, start.month, max_errors,
+                                                                    parallel=args.parallel, seed=args.seed)
+                return result.get('total_items', 0)
+
+            def fill_gaps():
+                from app import app
+                with app.test_client() as client:
+                    response = client.post('/api/fill-template-gaps', json={
+                        'template': {'type': 'daily', 'items': []},
+                        'content_filters': {},
+                        'schedule_date': start_str,
+                        'seed': args.seed,
+                    })
+                return len(response.get_json().get('items_added') or [])
+
+            runs = {'daily': daily, 'weekly': weekly, 'monthly': monthly, 'fill_gaps': fill_gaps}
+            return [measure(operation, runs[operation], reset, args.repeat, counter, not args.no_memory)
+                    for operation in args.operations]
+        finally:
+            setup_conn.close()
+    finally:
+        if args.keep_database:
+            print(f"Kept benchmark database {dbname}")
+        else:
+            try:
+                from database import db_manager
+                db_manager.disconnect()
+            except Exception:
+                pass
+            drop_database(args.admin_url, dbname)
+
+
+def print_results(results):
+    print(f"\n{'operation':<10} {'slots':>7} {'seconds':>9} {'slots/sec':>10} {'queries':>8} {'peak MB':>8}")
+    for result in results:
+        peak = '-' if result['peak_memory_mb'] is None else result['peak_memory_mb']
+        print(f"{result['operation']:<10} {result['slots']:>7} {result['seconds']:>9} "
+              f"{result['slots_per_sec'] or '-':>10} {result['queries']:>8} {peak:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark schedule generation on a synthetic library')
+    parser.add_argument('--backend', choices=('postgres', 'memory'), default='postgres')
+    parser.add_argument('--operations', nargs='+', choices=OPERATIONS, default=list(OPERATIONS))
+    parser.add_argument('--start-date', help='First schedule day (YYYY-MM-DD, default next Sunday)')
+    parser.add_argument('--seed', type=int, default=1, help='Seed of the library and of the schedule builds')
+    parser.add_argument('--repeat', type=int, default=1, help='Timed runs per operation (median is reported)')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the tracemalloc run')
+    parser.add_argument('--json', help='Also write the results to this file')
+    parser.add_argument('--parallel', action='store_true', default=None,
+                        help='Build weekly/monthly schedules with parallel generation')
+    parser.add_argument('--workers', type=int, default=1, help='Day builder processes (memory backend)')
+    parser.add_argument('--admin-url', default=f'postgresql://{getpass.getuser()}@localhost/postgres',
+                        help='Connection used to create and drop the benchmark database')
+    parser.add_argument('--database', help='Benchmark database name (default ftp_media_sync_bench_<pid>)')
+    parser.add_argument('--keep-database', action='store_true')
+
+    library_group = parser.add_argument_group('synthetic library')
+    library_group.add_argument('--size', type=int)
+    library_group.add_argument('--mix', help='Duration category shares, e.g. id=0.2,spots=0.4,short_form=0.3,long_form=0.1')
+    library_group.add_argument('--expired', type=float)
+    library_group.add_argument('--expiring', type=float)
+    library_group.add_argument('--future-go-live', type=float)
+    library_group.add_argument('--featured', type=float)
+    library_group.add_argument('--holiday-greetings', type=float)
+    library_group.add_argument('--previously-aired', type=float)
+    args = parser.parse_args()
+
+    # Relative paths (config.json) resolve as for the app
+    if args.json:
+        args.json = os.path.abspath(args.json)
+    os.chdir(BACKEND_DIR)
+
+    if args.start_date:
+        start = datetime.strptime(args.start_date, '%Y-%m-%d')
+    else:
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        start = today + timedelta(days=(6 - today.weekday()) % 7 or 7)
+
+    mix = None
+    if args.mix:
+        mix = {key: float(value) for key, value in (part.split('=') for part in args.mix.split(','))}
+    profile = build_profile(size=args.size, duration_mix=mix, expired=args.expired, expiring=args.expiring,
+                            future_go_live=args.future_go_live, featured=args.featured,
+                            holiday_greetings=args.holiday_greetings, previously_aired=args.previously_aired)
+    library = generate_library(profile, start, seed=args.seed)
+    print(f"Synthetic library: {len(library)} assets, schedules from {start.strftime('%Y-%m-%d')}")
+
+    if args.backend == 'memory':
+        results = run_memory(args, library, start)
+    else:
+        results = run_postgres(args, library, start)
+
+    print_results(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'backend': args.backend, 'start_date': start.strftime('%Y-%m-%d'),
+                       'profile': profile, 'results': results}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
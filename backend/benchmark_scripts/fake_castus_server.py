@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for a Castus FTP server.
+
+Serves a directory laid out like a Castus box over FTP (pyftpdlib), so
+FTPManager, FileScanner, CastusMetadataHandler and sync can be exercised and
+benchmarked without the real servers:
+
+  <root>/mnt/main/ATL26 On-Air Content/<FOLDER>/<YYMMDD>_<TYPE>_<title>.mp4
+  <root>/mnt/main/ATL26 On-Air Content/<FOLDER>/.castusmeta.<file name>/metadata
+
+build_castus_tree() creates such a tree (content files are sparse, so large
+libraries cost no disk). FakeCastusServer serves it with optional conditions:
+
+  mlsd=False        MLSD/MLST are not implemented (LIST only), as on older boxes
+  latency           Seconds added before every command reply
+  bandwidth         Data connection limit in bytes/sec (both directions)
+  disconnect_every  Drop the control connection every N commands
+
+FTPManager quotes paths containing spaces; quoted arguments are unquoted
+before the command runs.
+
+Needs pyftpdlib, which is not an app requirement:
+  pip install -r benchmark_scripts/requirements.txt
+
+Run standalone:
+  python benchmark_scripts/fake_castus_server.py --root /tmp/castus --build --port 2121 --list-only
+"""
+
+import argparse
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from pyftpdlib.authorizers import DummyAuthorizer
+from pyftpdlib.handlers import FTPHandler, ThrottledDTPHandler
+from pyftpdlib.ioloop import IOLoop
+from pyftpdlib.servers import ThreadedFTPServer
+
+logger = logging.getLogger(__name__)
+
+CASTUS_MOUNT = '/mnt/main'
+CONTENT_ROOT = 'ATL26 On-Air Content'
+
+# Castus content folders and the content type codes filed in them
+CASTUS_FOLDERS = {
+    'ATLANTA NOW': 'AN',
+    'BUMPS': 'BMP',
+    'IMOW': 'IMOW',
+    'INSIDE ATLANTA': 'IA',
+    'LEGISLATIVE MINUTE': 'LM',
+    'MEETINGS': 'MTG',
+    'MOVING ATLANTA FORWARD': 'MAF',
+    'PKGS': 'PKG',
+    'PROMOS': 'PMO',
+    'PSAs': 'PSA',
+    'SIZZLES': 'SZL',
+    'SPECIAL PROJECTS': 'SPP',
+}
+
+
+def _metadata_date(date):
+    return date.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')
+
+
+def build_castus_tree(root, files_per_folder=50, file_size=1024 * 1024, metadata_share=0.8,
+                      folders=None, mount=CASTUS_MOUNT, seed=0):
+    """
+    Create a Castus style content tree below root
+
+    Args:
+        root: Local directory served as the FTP root
+        files_per_folder: Content files in each folder
+        file_size: Size of each content file in bytes (sparse)
+        metadata_share: Share of files with a .castusmeta metadata file
+        folders: Folder name -> content type code (default CASTUS_FOLDERS)
+        mount: Castus mount point the content root is under
+        seed: Seed for file names and content windows
+
+    Returns:
+        List of remote paths of the content files
+    """
+    rng = random.Random(seed)
+    folders = folders or CASTUS_FOLDERS
+    now = datetime.now(timezone.utc)
+    content_dir = os.path.join(root, mount.strip('/'), CONTENT_ROOT)
+    remote_paths = []
+
+    for folder, content_type in folders.items():
+        local_folder = os.path.join(content_dir, folder)
+        os.makedirs(local_folder, exist_ok=True)
+        for index in range(files_per_folder):
+            encoded = now - timedelta(days=rng.randint(0, 365))
+            file_name = f"{encoded:%y%m%d}_{content_type}_{folder.title()} Segment {index:04d}.mp4"
+            with open(os.path.join(local_folder, file_name), 'wb') as f:
+                f.truncate(file_size)
+
+            if rng.random() < metadata_share:
+                metadata_dir = os.path.join(local_folder, f".castusmeta.{file_name}")
+                os.makedirs(metadata_dir, exist_ok=True)
+                go_live = encoded + timedelta(days=rng.randint(0, 7))
+                expiry = go_live + timedelta(days=rng.randint(30, 365))
+                with open(os.path.join(metadata_dir, 'metadata'), 'w') as f:
+                    f.write(f"content window open={_metadata_date(go_live)}\n"
+                            f"content window close={_metadata_date(expiry)}\n")
+
+            remote_paths.append(f"{mount}/{CONTENT_ROOT}/{folder}/{file_name}")
+
+    # Castus boxes also hold recordings the scanner has to skip
+    os.makedirs(os.path.join(root, mount.strip('/'), 'Recordings'), exist_ok=True)
+    logger.info(f"Built Castus tree with {len(remote_paths)} files in {len(folders)} folders under {root}")
+    return remote_paths
+
+
+def make_handler(root, user='castus', password='castus', mlsd=True, latency=0.0,
+                 bandwidth=0, disconnect_every=0):
+    """FTPHandler class serving root with the given conditions"""
+    authorizer = DummyAuthorizer()
+    authorizer.add_user(user, password, root, perm='elradfmwMT')
+
+    class CastusDTPHandler(ThrottledDTPHandler):
+        read_limit = bandwidth
+        write_limit = bandwidth
+
+    class CastusFTPHandler(FTPHandler):
+        banner = "Castus FTP server ready (benchmark stand-in)"
+        commands_seen = 0
+
+        def pre_process_command(self, line, cmd, arg):
+            self.commands_seen += 1
+            if disconnect_every and self.commands_seen % disconnect_every == 0:
+                logger.debug(f"Dropping connection after {self.commands_seen} commands")
+                self.close()
+                return
+            if latency:
+                # Threaded server: only this connection waits
+                time.sleep(latency)
+            if arg and len(arg) > 1 and arg.startswith('"') and arg.endswith('"'):
+                arg = arg[1:-1]
+            super().pre_process_command(line, cmd, arg)
+
+    CastusFTPHandler.authorizer = authorizer
+    CastusFTPHandler.dtp_handler = CastusDTPHandler if bandwidth else FTPHandler.dtp_handler
+    if not mlsd:
+        CastusFTPHandler.proto_cmds = {name: info for name, info in FTPHandler.proto_cmds.items()
+                                       if name not in ('MLSD', 'MLST')}
+    return CastusFTPHandler
+
+
+class FakeCastusServer:
+    """
+    Fake Castus FTP server running in a background thread
+
+    Use as a context manager; config is an FTPManager server configuration
+    pointing at it.
+    """
+
+    def __init__(self, root, host='127.0.0.1', port=0, user='castus', password='castus',
+                 path=f"{CASTUS_MOUNT}/{CONTENT_ROOT}", **conditions):
+        self.root = root
+        self.user = user
+        self.password = password
+        self.path = path
+        self.handler = make_handler(root, user, password, **conditions)
+        # Own IO loop, so several servers (sync source and target) can run in one process
+        self.server = ThreadedFTPServer((host, port), self.handler, ioloop=IOLoop())
+        self.host, self.port = self.server.address[:2]
+        self._serving = False
+        self._thread = None
+
+    @property
+    def config(self):
+        return {
+            'host': self.host,
+            'port': self.port,
+            'user': self.user,
+            'password': self.password,
+            'path': self.path,
+        }
+
+    def _serve(self):
+        try:
+            while self._serving:
+                self.server.serve_forever(timeout=0.05, blocking=False, handle_exit=False)
+        finally:
+            self.server.close_all()
+
+    def start(self):
+        self._serving = True
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        logger.info(f"Fake Castus server on {self.host}:{self.port} serving {self.root}")
+        return self
+
+    def stop(self):
+        self._serving = False
+        if self._thread:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a Castus style directory over FTP')
+    parser.add_argument('--root', required=True, help='Local directory served as the FTP root')
+    parser.add_argument('--build', action='store_true', help='Create a Castus content tree in root first')
+    parser.add_argument('--files-per-folder', type=int, default=50)
+    parser.add_argument('--file-size', type=int, default=1024 * 1024)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=2121)
+    parser.add_argument('--user', default='castus')
+    parser.add_argument('--password', default='castus')
+    parser.add_argument('--list-only', action='store_true', help='Disable MLSD/MLST')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every command')
+    parser.add_argument('--bandwidth', type=int, default=0, help='Data transfer limit in bytes/sec')
+    parser.add_argument('--disconnect-every', type=int, default=0, help='Drop connections every N commands')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.build:
+        build_castus_tree(args.root, args.files_per_folder, args.file_size)
+
+    server = FakeCastusServer(args.root, args.host, args.port, args.user, args.password,
+                              mlsd=not args.list_only, latency=args.latency,
+                              bandwidth=args.bandwidth, disconnect_every=args.disconnect_every)
+    logger.info(f"Serving {args.root} on {server.host}:{server.port} (user {args.user})")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server.close_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Synthetic content libraries for scheduler benchmarks.
+
+generate_library() builds a reproducible library of assets from a profile
+(size, duration category mix, content types, expiry / go live distribution,
+featured and holiday greeting share, airing history). The library is plain
+dicts, so it can be scheduled in memory (as parallel_schedule snapshot rows)
+or loaded into a throwaway PostgreSQL database with load_library().
+"""
+
+import random
+from datetime import datetime, timedelta
+
+# Default library profile; every key can be overridden from the command line
+DEFAULT_PROFILE = {
+    'size': 2000,
+    # Share of each duration category, and its duration range in seconds
+    'duration_mix': {'id': 0.20, 'spots': 0.35, 'short_form': 0.30, 'long_form': 0.15},
+    'duration_ranges': {
+        'id': (5, 15),
+        'spots': (15, 120),
+        'short_form': (120, 1200),
+        'long_form': (1200, 7200),
+    },
+    # Content types drawn per duration category
+    'content_types': {
+        'id': ['szl', 'other'],
+        'spots': ['psa', 'pmo', 'an', 'spp'],
+        'short_form': ['pkg', 'bmp', 'imow', 'im', 'ia', 'lm', 'maf'],
+        'long_form': ['mtg', 'imow', 'other'],
+    },
+    # Share of assets expired before the start date, expiring within
+    # expiring_within_days of it, and going live within go_live_within_days
+    'expired': 0.05,
+    'expiring': 0.15,
+    'expiring_within_days': 30,
+    'future_go_live': 0.05,
+    'go_live_within_days': 14,
+    'featured': 0.03,
+    'holiday_greetings': 0.04,
+    # Share of assets with an airing in the history_days before the start date
+    'previously_aired': 0.6,
+    'history_days': 14,
+    'themes': ['Budget', 'Public Safety', 'Parks', 'Transportation', 'Housing', 'Arts', 'Health'],
+    'themed': 0.3,
+}
+
+
+def build_profile(**overrides):
+    """DEFAULT_PROFILE with the given keys replaced (None values are ignored)"""
+    profile = {key: (dict(value) if isinstance(value, dict) else value)
+               for key, value in DEFAULT_PROFILE.items()}
+    profile.update({key: value for key, value in overrides.items() if value is not None})
+    return profile
+
+
+def _pick_weighted(rng, weights):
+    keys = list(weights)
+    return rng.choices(keys, weights=[weights[key] for key in keys])[0]
+
+
+def generate_library(profile, start_date: datetime, seed: int = 0):
+    """
+    Generate profile['size'] assets around start_date
+
+    Returns a list of dicts with the asset, instance and scheduling metadata
+    fields the scheduler reads. The same profile, start date and seed give
+    the same library.
+    """
+    rng = random.Random(seed)
+    library = []
+
+    for index in range(profile['size']):
+        category = _pick_weighted(rng, profile['duration_mix'])
+        low, high = profile['duration_ranges'][category]
+        duration = round(rng.uniform(low, high), 3)
+        content_type = rng.choice(profile['content_types'][category])
+
+        is_holiday_greeting = category in ('spots', 'short_form') and rng.random() < profile['holiday_greetings']
+        theme = rng.choice(profile['themes']) if rng.random() < profile['themed'] else None
+        if is_holiday_greeting:
+            title = f"Holiday Greeting {index:05d}"
+        elif theme:
+            title = f"{theme} Update {index:05d}"
+        else:
+            title = f"{content_type.upper()} Program {index:05d}"
+        file_name = f"{index:05d}_{content_type.upper()}_{title.replace(' ', '_')}.mp4"
+
+        # Expiry and go live windows relative to the schedule start
+        roll = rng.random()
+        expiry_date = None
+        go_live_date = None
+        if roll < profile['expired']:
+            expiry_date = start_date - timedelta(days=rng.uniform(1, 60))
+        elif roll < profile['expired'] + profile['expiring']:
+            expiry_date = start_date + timedelta(days=rng.uniform(0, profile['expiring_within_days']))
+        elif roll < profile['expired'] + profile['expiring'] + profile['future_go_live']:
+            go_live_date = start_date + timedelta(days=rng.uniform(0, profile['go_live_within_days']))
+
+        last_scheduled = None
+        total_airings = 0
+        if rng.random() < profile['previously_aired']:
+            last_scheduled = start_date - timedelta(hours=rng.uniform(1, profile['history_days'] * 24))
+            total_airings = rng.randint(1, 40)
+
+        library.append({
+            'index': index,
+            'content_type': content_type,
+            'content_title': title,
+            'summary': f"Synthetic benchmark asset {index}",
+            'theme': theme,
+            'duration_seconds': duration,
+            'duration_category': category,
+            'engagement_score': rng.randint(0, 100),
+            'is_holiday_greeting': is_holiday_greeting,
+            'file_name': file_name,
+            'file_path': f"/mnt/main/Benchmark/{category}/{file_name}",
+            'file_size': int(duration * 1_000_000),
+            'encoded_date': start_date - timedelta(days=rng.uniform(0, 365)),
+            'available_for_scheduling': True,
+            'content_expiry_date': expiry_date,
+            'go_live_date': go_live_date,
+            'featured': rng.random() < profile['featured'],
+            'last_scheduled_date': last_scheduled,
+            'total_airings': total_airings,
+        })
+
+    return library
+
+
+def snapshot_rows(library):
+    """The library as parallel_schedule snapshot rows (asset ids are 1-based indexes)"""
+    rows = []
+    for asset in library:
+        row = dict(asset)
+        row['asset_id'] = asset['index'] + 1
+        row['instance_id'] = asset['index'] + 1
+        rows.append(row)
+    return rows
+
+
+def load_library(conn, library):
+    """
+    Replace the content of a benchmark database with the library
+
+    Clears assets (and everything referencing them) and schedules, then
+    bulk inserts assets, primary instances and scheduling metadata. The
+    schedulable_assets triggers keep that table in step. Commits.
+    """
+    from psycopg2.extras import execute_values
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute("TRUNCATE schedules, scheduled_items, scheduling_metadata, instances, assets RESTART IDENTITY CASCADE")
+
+        asset_ids = execute_values(cursor, """
+            INSERT INTO assets (content_type, content_title, summary, theme, duration_seconds,
+                                duration_category, engagement_score, is_holiday_greeting,
+                                analysis_completed)
+            VALUES %s
+            RETURNING id
+        """, [(a['content_type'], a['content_title'], a['summary'], a['theme'], a['duration_seconds'],
+               a['duration_category'], a['engagement_score'], a['is_holiday_greeting'], True)
+              for a in library], page_size=1000, fetch=True)
+        asset_ids = [row[0] for row in asset_ids]
+
+        execute_values(cursor, """
+            INSERT INTO instances (asset_id, file_name, file_path, file_size, file_duration,
+                                   storage_location, encoded_date, is_primary)
+            VALUES %s
+        """, [(asset_id, a['file_name'], a['file_path'], a['file_size'], a['duration_seconds'],
+               'primary', a['encoded_date'], True)
+              for asset_id, a in zip(asset_ids, library)], page_size=1000)
+
+        execute_values(cursor, """
+            INSERT INTO scheduling_metadata (asset_id, available_for_scheduling, content_expiry_date,
+                                             go_live_date, featured, last_scheduled_date, total_airings)
+            VALUES %s
+        """, [(asset_id, a['available_for_scheduling'], a['content_expiry_date'], a['go_live_date'],
+               a['featured'], a['last_scheduled_date'], a['total_airings'])
+              for asset_id, a in zip(asset_ids, library)], page_size=1000)
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
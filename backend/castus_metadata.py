@@ -10,14 +10,86 @@ Example metadata file path structure:
 
 import json
 import os
+import re
+import queue
 import tempfile
 import logging
-from datetime import datetime
-from typing import Optional, Dict, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, Iterable, Set, Tuple
 from ftp_manager import FTPManager
+from remote_path_cache import server_key
 
 logger = logging.getLogger(__name__)
 
+# Parallel FTP connections used by batch metadata reads
+METADATA_READ_WORKERS = 4
+
+# Field names as they appear in the different metadata formats
+CONTENT_WINDOW_FIELDS = {
+    'open': ('content window open', 'contentwindowopen'),
+    'close': ('content window close', 'contentwindowclose'),
+}
+
+CONTENT_WINDOW_XML_PATTERNS = {
+    'open': re.compile(r'<(?:contentWindowOpen|content_window_open)>(.*?)</(?:contentWindowOpen|content_window_open)>', re.IGNORECASE),
+    'close': re.compile(r'<(?:contentWindowClose|content_window_close)>(.*?)</(?:contentWindowClose|content_window_close)>', re.IGNORECASE),
+}
+
+
+class MetadataContentCache:
+    """
+    Last known content of remote metadata files, validated by size and
+    modify time before use (an ETag-like check that costs one MLST instead
+    of a download)
+    """
+    
+    def __init__(self):
+        self._entries = {}  # (server_key, metadata_path) -> (size, modify, content)
+        self._lock = threading.Lock()
+    
+    def get(self, server: str, metadata_path: str, stat: Optional[Dict[str, Any]]) -> Optional[str]:
+        if not stat or stat.get('modify') is None:
+            return None
+        with self._lock:
+            entry = self._entries.get((server, metadata_path))
+        if entry and entry[0] == stat.get('size') and entry[1] == stat.get('modify'):
+            return entry[2]
+        return None
+    
+    def put(self, server: str, metadata_path: str, stat: Optional[Dict[str, Any]], content: str):
+        with self._lock:
+            self._entries[(server, metadata_path)] = (
+                stat.get('size') if stat else None,
+                stat.get('modify') if stat else None,
+                content
+            )
+
+
+# Shared by all handlers
+metadata_content_cache = MetadataContentCache()
+
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    A datetime as timezone-aware UTC, for comparing metadata dates with the
+    database. Naive values (Castus dates without an offset) are taken as
+    local time, as they are when stored in a timestamptz column.
+    """
+    return value.astimezone(timezone.utc) if value else None
+
+
+def _parse_modify_fact(value: Optional[str]) -> Optional[datetime]:
+    """An MLST/MDTM modify time (UTC per RFC 3659, optionally with fractional seconds) as a datetime"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value[:14], '%Y%m%d%H%M%S').replace(tzinfo=timezone.utc)
+    except ValueError:
+        logger.debug(f"Unparseable modify time: {value}")
+        return None
+
 
 class CastusMetadataHandler:
     """Handles reading and processing Castus metadata files"""
@@ -78,6 +150,130 @@ class CastusMetadataHandler:
         # Parse metadata and extract expiration
         return self._extract_content_window_close(metadata_content, file_path)
     
+    def get_content_windows(self, file_path: str) -> Dict[str, Optional[datetime]]:
+        """
+        Read both content window dates with a single metadata download
+        
+        Args:
+            file_path: Path to the content file on the server
+        
+        Returns:
+            Dict with 'open' and 'close' datetimes (None when absent) and
+            'found' telling whether the metadata file could be read
+        """
+        metadata_path = self._construct_metadata_path(file_path)
+        logger.debug(f"Reading content windows from: {metadata_path}")
+        
+        metadata_content = self._download_metadata_file(metadata_path)
+        if not metadata_content:
+            logger.warning(f"Could not retrieve metadata for: {file_path}")
+            return {'open': None, 'close': None, 'found': False}
+        
+        windows = self._extract_content_windows(metadata_content, file_path)
+        windows['found'] = True
+        return windows
+    
+    def read_content_windows_batch(self, file_paths: Iterable[str],
+                                   max_workers: int = METADATA_READ_WORKERS) -> Dict[str, Dict[str, Any]]:
+        """
+        Read content windows for many files, one download per file
+        
+        Reads are spread over up to max_workers FTP connections: this
+        handler's connection plus extra ones opened with the same server
+        configuration and closed when the batch finishes.
+        
+        Args:
+            file_paths: Content file paths on the server
+            max_workers: Number of parallel FTP connections
+        
+        Returns:
+            Dict mapping each file path to the result of get_content_windows
+        """
+        paths = list(dict.fromkeys(path for path in file_paths if path))
+        if not paths:
+            return {}
+        
+        workers = max(1, min(max_workers, len(paths)))
+        if workers == 1:
+            return {path: self.get_content_windows(path) for path in paths}
+        
+        extra_connections = [FTPManager(self.ftp.config) for _ in range(workers - 1)]
+        pool = queue.Queue()
+        for ftp in [self.ftp] + extra_connections:
+            pool.put(ftp)
+        
+        def read_windows(path):
+            ftp = pool.get()
+            try:
+                return path, CastusMetadataHandler(ftp).get_content_windows(path)
+            finally:
+                pool.put(ftp)
+        
+        results = {}
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for path, windows in executor.map(read_windows, paths):
+                    results[path] = windows
+        finally:
+            for ftp in extra_connections:
+                ftp.disconnect()
+        
+        found = sum(1 for windows in results.values() if windows['found'])
+        logger.info(f"Read Castus metadata for {found}/{len(paths)} files using {workers} connections")
+        return results
+    
+    def get_metadata_modify_times(self, file_paths: Iterable[str]) -> Tuple[Dict[str, datetime], Set[str]]:
+        """
+        Remote modify time of each file's Castus metadata file
+        
+        Lists each content folder once (MLSD) to find the files that have a
+        .castusmeta directory, then stats the metadata file inside it (MLST,
+        no download). The directory's own time is not used, since rewriting
+        the metadata file in place doesn't change it.
+        
+        Files without a .castusmeta directory get the content folder's modify
+        time instead, as a "no metadata" marker: creating a metadata
+        directory changes the folder's time, so the marker only stays the
+        same while the folder doesn't change. Files whose folder can't be
+        listed are left out of the result.
+        
+        Args:
+            file_paths: Content file paths on the server
+        
+        Returns:
+            Tuple of (dict mapping file path to a timezone-aware UTC datetime,
+            set of the file paths that have no metadata)
+        """
+        paths_by_directory = {}
+        for file_path in file_paths:
+            if file_path:
+                paths_by_directory.setdefault(os.path.dirname(file_path), []).append(file_path)
+        
+        modify_times = {}
+        without_metadata = set()
+        for directory, paths in paths_by_directory.items():
+            entries = self.ftp.list_directory_facts(directory)
+            if entries is None:
+                logger.debug(f"Could not list {directory}, metadata there will be read in full")
+                continue
+            folder_modified_at = None
+            for file_path in paths:
+                if f".castusmeta.{os.path.basename(file_path)}" not in entries:
+                    without_metadata.add(file_path)
+                    if folder_modified_at is None:
+                        folder_modified_at = _parse_modify_fact((self.ftp.stat_file(directory) or {}).get('modify'))
+                    if folder_modified_at:
+                        modify_times[file_path] = folder_modified_at
+                    continue
+                modified_at = _parse_modify_fact((self.ftp.stat_file(self._construct_metadata_path(file_path)) or {}).get('modify'))
+                if modified_at:
+                    modify_times[file_path] = modified_at
+        
+        logger.info(f"Got metadata modify times for {len(modify_times)} files "
+                    f"({len(without_metadata)} without metadata) "
+                    f"from {len(paths_by_directory)} folder listings")
+        return modify_times, without_metadata
+    
     def _construct_metadata_path(self, file_path: str) -> str:
         """
         Construct the metadata file path from content file path
@@ -102,39 +298,92 @@ class CastusMetadataHandler:
         """
         Download metadata file from server and return its content
         
+        The file is small, so it is read straight into memory.
+        
         Args:
             metadata_path: Full path to metadata file on server
         
         Returns:
             Content of metadata file as string, or None if download fails
         """
-        temp_path = None
         try:
-            # Create temporary file
-            temp_fd, temp_path = tempfile.mkstemp(suffix='.metadata')
-            os.close(temp_fd)
-            
-            # Try to download the file
-            logger.debug(f"Downloading metadata file to: {temp_path}")
-            success = self.ftp.download_file(metadata_path, temp_path)
-            
-            if not success:
+            data = self.ftp.read_file(metadata_path)
+            if not data:
                 logger.error(f"Failed to download metadata file: {metadata_path}")
                 return None
             
-            # Read the content
-            with open(temp_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            return content
+            return data.decode('utf-8')
             
         except Exception as e:
             logger.error(f"Error reading metadata file: {str(e)}")
             return None
-        finally:
-            # Cleanup temp file
-            if temp_path and os.path.exists(temp_path):
-                os.remove(temp_path)
+    
+    def _find_content_window_values(self, metadata_content: str) -> Dict[str, Optional[str]]:
+        """
+        Find the raw 'content window open' and 'content window close' values
+        
+        The metadata might be in various formats (JSON, XML, or key-value
+        pairs). Formats are tried in that order and the content is scanned
+        once for both fields.
+        """
+        values = {'open': None, 'close': None}
+        
+        # First, try parsing as JSON
+        try:
+            data = json.loads(metadata_content)
+            if isinstance(data, dict):
+                # Look for content window fields (case-insensitive)
+                for key, value in data.items():
+                    key_lower = key.lower()
+                    for window, names in CONTENT_WINDOW_FIELDS.items():
+                        if values[window] is None and key_lower in names:
+                            values[window] = value
+                if values['open'] is not None and values['close'] is not None:
+                    return values
+        except json.JSONDecodeError:
+            logger.debug("Metadata is not valid JSON, trying other formats")
+        
+        # Try parsing as key-value pairs (one per line)
+        for line in metadata_content.strip().split('\n'):
+            if '=' in line or ':' in line:
+                # Handle both = and : as separators
+                separator = '=' if '=' in line else ':'
+                parts = line.split(separator, 1)
+                if len(parts) == 2:
+                    key = parts[0].strip().lower()
+                    for window, names in CONTENT_WINDOW_FIELDS.items():
+                        if values[window] is None and any(name in key for name in names):
+                            values[window] = parts[1].strip()
+        
+        # Try XML format (simple parsing)
+        for window, pattern in CONTENT_WINDOW_XML_PATTERNS.items():
+            if values[window] is None:
+                match = pattern.search(metadata_content)
+                if match:
+                    values[window] = match.group(1)
+        
+        return values
+    
+    def _extract_content_windows(self, metadata_content: str, file_path: str) -> Dict[str, Optional[datetime]]:
+        """
+        Extract both content window dates from metadata content
+        
+        Args:
+            metadata_content: Raw content of metadata file
+            file_path: Original file path (for logging)
+        
+        Returns:
+            Dict with 'open' and 'close' datetimes, None when not found
+        """
+        windows = {'open': None, 'close': None}
+        try:
+            values = self._find_content_window_values(metadata_content)
+            for window, value in values.items():
+                if value is not None:
+                    windows[window] = self._parse_date_string(value)
+        except Exception as e:
+            logger.error(f"Error parsing metadata content: {str(e)}")
+        return windows
     
     def _extract_content_window_open(self, metadata_content: str, file_path: str) -> Optional[datetime]:
         """
@@ -147,56 +396,16 @@ class CastusMetadataHandler:
         Returns:
             datetime object with go live date, or None if not found
         """
-        try:
-            # First, try parsing as JSON
-            try:
-                data = json.loads(metadata_content)
-                if isinstance(data, dict):
-                    # Look for content window open field (case-insensitive)
-                    for key, value in data.items():
-                        if key.lower() == 'content window open' or key.lower() == 'contentwindowopen':
-                            return self._parse_date_string(value)
-            except json.JSONDecodeError:
-                logger.debug("Metadata is not valid JSON, trying other formats")
-            
-            # Try parsing as key-value pairs (one per line)
-            lines = metadata_content.strip().split('\n')
-            for line in lines:
-                if '=' in line or ':' in line:
-                    # Handle both = and : as separators
-                    separator = '=' if '=' in line else ':'
-                    parts = line.split(separator, 1)
-                    if len(parts) == 2:
-                        key = parts[0].strip().lower()
-                        value = parts[1].strip()
-                        
-                        if 'content window open' in key or 'contentwindowopen' in key:
-                            return self._parse_date_string(value)
-            
-            # Try XML format (simple parsing)
-            if '<contentWindowOpen>' in metadata_content or '<content_window_open>' in metadata_content:
-                import re
-                # Extract value between XML tags
-                pattern = r'<(?:contentWindowOpen|content_window_open)>(.*?)</(?:contentWindowOpen|content_window_open)>'
-                match = re.search(pattern, metadata_content, re.IGNORECASE)
-                if match:
-                    return self._parse_date_string(match.group(1))
-            
+        go_live = self._extract_content_windows(metadata_content, file_path)['open']
+        if go_live is None:
             logger.warning(f"Could not find 'content window open' in metadata for: {file_path}")
             logger.debug(f"Metadata content sample: {metadata_content[:200]}...")
-            
-        except Exception as e:
-            logger.error(f"Error parsing metadata content: {str(e)}")
-        
-        return None
+        return go_live
     
     def _extract_content_window_close(self, metadata_content: str, file_path: str) -> Optional[datetime]:
         """
         Extract 'content window close' field from metadata content
         
-        The metadata might be in various formats (JSON, XML, or key-value pairs)
-        This function attempts to parse and extract the expiration date.
-        
         Args:
             metadata_content: Raw content of metadata file
             file_path: Original file path (for logging)
@@ -204,48 +413,11 @@ class CastusMetadataHandler:
         Returns:
             datetime object with expiration date, or None if not found
         """
-        try:
-            # First, try parsing as JSON
-            try:
-                data = json.loads(metadata_content)
-                if isinstance(data, dict):
-                    # Look for content window close field (case-insensitive)
-                    for key, value in data.items():
-                        if key.lower() == 'content window close' or key.lower() == 'contentwindowclose':
-                            return self._parse_date_string(value)
-            except json.JSONDecodeError:
-                logger.debug("Metadata is not valid JSON, trying other formats")
-            
-            # Try parsing as key-value pairs (one per line)
-            lines = metadata_content.strip().split('\n')
-            for line in lines:
-                if '=' in line or ':' in line:
-                    # Handle both = and : as separators
-                    separator = '=' if '=' in line else ':'
-                    parts = line.split(separator, 1)
-                    if len(parts) == 2:
-                        key = parts[0].strip().lower()
-                        value = parts[1].strip()
-                        
-                        if 'content window close' in key or 'contentwindowclose' in key:
-                            return self._parse_date_string(value)
-            
-            # Try XML format (simple parsing)
-            if '<contentWindowClose>' in metadata_content or '<content_window_close>' in metadata_content:
-                import re
-                # Extract value between XML tags
-                pattern = r'<(?:contentWindowClose|content_window_close)>(.*?)</(?:contentWindowClose|content_window_close)>'
-                match = re.search(pattern, metadata_content, re.IGNORECASE)
-                if match:
-                    return self._parse_date_string(match.group(1))
-            
+        expiration = self._extract_content_windows(metadata_content, file_path)['close']
+        if expiration is None:
             logger.warning(f"Could not find 'content window close' in metadata for: {file_path}")
             logger.debug(f"Metadata content sample: {metadata_content[:200]}...")
-            
-        except Exception as e:
-            logger.error(f"Error parsing metadata content: {str(e)}")
-        
-        return None
+        return expiration
     
     def _parse_date_string(self, date_str: str) -> Optional[datetime]:
         """
@@ -363,24 +535,124 @@ class CastusMetadataHandler:
         Returns:
             True if successfully written, False otherwise
         """
-        # Construct metadata file path
-        metadata_path = self._construct_metadata_path(file_path)
-        logger.info(f"Writing content windows metadata to: {metadata_path}")
+        logger.info(f"Writing content windows metadata for: {file_path}")
         
         try:
-            # First, try to read existing metadata
-            existing_content = self._download_metadata_file(metadata_path)
-            
-            # Prepare the new content with both dates
-            new_content = self._prepare_metadata_content_with_both_dates(existing_content, go_live_date, expiration_date)
-            
-            # Write the metadata file
-            return self._upload_metadata_file(metadata_path, new_content)
+            # Only uploads when the dates differ from the current metadata
+            status = self.write_content_windows_batch({file_path: (go_live_date, expiration_date)})
+            return status.get(file_path) in ('updated', 'unchanged')
             
         except Exception as e:
             logger.error(f"Error writing content windows metadata: {str(e)}")
             return False
     
+    def _read_current_metadata(self, metadata_path: str) -> Optional[str]:
+        """
+        Current metadata content, served from the content cache when the
+        remote size and modify time still match
+        """
+        server = server_key(self.ftp.config)
+        stat = self.ftp.stat_file(metadata_path)
+        cached = metadata_content_cache.get(server, metadata_path, stat)
+        if cached is not None:
+            return cached
+        
+        content = self._download_metadata_file(metadata_path)
+        if content is not None:
+            metadata_content_cache.put(server, metadata_path, stat, content)
+        return content
+    
+    def _content_windows_match(self, existing_content: Optional[str], go_live_date: Optional[datetime],
+                               expiration_date: Optional[datetime]) -> bool:
+        """Whether the metadata already carries exactly the desired window values"""
+        if existing_content is None:
+            return False
+        current = self._find_content_window_values(existing_content)
+        desired = {
+            'open': self._format_date_for_metadata(go_live_date) if go_live_date else None,
+            'close': self._format_date_for_metadata(expiration_date) if expiration_date else None,
+        }
+        return all(
+            (current[window] or None) == desired[window]
+            for window in ('open', 'close')
+        )
+    
+    def plan_content_window_writes(self, windows_by_file: Dict[str, tuple]) -> list:
+        """
+        Work out which metadata files need rewriting
+        
+        Args:
+            windows_by_file: Dict mapping content file path to a
+                             (go_live_date, expiration_date) tuple
+        
+        Returns:
+            List of dicts with file_path, metadata_path, content (new file
+            content or None when unchanged) and changed
+        """
+        plan = []
+        for file_path, (go_live_date, expiration_date) in windows_by_file.items():
+            metadata_path = self._construct_metadata_path(file_path)
+            existing_content = self._read_current_metadata(metadata_path)
+            if self._content_windows_match(existing_content, go_live_date, expiration_date):
+                plan.append({'file_path': file_path, 'metadata_path': metadata_path,
+                             'content': None, 'changed': False})
+                continue
+            plan.append({
+                'file_path': file_path,
+                'metadata_path': metadata_path,
+                'content': self._prepare_metadata_content_with_both_dates(existing_content, go_live_date, expiration_date),
+                'changed': True
+            })
+        return plan
+    
+    def apply_content_window_writes(self, plan: list) -> Dict[str, str]:
+        """
+        Upload the changed entries of a write plan, batched per content directory
+        
+        Returns:
+            Dict mapping content file path to 'updated', 'unchanged' or 'failed'
+        """
+        results = {}
+        by_directory = {}
+        for entry in plan:
+            if not entry['changed']:
+                results[entry['file_path']] = 'unchanged'
+                continue
+            directory = os.path.dirname(entry['file_path'])
+            relative_path = entry['metadata_path'][len(directory):].lstrip('/')
+            by_directory.setdefault(directory, {})[relative_path] = entry
+        
+        for directory, entries in by_directory.items():
+            upload_results = self.ftp.write_files(
+                directory,
+                {relative_path: entry['content'].encode('utf-8') for relative_path, entry in entries.items()}
+            )
+            for relative_path, entry in entries.items():
+                if upload_results.get(relative_path):
+                    results[entry['file_path']] = 'updated'
+                else:
+                    results[entry['file_path']] = 'failed'
+        
+        updated = sum(1 for status in results.values() if status == 'updated')
+        logger.info(f"Castus metadata writes: {updated} updated, "
+                    f"{sum(1 for status in results.values() if status == 'unchanged')} unchanged, "
+                    f"{sum(1 for status in results.values() if status == 'failed')} failed "
+                    f"across {len(by_directory)} directories")
+        return results
+    
+    def write_content_windows_batch(self, windows_by_file: Dict[str, tuple]) -> Dict[str, str]:
+        """
+        Write content windows for many files, uploading only those that differ
+        
+        Args:
+            windows_by_file: Dict mapping content file path to a
+                             (go_live_date, expiration_date) tuple
+        
+        Returns:
+            Dict mapping content file path to 'updated', 'unchanged' or 'failed'
+        """
+        return self.apply_content_window_writes(self.plan_content_window_writes(windows_by_file))
+    
     def _prepare_metadata_content(self, existing_content: Optional[str], expiration_date: Optional[datetime]) -> str:
         """
         Prepare metadata content with updated expiration date
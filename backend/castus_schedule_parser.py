@@ -0,0 +1,250 @@
+"""
+Single-pass parser for Castus .sch schedule files.
+
+Castus times come as "12:00 am", "1:30:15.040 pm", "wed 12:00:15.040 am" or
+plain 24-hour "13:30:15". They are matched with precompiled regexes instead
+of strptime, items are kept in a compact slotted class while parsing, and the
+parser can be fed line by line or chunk by chunk so a schedule is parsed while
+it downloads. Results match what the original app.py parser produced.
+"""
+
+import codecs
+import logging
+import posixpath
+import re
+
+logger = logging.getLogger(__name__)
+
+DAY_INDEX = {'sun': 0, 'mon': 1, 'tue': 2, 'wed': 3, 'thu': 4, 'fri': 5, 'sat': 6}
+
+# Fractional seconds anywhere in a time string ("1:00:15.040 am")
+FRACTION_RE = re.compile(r'\.(\d+)')
+
+# The patterns strptime uses for %I:%M[:%S] %p and %H:%M[:%S]
+TIME_12H_RE = re.compile(r'(1[0-2]|0[1-9]|[1-9]):([0-5]\d|\d)(?::(6[0-1]|[0-5]\d|\d))?\s+(am|pm)', re.IGNORECASE)
+TIME_24H_RE = re.compile(r'(2[0-3]|[0-1]\d|\d):([0-5]\d|\d)(?::(6[0-1]|[0-5]\d|\d))?')
+
+SECONDS_PER_DAY = 24 * 60 * 60
+MAX_ITEM_DURATION = 7 * SECONDS_PER_DAY
+
+
+def convert_to_24hour_format(time_str):
+    """Convert Castus time format (12-hour with am/pm) to 24-hour format (HH:MM:SS or HH:MM:SS.mmm)"""
+    try:
+        fraction = FRACTION_RE.search(time_str)
+        match = TIME_12H_RE.fullmatch(FRACTION_RE.sub('', time_str))
+    except TypeError as e:
+        logger.error(f"Error converting time format: {e}")
+        return "00:00:00"
+
+    # Anything else might already be 24-hour, return it as-is
+    if not match:
+        return time_str
+    hours, minutes, seconds, meridiem = match.groups()
+    seconds = int(seconds or 0)
+    if seconds > 59:
+        return time_str
+
+    hours = int(hours) % 12 + (12 if meridiem.lower() == 'pm' else 0)
+    result = f"{hours:02d}:{int(minutes):02d}:{seconds:02d}"
+    if fraction:
+        result += f".{fraction.group(1)}"
+    return result
+
+
+def parse_time_with_day(time_str):
+    """
+    Parse a Castus time into (day index or None, whole seconds into the day, fractional seconds)
+
+    Raises ValueError if the time can't be parsed.
+    """
+    day_index = None
+    if ' ' in time_str:
+        prefix, rest = time_str.split(' ', 1)
+        if len(prefix) <= 3 and prefix.lower() in DAY_INDEX:
+            day_index = DAY_INDEX[prefix.lower()]
+            time_str = rest
+
+    fraction = FRACTION_RE.search(time_str)
+    fraction_seconds = float(f"0.{fraction.group(1)}") if fraction else 0.0
+    time_clean = FRACTION_RE.sub('', time_str).strip()
+
+    match = TIME_12H_RE.fullmatch(time_clean)
+    if match:
+        hours = int(match.group(1)) % 12 + (12 if match.group(4).lower() == 'pm' else 0)
+    else:
+        match = TIME_24H_RE.fullmatch(time_clean)
+        if not match:
+            raise ValueError(f"Unable to parse time: {time_str}")
+        hours = int(match.group(1))
+    seconds = int(match.group(3) or 0)
+    if seconds > 59:
+        raise ValueError(f"Unable to parse time: {time_str}")
+
+    return day_index, hours * 3600 + int(match.group(2)) * 60 + seconds, fraction_seconds
+
+
+def calculate_duration_from_times(start_time, end_time):
+    """Calculate duration in seconds from start/end time strings"""
+    try:
+        start_day, start_seconds, start_fraction = parse_time_with_day(start_time)
+        end_day, end_seconds, end_fraction = parse_time_with_day(end_time)
+    except Exception as e:
+        logger.error(f"Error calculating duration: {e}")
+        return 0
+
+    if start_day is not None and end_day is not None:
+        # Weekly schedule, wrap around the end of the week
+        end_seconds += ((end_day - start_day) % 7) * SECONDS_PER_DAY
+    elif end_seconds < start_seconds:
+        # Crosses midnight
+        end_seconds += SECONDS_PER_DAY
+
+    total_duration = float(end_seconds - start_seconds) + (end_fraction - start_fraction)
+
+    if total_duration < 0:
+        logger.error(f"Negative duration calculated: {total_duration}s. Start: {start_time}, End: {end_time}")
+        return 0
+    if total_duration > MAX_ITEM_DURATION:
+        logger.error(f"Duration exceeds 7 days: {total_duration}s. Start: {start_time}, End: {end_time}")
+        return 0
+    return total_duration
+
+
+class ScheduleItem:
+    """One parsed schedule entry"""
+
+    __slots__ = ('file_path', 'start_time', 'end_time', 'guid', 'loop', 'duration_seconds')
+
+    def __init__(self, file_path, start_time, end_time, guid, loop, duration_seconds=None):
+        self.file_path = file_path
+        self.start_time = start_time
+        self.end_time = end_time
+        self.guid = guid
+        self.loop = loop
+        self.duration_seconds = duration_seconds
+
+    @property
+    def filename(self):
+        return posixpath.basename(self.file_path)
+
+    def to_dict(self):
+        item = {
+            'file_path': self.file_path,
+            'filename': self.filename,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'guid': self.guid,
+            'loop': self.loop
+        }
+        if self.duration_seconds is not None:
+            item['duration_seconds'] = self.duration_seconds
+        return item
+
+
+class CastusScheduleParser:
+    """
+    Incremental .sch parser
+
+    Feed it lines (feed_line / iter_items) or raw bytes as they arrive
+    (feed_bytes then finish); the schedule type and header are collected
+    along the way.
+    """
+
+    def __init__(self):
+        self.type = 'daily'
+        self.header = {}
+        self.items_parsed = 0
+        self._block = None
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._partial = ''
+
+    def feed_line(self, line):
+        """Consume one line, returning a ScheduleItem when it closes an item block"""
+        line = line.strip()
+        if not line:
+            return None
+
+        if line == '*daily':
+            self.type = 'daily'
+        elif line == '*weekly':
+            self.type = 'weekly'
+        elif line.startswith('day = '):
+            # Weekly format without *weekly header
+            self.type = 'weekly'
+            self.header['day'] = line.split('=')[1].strip()
+        elif line == '{':
+            self._block = {}
+        elif line == '}' and self._block is not None:
+            block = self._block
+            self._block = None
+            if 'item' in block:
+                return self._make_item(block)
+        elif self._block is not None:
+            if '=' in line:
+                key, value = line.split('=', 1)
+                self._block[key.strip()] = value.strip()
+        elif '=' in line:
+            key, value = line.split('=', 1)
+            self.header[key.strip()] = value.strip()
+        return None
+
+    def _make_item(self, block):
+        start_time = block.get('start', '')
+        end_time = block.get('end', '')
+        item = ScheduleItem(block['item'], start_time, end_time,
+                            block.get('guid', '').strip('{}'), block.get('loop', '0'))
+        self.items_parsed += 1
+
+        if start_time and end_time:
+            item.duration_seconds = calculate_duration_from_times(start_time, end_time)
+            if item.duration_seconds > SECONDS_PER_DAY:
+                logger.error(f"Duration of {item.filename} exceeds 24 hours: "
+                             f"{start_time} - {end_time} ({item.duration_seconds}s)")
+
+            # Keep the day prefix of weekly times, convert the clock part to 24-hour
+            if self.type == 'weekly' and ' ' in start_time:
+                day_prefix, time_part = start_time.split(' ', 1)
+                if len(day_prefix) <= 3:
+                    item.start_time = f"{day_prefix} {convert_to_24hour_format(time_part)}"
+                else:
+                    item.start_time = convert_to_24hour_format(start_time)
+            else:
+                item.start_time = convert_to_24hour_format(start_time)
+        return item
+
+    def iter_items(self, lines):
+        """Yield ScheduleItems from an iterable of lines"""
+        for line in lines:
+            item = self.feed_line(line)
+            if item is not None:
+                yield item
+
+    def feed_bytes(self, data):
+        """Consume a chunk of the raw file, returning the items it completed"""
+        text = self._partial + self._decoder.decode(data)
+        lines = text.split('\n')
+        self._partial = lines.pop()
+        return list(self.iter_items(lines))
+
+    def finish(self):
+        """Flush the last line after feed_bytes, returning any item it completed"""
+        text = self._partial + self._decoder.decode(b'', final=True)
+        self._partial = ''
+        return list(self.iter_items(text.split('\n')))
+
+    def schedule_data(self, items):
+        """The schedule in the dict shape the API returns"""
+        return {
+            'type': self.type,
+            'items': [item.to_dict() for item in items],
+            'header': self.header
+        }
+
+
+def parse_castus_schedule(content):
+    """Parse Castus schedule file format"""
+    parser = CastusScheduleParser()
+    items = list(parser.iter_items(content.split('\n')))
+    logger.debug(f"Parsed {parser.type} schedule with {len(items)} items")
+    return parser.schedule_data(items)
@@ -61,6 +61,11 @@ class ConfigManager:
                 "default_export_server": "target",
                 "default_export_path": "/mnt/md127/Schedules/Contributors/Jay",
                 "max_consecutive_errors": 100,
+                # Build weekly/monthly schedules day by day in worker processes
+                "parallel_generation": {
+                    "enabled": False,
+                    "workers": 0  # 0 = one per CPU
+                },
                 "featured_content": {
                     "daytime_hours": {"start": 6, "end": 18},
                     "daytime_probability": 0.75,
@@ -0,0 +1,120 @@
+"""
+Go-live and expiry windows of fill candidates as offsets from the template start.
+
+fill_template_gaps used to re-parse each candidate's scheduling dates (ISO,
+date-only or with timezone) at every slot and for every replay delay factor.
+Here they are normalized once into seconds relative to the template base
+date, so availability at a position is a float comparison, and candidates
+whose expiry has passed are dropped from the active index as the fill moves
+forward.
+"""
+
+import logging
+from datetime import date, datetime
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 86400
+
+
+def parse_schedule_date(value):
+    """Normalize a scheduling date (datetime, date, ISO or YYYY-MM-DD string) to a naive datetime"""
+    if not value:
+        return None
+    if isinstance(value, str):
+        if 'T' in value:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        else:
+            parsed = datetime.strptime(value, '%Y-%m-%d')
+    elif isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, date):
+        parsed = datetime(value.year, value.month, value.day)
+    else:
+        raise ValueError(f"Unsupported date value: {value!r}")
+    # Dates are compared without timezone, as the air dates are naive
+    return parsed.replace(tzinfo=None) if parsed.tzinfo else parsed
+
+
+class ContentAvailabilityIndex:
+    """
+    Candidate content with go-live/expiry as seconds from the template base date
+
+    Content airs on a date (the base date, or base date + day for weekly
+    templates). It is unavailable when it goes live after that date or
+    expires on or before it, the same rule as the old per-call check.
+    """
+
+    def __init__(self, content_by_id, base_date, schedule_type):
+        self.schedule_type = schedule_type
+        self._content_by_id = content_by_id
+        self._windows = {}  # content_id -> (go_live offset or None, expiry offset or None)
+        self.parse_errors = 0
+
+        base = base_date.replace(tzinfo=None) if base_date.tzinfo else base_date
+        for content_id, content in content_by_id.items():
+            scheduling = content.get('scheduling') or {}
+            self._windows[content_id] = (
+                self._offset(content, 'go_live_date', scheduling.get('go_live_date'), base),
+                self._offset(content, 'content_expiry_date', scheduling.get('content_expiry_date'), base)
+            )
+
+        # Expiring content ordered by expiry, to drop it as the fill moves on
+        self._by_expiry = sorted(
+            (window[1], content_id) for content_id, window in self._windows.items() if window[1] is not None
+        )
+        self._reset()
+
+        logger.info(f"Content availability index: {len(self._windows)} items, "
+                    f"{len(self._by_expiry)} with expiry, {self.parse_errors} unparseable dates")
+
+    def _offset(self, content, field, value, base):
+        try:
+            parsed = parse_schedule_date(value)
+        except (ValueError, TypeError) as e:
+            # Unparseable dates don't restrict scheduling, as before
+            self.parse_errors += 1
+            logger.warning(f"Error parsing {field} for content {content.get('id')}: {e}")
+            return None
+        return (parsed - base).total_seconds() if parsed else None
+
+    def _reset(self):
+        self._active = dict(self._content_by_id)
+        self._expired_upto = 0
+        self._air_offset = None
+
+    def air_offset(self, position):
+        """Seconds from the base date to the start of the air date of a template position"""
+        if self.schedule_type == 'weekly':
+            return int(position // SECONDS_PER_DAY) * SECONDS_PER_DAY
+        return 0
+
+    def advance(self, position):
+        """Drop content that has expired by the air date of position from the active index"""
+        air = self.air_offset(position)
+        if self._air_offset is not None and air < self._air_offset:
+            # The fill went back to an earlier day, start from the full set again
+            self._reset()
+        self._air_offset = air
+
+        while self._expired_upto < len(self._by_expiry) and self._by_expiry[self._expired_upto][0] <= air:
+            content_id = self._by_expiry[self._expired_upto][1]
+            self._active.pop(content_id, None)
+            self._expired_upto += 1
+            logger.debug(f"Content {content_id} expired by day offset {air // SECONDS_PER_DAY}, "
+                         f"dropped from active index")
+
+    def active_items(self):
+        """(content_id, content) pairs not yet expired at the current fill position"""
+        return self._active.items()
+
+    def is_unavailable(self, content_id, position):
+        """True if the content has not gone live or has expired on the air date of position"""
+        go_live, expiry = self._windows.get(content_id, (None, None))
+        air = self.air_offset(position)
+        if go_live is not None and go_live > air:
+            return True
+        return expiry is not None and expiry <= air
+
+    def has_expiry(self, content_id):
+        return self._windows.get(content_id, (None, None))[1] is not None
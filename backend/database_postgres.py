@@ -1,15 +1,173 @@
 import os
 import logging
+import time
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 from psycopg2.pool import ThreadedConnectionPool
 from psycopg2.extensions import register_adapter, AsIs
 import uuid
+import json
+import base64
 from datetime import datetime
 from typing import List, Dict, Any, Optional
+from db_instrumentation import InstrumentedConnection, add_query_observer
+import metrics
+import query_tracer
 
 logger = logging.getLogger(__name__)
 
+# Inline equivalent of the schedulable_assets table (see
+# migrations/add_schedulable_assets_table.sql), used until the migration runs.
+# Formatted with the is_holiday_greeting column from holiday_greeting_column('a').
+SCHEDULABLE_ASSETS_SUBQUERY = """
+    (
+        SELECT DISTINCT ON (a.id)
+            a.id AS asset_id,
+            a.guid,
+            a.mongo_id,
+            a.content_type,
+            a.content_title,
+            a.summary,
+            a.theme,
+            a.duration_seconds,
+            a.duration_category,
+            a.engagement_score,
+            a.analysis_completed,
+            a.created_at,
+            a.updated_at,
+            i.id AS instance_id,
+            i.file_name,
+            i.file_path,
+            i.file_size,
+            i.file_duration,
+            i.encoded_date,
+            COALESCE(sm.available_for_scheduling, TRUE) AS available_for_scheduling,
+            sm.content_expiry_date,
+            sm.go_live_date,
+            COALESCE(sm.featured, FALSE) AS featured,
+            sm.last_scheduled_date,
+            sm.total_airings,
+            sm.priority_score,
+            sm.optimal_timeslots,
+            sm.metadata_synced_at,
+            {is_holiday_greeting}
+        FROM assets a
+        JOIN instances i ON a.id = i.asset_id AND i.is_primary = TRUE
+        LEFT JOIN scheduling_metadata sm ON a.id = sm.asset_id
+        WHERE a.analysis_completed = TRUE
+        ORDER BY a.id, i.id
+    )
+"""
+
+# Columns of schedulable_assets, in table order (is_holiday_greeting is added
+# separately since it depends on add_holiday_greeting_flag.sql)
+SCHEDULABLE_ASSETS_COLUMNS = (
+    'asset_id', 'guid', 'mongo_id', 'content_type', 'content_title', 'summary', 'theme',
+    'duration_seconds', 'duration_category', 'engagement_score', 'analysis_completed',
+    'created_at', 'updated_at', 'instance_id', 'file_name', 'file_path', 'file_size',
+    'file_duration', 'encoded_date', 'available_for_scheduling', 'content_expiry_date',
+    'go_live_date', 'featured', 'last_scheduled_date', 'total_airings', 'priority_score',
+    'optimal_timeslots', 'metadata_synced_at',
+)
+
+# Analyzed assets without a primary instance, shaped like schedulable_assets
+# with NULL file fields. The analyzed content listing includes them; the
+# scheduling readers don't. Formatted like SCHEDULABLE_ASSETS_SUBQUERY.
+UNFILED_ANALYZED_ASSETS_QUERY = """
+    SELECT
+        a.id AS asset_id,
+        a.guid,
+        a.mongo_id,
+        a.content_type,
+        a.content_title,
+        a.summary,
+        a.theme,
+        a.duration_seconds,
+        a.duration_category,
+        a.engagement_score,
+        a.analysis_completed,
+        a.created_at,
+        a.updated_at,
+        NULL::integer AS instance_id,
+        NULL::varchar AS file_name,
+        NULL::text AS file_path,
+        NULL::bigint AS file_size,
+        NULL::numeric AS file_duration,
+        NULL::timestamptz AS encoded_date,
+        COALESCE(sm.available_for_scheduling, TRUE) AS available_for_scheduling,
+        sm.content_expiry_date,
+        sm.go_live_date,
+        COALESCE(sm.featured, FALSE) AS featured,
+        sm.last_scheduled_date,
+        sm.total_airings,
+        sm.priority_score,
+        sm.optimal_timeslots,
+        sm.metadata_synced_at,
+        {is_holiday_greeting}
+    FROM assets a
+    LEFT JOIN scheduling_metadata sm ON a.id = sm.asset_id
+    WHERE a.analysis_completed = TRUE
+    AND NOT EXISTS (
+        SELECT 1 FROM instances i WHERE i.asset_id = a.id AND i.is_primary = TRUE
+    )
+"""
+
+# Keyset sort options for get_analyzed_content_page:
+# name -> (((sort key, SQL type of the key), ...), default direction)
+# Keys are COALESCEd so row comparisons never see NULLs, and each sort has a
+# matching (keys..., asset_id) index on schedulable_assets, so a page is an
+# index range scan however deep it is (see add_schedulable_assets_table.sql)
+ANALYZED_CONTENT_SORTS = {
+    'priority': ((("COALESCE(sa.priority_score, 0)", 'numeric'),
+                  ("COALESCE(sa.engagement_score, -1)", 'integer')), 'desc'),
+    'id': ((), 'asc'),
+    'title': ((("COALESCE(sa.content_title, '')", 'text'),), 'asc'),
+    'file_name': ((("COALESCE(sa.file_name, '')", 'text'),), 'asc'),
+    'duration': ((("COALESCE(sa.file_duration, sa.duration_seconds, 0)", 'numeric'),), 'asc'),
+    'created_at': ((("COALESCE(sa.created_at, 'epoch'::timestamptz)", 'timestamptz'),), 'desc'),
+}
+
+# Pages run over the assets with a primary file first, then over the analyzed
+# assets without one
+PAGE_BRANCHES = ('filed', 'unfiled')
+
+
+def _cursor_value(value):
+    """JSON-safe form of a sort key value, cast back to its SQL type when decoded"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (int, str)):
+        return value
+    return str(value)  # Decimal, kept exact
+
+
+def _encode_page_cursor(sort: str, branch: str, sort_keys: list, asset_id: int) -> str:
+    """Encode the last (sort keys, id) of a page as an opaque cursor"""
+    raw = json.dumps({
+        's': sort,
+        'b': branch,
+        'k': [_cursor_value(value) for value in sort_keys],
+        'id': asset_id
+    }).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def _decode_page_cursor(cursor: str, sort: str):
+    """Decode a cursor produced by _encode_page_cursor for the given sort
+    
+    Returns:
+        Tuple of (branch, sort key values, asset id)
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        branch, sort_keys, asset_id = data['b'], list(data['k']), int(data['id'])
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+    if data.get('s') != sort or branch not in PAGE_BRANCHES or \
+            len(sort_keys) != len(ANALYZED_CONTENT_SORTS[sort][0]):
+        raise ValueError("Pagination cursor does not match the requested sort")
+    return branch, sort_keys, asset_id
+
 
 class PostgreSQLDatabaseManager:
     def __init__(self, connection_string=None):
@@ -24,12 +182,17 @@ class PostgreSQLDatabaseManager:
         self.collection = None  # Compatibility property for MongoDB checks
         self.client = None  # Compatibility property for MongoDB checks
         self.db = None  # Compatibility property for MongoDB checks
+        self._has_schedulable_assets = None  # Cached table existence check
+        self._has_holiday_greeting_flag = None  # Cached column existence check
     
     def _get_connection(self):
         """Get a connection from the pool"""
         if not self.pool:
             raise Exception("Database connection pool not initialized")
-        return self.pool.getconn()
+        started = time.perf_counter()
+        conn = self.pool.getconn()
+        query_tracer.record_checkout(time.perf_counter() - started)
+        return conn
     
     def _put_connection(self, conn):
         """Return a connection to the pool"""
@@ -42,8 +205,11 @@ class PostgreSQLDatabaseManager:
             self.pool = ThreadedConnectionPool(
                 1, 20,  # min and max connections
                 self.connection_string,
-                cursor_factory=RealDictCursor
+                cursor_factory=RealDictCursor,
+                connection_factory=InstrumentedConnection
             )
+            metrics.watch_pool(self.pool)
+            add_query_observer(metrics.observe_query)
             
             # Test connection
             conn = self._get_connection()
@@ -72,8 +238,117 @@ class PostgreSQLDatabaseManager:
             self.collection = None  # Reset compatibility property
             self.client = None  # Reset compatibility property
             self.db = None  # Reset compatibility property
+            self._has_schedulable_assets = None
+            self._has_holiday_greeting_flag = None
             logger.info("Disconnected from PostgreSQL")
     
+    def schedulable_assets_relation(self) -> str:
+        """Return the SQL relation for schedulable assets, to be aliased by the caller
+        
+        Uses the trigger-maintained schedulable_assets table when the migration
+        has been applied, otherwise an equivalent inline subquery.
+        """
+        if self._has_schedulable_assets is None:
+            conn = self._get_connection()
+            try:
+                cursor = conn.cursor(cursor_factory=psycopg2.extensions.cursor)
+                cursor.execute("SELECT to_regclass('public.schedulable_assets')")
+                self._has_schedulable_assets = cursor.fetchone()[0] is not None
+                cursor.close()
+                if not self._has_schedulable_assets:
+                    logger.warning("schedulable_assets table not found, using inline join "
+                                   "(run run_schedulable_assets_migration.py)")
+            except Exception as e:
+                logger.error(f"Error checking for schedulable_assets table: {str(e)}")
+                conn.rollback()
+                return SCHEDULABLE_ASSETS_SUBQUERY.format(is_holiday_greeting=self.holiday_greeting_column('a'))
+            finally:
+                self._put_connection(conn)
+        
+        if self._has_schedulable_assets:
+            return 'schedulable_assets'
+        return SCHEDULABLE_ASSETS_SUBQUERY.format(is_holiday_greeting=self.holiday_greeting_column('a'))
+    
+    def analyzed_assets_relation(self) -> str:
+        """Return the SQL relation read by the analyzed content listing, to be aliased by the caller
+        
+        The schedulable assets plus analyzed assets that have no primary
+        instance (with NULL file fields), as the listing returned before
+        the schedulable_assets table.
+        """
+        columns = ', '.join(f"s.{column}" for column in SCHEDULABLE_ASSETS_COLUMNS)
+        return f"""(
+            SELECT {columns}, {self.holiday_greeting_column('s')}
+            FROM {self.schedulable_assets_relation()} s
+            UNION ALL
+            {UNFILED_ANALYZED_ASSETS_QUERY.format(is_holiday_greeting=self.holiday_greeting_column('a'))}
+        )"""
+    
+    def has_holiday_greeting_flag(self) -> bool:
+        """Whether assets.is_holiday_greeting exists (add_holiday_greeting_flag.sql applied)
+        
+        The migration adds the column to assets and schedulable_assets together.
+        """
+        if self._has_holiday_greeting_flag is None:
+            conn = self._get_connection()
+            try:
+                cursor = conn.cursor(cursor_factory=psycopg2.extensions.cursor)
+                cursor.execute("""
+                    SELECT EXISTS (
+                        SELECT 1 FROM information_schema.columns
+                        WHERE table_name = 'assets' AND column_name = 'is_holiday_greeting'
+                    )
+                """)
+                self._has_holiday_greeting_flag = cursor.fetchone()[0]
+                cursor.close()
+                if not self._has_holiday_greeting_flag:
+                    logger.warning("assets.is_holiday_greeting not found, classifying holiday greetings "
+                                   "by name (run run_holiday_greeting_flag_migration.py)")
+            except Exception as e:
+                logger.error(f"Error checking for is_holiday_greeting column: {str(e)}")
+                conn.rollback()
+                return False
+            finally:
+                self._put_connection(conn)
+        
+        return self._has_holiday_greeting_flag
+    
+    def holiday_greeting_column(self, alias: str) -> str:
+        """Select-list entry for is_holiday_greeting of alias, NULL (unclassified) before the migration"""
+        if self.has_holiday_greeting_flag():
+            return f"{alias}.is_holiday_greeting"
+        return "NULL::boolean AS is_holiday_greeting"
+    
+    def refresh_schedulable_assets(self, asset_ids: List[int] = None) -> bool:
+        """Rebuild schedulable_assets rows (all rows when asset_ids is None)
+        
+        The triggers keep the table current; this is for repairs after bulk
+        loads that bypass them.
+        """
+        if not self.connected or self.schedulable_assets_relation() != 'schedulable_assets':
+            return False
+        
+        conn = self._get_connection()
+        try:
+            cursor = conn.cursor(cursor_factory=psycopg2.extensions.cursor)
+            if asset_ids is None:
+                cursor.execute("SELECT refresh_all_schedulable_assets()")
+                logger.info(f"Rebuilt schedulable_assets: {cursor.fetchone()[0]} rows")
+            else:
+                cursor.execute("""
+                    SELECT refresh_schedulable_asset(asset_id)
+                    FROM unnest(%s::integer[]) AS asset_id
+                """, (list(asset_ids),))
+            conn.commit()
+            cursor.close()
+            return True
+        except Exception as e:
+            logger.error(f"Error refreshing schedulable assets: {str(e)}")
+            conn.rollback()
+            return False
+        finally:
+            self._put_connection(conn)
+    
     def check_analysis_status(self, files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Check which files have already been analyzed"""
         if not self.connected:
@@ -502,8 +777,6 @@ class PostgreSQLDatabaseManager:
                 asset_data['updated_at'] = datetime.utcnow()
                 
                 # Build update query with proper enum handling
-                from psycopg2.extensions import AsIs
-                
                 # Create update data with enum handling
                 update_data = asset_data.copy()
                 update_data['id'] = asset_id
@@ -571,9 +844,6 @@ class PostgreSQLDatabaseManager:
                            f"duration_category: '{asset_data_with_enums['duration_category']}', "
                            f"shelf_life_score: '{asset_data_with_enums['shelf_life_score']}'")
                 
-                # Use psycopg2.extensions.AsIs to prevent quoting of enum values
-                from psycopg2.extensions import AsIs
-                
                 # Wrap enum values with AsIs to prevent quoting
                 asset_data_final = asset_data_with_enums.copy()
                 asset_data_final['content_type_enum'] = AsIs(f"'{asset_data_with_enums['content_type']}'::content_type")
@@ -1140,165 +1410,134 @@ class PostgreSQLDatabaseManager:
         finally:
             self._put_connection(conn)
     
+    def _analyzed_content_filters(self, content_type: str = '', duration_category: str = '',
+                                  search: str = '', featured_filter: str = ''):
+        """Build the WHERE clause and params shared by the analyzed content queries"""
+        where = ["(sa.file_path IS NULL OR NOT (sa.file_path LIKE %s))"]
+        params = ['%FILL%']
+        
+        if content_type:
+            where.append("sa.content_type = %s")
+            params.append(content_type.lower())  # Convert to lowercase for PostgreSQL enum
+        
+        if duration_category:
+            where.append("sa.duration_category = %s")
+            params.append(duration_category.lower())  # Convert to lowercase for PostgreSQL enum
+        
+        # Add search filter if provided
+        if search:
+            where.append("""(
+                LOWER(sa.file_name) LIKE %s OR 
+                LOWER(sa.content_title) LIKE %s OR 
+                LOWER(sa.summary) LIKE %s
+            )""")
+            search_pattern = f'%{search}%'
+            params.extend([search_pattern, search_pattern, search_pattern])
+        
+        # Add featured filter if provided
+        if featured_filter == 'featured':
+            where.append("sa.featured = TRUE")
+        elif featured_filter == 'not_featured':
+            where.append("sa.featured = FALSE")
+        
+        # Filter by availability flag only
+        # NOTE: Expiration date filtering should be done at schedule creation time
+        # by comparing expiry_date to the scheduled air date
+        where.append("sa.available_for_scheduling = TRUE")
+        
+        return ' AND '.join(where), params
+    
+    def _get_topics_for_assets(self, cursor, asset_ids: List[int]) -> Dict[int, List[str]]:
+        """Fetch topic tags for a set of assets in one query"""
+        topics_by_asset = {}
+        if not asset_ids:
+            return topics_by_asset
+        
+        cursor.execute("""
+            SELECT 
+                at.asset_id,
+                t.tag_name
+            FROM asset_tags at
+            JOIN tags t ON at.tag_id = t.id
+            JOIN tag_types tt ON t.tag_type_id = tt.id
+            WHERE at.asset_id = ANY(%s) AND tt.type_name = 'topic'
+        """, (asset_ids,))
+        
+        for tag_row in cursor.fetchall():
+            topics_by_asset.setdefault(tag_row['asset_id'], []).append(tag_row['tag_name'])
+        return topics_by_asset
+    
+    def _analyzed_content_from_row(self, row, topics: List[str]) -> Dict[str, Any]:
+        """Convert a schedulable_assets row to the MongoDB-compatible content format"""
+        return {
+            '_id': row['mongo_id'] or str(row['id']),
+            'id': row['id'],  # Include PostgreSQL ID
+            'guid': str(row['guid']),
+            'file_name': row['file_name'],
+            'file_path': row['file_path'],
+            'file_size': row['file_size'],
+            'file_duration': float(row['file_duration']) if row['file_duration'] else float(row['duration_seconds']) if row['duration_seconds'] else 0,
+            'duration_category': row['duration_category'],
+            'content_type': row['content_type'],
+            'content_title': row['content_title'],
+            'summary': row['summary'],
+            'theme': row.get('theme', ''),  # Add theme field
+            'topics': topics,  # Add topics from tags
+            'is_holiday_greeting': row.get('is_holiday_greeting'),
+            'engagement_score': row['engagement_score'],
+            'analysis_completed': row['analysis_completed'],
+            'scheduling': {
+                'available_for_scheduling': row.get('available_for_scheduling', True),
+                'content_expiry_date': row['content_expiry_date'],
+                'go_live_date': row.get('go_live_date'),
+                'last_scheduled_date': row['last_scheduled_date'],
+                'total_airings': row.get('total_airings', 0),
+                'priority_score': float(row['priority_score']) if row['priority_score'] else 0,
+                'optimal_timeslots': row.get('optimal_timeslots', []),
+                'featured': row.get('featured', False)  # Add featured field inside scheduling
+            }
+        }
+    
     def get_analyzed_content_for_scheduling(self, content_type: str = '', duration_category: str = '', search: str = '', featured_filter: str = '') -> List[Dict[str, Any]]:
         """Get analyzed content for scheduling with filters"""
         if not self.connected:
             return []
         
+        relation = self.analyzed_assets_relation()
         conn = self._get_connection()
         try:
             cursor = conn.cursor(cursor_factory=RealDictCursor)
             
-            # Build query
-            query = """
+            where_sql, params = self._analyzed_content_filters(
+                content_type, duration_category, search, featured_filter
+            )
+            
+            # Query the denormalized schedulable assets (plus analyzed assets
+            # without a file), ordered by priority score and engagement score
+            cursor.execute(f"""
                 SELECT 
-                    a.*,
-                    i.file_name,
-                    i.file_path,
-                    i.file_size,
-                    i.file_duration,
-                    sm.available_for_scheduling,
-                    sm.content_expiry_date,
-                    sm.go_live_date,
-                    sm.last_scheduled_date,
-                    sm.total_airings,
-                    sm.priority_score,
-                    sm.optimal_timeslots,
-                    CASE 
-                        WHEN EXISTS (
-                            SELECT 1 FROM information_schema.columns 
-                            WHERE table_name = 'scheduling_metadata' 
-                            AND column_name = 'featured'
-                        ) THEN COALESCE(sm.featured, FALSE)
-                        ELSE FALSE
-                    END as featured
-                FROM assets a
-                LEFT JOIN instances i ON a.id = i.asset_id AND i.is_primary = TRUE
-                LEFT JOIN scheduling_metadata sm ON a.id = sm.asset_id
-                WHERE a.analysis_completed = TRUE
-                AND (i.file_path IS NULL OR NOT (i.file_path LIKE %s))
-            """
-            
-            params = ['%FILL%']
-            
-            # Add filters
-            if content_type:
-                query += " AND a.content_type = %s"
-                params.append(content_type.lower())  # Convert to lowercase for PostgreSQL enum
-            
-            if duration_category:
-                query += " AND a.duration_category = %s"
-                params.append(duration_category.lower())  # Convert to lowercase for PostgreSQL enum
-            
-            # Add search filter if provided
-            if search:
-                query += """ AND (
-                    LOWER(i.file_name) LIKE %s OR 
-                    LOWER(a.content_title) LIKE %s OR 
-                    LOWER(a.summary) LIKE %s
-                )"""
-                search_pattern = f'%{search}%'
-                params.extend([search_pattern, search_pattern, search_pattern])
-            
-            # Add featured filter if provided
-            if featured_filter == 'featured':
-                query += """ AND (
-                    CASE 
-                        WHEN EXISTS (
-                            SELECT 1 FROM information_schema.columns 
-                            WHERE table_name = 'scheduling_metadata' 
-                            AND column_name = 'featured'
-                        ) THEN COALESCE(sm.featured, FALSE) = TRUE
-                        ELSE FALSE
-                    END
-                )"""
-            elif featured_filter == 'not_featured':
-                query += """ AND (
-                    CASE 
-                        WHEN EXISTS (
-                            SELECT 1 FROM information_schema.columns 
-                            WHERE table_name = 'scheduling_metadata' 
-                            AND column_name = 'featured'
-                        ) THEN COALESCE(sm.featured, FALSE) = FALSE
-                        ELSE TRUE
-                    END
-                )"""
-            
-            # Filter by availability flag only
-            # NOTE: Expiration date filtering should be done at schedule creation time
-            # by comparing expiry_date to the scheduled air date
-            query += """
-                AND COALESCE(sm.available_for_scheduling, TRUE) = TRUE
-            """
-            
-            # Order by priority score and engagement score
-            query += """
+                    sa.*,
+                    sa.asset_id AS id
+                FROM {relation} sa
+                WHERE {where_sql}
                 ORDER BY 
-                    COALESCE(sm.priority_score, 0) DESC,
-                    a.engagement_score DESC NULLS LAST
-            """
-            
-            cursor.execute(query, params)
+                    COALESCE(sa.priority_score, 0) DESC,
+                    sa.engagement_score DESC NULLS LAST
+            """, params)
             results = cursor.fetchall()
             
-            # Get asset IDs for fetching tags
-            asset_ids = [row['id'] for row in results if row['id']]
-            
             # Fetch topics for all assets in one query
-            topics_by_asset = {}
-            if asset_ids:
-                cursor.execute("""
-                    SELECT 
-                        at.asset_id,
-                        t.tag_name
-                    FROM asset_tags at
-                    JOIN tags t ON at.tag_id = t.id
-                    JOIN tag_types tt ON t.tag_type_id = tt.id
-                    WHERE at.asset_id = ANY(%s) AND tt.type_name = 'topic'
-                """, (asset_ids,))
-                
-                for tag_row in cursor.fetchall():
-                    asset_id = tag_row['asset_id']
-                    if asset_id not in topics_by_asset:
-                        topics_by_asset[asset_id] = []
-                    topics_by_asset[asset_id].append(tag_row['tag_name'])
+            topics_by_asset = self._get_topics_for_assets(
+                cursor, [row['id'] for row in results if row['id']]
+            )
             
             cursor.close()
             
             # Convert to MongoDB-compatible format
-            content_list = []
-            for row in results:
-                asset_id = row['id']
-                content = {
-                    '_id': row['mongo_id'] or str(row['id']),
-                    'id': row['id'],  # Include PostgreSQL ID
-                    'guid': str(row['guid']),
-                    'file_name': row['file_name'],
-                    'file_path': row['file_path'],
-                    'file_size': row['file_size'],
-                    'file_duration': float(row['file_duration']) if row['file_duration'] else float(row['duration_seconds']) if row['duration_seconds'] else 0,
-                    'duration_category': row['duration_category'],
-                    'content_type': row['content_type'],
-                    'content_title': row['content_title'],
-                    'summary': row['summary'],
-                    'theme': row.get('theme', ''),  # Add theme field
-                    'topics': topics_by_asset.get(asset_id, []),  # Add topics from tags
-                    'engagement_score': row['engagement_score'],
-                    'analysis_completed': row['analysis_completed'],
-                    'scheduling': {
-                        'available_for_scheduling': row.get('available_for_scheduling', True),
-                        'content_expiry_date': row['content_expiry_date'],
-                        'go_live_date': row.get('go_live_date'),
-                        'last_scheduled_date': row['last_scheduled_date'],
-                        'total_airings': row.get('total_airings', 0),
-                        'priority_score': float(row['priority_score']) if row['priority_score'] else 0,
-                        'optimal_timeslots': row.get('optimal_timeslots', []),
-                        'featured': row.get('featured', False)  # Add featured field inside scheduling
-                    }
-                }
-                content_list.append(content)
-            
-            return content_list
+            return [
+                self._analyzed_content_from_row(row, topics_by_asset.get(row['id'], []))
+                for row in results
+            ]
             
         except Exception as e:
             logger.error(f"Error getting analyzed content: {str(e)}")
@@ -1306,6 +1545,124 @@ class PostgreSQLDatabaseManager:
         finally:
             self._put_connection(conn)
     
+    def get_analyzed_content_page(self, content_type: str = '', duration_category: str = '', search: str = '',
+                                  featured_filter: str = '', sort: str = 'priority', direction: str = None,
+                                  limit: int = 100, cursor: str = None, fields: List[str] = None,
+                                  durations_only: bool = False) -> Dict[str, Any]:
+        """Get one page of analyzed content using keyset pagination
+        
+        Pages are index range scans over schedulable_assets on (sort keys,
+        asset id). Analyzed assets without a primary file come after all
+        others, paged by the same sort in a separate branch.
+        
+        Args:
+            sort: One of ANALYZED_CONTENT_SORTS; ties are broken by asset id
+            direction: 'asc' or 'desc' (defaults to the sort's natural direction)
+            limit: Page size (capped at 1000)
+            cursor: Opaque cursor returned as next_cursor by the previous page
+            fields: Optional list of top-level keys to return (id is always included)
+            durations_only: Return only id, file_duration and duration_category
+        
+        Returns:
+            Dict with content, next_cursor and has_more
+        
+        Raises:
+            ValueError: For an unknown sort/direction or a malformed cursor
+        """
+        if sort not in ANALYZED_CONTENT_SORTS:
+            raise ValueError(f"Unknown sort '{sort}'")
+        sort_keys, default_direction = ANALYZED_CONTENT_SORTS[sort]
+        direction = (direction or default_direction).lower()
+        if direction not in ('asc', 'desc'):
+            raise ValueError(f"Unknown sort direction '{direction}'")
+        limit = max(1, min(int(limit), 1000))
+        
+        branch, last_keys, last_id = PAGE_BRANCHES[0], [], None
+        if cursor:
+            branch, last_keys, last_id = _decode_page_cursor(cursor, sort)
+        
+        if not self.connected:
+            return {'content': [], 'next_cursor': None, 'has_more': False}
+        
+        if durations_only:
+            columns = "sa.asset_id AS id, sa.file_duration, sa.duration_seconds, sa.duration_category"
+        else:
+            columns = "sa.*, sa.asset_id AS id"
+        columns += ''.join(f", {expr} AS _sort_key_{n}" for n, (expr, _) in enumerate(sort_keys))
+        order_sql = ', '.join(f"{expr} {direction.upper()}" for expr, _ in sort_keys + (("sa.asset_id", None),))
+        
+        relations = {
+            'filed': self.schedulable_assets_relation(),
+            'unfiled': f"({UNFILED_ANALYZED_ASSETS_QUERY.format(is_holiday_greeting=self.holiday_greeting_column('a'))})"
+        }
+        conn = self._get_connection()
+        try:
+            db_cursor = conn.cursor(cursor_factory=RealDictCursor)
+            results = []  # (branch, row)
+            for page_branch in PAGE_BRANCHES[PAGE_BRANCHES.index(branch):]:
+                where_sql, params = self._analyzed_content_filters(
+                    content_type, duration_category, search, featured_filter
+                )
+                
+                # Keyset condition: rows strictly after the last (sort keys, id)
+                # seen, with the cursor values cast back to the keys' types
+                if page_branch == branch and last_id is not None:
+                    comparison = '>' if direction == 'asc' else '<'
+                    row_sql = ', '.join([expr for expr, _ in sort_keys] + ['sa.asset_id'])
+                    values_sql = ', '.join([f"%s::{sql_type}" for _, sql_type in sort_keys] + ['%s'])
+                    where_sql += f" AND ({row_sql}) {comparison} ({values_sql})"
+                    params.extend(last_keys + [last_id])
+                
+                db_cursor.execute(f"""
+                    SELECT {columns}
+                    FROM {relations[page_branch]} sa
+                    WHERE {where_sql}
+                    ORDER BY {order_sql}
+                    LIMIT %s
+                """, params + [limit + 1 - len(results)])
+                results.extend((page_branch, row) for row in db_cursor.fetchall())
+                if len(results) > limit:
+                    break
+            
+            has_more = len(results) > limit
+            results = results[:limit]
+            next_cursor = None
+            if has_more:
+                last_branch, last_row = results[-1]
+                next_cursor = _encode_page_cursor(
+                    sort, last_branch,
+                    [last_row[f'_sort_key_{n}'] for n in range(len(sort_keys))],
+                    last_row['id']
+                )
+            rows = [row for _, row in results]
+            
+            if durations_only:
+                content = [{
+                    'id': row['id'],
+                    'file_duration': float(row['file_duration'] or row['duration_seconds'] or 0),
+                    'duration_category': row['duration_category']
+                } for row in rows]
+            else:
+                topics_by_asset = {}
+                if not fields or 'topics' in fields:
+                    topics_by_asset = self._get_topics_for_assets(db_cursor, [row['id'] for row in rows])
+                content = []
+                for row in rows:
+                    item = self._analyzed_content_from_row(row, topics_by_asset.get(row['id'], []))
+                    if fields:
+                        item = {key: value for key, value in item.items() if key in fields or key == 'id'}
+                    content.append(item)
+            
+            db_cursor.close()
+            return {'content': content, 'next_cursor': next_cursor, 'has_more': has_more}
+            
+        except Exception as e:
+            logger.error(f"Error getting analyzed content page: {str(e)}")
+            conn.rollback()
+            return {'content': [], 'next_cursor': None, 'has_more': False}
+        finally:
+            self._put_connection(conn)
+    
     def get_all_meetings(self) -> List[Dict[str, Any]]:
         """Get all meetings from the database"""
         if not self.connected:
@@ -2071,6 +2428,64 @@ class PostgreSQLDatabaseManager:
         finally:
             self._put_connection(conn)
     
+    def log_metadata_changes(self, changes: List[Dict[str, Any]], cursor=None) -> int:
+        """
+        Log many metadata changes to the audit trail with one multi-row insert
+        
+        Each change is a dict with asset_id, field_name, old_value, new_value,
+        changed_by, change_source, change_reason and optionally instance_id.
+        As with log_metadata_change, rows whose value did not change are
+        skipped. When a cursor is passed the insert joins the caller's
+        transaction and is not committed here.
+        
+        Returns the number of audit rows written.
+        """
+        rows = [
+            (int(change['asset_id']), change.get('instance_id'), change['field_name'],
+             change.get('old_value'), change.get('new_value'),
+             change.get('changed_by', 'system'), change.get('change_source', 'api'),
+             change.get('change_reason'))
+            for change in changes
+        ]
+        if not rows:
+            return 0
+        
+        sql = """
+            INSERT INTO metadata_audit_log (
+                asset_id, instance_id, field_name, old_value, new_value,
+                changed_by, change_source, change_reason
+            )
+            SELECT v.asset_id, v.instance_id, v.field_name, v.old_value, v.new_value,
+                   v.changed_by, v.change_source, v.change_reason
+            FROM (VALUES %s) AS v(asset_id, instance_id, field_name, old_value, new_value,
+                                  changed_by, change_source, change_reason)
+            WHERE v.old_value IS DISTINCT FROM v.new_value
+        """
+        template = "(%s::integer, %s::integer, %s, %s::timestamptz, %s::timestamptz, %s, %s, %s)"
+        
+        if cursor is not None:
+            execute_values(cursor, sql, rows, template=template, page_size=len(rows))
+            return cursor.rowcount
+        
+        if not self.connected:
+            logger.warning("Database not connected")
+            return 0
+        
+        conn = self._get_connection()
+        try:
+            with conn.cursor(cursor_factory=None) as own_cursor:
+                execute_values(own_cursor, sql, rows, template=template, page_size=len(rows))
+                logged = own_cursor.rowcount
+            conn.commit()
+            logger.info(f"Logged {logged} metadata changes")
+            return logged
+        except Exception as e:
+            logger.error(f"Error logging metadata changes: {str(e)}")
+            conn.rollback()
+            return 0
+        finally:
+            self._put_connection(conn)
+    
     def get_asset_audit_history(self, asset_id, field_name: str = None, limit: int = 50) -> List[Dict[str, Any]]:
         """Get audit history for a specific asset"""
         if not self.connected:
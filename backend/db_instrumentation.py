@@ -0,0 +1,127 @@
+"""
+Query timing for the PostgreSQL connection pool.
+
+The pool creates InstrumentedConnection objects. Their cursors are the
+cursor class the caller asked for (RealDictCursor by default) with timed
+execute/executemany, and each finished statement is passed to the
+registered query observers as (family, sql, seconds). A statement family is
+the verb and main table ("SELECT assets", "UPDATE scheduling_metadata"),
+so metrics stay grouped by what a query does rather than by its parameters.
+"""
+
+import logging
+import re
+import threading
+import time
+from functools import lru_cache
+
+import psycopg2.extensions
+
+logger = logging.getLogger(__name__)
+
+_observers = []
+_observers_lock = threading.Lock()
+_timed_classes = {}
+
+_COMMENT_RE = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_VERB_RE = re.compile(r'\s*\(?\s*(\w+)')
+_TABLE_RE = {
+    'SELECT': re.compile(r'\bFROM\s+(?:ONLY\s+)?([\w."]+)', re.I),
+    'DELETE': re.compile(r'\bFROM\s+(?:ONLY\s+)?([\w."]+)', re.I),
+    'INSERT': re.compile(r'\bINTO\s+([\w."]+)', re.I),
+    'UPDATE': re.compile(r'^\s*UPDATE\s+(?:ONLY\s+)?([\w."]+)', re.I),
+    'TRUNCATE': re.compile(r'^\s*TRUNCATE\s+(?:TABLE\s+)?([\w."]+)', re.I),
+}
+
+
+def add_query_observer(observer):
+    """Call observer(family, sql, seconds) after every statement on a pool connection"""
+    with _observers_lock:
+        if observer not in _observers:
+            _observers.append(observer)
+
+
+def remove_query_observer(observer):
+    with _observers_lock:
+        if observer in _observers:
+            _observers.remove(observer)
+
+
+@lru_cache(maxsize=4096)
+def _family(sql):
+    text = _COMMENT_RE.sub(' ', sql)
+    match = _VERB_RE.match(text)
+    if not match:
+        return 'OTHER'
+    verb = match.group(1).upper()
+    if verb == 'WITH':
+        # CTE: name the family after the statement the CTEs feed
+        outer = re.search(r'\)\s*(SELECT|INSERT|UPDATE|DELETE)\b', text, re.I)
+        verb = outer.group(1).upper() if outer else 'SELECT'
+        text = text[outer.start() + 1:] if outer else text
+    pattern = _TABLE_RE.get(verb)
+    table = pattern.search(text) if pattern else None
+    if not table or table.group(1).startswith('('):
+        return verb
+    name = table.group(1).split('.')[-1].strip('"').lower()
+    return f"{verb} {name}"
+
+
+def statement_family(sql):
+    """Verb and main table of a statement, e.g. 'SELECT assets'"""
+    if isinstance(sql, bytes):
+        # execute_values and mogrify pass bytes; the head is enough to classify
+        sql = sql[:2000].decode('utf-8', 'replace')
+    elif not isinstance(sql, str):
+        sql = str(sql)
+    return _family(sql[:2000])
+
+
+def _notify(sql, seconds):
+    if not _observers:
+        return
+    family = statement_family(sql)
+    for observer in list(_observers):
+        try:
+            observer(family, sql, seconds)
+        except Exception as e:
+            logger.debug(f"Query observer failed: {str(e)}")
+
+
+class TimedCursorMixin:
+    """Times execute/executemany and reports them to the query observers"""
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            _notify(query, time.perf_counter() - started)
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            _notify(query, time.perf_counter() - started)
+
+
+def timed_cursor_class(cursor_class):
+    """Subclass of cursor_class with timed execute (one class per cursor type)"""
+    if issubclass(cursor_class, TimedCursorMixin):
+        return cursor_class
+    timed = _timed_classes.get(cursor_class)
+    if timed is None:
+        timed = type(f"Timed{cursor_class.__name__}", (TimedCursorMixin, cursor_class), {})
+        _timed_classes[cursor_class] = timed
+    return timed
+
+
+class InstrumentedConnection(psycopg2.extensions.connection):
+    """Connection whose cursors report statement timings"""
+
+    def cursor(self, *args, **kwargs):
+        # Resolve the factory the way psycopg2 does (argument, then connection default)
+        cursor_factory = kwargs.pop('cursor_factory', None) or self.cursor_factory \
+            or psycopg2.extensions.cursor
+        return super().cursor(*args, cursor_factory=timed_cursor_class(cursor_factory), **kwargs)
@@ -1,11 +1,54 @@
 import ftplib
+import io
 import os
+import posixpath
 import logging
 import time
 from datetime import datetime
+from types import SimpleNamespace
+
+from remote_path_cache import remote_path_cache, server_key
+import metrics
 
 logger = logging.getLogger(__name__)
 
+# Block size used when streaming generated content to the server
+STREAM_BLOCK_SIZE = 65536
+
+
+class ChunkReader(io.RawIOBase):
+    """Read-only file object over an iterable of byte chunks, for storbinary"""
+    
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._pending = b''
+        self.bytes_read = 0
+    
+    def readable(self):
+        return True
+    
+    def prime(self):
+        """Produce the first chunk now, so generator errors surface before a transfer starts"""
+        self._fill()
+    
+    def _fill(self):
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return
+            self._pending = chunk
+    
+    def read(self, size=-1):
+        self._fill()
+        if size is None or size < 0:
+            data = self._pending + b''.join(self._chunks)
+            self._pending = b''
+        else:
+            data = self._pending[:size]
+            self._pending = self._pending[size:]
+        self.bytes_read += len(data)
+        return data
+
 
 class FTPManager:
     def __init__(self, config):
@@ -320,10 +363,12 @@ class FTPManager:
             if files:
                 logger.debug(f"Sample files: {[f['name'] for f in files[:3]]}")
             
+            metrics.record_ftp_operation(server_key(self.config), 'list')
             return files
             
         except Exception as e:
             logger.error(f"Error listing files in {path}: {str(e)}")
+            metrics.record_ftp_operation(server_key(self.config), 'list', success=False)
             return []
     
     def get_file_size(self, filepath):
@@ -348,6 +393,14 @@ class FTPManager:
     
     def download_file(self, remote_path, local_path):
         """Download file from FTP server"""
+        started = time.perf_counter()
+        success = self._download_file(remote_path, local_path)
+        nbytes = os.path.getsize(local_path) if success and os.path.exists(local_path) else 0
+        metrics.record_ftp_transfer(server_key(self.config), 'download', nbytes,
+                                    time.perf_counter() - started, success)
+        return success
+    
+    def _download_file(self, remote_path, local_path):
         # Always test the connection before download to handle broken connections
         try:
             # Test if connection is still alive
@@ -519,8 +572,292 @@ class FTPManager:
                     pass
             return False
     
+    def read_file(self, remote_path):
+        """Read a small remote file into memory, returning its bytes or None"""
+        started = time.perf_counter()
+        data = self._read_file(remote_path)
+        metrics.record_ftp_transfer(server_key(self.config), 'download', len(data or b''),
+                                    time.perf_counter() - started, data is not None)
+        return data
+    
+    def _read_file(self, remote_path):
+        if not self.is_connection_alive():
+            self.connected = False
+            if not self.connect():
+                return None
+        
+        full_remote_path = self._absolute_remote_path(remote_path)
+        
+        # Same server peculiarities as download_file: symbolic links and quoted folders
+        for path_desc, alt_path in self._generate_alternative_paths(full_remote_path):
+            buffer = io.BytesIO()
+            try:
+                self.ftp.retrbinary(f'RETR {alt_path}', buffer.write)
+                return buffer.getvalue()
+            except ftplib.error_perm as e:
+                logger.debug(f"Read failed ({path_desc}) for {alt_path}: {str(e)}")
+            except Exception as e:
+                logger.warning(f"Read of {alt_path} failed: {str(e)}, reconnecting...")
+                self.connected = False
+                if not self.connect():
+                    return None
+        
+        # Last resort: change into the directory and read by filename
+        buffer = io.BytesIO()
+        if self._download_with_cwd(full_remote_path, buffer):
+            return buffer.getvalue()
+        
+        logger.debug(f"Could not read remote file: {full_remote_path}")
+        return None
+    
+    def retrieve_file(self, remote_path, callback):
+        """
+        Stream a remote file to callback(chunk) as it downloads, without a
+        local copy. Returns True on success.
+        
+        Alternative paths are only tried while the server refuses the RETR,
+        so callback never sees data from more than one attempt.
+        """
+        received = 0
+        
+        def counting_callback(chunk):
+            nonlocal received
+            received += len(chunk)
+            callback(chunk)
+        
+        started = time.perf_counter()
+        success = self._retrieve_file(remote_path, counting_callback)
+        metrics.record_ftp_transfer(server_key(self.config), 'download', received,
+                                    time.perf_counter() - started, success)
+        return success
+    
+    def _retrieve_file(self, remote_path, callback):
+        if not self.is_connection_alive():
+            self.connected = False
+            if not self.connect():
+                return False
+        
+        full_remote_path = self._absolute_remote_path(remote_path)
+        for path_desc, alt_path in self._generate_alternative_paths(full_remote_path):
+            try:
+                self.ftp.retrbinary(f'RETR {alt_path}', callback)
+                return True
+            except ftplib.error_perm as e:
+                logger.debug(f"Retrieve failed ({path_desc}) for {alt_path}: {str(e)}")
+            except Exception as e:
+                logger.error(f"Retrieve of {alt_path} failed: {str(e)}")
+                self.connected = False
+                return False
+        
+        # Last resort: change into the directory and retrieve by filename
+        if self._download_with_cwd(full_remote_path, SimpleNamespace(write=callback)):
+            return True
+        
+        logger.debug(f"Could not retrieve remote file: {full_remote_path}")
+        return False
+    
+    def stat_file(self, remote_path):
+        """
+        Size and modify time of a remote file in one round trip (MLST),
+        falling back to SIZE + MDTM. Returns None if the file does not exist.
+        """
+        if not self.is_connection_alive():
+            self.connected = False
+            if not self.connect():
+                return None
+        
+        full_remote_path = self._absolute_remote_path(remote_path)
+        try:
+            response = self.ftp.sendcmd(f'MLST {full_remote_path}')
+            for line in response.splitlines()[1:]:
+                if not line.startswith(' '):
+                    continue
+                facts = {}
+                for fact in line.strip().split(' ', 1)[0].split(';'):
+                    if '=' in fact:
+                        key, value = fact.split('=', 1)
+                        facts[key.lower()] = value
+                return {
+                    'size': int(facts['size']) if facts.get('size', '').isdigit() else None,
+                    'modify': facts.get('modify')
+                }
+        except ftplib.error_perm as e:
+            if str(e).startswith('550'):
+                return None
+            logger.debug(f"MLST not available ({str(e)}), using SIZE/MDTM")
+        except Exception as e:
+            logger.debug(f"MLST failed for {full_remote_path}: {str(e)}")
+        
+        try:
+            size = self.ftp.size(full_remote_path)
+            modify = self.ftp.sendcmd(f'MDTM {full_remote_path}').split(' ', 1)[-1].strip()
+            return {'size': size, 'modify': modify}
+        except ftplib.error_perm:
+            return None
+        except Exception as e:
+            logger.debug(f"Could not stat {full_remote_path}: {str(e)}")
+            return None
+    
+    def list_directory_facts(self, directory):
+        """
+        MLSD facts for every entry in a directory, files and directories alike
+        
+        Returns a dict mapping entry name to its facts, or None when the
+        directory can't be listed with MLSD.
+        """
+        if not self.is_connection_alive():
+            self.connected = False
+            if not self.connect():
+                return None
+        
+        full_directory = self._absolute_remote_path(directory)
+        for path_desc, alt_directory in self._generate_alternative_paths(full_directory):
+            try:
+                return {
+                    name: facts
+                    for name, facts in self.ftp.mlsd(path=alt_directory, facts=['type', 'size', 'modify'])
+                    if name not in ('.', '..')
+                }
+            except ftplib.error_perm as e:
+                logger.debug(f"MLSD failed ({path_desc}) for {alt_directory}: {str(e)}")
+            except Exception as e:
+                logger.warning(f"MLSD of {alt_directory} failed: {str(e)}")
+                return None
+        return None
+    
+    def write_files(self, directory, files):
+        """
+        Upload in-memory files below one remote directory
+        
+        Changes into the directory once and stores each file by its path
+        relative to it, so a batch costs one CWD plus one STOR per file.
+        
+        Args:
+            directory: Remote directory the relative paths are under
+            files: Dict mapping relative path to file content (bytes)
+        
+        Returns:
+            Dict mapping relative path to True/False upload result
+        """
+        results = {relative_path: False for relative_path in files}
+        if not self.is_connection_alive():
+            self.connected = False
+            if not self.connect():
+                return results
+        
+        full_directory = self._absolute_remote_path(directory)
+        for path_desc, alt_directory in self._generate_alternative_paths(full_directory):
+            try:
+                self.ftp.cwd(alt_directory)
+                break
+            except ftplib.error_perm:
+                continue
+        else:
+            logger.error(f"Could not change to directory for upload: {full_directory}")
+            return results
+        
+        server = server_key(self.config)
+        for relative_path, data in files.items():
+            try:
+                self.ftp.storbinary(f'STOR {relative_path}', io.BytesIO(data))
+                results[relative_path] = True
+                remote_path_cache.add_path(server, f"{full_directory.rstrip('/')}/{relative_path}")
+            except Exception as e:
+                logger.error(f"Upload of {relative_path} to {full_directory} failed: {str(e)}")
+        return results
+    
+    def upload_stream(self, chunks, remote_path):
+        """
+        Upload generated content straight from an iterable of byte chunks
+        
+        No local temp file and no full in-memory copy is made. The content
+        is stored under a temporary name next to the target and renamed over
+        it only once the transfer completed, so an error raised while
+        generating or sending it (the partial temp file is removed and the
+        error re-raised) leaves the existing remote file untouched.
+        
+        Returns:
+            Number of bytes uploaded
+        """
+        if not self.is_connection_alive():
+            self.connected = False
+            if not self.connect():
+                raise ftplib.Error(f"Could not connect to {self.config.get('host')}")
+        
+        full_remote_path = self._absolute_remote_path(remote_path)
+        directory, filename = posixpath.split(full_remote_path)
+        
+        reader = ChunkReader(chunks)
+        reader.prime()
+        
+        for path_desc, alt_directory in self._generate_alternative_paths(directory or '/'):
+            try:
+                self.ftp.cwd(alt_directory)
+                break
+            except ftplib.error_perm:
+                continue
+        else:
+            raise ftplib.error_perm(f"550 Could not change to directory for upload: {directory}")
+        
+        server = server_key(self.config)
+        temp_filename = f"{filename}.tmp_{int(time.time())}"
+        started = time.perf_counter()
+        try:
+            self.ftp.storbinary(f'STOR {temp_filename}', reader, blocksize=STREAM_BLOCK_SIZE)
+        except Exception as e:
+            metrics.record_ftp_transfer(server, 'upload', reader.bytes_read, 0, success=False)
+            if not isinstance(e, (ftplib.Error, OSError)):
+                # The content generator failed mid-transfer: read the transfer
+                # reply so the control connection stays in sync
+                try:
+                    self.ftp.voidresp()
+                except Exception:
+                    pass
+            try:
+                self.ftp.delete(temp_filename)
+            except Exception as delete_e:
+                logger.warning(f"Could not remove partial upload {directory}/{temp_filename}: {str(delete_e)}")
+            raise
+        
+        try:
+            self.ftp.rename(temp_filename, filename)
+        except ftplib.error_perm as e:
+            # Some servers refuse to rename over an existing file
+            logger.debug(f"Rename over {full_remote_path} refused ({str(e)}), replacing it")
+            try:
+                self.ftp.delete(filename)
+                self.ftp.rename(temp_filename, filename)
+            except Exception:
+                try:
+                    self.ftp.delete(temp_filename)
+                except Exception:
+                    pass
+                raise
+        
+        metrics.record_ftp_transfer(server, 'upload', reader.bytes_read, time.perf_counter() - started)
+        remote_path_cache.add_path(server, full_remote_path)
+        logger.info(f"Streamed {reader.bytes_read} bytes to {full_remote_path}")
+        return reader.bytes_read
+    
+    def _absolute_remote_path(self, remote_path):
+        """Resolve a path relative to the configured base path"""
+        if remote_path.startswith('/'):
+            return remote_path
+        base_path = self.config.get('path', '/')
+        return f"{base_path.rstrip('/')}/{remote_path}".replace('//', '/')
+    
     def upload_file(self, local_path, remote_path, skip_verification=False):
         """Upload file to FTP server"""
+        started = time.perf_counter()
+        success = self._upload_file(local_path, remote_path, skip_verification)
+        nbytes = os.path.getsize(local_path) if success else 0
+        metrics.record_ftp_transfer(server_key(self.config), 'upload', nbytes,
+                                    time.perf_counter() - started, success)
+        if success:
+            remote_path_cache.add_path(server_key(self.config), self._absolute_remote_path(remote_path))
+        return success
+    
+    def _upload_file(self, local_path, remote_path, skip_verification=False):
         if not self.connected:
             if not self.connect():
                 return False
@@ -895,8 +1232,26 @@ class FTPManager:
         """Update file on another FTP server"""
         return self.copy_file_to(file_info, target_ftp, keep_temp)  # Same as copy for now
     
+    def rename_file(self, from_path, to_path):
+        """Rename or move a file on the FTP server. Raises on FTP errors."""
+        if not self.connected:
+            if not self.connect():
+                raise ftplib.Error(f"Could not connect to {self.config.get('host')}")
+        
+        self.ftp.rename(from_path, to_path)
+        server = server_key(self.config)
+        remote_path_cache.discard_path(server, self._absolute_remote_path(from_path))
+        remote_path_cache.add_path(server, self._absolute_remote_path(to_path))
+        return True
+    
     def delete_file(self, remote_path):
         """Delete file from FTP server"""
+        success = self._delete_file(remote_path)
+        if success:
+            remote_path_cache.discard_path(server_key(self.config), self._absolute_remote_path(remote_path))
+        return success
+    
+    def _delete_file(self, remote_path):
         if not self.connected:
             logger.info("FTP not connected, attempting to connect...")
             if not self.connect():
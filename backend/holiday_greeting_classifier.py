@@ -0,0 +1,42 @@
+"""
+Holiday greeting classification.
+
+Whether an asset is a holiday greeting depends only on its file name and
+title, so it is stored in assets.is_holiday_greeting, which triggers keep
+current when the title or primary instance changes (see
+migrations/add_holiday_greeting_flag.sql). Content rows read for scheduling
+carry the flag, and the filters only look it up. For rows without a flag
+(NULL, or the migration not applied yet), all greeting patterns are compiled
+into one regex and the file name and title are searched in a single pass.
+"""
+
+import re
+
+# Patterns identifying a holiday greeting in a file name or title. The
+# migration's is_holiday_greeting_text() uses the same expression in
+# PostgreSQL syntax.
+HOLIDAY_GREETING_PATTERNS = (
+    r'holiday\s*greeting',
+)
+
+HOLIDAY_GREETING_MATCHER = re.compile(
+    '|'.join(f'(?:{pattern})' for pattern in HOLIDAY_GREETING_PATTERNS),
+    re.IGNORECASE
+)
+
+# Joins the texts searched together; not whitespace, so \s* can't match across it
+_SEPARATOR = '\x00'
+
+
+def is_holiday_greeting_text(*texts) -> bool:
+    """Check file names / titles against all greeting patterns in one search"""
+    joined = _SEPARATOR.join(text for text in texts if text)
+    return bool(joined) and HOLIDAY_GREETING_MATCHER.search(joined) is not None
+
+
+def is_holiday_greeting_content(content) -> bool:
+    """Use the stored flag of a content row, classifying by name when it has none"""
+    flag = content.get('is_holiday_greeting')
+    if flag is not None:
+        return bool(flag)
+    return is_holiday_greeting_text(content.get('file_name', ''), content.get('content_title', ''))
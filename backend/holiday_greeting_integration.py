@@ -10,7 +10,11 @@ import os
 from typing import List, Dict, Optional, Any
 from holiday_greeting_scheduler import get_holiday_scheduler
 from holiday_greeting_daily_assignments import HolidayGreetingDailyAssignments
+from holiday_greeting_session import HolidayGreetingSession
+from holiday_greeting_classifier import is_holiday_greeting_content, is_holiday_greeting_text
 from datetime import datetime, timedelta
+import async_logging
+from async_logging import LogChannel
 
 # Set up dedicated holiday greeting logger
 holiday_logger = logging.getLogger('holiday_greeting')
@@ -29,12 +33,16 @@ file_handler.setLevel(logging.DEBUG)
 formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 file_handler.setFormatter(formatter)
 
-# Add handler to logger
+# Add handler to logger, written by the background log writer
 holiday_logger.addHandler(file_handler)
+async_logging.route_through_queue(holiday_logger)
 
 # Also keep the regular logger
 logger = logging.getLogger(__name__)
 
+# filter_available_content runs for every candidate batch, its trace lines are sampled
+holiday_filter_log = LogChannel(holiday_logger, max_per_second=10)
+
 class HolidayGreetingIntegration:
     """Safe integration wrapper for holiday greeting scheduling"""
     
@@ -44,9 +52,8 @@ class HolidayGreetingIntegration:
         self.scheduler = None
         self.enabled = False
         self._load_config_and_init()
-        # Track greetings used in current scheduling session
-        self.session_used_greetings = {}  # {duration_category: [asset_ids]}
-        self.session_greeting_index = {}  # {duration_category: current_index}
+        # Greetings, play counts and rotation state of the current scheduling session
+        self.session = HolidayGreetingSession(db_manager)
         # Daily rotation pool - tracks which greetings to use for each date
         self.daily_rotation_pools = {}  # {date_str: [greeting_dicts]}
         self.daily_rotation_indexes = {}  # {date_str: current_index}
@@ -88,8 +95,9 @@ class HolidayGreetingIntegration:
     
     def reset_session(self):
         """Reset session tracking for a new scheduling run"""
-        self.session_used_greetings = {}
-        self.session_greeting_index = {}
+        # Plays of the previous run are written back before its state goes away
+        self.session.flush()
+        self.session = HolidayGreetingSession(self.db_manager)
         # Clear daily rotation pools to force reload with corrected logic
         self.daily_rotation_pools = {}
         self.daily_rotation_indexes = {}
@@ -250,12 +258,9 @@ class HolidayGreetingIntegration:
         Returns:
             Filtered/modified content list
         """
-        holiday_logger.warning(f"=== FILTER CONTENT CALLED ===")
-        holiday_logger.warning(f"Category: {duration_category}, Available content: {len(available_content)}, Excluded IDs: {len(exclude_ids)}")
-        holiday_logger.warning(f"Schedule date passed: {schedule_date}")
-        holiday_logger.warning(f"Current schedule_id: {getattr(self, 'current_schedule_id', 'NOT SET')}")
-        holiday_logger.warning(f"Last scheduled theme: {last_scheduled_theme}")
-        logger.warning(f"[HOLIDAY DEBUG] filter_available_content called with {len(available_content)} items")
+        holiday_filter_log.debug("FILTER CONTENT: category=%s, available=%d, excluded=%d, date=%s, schedule_id=%s, last theme=%s",
+                                 duration_category, len(available_content), len(exclude_ids), schedule_date,
+                                 getattr(self, 'current_schedule_id', 'NOT SET'), last_scheduled_theme)
         
         # Check if this is a content type or duration category
         duration_categories = ['id', 'spots', 'short_form', 'long_form']
@@ -265,13 +270,11 @@ class HolidayGreetingIntegration:
             return available_content
         
         if not self.enabled:
-            holiday_logger.warning("Holiday greeting filtering DISABLED - returning original content")
-            logger.warning("[HOLIDAY DEBUG] Integration disabled, returning all content unchanged")
+            holiday_filter_log.debug("Holiday greeting filtering DISABLED - returning original content")
             return available_content
             
         if not self.scheduler:
             holiday_logger.warning("Holiday greeting filtering enabled but scheduler not initialized")
-            logger.warning("[HOLIDAY DEBUG] No scheduler, returning all content unchanged")
             return available_content
         
         try:
@@ -279,50 +282,31 @@ class HolidayGreetingIntegration:
             other_content = []
             removed_greetings = []
             
-            holiday_logger.debug(f"Checking {len(available_content)} items for holiday greetings")
-            
             for content in available_content:
-                file_name = content.get('file_name', '')
-                content_title = content.get('content_title', '')
-                is_greeting = self.scheduler.is_holiday_greeting(file_name, content_title)
-                
-                if is_greeting:
+                if self.session.is_greeting(content, is_holiday_greeting_content):
                     # Normalize the content to ensure it has asset_id
                     if 'asset_id' not in content and 'id' in content:
                         content['asset_id'] = content['id']
                     removed_greetings.append(content)
-                    holiday_logger.debug(f"  - HOLIDAY GREETING: {file_name}")
                 else:
                     other_content.append(content)
-                    # Log first few non-greeting files to verify what we're checking
-                    if len(other_content) <= 3:
-                        holiday_logger.debug(f"  - NOT greeting: {file_name}")
-            
-            holiday_logger.warning(f"[HOLIDAY DEBUG] Found {len(removed_greetings)} holiday greetings, {len(other_content)} other content")
-            logger.warning(f"[HOLIDAY DEBUG] Removed {len(removed_greetings)} holiday greetings from pool")
-            
-            if removed_greetings:
-                logger.info(f"Found {len(removed_greetings)} holiday greetings in {duration_category}")
-                logger.info(f"Session tracking: {len(self.session_used_greetings.get(duration_category, []))} greetings used so far")
-                holiday_logger.warning(f"[HOLIDAY DEBUG] Removed greetings: {[g.get('file_name', 'unknown') for g in removed_greetings[:5]]}")
-                # Debug: Check structure of greetings
-                if removed_greetings:
-                    sample = removed_greetings[0]
-                    holiday_logger.info(f"Sample greeting structure: {list(sample.keys())}")
-                    holiday_logger.info(f"Sample greeting asset_id: {sample.get('asset_id', 'NO ASSET_ID')}")
+            
+            holiday_filter_log.debug("Found %d holiday greetings, %d other content in %s (%d used this session), first: %s",
+                                     len(removed_greetings), len(other_content), duration_category,
+                                     len(self.session.used_in_category(duration_category)),
+                                     async_logging.Lazy(lambda: [g.get('file_name', 'unknown') for g in removed_greetings[:5]]))
             
             # Step 2: Get the NEXT holiday greeting
             next_greeting = None
             
             # For SPOTS category with a schedule date, use daily rotation pool
             if duration_category == 'spots' and schedule_date:
-                holiday_logger.info(f"Checking daily rotation pool for {schedule_date}")
                 next_greeting = self._get_next_from_daily_pool(schedule_date)
                 
                 if next_greeting:
-                    holiday_logger.info(f"Selected from daily pool: {next_greeting.get('file_name')}")
+                    holiday_filter_log.info("Selected from daily pool for %s: %s", schedule_date, next_greeting.get('file_name'))
                 else:
-                    holiday_logger.info("No daily pool available, falling back to standard rotation")
+                    holiday_filter_log.debug("No daily pool available for %s, falling back to standard rotation", schedule_date)
             
             # If no daily pool greeting, use standard rotation
             if not next_greeting:
@@ -336,18 +320,15 @@ class HolidayGreetingIntegration:
             
             # Step 3: Return ONLY our selected greeting (not all removed ones) + all non-greeting content
             if next_greeting:
-                logger.warning(f"[HOLIDAY DEBUG] ENHANCED ROTATION: Selected holiday greeting: {next_greeting.get('file_name')} "
-                          f"(asset_id: {next_greeting.get('asset_id')})")
+                holiday_filter_log.info("Selected holiday greeting: %s (asset_id: %s), returning it with %d non-greetings",
+                                        next_greeting.get('file_name'), next_greeting.get('asset_id'), len(other_content))
                 # IMPORTANT: Return ONLY the selected greeting, not all holiday greetings
-                result = [next_greeting] + other_content
-                logger.warning(f"[HOLIDAY DEBUG] Returning {len(result)} items: 1 selected greeting + {len(other_content)} non-greetings")
-                holiday_logger.warning(f"[HOLIDAY DEBUG] Final result has {len(result)} items")
-                return result
+                return [next_greeting] + other_content
             else:
                 # No suitable holiday greeting found, return non-greeting content only
                 if removed_greetings:
-                    logger.warning(f"[HOLIDAY DEBUG] ENHANCED ROTATION: Could not find suitable holiday greeting to replace {len(removed_greetings)} removed items")
-                logger.warning(f"[HOLIDAY DEBUG] Returning {len(other_content)} non-greeting items (no greeting selected)")
+                    holiday_filter_log.info("Could not find suitable holiday greeting to replace %d removed items",
+                                            len(removed_greetings))
                 return other_content
             
         except Exception as e:
@@ -390,23 +371,17 @@ class HolidayGreetingIntegration:
             else:
                 holiday_logger.info(f"No daily assignments found for {schedule_date}, falling back to rotation")
         
-        # Initialize session tracking for this category if needed
-        if duration_category not in self.session_used_greetings:
-            self.session_used_greetings[duration_category] = []
-            self.session_greeting_index[duration_category] = 0
-            logger.info(f"Initialized session tracking for {duration_category}")
-            holiday_logger.info(f"Initialized session tracking for {duration_category}")
-        
-        # Get all available greetings for this category
+        # Get all available greetings for this category, loaded once per session and date
         if available_greetings is None:
-            available_greetings = self._get_all_holiday_greetings(duration_category, schedule_date)
+            available_greetings = self.session.greetings(duration_category, schedule_date,
+                                                         self._get_all_holiday_greetings)
         
         # Filter out recently used in this session
         # NOTE: We intentionally DO NOT filter by exclude_ids here because:
         # 1. exclude_ids contains ALL assets scheduled in the entire schedule
         # 2. This prevents any holiday greeting from appearing more than once
         # 3. We want fair rotation WITHIN the schedule, not just one appearance
-        session_used = self.session_used_greetings[duration_category]
+        session_used = self.session.used_in_category(duration_category)
         
         # Debug logging
         holiday_logger.info(f"Available greetings: {len(available_greetings)}")
@@ -429,21 +404,6 @@ class HolidayGreetingIntegration:
                 holiday_logger.warning(f"All {len(filtered_out)} greetings were in exclude list: {[g['file_name'] for g in filtered_out[:5]]}")
             return None
         
-        # Sort candidates by play count and last scheduled to ensure fairness
-        candidates_with_stats = []
-        for greeting in candidates:
-            stats = self._get_greeting_stats(greeting['asset_id'])
-            # Count how many times used in this session (across all categories)
-            session_count = sum(1 for cat in self.session_used_greetings.values() 
-                              for aid in cat if aid == greeting['asset_id'])
-            candidates_with_stats.append({
-                'greeting': greeting,
-                'play_count': stats.get('scheduled_count', 0),
-                'last_scheduled': stats.get('last_scheduled'),
-                'session_count': session_count,
-                'recently_used_in_category': greeting['asset_id'] in session_used[-5:] if session_used else False
-            })
-        
         # Theme conflict check - only skip if the IMMEDIATELY PREVIOUS item has the same theme
         # AND it's a holiday greeting (not other content with same theme)
         if last_scheduled_theme and duration_category in ['spots', 'id', 'short_form']:
@@ -456,18 +416,8 @@ class HolidayGreetingIntegration:
             # If last theme wasn't HolidayGreeting, we can place a holiday greeting
             holiday_logger.info(f"Last scheduled theme '{last_scheduled_theme}' is not a holiday greeting, OK to place one")
         
-        # Sort by: 
-        # 1. Not recently used in this category (last 5)
-        # 2. Lowest session count (times used in current schedule)
-        # 3. Lowest total play count (historical)
-        # 4. Oldest last scheduled
-        candidates_with_stats.sort(key=lambda x: (
-            x['recently_used_in_category'],  # False comes before True
-            x['session_count'],              # Fewer uses in session first
-            x['play_count'],                 # Fewer historical plays
-            x['last_scheduled'] is not None,  # Never scheduled comes first
-            x['last_scheduled'] if x['last_scheduled'] else ''
-        ))
+        # Sort candidates by session use, play count and last scheduled to ensure fairness
+        candidates_with_stats = self.session.rank(duration_category, candidates)
         
         # Select the best candidate
         if candidates_with_stats:
@@ -488,14 +438,8 @@ class HolidayGreetingIntegration:
                                    f"total: {cand['play_count']}")
             
             # Track this selection in the session
-            self.session_used_greetings[duration_category].append(selected['asset_id'])
-            
-            # If we've used all available greetings, allow reuse but maintain order
-            available_count = len(candidates)
-            if len(self.session_used_greetings[duration_category]) >= available_count * 2:
-                # Keep only recent history to prevent memory bloat
-                self.session_used_greetings[duration_category] = \
-                    self.session_used_greetings[duration_category][-available_count:]
+            # (once all greetings went around twice, only recent history is kept)
+            self.session.record_selection(duration_category, selected['asset_id'], len(candidates))
             
             return selected
         
@@ -705,34 +649,6 @@ class HolidayGreetingIntegration:
             if conn:
                 self.db_manager._put_connection(conn)
     
-    def _get_greeting_stats(self, asset_id: int) -> Dict[str, Any]:
-        """Get scheduling stats for a holiday greeting"""
-        conn = None
-        try:
-            from psycopg2.extras import RealDictCursor
-            conn = self.db_manager._get_connection()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            cursor.execute("""
-                SELECT scheduled_count, last_scheduled
-                FROM holiday_greeting_rotation
-                WHERE asset_id = %s
-            """, (asset_id,))
-            
-            result = cursor.fetchone()
-            cursor.close()
-            
-            if result:
-                return dict(result)
-            return {'scheduled_count': 0, 'last_scheduled': None}
-            
-        except Exception as e:
-            logger.error(f"Error getting greeting stats: {e}")
-            return {'scheduled_count': 0, 'last_scheduled': None}
-        finally:
-            if conn:
-                self.db_manager._put_connection(conn)
-    
     def _get_all_holiday_greetings(self, duration_category: str, schedule_date: str = None) -> List[Dict[str, Any]]:
         """Get all holiday greetings for a duration category"""
         # Check if this is a content type or duration category
@@ -759,40 +675,32 @@ class HolidayGreetingIntegration:
             else:
                 compare_date = datetime.now()
             
-            # First check how many are in rotation table
-            cursor.execute("SELECT COUNT(*) FROM holiday_greeting_rotation")
-            total_in_rotation = cursor.fetchone()[0]
-            holiday_logger.info(f"Total greetings in rotation table: {total_in_rotation}")
-            
-            cursor.execute("""
+            cursor.execute(f"""
                 SELECT 
-                    a.id as asset_id,
-                    a.id,
-                    i.id as instance_id,
-                    i.file_name,
-                    i.file_path,
-                    a.content_title,
-                    a.duration_seconds,
-                    a.duration_category,
-                    a.content_type,
-                    a.active,
-                    a.engagement_score,
-                    a.created_at,
-                    a.updated_at,
-                    a.theme,
+                    sa.asset_id,
+                    sa.asset_id as id,
+                    sa.instance_id,
+                    sa.file_name,
+                    sa.file_path,
+                    sa.content_title,
+                    sa.duration_seconds,
+                    sa.duration_category,
+                    sa.content_type,
+                    sa.engagement_score,
+                    sa.created_at,
+                    sa.updated_at,
+                    sa.theme,
                     json_build_object(
-                        'content_expiry_date', sm.content_expiry_date::text,
-                        'featured', COALESCE(sm.featured, false),
-                        'available_for_scheduling', COALESCE(sm.available_for_scheduling, true)
+                        'content_expiry_date', sa.content_expiry_date::text,
+                        'featured', sa.featured,
+                        'available_for_scheduling', sa.available_for_scheduling
                     ) as scheduling
-                FROM assets a
-                JOIN instances i ON a.id = i.asset_id AND i.is_primary = true
-                JOIN holiday_greeting_rotation hgr ON a.id = hgr.asset_id
-                LEFT JOIN scheduling_metadata sm ON a.id = sm.asset_id
-                WHERE a.duration_category = %s
-                  AND (sm.content_expiry_date IS NULL OR sm.content_expiry_date > %s)
-                  AND (sm.go_live_date IS NULL OR sm.go_live_date <= %s)
-                  AND COALESCE(sm.available_for_scheduling, TRUE) = TRUE
+                FROM {self.db_manager.schedulable_assets_relation()} sa
+                JOIN holiday_greeting_rotation hgr ON sa.asset_id = hgr.asset_id
+                WHERE sa.duration_category = %s
+                  AND (sa.content_expiry_date IS NULL OR sa.content_expiry_date > %s)
+                  AND (sa.go_live_date IS NULL OR sa.go_live_date <= %s)
+                  AND sa.available_for_scheduling = TRUE
                 ORDER BY hgr.scheduled_count ASC, hgr.last_scheduled ASC NULLS FIRST
             """, (duration_category, compare_date, compare_date))
             
@@ -947,12 +855,19 @@ class HolidayGreetingIntegration:
             return
         
         try:
-            if self.scheduler.is_holiday_greeting(file_name):
+            if is_holiday_greeting_text(file_name):
                 self.scheduler.record_scheduling(asset_id, file_name)
-                self._update_database_tracking(asset_id)
+                # Written back with the other plays of the session by flush_tracking()
+                self.session.record_play(asset_id)
         except Exception as e:
             logger.error(f"Error recording holiday greeting schedule: {e}")
     
+    def flush_tracking(self):
+        """Write the holiday greeting plays recorded so far to holiday_greeting_rotation"""
+        if not self.enabled:
+            return
+        self.session.flush()
+    
     def _get_greeting_from_daily_assignments(self, daily_asset_ids: List[int], 
                                             duration_category: str,
                                             exclude_ids: List[int]) -> Optional[Dict[str, Any]]:
@@ -1020,39 +935,6 @@ class HolidayGreetingIntegration:
             if conn:
                 self.db_manager._put_connection(conn)
     
-    def _update_database_tracking(self, asset_id: int):
-        """Update the database tracking for scheduled holiday greeting"""
-        if not self.db_manager:
-            return
-            
-        try:
-            conn = self.db_manager._get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                UPDATE holiday_greeting_rotation
-                SET scheduled_count = scheduled_count + 1,
-                    last_scheduled = CURRENT_TIMESTAMP,
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE asset_id = %s
-                RETURNING scheduled_count
-            """, (asset_id,))
-            
-            result = cursor.fetchone()
-            new_count = result[0] if result else 0
-            
-            conn.commit()
-            cursor.close()
-            self.db_manager._put_connection(conn)
-            
-            logger.info(f"Updated holiday greeting tracking for asset {asset_id}, new count: {new_count}")
-            
-        except Exception as e:
-            logger.error(f"Error updating holiday greeting database tracking: {e}")
-            if 'conn' in locals():
-                conn.rollback()
-                self.db_manager._put_connection(conn)
-    
     def get_status_report(self) -> str:
         """Get current status of holiday greeting rotation"""
         if not self.enabled:
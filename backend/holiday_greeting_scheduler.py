@@ -11,12 +11,13 @@ Status: INACTIVE until explicitly enabled
 """
 
 import logging
-import re
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Set
 import json
 import os
 
+from holiday_greeting_classifier import HOLIDAY_GREETING_MATCHER, is_holiday_greeting_text
+
 # Create dedicated logger for holiday greeting scheduling
 logger = logging.getLogger('holiday_greeting_scheduler')
 logger.setLevel(logging.DEBUG)
@@ -69,11 +70,8 @@ class HolidayGreetingScheduler:
             else:
                 self.config = self._get_default_config()
         
-        # Pattern to identify holiday greetings
-        self.greeting_pattern = re.compile(
-            r'holiday\s*greeting', 
-            re.IGNORECASE
-        )
+        # Pattern to identify holiday greetings (all greeting patterns, compiled once)
+        self.greeting_pattern = HOLIDAY_GREETING_MATCHER
         
         # In-memory tracking (until DB table approved)
         self.rotation_history = {}
@@ -132,17 +130,8 @@ class HolidayGreetingScheduler:
         Returns:
             True if this is a holiday greeting content
         """
-        # Check filename
-        if self.greeting_pattern.search(file_name):
-            logger.debug(f"Identified holiday greeting by filename: {file_name}")
-            return True
-        
-        # Check content title if provided
-        if content_title and self.greeting_pattern.search(content_title):
-            logger.debug(f"Identified holiday greeting by title: {content_title}")
-            return True
-        
-        return False
+        # File name and title are searched together in one pass
+        return is_holiday_greeting_text(file_name, content_title)
     
     def get_scheduling_priority(self, asset_id: int, file_name: str) -> float:
         """
@@ -0,0 +1,175 @@
+"""
+In-memory holiday greeting rotation for one schedule build.
+
+filter_available_content runs for every candidate batch of a build. It used
+to query holiday_greeting_rotation for the greeting list and once more per
+greeting for its play stats, and every scheduled greeting was written back
+with its own UPDATE. A HolidayGreetingSession loads the rotation stats once,
+caches greeting lists per category and date, keeps the fair-rotation
+counters in memory and writes the plays of the build back in one statement
+at the end.
+"""
+
+import logging
+from collections import Counter
+from datetime import datetime
+
+from psycopg2.extras import RealDictCursor, execute_values
+
+logger = logging.getLogger(__name__)
+
+
+class HolidayGreetingSession:
+    """Greetings, play counts and fair-rotation state for one schedule build"""
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self._stats = None  # asset_id -> {'scheduled_count', 'last_scheduled'}
+        self._greetings = {}  # (duration_category, schedule_date) -> greetings
+        self._used = {}  # duration_category -> asset ids selected, most recent last
+        self._session_counts = Counter()  # asset_id -> selections across categories
+        self._pending = Counter()  # asset_id -> plays not yet written back
+        self._greeting_flags = {}  # asset_id -> is holiday greeting
+
+    # Loaded once per build
+
+    def _load_stats(self):
+        stats = {}
+        if self.db_manager:
+            conn = None
+            try:
+                conn = self.db_manager._get_connection()
+                cursor = conn.cursor(cursor_factory=RealDictCursor)
+                cursor.execute("""
+                    SELECT asset_id, scheduled_count, last_scheduled
+                    FROM holiday_greeting_rotation
+                """)
+                for row in cursor.fetchall():
+                    stats[row['asset_id']] = {
+                        'scheduled_count': row['scheduled_count'] or 0,
+                        'last_scheduled': row['last_scheduled']
+                    }
+                cursor.close()
+            except Exception as e:
+                logger.error(f"Error loading holiday greeting rotation stats: {e}")
+            finally:
+                if conn:
+                    self.db_manager._put_connection(conn)
+        logger.info(f"Loaded rotation stats for {len(stats)} holiday greetings")
+        return stats
+
+    def stats(self, asset_id):
+        """Play count and last scheduled time as of the start of the build"""
+        if self._stats is None:
+            self._stats = self._load_stats()
+        return self._stats.get(asset_id, {'scheduled_count': 0, 'last_scheduled': None})
+
+    def greetings(self, duration_category, schedule_date, load):
+        """Greetings for a category and date, loaded with load() the first time"""
+        key = (duration_category, schedule_date)
+        if key not in self._greetings:
+            self._greetings[key] = load(duration_category, schedule_date)
+        return self._greetings[key]
+
+    def is_greeting(self, content, classify):
+        """Classify content once per asset for the rest of the build"""
+        asset_id = content.get('id') or content.get('asset_id')
+        if asset_id is None:
+            return classify(content)
+        flag = self._greeting_flags.get(asset_id)
+        if flag is None:
+            flag = self._greeting_flags[asset_id] = classify(content)
+        return flag
+
+    # Fair rotation
+
+    def used_in_category(self, duration_category):
+        return self._used.setdefault(duration_category, [])
+
+    def record_selection(self, duration_category, asset_id, available_count):
+        """Remember a selection, keeping only recent history once all greetings went around twice"""
+        used = self.used_in_category(duration_category)
+        used.append(asset_id)
+        self._session_counts[asset_id] += 1
+        if len(used) >= available_count * 2:
+            dropped = used[:-available_count]
+            del used[:len(dropped)]
+            self._session_counts.subtract(dropped)
+
+    def rank(self, duration_category, greetings):
+        """
+        Greetings in selection order:
+        1. Not recently used in this category (last 5)
+        2. Lowest session count (times used in current schedule)
+        3. Lowest total play count (historical)
+        4. Oldest last scheduled
+        """
+        recent = set(self.used_in_category(duration_category)[-5:])
+        ranked = []
+        for greeting in greetings:
+            asset_id = greeting['asset_id']
+            stats = self.stats(asset_id)
+            ranked.append({
+                'greeting': greeting,
+                'play_count': stats.get('scheduled_count', 0),
+                'last_scheduled': stats.get('last_scheduled'),
+                'session_count': self._session_counts[asset_id],
+                'recently_used_in_category': asset_id in recent
+            })
+        ranked.sort(key=lambda x: (
+            x['recently_used_in_category'],
+            x['session_count'],
+            x['play_count'],
+            x['last_scheduled'] is not None,
+            x['last_scheduled'] if x['last_scheduled'] else ''
+        ))
+        return ranked
+
+    # Write-back
+
+    def record_play(self, asset_id):
+        """Count a scheduled greeting, written back by flush()"""
+        self._pending[asset_id] += 1
+
+    def flush(self):
+        """Write the plays recorded since the last flush in one statement"""
+        if not self._pending or not self.db_manager:
+            return 0
+
+        plays = sorted(self._pending.items())
+        conn = None
+        try:
+            conn = self.db_manager._get_connection()
+            cursor = conn.cursor()
+            execute_values(cursor, """
+                UPDATE holiday_greeting_rotation hgr
+                SET scheduled_count = hgr.scheduled_count + v.plays,
+                    last_scheduled = CURRENT_TIMESTAMP,
+                    updated_at = CURRENT_TIMESTAMP
+                FROM (VALUES %s) AS v(asset_id, plays)
+                WHERE hgr.asset_id = v.asset_id
+            """, plays, template="(%s::integer, %s::integer)", page_size=len(plays))
+            updated = cursor.rowcount
+            conn.commit()
+            cursor.close()
+        except Exception as e:
+            logger.error(f"Error writing holiday greeting rotation tracking: {e}")
+            if conn:
+                conn.rollback()
+            return 0
+        finally:
+            if conn:
+                self.db_manager._put_connection(conn)
+
+        # Keep the in-memory stats in step for selections after the flush
+        if self._stats is not None:
+            now = datetime.now()
+            for asset_id, count in plays:
+                if asset_id in self._stats:
+                    self._stats[asset_id]['scheduled_count'] += count
+                    self._stats[asset_id]['last_scheduled'] = now
+
+        self._pending.clear()
+        logger.info(f"Updated holiday greeting tracking for {updated} greetings "
+                    f"({sum(count for _, count in plays)} plays)")
+        return updated
@@ -0,0 +1,130 @@
+"""
+Prometheus metrics for the backend, served at /metrics.
+
+Collectors live in one registry, so the app and the modules it uses record
+into the same place without passing it around:
+
+  http_request_duration_seconds   request latency per route and status
+  db_query_duration_seconds       statement count and time per statement family
+  db_pool_connections             pool connections in use / idle / max
+  ftp_bytes_total                 bytes moved per server and direction
+  ftp_operations_total            FTP operations per server, operation, outcome
+  ftp_transfer_seconds            transfer time per server and direction
+  whisper_real_time_factor        transcription time / audio duration
+  llm_request_duration_seconds    AI analysis latency per provider
+  loudness_queue_items            loudness queue items per status
+  fill_gaps_*                     slots added and slot rate of fill gaps runs
+
+Gauges for the pool and the loudness queue are read when scraped. FTP bytes
+per second is rate(ftp_bytes_total[...]) on the Prometheus side.
+"""
+
+import logging
+
+from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge,
+                               Histogram, generate_latest)
+
+logger = logging.getLogger(__name__)
+
+registry = CollectorRegistry(auto_describe=True)
+
+# Requests and queries are mostly short; schedule builds and fills are not
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 10)
+TRANSFER_BUCKETS = (0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800)
+RTF_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 4)
+
+http_request_duration = Histogram(
+    'http_request_duration_seconds', 'API request latency',
+    ['method', 'route', 'status'], buckets=LATENCY_BUCKETS, registry=registry)
+
+db_query_duration = Histogram(
+    'db_query_duration_seconds', 'PostgreSQL statement time per statement family',
+    ['family'], buckets=QUERY_BUCKETS, registry=registry)
+
+db_pool_connections = Gauge(
+    'db_pool_connections', 'PostgreSQL pool connections', ['state'], registry=registry)
+
+ftp_bytes = Counter(
+    'ftp_bytes_total', 'Bytes transferred over FTP', ['server', 'direction'], registry=registry)
+
+ftp_operations = Counter(
+    'ftp_operations_total', 'FTP operations', ['server', 'operation', 'outcome'], registry=registry)
+
+ftp_transfer_duration = Histogram(
+    'ftp_transfer_seconds', 'FTP transfer time', ['server', 'direction'],
+    buckets=TRANSFER_BUCKETS, registry=registry)
+
+whisper_real_time_factor = Histogram(
+    'whisper_real_time_factor', 'Transcription time divided by audio duration',
+    ['model'], buckets=RTF_BUCKETS, registry=registry)
+
+llm_request_duration = Histogram(
+    'llm_request_duration_seconds', 'AI analysis request latency',
+    ['provider', 'outcome'], buckets=LATENCY_BUCKETS, registry=registry)
+
+loudness_queue_items = Gauge(
+    'loudness_queue_items', 'Loudness analysis queue items', ['status'], registry=registry)
+
+fill_gaps_slots = Counter(
+    'fill_gaps_slots_total', 'Items added to templates by fill gaps', registry=registry)
+
+fill_gaps_duration = Histogram(
+    'fill_gaps_duration_seconds', 'Fill gaps run time', buckets=LATENCY_BUCKETS, registry=registry)
+
+fill_gaps_last_rate = Gauge(
+    'fill_gaps_last_slots_per_second', 'Slot rate of the last fill gaps run', registry=registry)
+
+
+def observe_query(family, sql, seconds):
+    """Query observer for db_instrumentation"""
+    db_query_duration.labels(family).observe(seconds)
+
+
+def watch_pool(pool):
+    """Report a ThreadedConnectionPool's connections when scraped"""
+    db_pool_connections.labels('in_use').set_function(lambda: len(pool._used))
+    db_pool_connections.labels('idle').set_function(lambda: len(pool._pool))
+    db_pool_connections.labels('max').set_function(lambda: pool.maxconn)
+
+
+def watch_loudness_queue(get_queue, statuses=('pending', 'processing', 'completed', 'error', 'failed')):
+    """Report loudness queue items per status when scraped (get_queue returns the current list)"""
+    for status in statuses:
+        loudness_queue_items.labels(status).set_function(
+            lambda status=status: sum(1 for item in list(get_queue()) if item.get('status') == status))
+
+
+def record_ftp_transfer(server, direction, nbytes, seconds, success=True):
+    """Record an upload or download (nbytes moved, whether or not it succeeded)"""
+    outcome = 'success' if success else 'failure'
+    ftp_operations.labels(server, direction, outcome).inc()
+    if nbytes:
+        ftp_bytes.labels(server, direction).inc(nbytes)
+    if success:
+        ftp_transfer_duration.labels(server, direction).observe(seconds)
+
+
+def record_ftp_operation(server, operation, success=True):
+    ftp_operations.labels(server, operation, 'success' if success else 'failure').inc()
+
+
+def record_transcription(model, seconds, audio_duration):
+    if audio_duration and audio_duration > 0:
+        whisper_real_time_factor.labels(model).observe(seconds / audio_duration)
+
+
+def record_llm_request(provider, seconds, success=True):
+    llm_request_duration.labels(provider, 'success' if success else 'failure').observe(seconds)
+
+
+def record_fill_gaps(slots, seconds):
+    fill_gaps_slots.inc(slots)
+    fill_gaps_duration.observe(seconds)
+    if seconds > 0:
+        fill_gaps_last_rate.set(slots / seconds)
+
+
+def render_metrics():
+    """Exposition body and content type for the /metrics endpoint"""
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,13 @@
+-- Add castus_metadata_modified_at column to scheduling_metadata table
+-- This column records the modify time (MLST) of the asset's
+-- .castusmeta.<file>/metadata file on the Castus server as of the last sync,
+-- so the scheduled expiration sync only downloads metadata that changed since
+-- then. For assets without metadata it holds the content folder's modify time
+-- instead, so they are not looked up again until the folder changes.
+
+ALTER TABLE scheduling_metadata 
+ADD COLUMN IF NOT EXISTS castus_metadata_modified_at TIMESTAMP WITH TIME ZONE;
+
+-- Add comment explaining the column purpose
+COMMENT ON COLUMN scheduling_metadata.castus_metadata_modified_at IS 
+'Remote modify time of the Castus metadata for this asset when it was last synchronized';
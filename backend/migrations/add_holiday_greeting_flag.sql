@@ -0,0 +1,218 @@
+-- Migration: Store the holiday greeting classification per asset
+-- Purpose: Holiday greeting filtering used to run the greeting patterns
+-- against the file name and title of every candidate in every filter pass.
+-- The classification is now stored in assets.is_holiday_greeting, and
+-- schedulable_assets carries it to the scheduling readers.
+--
+-- Requires: add_schedulable_assets_table.sql
+--
+-- The flag is kept current by triggers: inserting an asset or changing its
+-- title reclassifies it, and so does adding, renaming, re-pointing or
+-- removing its primary instance, whichever code path makes the change.
+-- NULL means unclassified; the readers then fall back to matching the
+-- names (holiday_greeting_classifier.is_holiday_greeting_content).
+--
+-- The SQL classification is the PostgreSQL form of HOLIDAY_GREETING_PATTERNS.
+--
+-- To apply this migration:
+-- psql -U ftp_sync_user -d ftp_media_sync -f add_holiday_greeting_flag.sql
+
+BEGIN;
+
+ALTER TABLE assets
+    ADD COLUMN IF NOT EXISTS is_holiday_greeting BOOLEAN;
+
+-- Earlier versions of this migration created the column NOT NULL DEFAULT FALSE
+ALTER TABLE assets
+    ALTER COLUMN is_holiday_greeting DROP NOT NULL,
+    ALTER COLUMN is_holiday_greeting DROP DEFAULT;
+
+-- Greeting patterns (HOLIDAY_GREETING_PATTERNS in holiday_greeting_classifier.py)
+CREATE OR REPLACE FUNCTION is_holiday_greeting_text(p_text TEXT)
+RETURNS BOOLEAN AS $$
+    SELECT COALESCE(p_text ~* 'holiday[[:space:]]*greeting', FALSE);
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Classify an asset by its title and the file name of its primary instance
+CREATE OR REPLACE FUNCTION classify_holiday_greeting(p_asset_id INTEGER, p_title TEXT)
+RETURNS BOOLEAN AS $$
+    SELECT is_holiday_greeting_text(p_title) OR EXISTS (
+        SELECT 1 FROM instances i
+        WHERE i.asset_id = p_asset_id
+        AND i.is_primary = TRUE
+        AND is_holiday_greeting_text(i.file_name)
+    );
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION reclassify_holiday_greeting(p_asset_id INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    IF p_asset_id IS NULL THEN
+        RETURN;
+    END IF;
+
+    UPDATE assets
+    SET is_holiday_greeting = classify_holiday_greeting(id, content_title)
+    WHERE id = p_asset_id
+    AND is_holiday_greeting IS DISTINCT FROM classify_holiday_greeting(id, content_title);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Trigger functions
+CREATE OR REPLACE FUNCTION holiday_greeting_on_asset_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.is_holiday_greeting := classify_holiday_greeting(NEW.id, NEW.content_title);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION holiday_greeting_on_instance_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM reclassify_holiday_greeting(OLD.asset_id);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND (TG_OP = 'INSERT' OR NEW.asset_id IS DISTINCT FROM OLD.asset_id) THEN
+        PERFORM reclassify_holiday_greeting(NEW.asset_id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS holiday_greeting_assets_classify ON assets;
+CREATE TRIGGER holiday_greeting_assets_classify
+    BEFORE INSERT OR UPDATE OF content_title ON assets
+    FOR EACH ROW EXECUTE FUNCTION holiday_greeting_on_asset_change();
+
+DROP TRIGGER IF EXISTS holiday_greeting_instances_classify ON instances;
+CREATE TRIGGER holiday_greeting_instances_classify
+    AFTER INSERT OR UPDATE OF asset_id, file_name, is_primary OR DELETE ON instances
+    FOR EACH ROW EXECUTE FUNCTION holiday_greeting_on_instance_change();
+
+-- Backfill every asset, including rows left FALSE by the old column default
+UPDATE assets a
+SET is_holiday_greeting = classify_holiday_greeting(a.id, a.content_title)
+WHERE a.is_holiday_greeting IS DISTINCT FROM classify_holiday_greeting(a.id, a.content_title);
+
+CREATE INDEX IF NOT EXISTS idx_assets_is_holiday_greeting
+    ON assets(id) WHERE is_holiday_greeting;
+
+ALTER TABLE schedulable_assets
+    ADD COLUMN IF NOT EXISTS is_holiday_greeting BOOLEAN;
+
+ALTER TABLE schedulable_assets
+    ALTER COLUMN is_holiday_greeting DROP NOT NULL,
+    ALTER COLUMN is_holiday_greeting DROP DEFAULT;
+
+-- Same as add_schedulable_assets_table.sql, now copying is_holiday_greeting
+-- Rebuild the row for a single asset (delete + re-insert)
+CREATE OR REPLACE FUNCTION refresh_schedulable_asset(p_asset_id INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    IF p_asset_id IS NULL THEN
+        RETURN;
+    END IF;
+
+    DELETE FROM schedulable_assets WHERE asset_id = p_asset_id;
+
+    INSERT INTO schedulable_assets
+    SELECT DISTINCT ON (a.id)
+        a.id,
+        a.guid,
+        a.mongo_id,
+        a.content_type,
+        a.content_title,
+        a.summary,
+        a.theme,
+        a.duration_seconds,
+        a.duration_category,
+        a.engagement_score,
+        a.analysis_completed,
+        a.created_at,
+        a.updated_at,
+        i.id,
+        i.file_name,
+        i.file_path,
+        i.file_size,
+        i.file_duration,
+        i.encoded_date,
+        COALESCE(sm.available_for_scheduling, TRUE),
+        sm.content_expiry_date,
+        sm.go_live_date,
+        COALESCE(sm.featured, FALSE),
+        sm.last_scheduled_date,
+        sm.total_airings,
+        sm.priority_score,
+        sm.optimal_timeslots,
+        sm.metadata_synced_at,
+        a.is_holiday_greeting
+    FROM assets a
+    JOIN instances i ON a.id = i.asset_id AND i.is_primary = TRUE
+    LEFT JOIN scheduling_metadata sm ON a.id = sm.asset_id
+    WHERE a.id = p_asset_id
+    AND a.analysis_completed = TRUE
+    ORDER BY a.id, i.id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Full rebuild, used for the initial fill and manual repair
+CREATE OR REPLACE FUNCTION refresh_all_schedulable_assets()
+RETURNS INTEGER AS $$
+DECLARE
+    row_count INTEGER;
+BEGIN
+    DELETE FROM schedulable_assets;
+
+    INSERT INTO schedulable_assets
+    SELECT DISTINCT ON (a.id)
+        a.id,
+        a.guid,
+        a.mongo_id,
+        a.content_type,
+        a.content_title,
+        a.summary,
+        a.theme,
+        a.duration_seconds,
+        a.duration_category,
+        a.engagement_score,
+        a.analysis_completed,
+        a.created_at,
+        a.updated_at,
+        i.id,
+        i.file_name,
+        i.file_path,
+        i.file_size,
+        i.file_duration,
+        i.encoded_date,
+        COALESCE(sm.available_for_scheduling, TRUE),
+        sm.content_expiry_date,
+        sm.go_live_date,
+        COALESCE(sm.featured, FALSE),
+        sm.last_scheduled_date,
+        sm.total_airings,
+        sm.priority_score,
+        sm.optimal_timeslots,
+        sm.metadata_synced_at,
+        a.is_holiday_greeting
+    FROM assets a
+    JOIN instances i ON a.id = i.asset_id AND i.is_primary = TRUE
+    LEFT JOIN scheduling_metadata sm ON a.id = sm.asset_id
+    WHERE a.analysis_completed = TRUE
+    ORDER BY a.id, i.id;
+
+    GET DIAGNOSTICS row_count = ROW_COUNT;
+    RETURN row_count;
+END;
+$$ LANGUAGE plpgsql;
+
+UPDATE schedulable_assets sa
+SET is_holiday_greeting = a.is_holiday_greeting
+FROM assets a
+WHERE a.id = sa.asset_id
+AND sa.is_holiday_greeting IS DISTINCT FROM a.is_holiday_greeting;
+
+COMMENT ON COLUMN assets.is_holiday_greeting IS
+'Holiday greeting classification of the title and primary file name, kept current by triggers on assets and instances. NULL means unclassified.';
+
+COMMIT;
@@ -0,0 +1,270 @@
+-- Migration: Add denormalized schedulable_assets table
+-- Purpose: One row per analyzed asset joining assets, its primary instance and
+-- scheduling_metadata, so the scheduler, holiday greeting rotation, analyzed
+-- content listing and expiration sync read a single indexed table instead of
+-- repeating the three-way join on every call.
+--
+-- Requires: add_featured_field.sql, add_go_live_date.sql,
+--           add_metadata_synced_at.sql and add_theme_field.sql
+--
+-- The table is kept current by row-level triggers on assets, instances and
+-- scheduling_metadata (analysis, expiration, go live and featured changes all
+-- flow through those tables). Date-relative filters (expiry/go live compared
+-- to the schedule date) are still applied by the readers.
+--
+-- To apply this migration:
+-- psql -U ftp_sync_user -d ftp_media_sync -f add_schedulable_assets_table.sql
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS schedulable_assets (
+    asset_id INTEGER PRIMARY KEY REFERENCES assets(id) ON DELETE CASCADE,
+    guid UUID NOT NULL,
+    mongo_id VARCHAR(24),
+    content_type content_type,
+    content_title VARCHAR(500),
+    summary TEXT,
+    theme VARCHAR(255),
+    duration_seconds NUMERIC(10,3),
+    duration_category duration_category,
+    engagement_score INTEGER,
+    analysis_completed BOOLEAN NOT NULL DEFAULT TRUE,
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    instance_id INTEGER NOT NULL,
+    file_name VARCHAR(500),
+    file_path TEXT,
+    file_size BIGINT,
+    file_duration NUMERIC(10,3),
+    encoded_date TIMESTAMP WITH TIME ZONE,
+    available_for_scheduling BOOLEAN NOT NULL DEFAULT TRUE,
+    content_expiry_date TIMESTAMP WITH TIME ZONE,
+    go_live_date TIMESTAMP WITH TIME ZONE,
+    featured BOOLEAN NOT NULL DEFAULT FALSE,
+    last_scheduled_date TIMESTAMP WITH TIME ZONE,
+    total_airings INTEGER,
+    priority_score NUMERIC(5,2),
+    optimal_timeslots TEXT[],
+    metadata_synced_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Indexes matching the reader filters
+CREATE INDEX IF NOT EXISTS idx_schedulable_assets_duration_category
+    ON schedulable_assets(duration_category) WHERE available_for_scheduling;
+CREATE INDEX IF NOT EXISTS idx_schedulable_assets_content_type
+    ON schedulable_assets(content_type);
+CREATE INDEX IF NOT EXISTS idx_schedulable_assets_expiry
+    ON schedulable_assets(content_expiry_date);
+CREATE INDEX IF NOT EXISTS idx_schedulable_assets_last_scheduled
+    ON schedulable_assets(last_scheduled_date);
+
+-- Keyset pagination of the analyzed content listing: one index per sort on
+-- (sort keys, asset_id), with the same expressions as ANALYZED_CONTENT_SORTS
+-- in database_postgres.py (the 'id' sort uses the primary key)
+CREATE INDEX IF NOT EXISTS idx_schedulable_assets_page_priority
+    ON schedulable_assets((COALESCE(priority_score, 0)), (COALESCE(engagement_score, -1)), asset_id)
+    WHERE available_for_scheduling;
+CREATE INDEX IF NOT EXISTS idx_schedulable_assets_page_title
+    ON schedulable_assets((COALESCE(content_title, '')), asset_id)
+    WHERE available_for_scheduling;
+CREATE INDEX IF NOT EXISTS idx_schedulable_assets_page_file_name
+    ON schedulable_assets((COALESCE(file_name, '')), asset_id)
+    WHERE available_for_scheduling;
+CREATE INDEX IF NOT EXISTS idx_schedulable_assets_page_duration
+    ON schedulable_assets((COALESCE(file_duration, duration_seconds, 0)), asset_id)
+    WHERE available_for_scheduling;
+CREATE INDEX IF NOT EXISTS idx_schedulable_assets_page_created_at
+    ON schedulable_assets((COALESCE(created_at, 'epoch'::timestamptz)), asset_id)
+    WHERE available_for_scheduling;
+
+-- Rebuild the row for a single asset (delete + re-insert)
+CREATE OR REPLACE FUNCTION refresh_schedulable_asset(p_asset_id INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    IF p_asset_id IS NULL THEN
+        RETURN;
+    END IF;
+
+    DELETE FROM schedulable_assets WHERE asset_id = p_asset_id;
+
+    INSERT INTO schedulable_assets
+    SELECT DISTINCT ON (a.id)
+        a.id,
+        a.guid,
+        a.mongo_id,
+        a.content_type,
+        a.content_title,
+        a.summary,
+        a.theme,
+        a.duration_seconds,
+        a.duration_category,
+        a.engagement_score,
+        a.analysis_completed,
+        a.created_at,
+        a.updated_at,
+        i.id,
+        i.file_name,
+        i.file_path,
+        i.file_size,
+        i.file_duration,
+        i.encoded_date,
+        COALESCE(sm.available_for_scheduling, TRUE),
+        sm.content_expiry_date,
+        sm.go_live_date,
+        COALESCE(sm.featured, FALSE),
+        sm.last_scheduled_date,
+        sm.total_airings,
+        sm.priority_score,
+        sm.optimal_timeslots,
+        sm.metadata_synced_at
+    FROM assets a
+    JOIN instances i ON a.id = i.asset_id AND i.is_primary = TRUE
+    LEFT JOIN scheduling_metadata sm ON a.id = sm.asset_id
+    WHERE a.id = p_asset_id
+    AND a.analysis_completed = TRUE
+    ORDER BY a.id, i.id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Full rebuild, used for the initial fill and manual repair
+CREATE OR REPLACE FUNCTION refresh_all_schedulable_assets()
+RETURNS INTEGER AS $$
+DECLARE
+    row_count INTEGER;
+BEGIN
+    DELETE FROM schedulable_assets;
+
+    INSERT INTO schedulable_assets
+    SELECT DISTINCT ON (a.id)
+        a.id,
+        a.guid,
+        a.mongo_id,
+        a.content_type,
+        a.content_title,
+        a.summary,
+        a.theme,
+        a.duration_seconds,
+        a.duration_category,
+        a.engagement_score,
+        a.analysis_completed,
+        a.created_at,
+        a.updated_at,
+        i.id,
+        i.file_name,
+        i.file_path,
+        i.file_size,
+        i.file_duration,
+        i.encoded_date,
+        COALESCE(sm.available_for_scheduling, TRUE),
+        sm.content_expiry_date,
+        sm.go_live_date,
+        COALESCE(sm.featured, FALSE),
+        sm.last_scheduled_date,
+        sm.total_airings,
+        sm.priority_score,
+        sm.optimal_timeslots,
+        sm.metadata_synced_at
+    FROM assets a
+    JOIN instances i ON a.id = i.asset_id AND i.is_primary = TRUE
+    LEFT JOIN scheduling_metadata sm ON a.id = sm.asset_id
+    WHERE a.analysis_completed = TRUE
+    ORDER BY a.id, i.id;
+
+    GET DIAGNOSTICS row_count = ROW_COUNT;
+    RETURN row_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Trigger functions
+CREATE OR REPLACE FUNCTION schedulable_assets_on_asset_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM schedulable_assets WHERE asset_id = OLD.id;
+        RETURN OLD;
+    END IF;
+    PERFORM refresh_schedulable_asset(NEW.id);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION schedulable_assets_on_child_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM refresh_schedulable_asset(OLD.asset_id);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND (TG_OP = 'INSERT' OR NEW.asset_id IS DISTINCT FROM OLD.asset_id) THEN
+        PERFORM refresh_schedulable_asset(NEW.asset_id);
+    END IF;
+    IF TG_OP = 'DELETE' THEN
+        RETURN OLD;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- scheduling_metadata only supplies column values (the row set depends on
+-- assets and instances), so an update for the same asset is copied in place
+-- instead of rebuilding the row. This keeps the frequent
+-- last_scheduled_date / total_airings writes cheap.
+CREATE OR REPLACE FUNCTION schedulable_assets_on_scheduling_metadata_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND NEW.asset_id IS NOT DISTINCT FROM OLD.asset_id THEN
+        UPDATE schedulable_assets sa
+        SET available_for_scheduling = COALESCE(NEW.available_for_scheduling, TRUE),
+            content_expiry_date = NEW.content_expiry_date,
+            go_live_date = NEW.go_live_date,
+            featured = COALESCE(NEW.featured, FALSE),
+            last_scheduled_date = NEW.last_scheduled_date,
+            total_airings = NEW.total_airings,
+            priority_score = NEW.priority_score,
+            optimal_timeslots = NEW.optimal_timeslots,
+            metadata_synced_at = NEW.metadata_synced_at
+        WHERE sa.asset_id = NEW.asset_id
+        AND (sa.available_for_scheduling, sa.content_expiry_date, sa.go_live_date, sa.featured,
+             sa.last_scheduled_date, sa.total_airings, sa.priority_score, sa.optimal_timeslots,
+             sa.metadata_synced_at)
+            IS DISTINCT FROM
+            (COALESCE(NEW.available_for_scheduling, TRUE), NEW.content_expiry_date, NEW.go_live_date,
+             COALESCE(NEW.featured, FALSE), NEW.last_scheduled_date, NEW.total_airings,
+             NEW.priority_score, NEW.optimal_timeslots, NEW.metadata_synced_at);
+        RETURN NEW;
+    END IF;
+    -- Insert, delete or a change of asset: rebuild the affected rows
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM refresh_schedulable_asset(OLD.asset_id);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM refresh_schedulable_asset(NEW.asset_id);
+    END IF;
+    IF TG_OP = 'DELETE' THEN
+        RETURN OLD;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS schedulable_assets_assets_sync ON assets;
+CREATE TRIGGER schedulable_assets_assets_sync
+    AFTER INSERT OR UPDATE OR DELETE ON assets
+    FOR EACH ROW EXECUTE FUNCTION schedulable_assets_on_asset_change();
+
+DROP TRIGGER IF EXISTS schedulable_assets_instances_sync ON instances;
+CREATE TRIGGER schedulable_assets_instances_sync
+    AFTER INSERT OR UPDATE OR DELETE ON instances
+    FOR EACH ROW EXECUTE FUNCTION schedulable_assets_on_child_change();
+
+DROP TRIGGER IF EXISTS schedulable_assets_scheduling_metadata_sync ON scheduling_metadata;
+CREATE TRIGGER schedulable_assets_scheduling_metadata_sync
+    AFTER INSERT OR UPDATE OR DELETE ON scheduling_metadata
+    FOR EACH ROW EXECUTE FUNCTION schedulable_assets_on_scheduling_metadata_change();
+
+-- Initial fill
+SELECT refresh_all_schedulable_assets();
+
+COMMENT ON TABLE schedulable_assets IS
+'Denormalized analyzed assets with primary instance and scheduling metadata. Maintained by triggers on assets, instances and scheduling_metadata.';
+
+COMMIT;
@@ -0,0 +1,579 @@
+"""
+Day-parallel generation of weekly and monthly schedules.
+
+The sequential builders fill one day after the other and ask the database
+for candidates before every item. Days only depend on each other through
+replay delays (an item aired late on one day can still be blocked early on
+the next), so here the candidate content of the whole range is read once
+into a ScheduleSnapshot, every day is filled from it in its own worker
+process, and a stitching pass walks the days in order afterwards to
+replace items whose replay delay is violated by what the previous days
+aired.
+
+Everything in this module works on the snapshot only (no database access),
+so it can run in worker processes. The worker pool runs in a separate
+interpreter started on this file, never in the web process (see build_days).
+"""
+
+import logging
+import multiprocessing
+import os
+import pickle
+import random
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+logger = logging.getLogger(__name__)
+
+DAY_SECONDS = 24 * 60 * 60
+
+DURATION_CATEGORIES = ('id', 'spots', 'short_form', 'long_form')
+SHORT_FORM_CATEGORIES = ('id', 'spots', 'short_form')
+
+# Progressive delay relaxation, as in _get_content_with_progressive_delays
+DELAY_FACTORS = (1.0, 0.75, 0.5, 0.25, 0.0)
+
+# Default replay delays (hours) for content types requested by the rotation
+CONTENT_TYPE_DELAYS = {
+    'an': 2,
+    'atld': 2,
+    'bmp': 3,
+    'imow': 4,
+    'im': 3,
+    'ia': 4,
+    'lm': 3,
+    'mtg': 8,
+    'maf': 4,
+    'pkg': 3,
+    'pmo': 3,
+    'psa': 2,
+    'szl': 3,
+    'spp': 3
+}
+
+DELAY_STAT_KEYS = {1.0: 'full_delays', 0.75: 'reduced_75', 0.5: 'reduced_50', 0.25: 'reduced_25', 0.0: 'no_delays'}
+
+# Candidates considered per selection, as the LIMIT of get_available_content
+CANDIDATE_LIMIT = 200
+
+# Iterations without progress before the rest of a day is left empty
+MAX_NO_PROGRESS = 50
+
+SNAPSHOT_FIELDS = (
+    'asset_id', 'instance_id', 'content_type', 'content_title', 'duration_seconds',
+    'duration_category', 'engagement_score', 'theme', 'file_name', 'encoded_date',
+    'last_scheduled_date', 'total_airings', 'featured', 'content_expiry_date', 'go_live_date'
+)
+
+
+def _plain_value(value):
+    """Database values in a form that pickles and compares with naive datetimes"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        # timestamptz columns are compared with naive schedule dates in local time
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def replay_delay_settings(category, scheduling_config):
+    """Full (base, additional per airing) replay delay hours for a rotation category"""
+    replay_delays = scheduling_config.get('replay_delays', {})
+    additional_delays = scheduling_config.get('additional_delay_per_airing', {})
+    if category.lower() in CONTENT_TYPE_DELAYS:
+        content_type = category.lower()
+        return (replay_delays.get(content_type, CONTENT_TYPE_DELAYS[content_type]),
+                additional_delays.get(content_type, 0.5))
+    return replay_delays.get(category, 24), additional_delays.get(category, 2)
+
+
+def snapshot_row(row):
+    """Copy the fields the day builder needs out of a content row"""
+    candidate = {field: _plain_value(row.get(field)) for field in SNAPSHOT_FIELDS}
+    candidate['duration_seconds'] = float(candidate['duration_seconds'] or 0)
+    candidate['total_airings'] = candidate['total_airings'] or 0
+    candidate['featured'] = bool(candidate['featured'])
+    return candidate
+
+
+class ScheduleSnapshot:
+    """
+    Candidate content and settings for building a range of days
+
+    Args:
+        start_date: Midnight of the first day
+        days: Number of days to build
+        rotation: Duration category / content type rotation order
+        candidates: snapshot_row() dicts of all content schedulable in the range
+        featured_by_day: Featured content (snapshot_row() dicts) for each day
+        replay_delays: Category -> (base delay hours, additional hours per airing)
+        featured_delay: Minimum spacing of featured content in hours
+        featured_config: 'featured_content' scheduling settings
+        seed: Seed of the per-day random choices (None for unseeded)
+    """
+
+    def __init__(self, start_date, days, rotation, candidates, featured_by_day,
+                 replay_delays, featured_delay, featured_config, seed=None):
+        self.start_date = start_date
+        self.days = days
+        self.rotation = list(rotation)
+        self.candidates = candidates
+        self.featured_by_day = featured_by_day
+        self.replay_delays = replay_delays
+        self.featured_delay = featured_delay
+        self.featured_config = featured_config or {}
+        self.seed = seed
+
+    def day_start(self, day_index):
+        return self.start_date + timedelta(days=day_index)
+
+    def replay_delay_hours(self, candidate, category, airings, factor):
+        """Required hours since the last airing, as in the get_available_content filter"""
+        if candidate['featured']:
+            return self.featured_delay
+        base, additional = self.replay_delays.get(category, (24, 2))
+        return (base + airings * additional) * factor
+
+
+def matches_category(candidate, category):
+    """Rotation entries are duration categories or (lowercase) content types"""
+    if category in DURATION_CATEGORIES:
+        return candidate['duration_category'] == category
+    return (candidate['content_type'] or '').lower() == category.lower()
+
+
+def is_available_on(candidate, day_start):
+    """Expiry and go live filters of get_available_content for one day"""
+    expiry = candidate['content_expiry_date']
+    go_live = candidate['go_live_date']
+    return ((expiry is None or expiry > day_start) and
+            (go_live is None or go_live <= day_start))
+
+
+def delay_satisfied(snapshot, candidate, category, last_aired, airings, day_start, factor):
+    """Replay delay check of get_available_content against a given airing history"""
+    if factor == 0.0 or last_aired is None or last_aired > day_start:
+        return True
+    hours_since = (day_start - last_aired).total_seconds() / 3600
+    return hours_since >= snapshot.replay_delay_hours(candidate, category, airings, factor)
+
+
+def _rank_key(candidate, day_start):
+    """ORDER BY of get_available_content, ties broken by asset id"""
+    encoded = candidate['encoded_date']
+    if encoded is None:
+        freshness = 0
+    else:
+        age_days = (day_start - encoded).total_seconds() / 86400
+        if age_days <= 0:
+            freshness = 100
+        elif age_days <= 1:
+            freshness = 90
+        elif age_days <= 3:
+            freshness = 80
+        elif age_days <= 7:
+            freshness = 60
+        elif age_days <= 14:
+            freshness = 40
+        elif age_days <= 30:
+            freshness = 20
+        else:
+            freshness = 10
+
+    airings = candidate['total_airings']
+    if airings == 0:
+        airing_score = 100
+    elif airings <= 2:
+        airing_score = 80
+    elif airings <= 5:
+        airing_score = 60
+    elif airings <= 10:
+        airing_score = 40
+    elif airings <= 20:
+        airing_score = 20
+    else:
+        airing_score = 10
+
+    last = candidate['last_scheduled_date']
+    if last is None:
+        recency = 100
+    else:
+        hours = (day_start - last).total_seconds() / 3600
+        if hours >= 24:
+            recency = 100
+        elif hours >= 12:
+            recency = 80
+        elif hours >= 6:
+            recency = 60
+        elif hours >= 3:
+            recency = 40
+        elif hours >= 1:
+            recency = 20
+        else:
+            recency = 0
+
+    engagement = candidate['engagement_score'] if candidate['engagement_score'] is not None else 50
+    score = freshness * 0.35 + engagement * 0.25 + airing_score * 0.20 + recency * 0.20
+
+    return (
+        -score,
+        last is not None, last or datetime.min,
+        candidate['total_airings'],
+        encoded is None, -(encoded.timestamp() if encoded else 0),
+        candidate['asset_id']
+    )
+
+
+class _DayCandidates:
+    """Candidates available on one day, ranked per rotation category on first use"""
+
+    def __init__(self, snapshot, day_start):
+        self.snapshot = snapshot
+        self.day_start = day_start
+        self._available = [c for c in snapshot.candidates if is_available_on(c, day_start)]
+        self._ranked = {}
+
+    def ranked(self, category):
+        ranked = self._ranked.get(category)
+        if ranked is None:
+            ranked = sorted((c for c in self._available if matches_category(c, category)),
+                            key=lambda c: _rank_key(c, self.day_start))
+            self._ranked[category] = ranked
+        return ranked
+
+    def with_delays(self, category, exclude_ids, factor):
+        """Candidates passing the replay delay at factor against the history in the snapshot"""
+        found = []
+        for candidate in self.ranked(category):
+            if candidate['asset_id'] in exclude_ids:
+                continue
+            if delay_satisfied(self.snapshot, candidate, category, candidate['last_scheduled_date'],
+                               candidate['total_airings'], self.day_start, factor):
+                found.append(candidate)
+                if len(found) >= CANDIDATE_LIMIT:
+                    break
+        return found
+
+    def progressive(self, category, exclude_ids):
+        """Relax delays step by step, then allow repeats within the day, returning (content, factor, was_reset)"""
+        for factor in DELAY_FACTORS:
+            found = self.with_delays(category, exclude_ids, factor)
+            if found:
+                return found, factor, False
+        found = self.ranked(category)[:CANDIDATE_LIMIT]
+        return found, 0.0, bool(found)
+
+
+def has_theme_conflict(candidate, category, day_items, remaining_hours=None):
+    """Same-theme short-form content must be separated by long_form (as _has_theme_conflict)"""
+    theme = candidate.get('theme')
+    candidate_category = candidate.get('duration_category') or category
+    if candidate_category not in SHORT_FORM_CATEGORIES or not theme or not day_items:
+        return False
+    if remaining_hours is not None and remaining_hours < 2.0:
+        return False
+    theme = theme.lower()
+    for item in reversed(day_items):
+        if item['duration_category'] == 'long_form':
+            return False
+        if (item['duration_category'] in SHORT_FORM_CATEGORIES and item['theme'] and
+                item['theme'].lower() == theme):
+            return True
+    return False
+
+
+def _score(candidate, requested_category, position, recent_plays, day_items, rng):
+    """Multi-factor score of the sequential weekly builder"""
+    asset_id = candidate['asset_id']
+    score = 100 + rng.uniform(-5, 5)
+    if candidate['featured']:
+        score += 150
+
+    plays = recent_plays.get(asset_id)
+    if plays:
+        for play_time in plays:
+            time_gap = (position - play_time) / 3600
+            if time_gap < 1:
+                score -= 100
+            elif time_gap < 2:
+                score -= 50
+            elif time_gap < 4:
+                score -= 25
+            elif time_gap < 6:
+                score -= 10
+        if len(plays) >= 3:
+            score -= 50 * (len(plays) - 2)
+
+    requested = requested_category.lower()
+    if requested in CONTENT_TYPE_DELAYS:
+        if plays:
+            time_gap = (position - plays[-1]) / 3600
+            min_delay = CONTENT_TYPE_DELAYS.get((candidate['content_type'] or '').lower(), 3)
+            if time_gap < min_delay:
+                score -= 200 * (min_delay - time_gap) / min_delay
+            if len(plays) >= 2:
+                score -= 30 * (len(plays) - 1)
+        else:
+            score += 30
+    elif candidate['duration_category'] == 'id':
+        if plays:
+            if (position - plays[-1]) / 3600 < 2:
+                score -= 300
+            if len(plays) >= 2:
+                score -= 50 * (len(plays) - 1)
+        else:
+            score += 50
+
+    if has_theme_conflict(candidate, candidate['duration_category'], day_items):
+        score -= 400
+    return score
+
+
+def _is_daytime(position, featured_config):
+    hour_of_day = (position / 3600) % 24
+    daytime = featured_config.get('daytime_hours', {})
+    return daytime.get('start', 6) <= hour_of_day < daytime.get('end', 18)
+
+
+def _make_item(candidate, position, requested_category, factor, was_reset, featured_slot):
+    return {
+        'offset': position,
+        'asset_id': candidate['asset_id'],
+        'instance_id': candidate['instance_id'],
+        'duration': candidate['duration_seconds'],
+        'content_type': candidate['content_type'],
+        'theme': candidate['theme'],
+        'duration_category': candidate['duration_category'],
+        'file_name': candidate['file_name'],
+        'featured': candidate['featured'],
+        'featured_slot': featured_slot,
+        'requested_category': requested_category,
+        'delay_factor': factor,
+        'was_reset': was_reset
+    }
+
+
+def build_day(snapshot, day_index):
+    """
+    Fill one day from the snapshot, following the sequential weekly builder
+    (rotation, featured spacing, progressive delays, scoring, end-of-day fit).
+
+    Returns a dict with the day index, its items (offsets in seconds from
+    the start of the day) and delay statistics.
+    """
+    day_start = snapshot.day_start(day_index)
+    rng = random.Random(None if snapshot.seed is None else f"{snapshot.seed}:{day_start:%Y-%m-%d}")
+    candidates = _DayCandidates(snapshot, day_start)
+    featured_content = snapshot.featured_by_day[day_index] if snapshot.featured_by_day else []
+    featured_config = snapshot.featured_config
+    daytime_probability = featured_config.get('daytime_probability', 0.75)
+
+    items = []
+    day_ids = set()
+    recent_plays = {}
+    rotation_index = 0
+    position = 0.0
+    last_featured = 0.0
+    featured_index = 0
+    no_progress = 0
+    stats = {'full_delays': 0, 'reduced_75': 0, 'reduced_50': 0, 'reduced_25': 0, 'no_delays': 0, 'resets': 0}
+
+    while position < DAY_SECONDS and no_progress < MAX_NO_PROGRESS:
+        remaining = DAY_SECONDS - position
+        requested = snapshot.rotation[rotation_index]
+        featured_slot = False
+
+        try_featured = False
+        if featured_content and position - last_featured >= snapshot.featured_delay * 3600:
+            probability = daytime_probability if _is_daytime(position, featured_config) else 1 - daytime_probability
+            try_featured = rng.random() < probability
+
+        if try_featured:
+            available = [featured_content[featured_index % len(featured_content)]]
+            featured_index += 1
+            factor, was_reset, featured_slot = 1.0, False, True
+        else:
+            available, factor, was_reset = candidates.progressive(requested, day_ids)
+            if was_reset:
+                day_ids.difference_update(c['asset_id'] for c in candidates.ranked(requested))
+
+        if not available:
+            # Nothing in this category even after a reset, move on in the rotation
+            rotation_index = (rotation_index + 1) % len(snapshot.rotation)
+            no_progress += 1
+            continue
+
+        if featured_slot:
+            content = available[0]
+        else:
+            content = max(available, key=lambda c: _score(c, requested, position, recent_plays, items, rng))
+
+        duration = content['duration_seconds']
+        if duration > remaining:
+            # Would cross midnight: take the first shorter item without a theme conflict
+            content = next((alt for alt in available[1:]
+                            if alt['duration_seconds'] <= remaining and
+                            not has_theme_conflict(alt, requested, items, remaining_hours=remaining / 3600)),
+                           None)
+            if content is None:
+                break
+            duration = content['duration_seconds']
+
+        items.append(_make_item(content, position, requested, factor, was_reset, featured_slot))
+        day_ids.add(content['asset_id'])
+        recent_plays.setdefault(content['asset_id'], []).append(position)
+        position += duration
+        no_progress = 0
+
+        stats[DELAY_STAT_KEYS[factor]] += 1
+        if was_reset:
+            stats['resets'] += 1
+        if not content['featured']:
+            rotation_index = (rotation_index + 1) % len(snapshot.rotation)
+        if content['featured']:
+            last_featured = position
+
+    return {'day_index': day_index, 'items': items, 'stats': stats}
+
+
+# Worker processes get the snapshot once, not with every day
+_worker_snapshot = None
+
+
+def _init_worker(snapshot):
+    global _worker_snapshot
+    _worker_snapshot = snapshot
+
+
+def _build_day_in_worker(day_index):
+    return build_day(_worker_snapshot, day_index)
+
+
+def run_worker_pool(snapshot, workers):
+    """
+    Build all days in a pool of worker processes
+
+    Only called from this module's entry point (see build_days), in an
+    interpreter that runs nothing but this module, so the forkserver and
+    its workers never import the web app.
+    """
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload([__name__])
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(snapshot,)) as pool:
+        return list(pool.map(_build_day_in_worker, range(snapshot.days)))
+
+
+def build_days(snapshot, workers=None):
+    """Build all days of the snapshot, in worker processes when there is more than one"""
+    workers = workers or int(os.environ.get('SCHEDULE_WORKERS', 0)) or os.cpu_count() or 1
+    workers = min(workers, snapshot.days)
+
+    if workers > 1:
+        # The pool runs in a fresh interpreter started on this file. Forking
+        # the multi-threaded web process (log listener, APScheduler, open
+        # database sockets) can deadlock a worker on a lock another thread
+        # held, and spawn/forkserver workers started from it would re-run
+        # app.py as their main module.
+        try:
+            result = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), str(workers)],
+                input=pickle.dumps(snapshot, pickle.HIGHEST_PROTOCOL),
+                capture_output=True, check=True
+            )
+            return pickle.loads(result.stdout)
+        except subprocess.CalledProcessError as e:
+            stderr = e.stderr.decode('utf-8', 'replace').strip().splitlines()
+            logger.warning(f"Parallel day build failed ({stderr[-1] if stderr else e}), building days in process")
+        except Exception as e:
+            logger.warning(f"Parallel day build failed ({e}), building days in process")
+
+    return [build_day(snapshot, day_index) for day_index in range(snapshot.days)]
+
+
+def stitch(snapshot, day_results):
+    """
+    Resolve replay delays across day boundaries, walking the days in order
+
+    Each day was built against the airing history in the snapshot only. Here
+    the history grows with every stitched day; an item whose delay (at the
+    factor it was selected with) is violated by an airing on an earlier day
+    is replaced by the best ranked candidate of its rotation category that
+    satisfies the delay, isn't aired that day yet and fits the day. When no
+    candidate qualifies the item stays, as the sequential builder would
+    have taken it with delays removed.
+
+    Returns (days, stats): each day as a list of items with offsets
+    recomputed, and counts of replaced and kept conflicts.
+    """
+    last_aired = {c['asset_id']: c['last_scheduled_date'] for c in snapshot.candidates}
+    airings = {c['asset_id']: c['total_airings'] for c in snapshot.candidates}
+    by_id = {c['asset_id']: c for c in snapshot.candidates}
+    stats = {'conflicts': 0, 'replaced': 0, 'kept': 0}
+    days = []
+
+    for result in sorted(day_results, key=lambda r: r['day_index']):
+        day_start = snapshot.day_start(result['day_index'])
+        items = [dict(item) for item in result['items']]
+        candidates = None
+        aired_today = {item['asset_id'] for item in items}
+        slack = DAY_SECONDS - sum(item['duration'] for item in items)
+
+        for index, item in enumerate(items):
+            if item['featured_slot'] or item['asset_id'] not in by_id:
+                continue
+            category = item['requested_category']
+            asset_id = item['asset_id']
+            if delay_satisfied(snapshot, by_id[asset_id], category, last_aired.get(asset_id),
+                               airings.get(asset_id, 0), day_start, item['delay_factor']):
+                continue
+
+            stats['conflicts'] += 1
+            if candidates is None:
+                candidates = _DayCandidates(snapshot, day_start)
+            replacement = None
+            for factor in DELAY_FACTORS:
+                if factor < item['delay_factor']:
+                    break
+                replacement = next((c for c in candidates.ranked(category)
+                                    if c['asset_id'] not in aired_today and
+                                    c['duration_seconds'] <= item['duration'] + slack and
+                                    delay_satisfied(snapshot, c, category, last_aired.get(c['asset_id']),
+                                                    airings.get(c['asset_id'], 0), day_start, factor)),
+                                   None)
+                if replacement:
+                    break
+
+            if replacement is None:
+                stats['kept'] += 1
+                continue
+
+            slack += item['duration'] - replacement['duration_seconds']
+            aired_today.discard(asset_id)
+            aired_today.add(replacement['asset_id'])
+            items[index] = _make_item(replacement, item['offset'], category, factor, False, False)
+            stats['replaced'] += 1
+
+        # Lay the day out again after replacements changed durations
+        position = 0.0
+        for item in items:
+            item['offset'] = position
+            position += item['duration']
+            air_time = day_start + timedelta(seconds=item['offset'])
+            last_aired[item['asset_id']] = air_time
+            airings[item['asset_id']] = airings.get(item['asset_id'], 0) + 1
+        days.append(items)
+
+    return days, stats
+
+
+if __name__ == '__main__':
+    # Worker pool entry point for build_days: reads the pickled snapshot from
+    # stdin and writes the pickled day results to stdout. The module is
+    # imported by name so the snapshot's classes are the ones pickled.
+    import parallel_schedule
+    day_results = parallel_schedule.run_worker_pool(pickle.load(sys.stdin.buffer), int(sys.argv[1]))
+    pickle.dump(day_results, sys.stdout.buffer, pickle.HIGHEST_PROTOCOL)
@@ -0,0 +1,202 @@
+"""
+Per-request SQL statement tracing.
+
+Each API request gets a RequestQueries (in a context variable, like the log
+budget in async_logging) that counts pool checkouts, statements and DB
+time, and keeps the slowest statements and how often each statement was
+repeated. When the request ends its summary goes into a rolling window,
+from which the admin report ranks the endpoints by DB time and lists N+1
+suspects: the same statement run many times within one request.
+
+Statements run outside a request (scheduler jobs, background threads) are
+not traced here; they still show up in the /metrics query histogram.
+"""
+
+import contextvars
+import heapq
+import re
+import threading
+import time
+from collections import Counter, deque
+from functools import lru_cache
+
+from db_instrumentation import add_query_observer
+
+# Slowest statements kept per request
+SLOWEST_PER_REQUEST = 5
+# One statement run this often in a single request is reported as an N+1 suspect
+N_PLUS_ONE_THRESHOLD = 20
+# Requests kept for the admin report
+REPORT_WINDOW = 2000
+# Statement text kept in reports
+STATEMENT_PREVIEW = 300
+
+_current = contextvars.ContextVar('request_queries', default=None)
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACE_RE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=4096)
+def _normalize(sql):
+    return _SPACE_RE.sub(' ', _LITERAL_RE.sub('?', sql)).strip()[:STATEMENT_PREVIEW]
+
+
+def normalize_statement(sql):
+    """Statement text with literals replaced, to group repeats of one statement"""
+    if isinstance(sql, bytes):
+        sql = sql[:STATEMENT_PREVIEW * 4].decode('utf-8', 'replace')
+    elif not isinstance(sql, str):
+        sql = str(sql)
+    return _normalize(sql[:STATEMENT_PREVIEW * 4])
+
+
+class RequestQueries:
+    """Statements and DB time of one request"""
+
+    def __init__(self, label):
+        self.label = label
+        self.started = time.perf_counter()
+        self.count = 0
+        self.seconds = 0.0
+        self.checkouts = 0
+        self.checkout_seconds = 0.0
+        self.slowest = []  # min-heap of (seconds, sequence, family, sql)
+        self.statements = Counter()
+        self._lock = threading.Lock()
+
+    def add_query(self, family, sql, seconds):
+        statement = normalize_statement(sql)
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            self.statements[statement] += 1
+            entry = (seconds, self.count, family, statement)
+            if len(self.slowest) < SLOWEST_PER_REQUEST:
+                heapq.heappush(self.slowest, entry)
+            elif seconds > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, entry)
+
+    def add_checkout(self, seconds):
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_seconds += seconds
+
+    def slowest_statements(self):
+        return [{'ms': round(seconds * 1000, 2), 'family': family, 'statement': statement}
+                for seconds, _, family, statement in sorted(self.slowest, reverse=True)]
+
+    def repeated_statements(self, threshold=N_PLUS_ONE_THRESHOLD):
+        return [(statement, count) for statement, count in self.statements.most_common()
+                if count >= threshold]
+
+    def summary(self):
+        return {
+            'endpoint': self.label,
+            'queries': self.count,
+            'db_ms': round(self.seconds * 1000, 2),
+            'request_ms': round((time.perf_counter() - self.started) * 1000, 2),
+            'checkouts': self.checkouts,
+            'slowest': self.slowest_statements(),
+            'repeated': self.repeated_statements(),
+            'finished': time.time(),
+        }
+
+
+class QueryReport:
+    """Rolling window of request summaries, aggregated per endpoint on demand"""
+
+    def __init__(self, window=REPORT_WINDOW):
+        self._requests = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, summary):
+        with self._lock:
+            self._requests.append(summary)
+
+    def clear(self):
+        with self._lock:
+            self._requests.clear()
+
+    def report(self, limit=25):
+        with self._lock:
+            requests = list(self._requests)
+
+        endpoints = {}
+        suspects = {}
+        for summary in requests:
+            endpoint = endpoints.setdefault(summary['endpoint'], {
+                'endpoint': summary['endpoint'], 'requests': 0, 'queries': 0, 'max_queries': 0,
+                'db_ms': 0.0, 'max_db_ms': 0.0, 'request_ms': 0.0, 'slowest': None})
+            endpoint['requests'] += 1
+            endpoint['queries'] += summary['queries']
+            endpoint['max_queries'] = max(endpoint['max_queries'], summary['queries'])
+            endpoint['db_ms'] += summary['db_ms']
+            endpoint['max_db_ms'] = max(endpoint['max_db_ms'], summary['db_ms'])
+            endpoint['request_ms'] += summary['request_ms']
+            if summary['slowest'] and (endpoint['slowest'] is None
+                                       or summary['slowest'][0]['ms'] > endpoint['slowest']['ms']):
+                endpoint['slowest'] = summary['slowest'][0]
+
+            for statement, count in summary['repeated']:
+                suspect = suspects.setdefault((summary['endpoint'], statement), {
+                    'endpoint': summary['endpoint'], 'statement': statement,
+                    'requests': 0, 'max_repeats': 0, 'total_repeats': 0})
+                suspect['requests'] += 1
+                suspect['max_repeats'] = max(suspect['max_repeats'], count)
+                suspect['total_repeats'] += count
+
+        for endpoint in endpoints.values():
+            requests_seen = endpoint['requests']
+            endpoint['avg_queries'] = round(endpoint['queries'] / requests_seen, 1)
+            endpoint['avg_db_ms'] = round(endpoint['db_ms'] / requests_seen, 2)
+            endpoint['avg_request_ms'] = round(endpoint.pop('request_ms') / requests_seen, 2)
+            endpoint['db_ms'] = round(endpoint['db_ms'], 2)
+
+        return {
+            'requests': len(requests),
+            'endpoints': sorted(endpoints.values(), key=lambda e: e['db_ms'], reverse=True)[:limit],
+            'n_plus_one': sorted(suspects.values(), key=lambda s: s['max_repeats'], reverse=True)[:limit],
+            'threshold': N_PLUS_ONE_THRESHOLD,
+        }
+
+
+query_report = QueryReport()
+
+
+def begin_request(label):
+    """Start tracing the current request, returning a token for end_request"""
+    return _current.set(RequestQueries(label))
+
+
+def current_request():
+    """RequestQueries of the current request, or None outside a traced request"""
+    return _current.get()
+
+
+def end_request(token):
+    """Stop tracing and add the request to the report"""
+    queries = _current.get()
+    try:
+        _current.reset(token)
+    except ValueError:
+        # Ended from a different context than it began in
+        _current.set(None)
+    if queries is not None:
+        query_report.add(queries.summary())
+    return queries
+
+
+def record_checkout(seconds):
+    queries = _current.get()
+    if queries is not None:
+        queries.add_checkout(seconds)
+
+
+def _observe_query(family, sql, seconds):
+    queries = _current.get()
+    if queries is not None:
+        queries.add_query(family, sql, seconds)
+
+
+add_query_observer(_observe_query)
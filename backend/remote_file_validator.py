@@ -0,0 +1,153 @@
+"""
+Batched remote file existence checks.
+
+Rather than issuing a SIZE command for every candidate path, paths are grouped
+by parent directory, each directory is listed once (MLSD, NLST fallback) and
+existence is answered from the listing. Listings live in the shared
+remote_path_cache so back to back validations (fill gaps, template validation,
+check-file-exists) reuse them instead of going back to the server.
+"""
+
+import ftplib
+import logging
+import posixpath
+
+from remote_path_cache import remote_path_cache, server_key
+
+logger = logging.getLogger(__name__)
+
+# Common base paths where content with a relative file_path might be stored
+# Note: /mnt/main and /mnt/md127 are the same via symbolic link
+CONTENT_BASE_PATHS = [
+    '/mnt/main/ATL26 On-Air Content/',
+    '/mnt/main/'
+]
+
+
+def candidate_paths(file_path):
+    """Return the remote paths a content file_path may live at, in lookup order"""
+    if not file_path:
+        return []
+    paths = [file_path]
+    if not file_path.startswith('/mnt/'):
+        for base in CONTENT_BASE_PATHS:
+            paths.append(base + file_path)
+    return paths
+
+
+class RemoteFileValidator:
+    """Answer "does this path exist" for many paths with one listing per directory"""
+
+    def __init__(self, ftp_manager, cache=None, should_cancel=None):
+        self.ftp_manager = ftp_manager
+        self.cache = cache or remote_path_cache
+        self.should_cancel = should_cancel  # checked before each directory is listed
+        self.server = server_key(ftp_manager.config)
+        self.directories_listed = 0
+        self._use_mlsd = True
+        self._connect_failed = False
+
+    def _ensure_connected(self):
+        if self.ftp_manager.connected:
+            return True
+        if self._connect_failed:
+            return False
+        if not self.ftp_manager.connect():
+            self._connect_failed = True
+            return False
+        return True
+
+    def _fetch_listing(self, directory):
+        """List a directory on the server, returning a set of entry names
+
+        The FTP manager may be shared, so its working directory is restored
+        afterwards.
+        """
+        ftp = self.ftp_manager.ftp
+        original_dir = ftp.pwd()
+        try:
+            ftp.cwd(directory)
+        except ftplib.error_perm:
+            # Directory does not exist, so nothing in it does either
+            return set()
+        try:
+            return self._list_current_directory(ftp)
+        finally:
+            ftp.cwd(original_dir)
+
+    def _list_current_directory(self, ftp):
+        """Entry names of the working directory (MLSD, NLST fallback)"""
+        names = set()
+        if self._use_mlsd:
+            try:
+                for name, facts in ftp.mlsd(path='.', facts=['type']):
+                    if facts.get('type') in ('dir', 'cdir', 'pdir'):
+                        continue
+                    names.add(name)
+                return names
+            except ftplib.error_perm:
+                logger.debug(f"Server {self.server} does not support MLSD, using NLST")
+                self._use_mlsd = False
+
+        try:
+            for entry in ftp.nlst():
+                names.add(posixpath.basename(entry))
+        except ftplib.error_perm:
+            # Some servers answer NLST on an empty directory with 550
+            pass
+        return names
+
+    def directory_names(self, directory):
+        """Names in a directory, from the cache when fresh. None if the server is unreachable."""
+        names = self.cache.get(self.server, directory)
+        if names is not None:
+            return names
+        if not self._ensure_connected():
+            return None
+        try:
+            names = self._fetch_listing(directory)
+        except Exception as e:
+            logger.warning(f"Could not list {directory} on {self.server}: {str(e)}")
+            return None
+        self.directories_listed += 1
+        self.cache.put(self.server, directory, names)
+        return names
+
+    def existing_paths(self, paths):
+        """Return the subset of paths that exist on the server"""
+        by_directory = {}
+        for path in paths:
+            if not path:
+                continue
+            directory, name = posixpath.split(path)
+            by_directory.setdefault(directory or '/', []).append((name, path))
+
+        existing = set()
+        for directory, wanted in by_directory.items():
+            if self.should_cancel is not None and self.should_cancel():
+                logger.info(f"Validation on {self.server} cancelled")
+                break
+            names = self.directory_names(directory)
+            if not names:
+                continue
+            existing.update(path for name, path in wanted if name in names)
+
+        logger.debug(f"Validated {len(paths)} paths in {len(by_directory)} directories on {self.server} "
+                     f"({self.directories_listed} listed from server)")
+        return existing
+
+    def path_exists(self, path):
+        return path in self.existing_paths([path])
+
+    def find_existing(self, file_paths):
+        """Map each content file_path to the first candidate path that exists, or None"""
+        candidates = {file_path: candidate_paths(file_path) for file_path in file_paths if file_path}
+        existing = self.existing_paths([p for paths in candidates.values() for p in paths])
+        return {
+            file_path: next((p for p in paths if p in existing), None)
+            for file_path, paths in candidates.items()
+        }
+
+    def close(self):
+        if self.ftp_manager.connected:
+            self.ftp_manager.disconnect()
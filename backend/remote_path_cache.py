@@ -0,0 +1,139 @@
+"""
+Shared cache of remote directory contents per FTP server.
+
+Existence checks (template validation, fill gaps, check-file-exists, meeting
+trim status) answer from cached directory listings. Listings expire after a
+TTL, and uploads, deletes and renames made through FTPManager patch the cached
+listing so answers stay correct after our own writes.
+"""
+
+import logging
+import posixpath
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# How long a directory listing is trusted before it is fetched again
+DEFAULT_LISTING_TTL = 120  # seconds
+
+# /mnt/main and /mnt/md127 are the same via symbolic link
+MOUNT_ALIASES = ('/mnt/main', '/mnt/md127')
+
+
+def server_key(config):
+    """Identify an FTP server in the cache"""
+    return f"{config.get('host', '')}:{config.get('port', 21)}"
+
+
+def normalize_directory(directory):
+    """Canonical form of a remote directory used as cache key"""
+    if not directory:
+        return '/'
+    directory = posixpath.normpath(directory)
+    if directory.startswith('//'):
+        directory = '/' + directory.lstrip('/')
+    return directory
+
+
+def _aliased_directories(directory):
+    """The directory plus its equivalent under the other mount alias"""
+    directories = [directory]
+    for alias in MOUNT_ALIASES:
+        if directory == alias or directory.startswith(alias + '/'):
+            suffix = directory[len(alias):]
+            directories.extend(other + suffix for other in MOUNT_ALIASES if other != alias)
+            break
+    return directories
+
+
+class RemotePathCache:
+    """Thread-safe TTL cache of remote directory listings keyed by server and directory"""
+
+    def __init__(self, ttl=DEFAULT_LISTING_TTL):
+        self.ttl = ttl
+        self._listings = {}  # (server_key, directory) -> (fetched_at, set of names)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.patches = 0
+        self.invalidations = 0
+
+    def get(self, server, directory):
+        """Return the cached set of names, or None if missing or expired"""
+        key = (server, normalize_directory(directory))
+        with self._lock:
+            entry = self._listings.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._listings[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def put(self, server, directory, names):
+        with self._lock:
+            self._listings[(server, normalize_directory(directory))] = (time.monotonic(), set(names))
+
+    def _patch(self, server, path, add):
+        directory, name = posixpath.split(path)
+        directory = normalize_directory(directory)
+        with self._lock:
+            for candidate in _aliased_directories(directory):
+                entry = self._listings.get((server, candidate))
+                if entry is None:
+                    continue
+                names = set(entry[1])
+                if add:
+                    names.add(name)
+                else:
+                    names.discard(name)
+                # Keep the original fetch time so the TTL still bounds staleness
+                self._listings[(server, candidate)] = (entry[0], names)
+                self.patches += 1
+
+    def add_path(self, server, path):
+        """Record a file written to the server"""
+        self._patch(server, path, add=True)
+
+    def discard_path(self, server, path):
+        """Record a file removed from the server"""
+        self._patch(server, path, add=False)
+
+    def invalidate_directory(self, server, directory):
+        directory = normalize_directory(directory)
+        with self._lock:
+            for candidate in _aliased_directories(directory):
+                if self._listings.pop((server, candidate), None) is not None:
+                    self.invalidations += 1
+
+    def clear(self, server=None):
+        """Drop all listings, or only those for one server"""
+        with self._lock:
+            keys = [k for k in self._listings if server is None or k[0] == server]
+            for key in keys:
+                del self._listings[key]
+            self.invalidations += len(keys)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            servers = {}
+            for server, _ in self._listings:
+                servers[server] = servers.get(server, 0) + 1
+            return {
+                'ttl_seconds': self.ttl,
+                'cached_directories': len(self._listings),
+                'directories_by_server': servers,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0,
+                'patches': self.patches,
+                'invalidations': self.invalidations
+            }
+
+
+# Shared across requests and FTPManager instances
+remote_path_cache = RemotePathCache()
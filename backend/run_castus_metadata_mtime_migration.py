@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Run the castus_metadata_modified_at migration to add the column recording
+the remote Castus metadata modify time used by incremental sync.
+"""
+
+import psycopg2
+import os
+import getpass
+from pathlib import Path
+
+# Database connection parameters - use same approach as database_postgres.py
+DATABASE_URL = os.getenv('DATABASE_URL', f'postgresql://{getpass.getuser()}@localhost/ftp_media_sync')
+
+def run_migration():
+    """Run the castus_metadata_modified_at migration"""
+    
+    # Get the migration SQL file path
+    migration_file = Path(__file__).parent / 'migrations' / 'add_castus_metadata_modified_at.sql'
+    
+    if not migration_file.exists():
+        print(f"Error: Migration file not found: {migration_file}")
+        return False
+    
+    try:
+        # Connect to the database
+        print("Connecting to PostgreSQL database...")
+        conn = psycopg2.connect(DATABASE_URL)
+        conn.autocommit = True
+        cursor = conn.cursor()
+        
+        # Read and execute the migration SQL
+        print("Reading migration SQL...")
+        with open(migration_file, 'r') as f:
+            migration_sql = f.read()
+        
+        print("Executing migration...")
+        cursor.execute(migration_sql)
+        
+        # Verify the column was added
+        cursor.execute("""
+            SELECT column_name, data_type 
+            FROM information_schema.columns 
+            WHERE table_name = 'scheduling_metadata' 
+            AND column_name = 'castus_metadata_modified_at'
+        """)
+        
+        result = cursor.fetchone()
+        if result:
+            print(f"✅ Successfully added column: {result[0]} ({result[1]})")
+        else:
+            print("❌ Column was not added successfully")
+            return False
+        
+        # Show current metadata sync status
+        cursor.execute("""
+            SELECT 
+                COUNT(*) as total_assets,
+                COUNT(castus_metadata_modified_at) as tracked_count,
+                COUNT(*) - COUNT(castus_metadata_modified_at) as untracked_count
+            FROM scheduling_metadata
+        """)
+        
+        stats = cursor.fetchone()
+        print("\nCastus metadata modify time tracking:")
+        print(f"  Total assets in scheduling: {stats[0]}")
+        print(f"  Assets with a recorded modify time: {stats[1]}")
+        print(f"  Assets read in full on next sync: {stats[2]}")
+        
+        # Close the connection
+        cursor.close()
+        conn.close()
+        
+        print("\n✅ Migration completed successfully!")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        return False
+
+if __name__ == "__main__":
+    success = run_migration()
+    exit(0 if success else 1)
\ No newline at end of file
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Run the holiday greeting flag migration to store the greeting classification
+on assets and schedulable_assets.
+"""
+
+import psycopg2
+import os
+import getpass
+from pathlib import Path
+
+# Database connection parameters - use same approach as database_postgres.py
+DATABASE_URL = os.getenv('DATABASE_URL', f'postgresql://{getpass.getuser()}@localhost/ftp_media_sync')
+
+def run_migration():
+    """Run the holiday greeting flag migration"""
+
+    # Get the migration SQL file path
+    migration_file = Path(__file__).parent / 'migrations' / 'add_holiday_greeting_flag.sql'
+
+    if not migration_file.exists():
+        print(f"Error: Migration file not found: {migration_file}")
+        return False
+
+    try:
+        # Connect to the database
+        print("Connecting to PostgreSQL database...")
+        conn = psycopg2.connect(DATABASE_URL)
+        conn.autocommit = True
+        cursor = conn.cursor()
+
+        # Read and execute the migration SQL
+        print("Reading migration SQL...")
+        with open(migration_file, 'r') as f:
+            migration_sql = f.read()
+
+        print("Executing migration...")
+        cursor.execute(migration_sql)
+
+        # Verify the flag was backfilled
+        cursor.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM assets WHERE is_holiday_greeting) as assets_flagged,
+                (SELECT COUNT(*) FROM schedulable_assets WHERE is_holiday_greeting) as schedulable_flagged,
+                (SELECT COUNT(*) FROM assets WHERE is_holiday_greeting IS NULL) as unclassified
+        """)
+
+        stats = cursor.fetchone()
+        print("\nHoliday greetings flagged:")
+        print(f"  Assets: {stats[0]}")
+        print(f"  Schedulable assets: {stats[1]}")
+        print(f"  Unclassified assets: {stats[2]}")
+
+        # Close the connection
+        cursor.close()
+        conn.close()
+
+        print("\n✅ Migration completed successfully!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        return False
+
+if __name__ == "__main__":
+    success = run_migration()
+    exit(0 if success else 1)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Run the schedulable_assets migration to create the denormalized table
+(and its maintenance triggers) read by the scheduler and expiration sync.
+"""
+
+import psycopg2
+import os
+import getpass
+from pathlib import Path
+
+# Database connection parameters - use same approach as database_postgres.py
+DATABASE_URL = os.getenv('DATABASE_URL', f'postgresql://{getpass.getuser()}@localhost/ftp_media_sync')
+
+def run_migration():
+    """Run the schedulable_assets migration"""
+
+    # Get the migration SQL file path
+    migration_file = Path(__file__).parent / 'migrations' / 'add_schedulable_assets_table.sql'
+
+    if not migration_file.exists():
+        print(f"Error: Migration file not found: {migration_file}")
+        return False
+
+    try:
+        # Connect to the database
+        print("Connecting to PostgreSQL database...")
+        conn = psycopg2.connect(DATABASE_URL)
+        conn.autocommit = True
+        cursor = conn.cursor()
+
+        # Read and execute the migration SQL
+        print("Reading migration SQL...")
+        with open(migration_file, 'r') as f:
+            migration_sql = f.read()
+
+        print("Executing migration...")
+        cursor.execute(migration_sql)
+
+        # Verify the table was created and populated
+        cursor.execute("SELECT to_regclass('public.schedulable_assets')")
+        if not cursor.fetchone()[0]:
+            print("❌ schedulable_assets table was not created")
+            return False
+
+        cursor.execute("""
+            SELECT
+                COUNT(*) as total_rows,
+                COUNT(*) FILTER (WHERE available_for_scheduling) as available_rows,
+                COUNT(*) FILTER (WHERE featured) as featured_rows
+            FROM schedulable_assets
+        """)
+
+        stats = cursor.fetchone()
+        print("\nschedulable_assets populated:")
+        print(f"  Analyzed assets: {stats[0]}")
+        print(f"  Available for scheduling: {stats[1]}")
+        print(f"  Featured: {stats[2]}")
+
+        # Close the connection
+        cursor.close()
+        conn.close()
+
+        print("\n✅ Migration completed successfully!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        return False
+
+if __name__ == "__main__":
+    success = run_migration()
+    exit(0 if success else 1)
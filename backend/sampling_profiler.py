@@ -0,0 +1,263 @@
+"""
+On-demand sampling profiler for requests and background jobs.
+
+An admin arms a target, and the next matching run is profiled:
+
+  POST /api/fill-template-gaps   next request to that route (METHOD + route pattern)
+  request:<id>                   the request sent with that X-Request-ID header
+  job:<name>                     next run of a background job wrapped with profiled()
+
+While a run is profiled, a sampler thread reads the stack of the thread
+doing the work every interval (sys._current_frames) and counts identical
+stacks. Nothing is hooked into the profiled code itself, so the cost is the
+sampler thread waking up, and runs that are not profiled pay only a dict
+lookup. When the run ends, the counts are written to logs/profiles/ in
+collapsed-stack format ("frame;frame;frame count", root first), which
+flamegraph.pl, speedscope and inferno read directly, with a .json file of
+run details next to it.
+
+Only the thread running the request or job is sampled; work it hands to
+other threads or processes (the parallel schedule build workers) is not.
+"""
+
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs', 'profiles')
+
+DEFAULT_INTERVAL = 0.01  # seconds between samples
+DEFAULT_MAX_SECONDS = 900  # sampling stops after this, even if the run continues
+MAX_STACK_DEPTH = 200
+
+_ROUTE_TARGET_RE = re.compile(r'^[A-Z]+ /\S*$')
+
+
+def validate_target(target):
+    """Normalized target, or ValueError if it is not a route, request:<id> or job:<name>"""
+    target = (target or '').strip()
+    if target.startswith(('request:', 'job:')) and target.partition(':')[2]:
+        return target
+    if _ROUTE_TARGET_RE.match(target):
+        return target
+    raise ValueError("target must be 'METHOD /route', 'request:<id>' or 'job:<name>'")
+
+
+def _slug(text):
+    return re.sub(r'[^A-Za-z0-9]+', '_', text).strip('_')[:80] or 'profile'
+
+
+class StackSampler(threading.Thread):
+    """Counts the collapsed stacks of one thread until stopped"""
+
+    def __init__(self, thread_id, interval=DEFAULT_INTERVAL, max_seconds=DEFAULT_MAX_SECONDS):
+        super().__init__(name=f"stack-sampler-{thread_id}", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.stacks = Counter()
+        self.samples = 0
+        self.truncated = False
+        self._labels = {}
+        self._stop_event = threading.Event()
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _collapse(self, frame):
+        frames = []
+        while frame is not None and len(frames) < MAX_STACK_DEPTH:
+            frames.append(self._label(frame.f_code))
+            frame = frame.f_back
+        frames.reverse()
+        return ';'.join(frames)
+
+    def run(self):
+        started = time.monotonic()
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+            self.stacks[self._collapse(frame)] += 1
+            self.samples += 1
+            del frame
+            if time.monotonic() - started > self.max_seconds:
+                self.truncated = True
+                break
+
+    def stop(self):
+        self._stop_event.set()
+        self.join(timeout=5)
+
+
+class ProfileSession:
+    """One profiled run"""
+
+    def __init__(self, target, label, interval, max_seconds):
+        self.target = target
+        self.label = label
+        self.started_at = datetime.now()
+        self.started = time.perf_counter()
+        self.sampler = StackSampler(threading.get_ident(), interval, max_seconds)
+        self.name = f"{self.started_at:%Y%m%d_%H%M%S_%f}_{_slug(label)}.folded"
+        self.sampler.start()
+
+    def finish(self):
+        """Stop sampling and write the profile, returning its details"""
+        self.sampler.stop()
+        details = {
+            'name': self.name,
+            'target': self.target,
+            'label': self.label,
+            'started': self.started_at.isoformat(),
+            'seconds': round(time.perf_counter() - self.started, 3),
+            'samples': self.sampler.samples,
+            'interval_ms': round(self.sampler.interval * 1000, 2),
+            'truncated': self.sampler.truncated,
+        }
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, self.name)
+        with open(path, 'w') as f:
+            for stack, count in self.sampler.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        with open(f"{path[:-len('.folded')]}.json", 'w') as f:
+            json.dump(details, f, indent=2)
+        logger.info(f"Profile of {self.label} written to {path} "
+                    f"({details['samples']} samples over {details['seconds']}s)")
+        return details
+
+
+class SamplingProfiler:
+    """Armed targets and the runs being profiled"""
+
+    def __init__(self):
+        self.armed = {}  # target -> {'runs', 'interval', 'max_seconds', 'armed_at'}
+        self.active = {}  # session name -> ProfileSession
+        self.jobs = set()
+        self._lock = threading.Lock()
+
+    def arm(self, target, runs=1, interval=DEFAULT_INTERVAL, max_seconds=DEFAULT_MAX_SECONDS):
+        target = validate_target(target)
+        if runs < 1:
+            raise ValueError("runs must be at least 1")
+        if not 0.001 <= interval <= 1:
+            raise ValueError("interval must be between 1 and 1000 ms")
+        with self._lock:
+            self.armed[target] = {'runs': runs, 'interval': interval, 'max_seconds': max_seconds,
+                                  'armed_at': datetime.now().isoformat()}
+        logger.info(f"Profiler armed for {target} ({runs} run(s), {interval * 1000:.0f} ms interval)")
+        return target
+
+    def disarm(self, target=None):
+        with self._lock:
+            if target is None:
+                self.armed.clear()
+            else:
+                self.armed.pop(target, None)
+
+    def start(self, targets, label):
+        """Start profiling the current thread if one of targets is armed, else None"""
+        if not self.armed:
+            return None
+        with self._lock:
+            for target in targets:
+                settings = self.armed.get(target)
+                if settings:
+                    break
+            else:
+                return None
+            settings['runs'] -= 1
+            if settings['runs'] <= 0:
+                del self.armed[target]
+            session = ProfileSession(target, label, settings['interval'], settings['max_seconds'])
+            self.active[session.name] = session
+        logger.info(f"Profiling {label} (target {target})")
+        return session
+
+    def finish(self, session):
+        try:
+            return session.finish()
+        except Exception as e:
+            logger.error(f"Error writing profile {session.name}: {str(e)}")
+            return None
+        finally:
+            with self._lock:
+                self.active.pop(session.name, None)
+
+    def register_job(self, name):
+        """List a background job as profilable in the admin panel"""
+        self.jobs.add(name)
+
+    @contextmanager
+    def profile_job(self, name):
+        """Profile this run of a background job if job:<name> is armed"""
+        self.register_job(name)
+        session = self.start([f"job:{name}"], f"job {name}")
+        try:
+            yield session
+        finally:
+            if session is not None:
+                self.finish(session)
+
+    def status(self):
+        with self._lock:
+            return {
+                'armed': [dict(settings, target=target) for target, settings in self.armed.items()],
+                'active': [{'name': session.name, 'target': session.target, 'label': session.label,
+                            'samples': session.sampler.samples} for session in self.active.values()],
+                'jobs': sorted(self.jobs),
+            }
+
+
+def recent_profiles(limit=50):
+    """Details of the most recent profiles in PROFILE_DIR, newest first"""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    names = sorted((name for name in os.listdir(PROFILE_DIR) if name.endswith('.folded')), reverse=True)
+    profiles = []
+    for name in names[:limit]:
+        path = os.path.join(PROFILE_DIR, name)
+        try:
+            with open(f"{path[:-len('.folded')]}.json") as f:
+                details = json.load(f)
+        except (OSError, ValueError):
+            details = {'name': name}
+        details['size'] = os.path.getsize(path)
+        profiles.append(details)
+    return profiles
+
+
+def profile_path(name):
+    """Path of a profile file by name, or None if there is no such profile"""
+    if os.path.basename(name) != name or not name.endswith(('.folded', '.json')):
+        return None
+    path = os.path.join(PROFILE_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+profiler = SamplingProfiler()
+
+
+def profiled(name, func):
+    """func wrapped so its runs can be profiled as job:<name>"""
+    profiler.register_job(name)
+
+    @wraps(func)
+    def run(*args, **kwargs):
+        with profiler.profile_job(name):
+            return func(*args, **kwargs)
+    return run
@@ -0,0 +1,80 @@
+"""
+Content hashes of exported Castus schedules.
+
+Each export hashes the generated .sch content before uploading it and
+records the hash per (server, path) together with the size and modify time
+the remote file had right after the upload. When the next export of the
+same path hashes the same and the remote file is untouched, there is
+nothing to upload.
+"""
+
+import hashlib
+import logging
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+def hash_schedule_lines(lines):
+    """
+    Hash generated schedule lines without keeping them in memory
+
+    The hash covers exactly the bytes an export uploads (UTF-8, LF
+    separated, no trailing newline).
+
+    Returns:
+        Tuple of (content hash, size in bytes)
+    """
+    content = hashlib.sha256()
+    size = 0
+    separator = b''
+    for line in lines:
+        encoded = separator + line.encode('utf-8')
+        separator = b'\n'
+        content.update(encoded)
+        size += len(encoded)
+    return content.hexdigest(), size
+
+
+class ScheduleExportState:
+    """Thread-safe record of the last export per (server, remote path)"""
+
+    def __init__(self):
+        self._exports = {}  # (server_key, path) -> record dict
+        self._lock = threading.Lock()
+
+    def get(self, server, path):
+        with self._lock:
+            record = self._exports.get((server, path))
+            return dict(record) if record else None
+
+    def record(self, server, path, content_hash, remote_stat):
+        """Remember what was uploaded and the remote file's stat right after it"""
+        with self._lock:
+            self._exports[(server, path)] = {
+                'content_hash': content_hash,
+                'size': remote_stat.get('size'),
+                'modify': remote_stat.get('modify'),
+                'exported_at': datetime.now().isoformat()
+            }
+
+    def is_unchanged(self, server, path, content_hash, remote_stat):
+        """
+        True when the last export of this path had the same content hash and
+        the remote file still has the size and modify time seen after it
+        """
+        record = self.get(server, path)
+        if not record or not remote_stat or record['content_hash'] != content_hash:
+            return False
+        return (record['size'] is not None and record['modify'] is not None
+                and remote_stat.get('size') == record['size']
+                and remote_stat.get('modify') == record['modify'])
+
+    def forget(self, server, path):
+        with self._lock:
+            self._exports.pop((server, path), None)
+
+
+# Shared across requests
+schedule_export_state = ScheduleExportState()
@@ -0,0 +1,51 @@
+"""
+Seeded random choices for reproducible schedule builds.
+
+Schedule builds break ties randomly (RANDOM() in the candidate queries,
+score jitter, featured slot draws, ID shuffles), so the same content gives
+a different schedule on every run. A build started with a seed makes each
+of those choices from the seed instead: random draws come from a
+random.Random seeded per build, and the SQL tie break orders by a hash of
+(seed, selection slot, asset id). Same seed and same data give the same
+schedule. Without a seed everything stays random.
+"""
+
+import hashlib
+import random
+
+
+def parse_seed(value):
+    """Seed from a request value: None/'' for unseeded, otherwise an integer"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        raise ValueError("seed must be an integer")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError("seed must be an integer")
+
+
+def stable_hash(*parts) -> int:
+    """64-bit hash of the parts that is the same in every process and run"""
+    digest = hashlib.blake2b(':'.join(str(part) for part in parts).encode('utf-8'), digest_size=8)
+    return int.from_bytes(digest.digest(), 'big')
+
+
+def build_rng(seed=None, *scope) -> random.Random:
+    """Random generator for one build (or one part of it, named by scope)"""
+    if seed is None:
+        return random.Random()
+    return random.Random(stable_hash(seed, *scope))
+
+
+def tiebreak_sql(id_column: str, seed=None, slot=None):
+    """
+    Last ORDER BY term of a candidate query, with its parameters
+
+    RANDOM() when unseeded, otherwise md5 of (seed, slot, id): a stable order
+    that still differs between selection slots.
+    """
+    if seed is None:
+        return "RANDOM()", []
+    return f"md5(%s || {id_column}::text)", [f"{seed}:{slot}:"]
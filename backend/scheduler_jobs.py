@@ -11,15 +11,16 @@ import re
 from datetime import datetime, timezone, timedelta
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 import psycopg2
 
 # Import from app modules
 from config_manager import ConfigManager
 from ftp_manager import FTPManager
-from castus_metadata import CastusMetadataHandler
+from castus_metadata import CastusMetadataHandler, as_utc
 from email_notifier import EmailNotifier
 from host_verification import is_backend_host, get_host_info
+from sampling_profiler import profiled
 
 # Setup dedicated logger for scheduler with file output
 logger = logging.getLogger(__name__)
@@ -54,6 +55,7 @@ class SchedulerJobs:
         self.hostname = socket.gethostname()
         self.enabled = False
         self.email_notifier = None
+        self._has_castus_mtime_column = None
         self._setup_email_notifier()
         
     def _setup_email_notifier(self):
@@ -90,7 +92,7 @@ class SchedulerJobs:
         
         # Schedule the Castus sync job at 9am, 12pm, 3pm, 6pm (every 3 business hours)
         self.scheduler.add_job(
-            func=self.sync_all_expirations_from_castus,
+            func=profiled('castus_sync_all', self.sync_all_expirations_from_castus),
             trigger=CronTrigger(hour='9,12,15,18', minute=0),
             id='castus_sync_all',
             name='Copy All Expirations from Castus',
@@ -101,7 +103,7 @@ class SchedulerJobs:
         
         # Schedule the meeting video generation check every minute
         self.scheduler.add_job(
-            func=self.check_meetings_for_video_generation,
+            func=profiled('meeting_video_generation', self.check_meetings_for_video_generation),
             trigger=CronTrigger(minute='*'),  # Every minute
             id='meeting_video_generation',
             name='Check Meetings for Video Generation',
@@ -134,7 +136,7 @@ class SchedulerJobs:
         conn = self.db_manager._get_connection()
         try:
             # Use regular cursor, not RealDictCursor
-            with conn.cursor(cursor_factory=None) as cursor:
+            with conn.cursor() as cursor:
                 # Try to acquire lock with SELECT FOR UPDATE SKIP LOCKED
                 cursor.execute("""
                     SELECT id, lock_expires_at 
@@ -212,7 +214,7 @@ class SchedulerJobs:
         conn = self.db_manager._get_connection()
         try:
             # Use regular cursor, not RealDictCursor
-            with conn.cursor(cursor_factory=None) as cursor:
+            with conn.cursor() as cursor:
                 cursor.execute("""
                     UPDATE sync_jobs 
                     SET lock_acquired_at = NULL,
@@ -313,6 +315,21 @@ class SchedulerJobs:
             logger.error(f"Error in scheduled sync: {str(e)}")
             self.release_job_lock(job_name, 'failed', {'error': str(e)})
             
+    def _supports_incremental_metadata_sync(self, conn) -> bool:
+        """Whether scheduling_metadata has the castus_metadata_modified_at column"""
+        if self._has_castus_mtime_column is None:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_name = 'scheduling_metadata'
+                    AND column_name = 'castus_metadata_modified_at'
+                """)
+                self._has_castus_mtime_column = cursor.fetchone() is not None
+            if not self._has_castus_mtime_column:
+                logger.warning("castus_metadata_modified_at column missing - run run_castus_metadata_mtime_migration.py "
+                               "to enable incremental Castus metadata sync")
+        return self._has_castus_mtime_column
+    
     def _sync_content_type_expirations(self, content_type: str, expiration_days: int) -> dict:
         """Sync expiration dates for a specific content type"""
         logger.info(f"=== Processing {content_type} (expiration_days={expiration_days}) ===")
@@ -342,23 +359,53 @@ class SchedulerJobs:
         
         conn = self.db_manager._get_connection()
         try:
+            incremental = expiration_days == 0 and self._supports_incremental_metadata_sync(conn)
+            
             with conn.cursor(cursor_factory=RealDictCursor) as cursor:
                 # Get all assets of this content type
                 ct_lower = content_type.lower()
-                cursor.execute("""
-                    SELECT a.id, i.file_path, i.file_name, a.content_title, i.encoded_date,
-                           sm.content_expiry_date as current_expiry
-                    FROM assets a
-                    JOIN instances i ON a.id = i.asset_id AND i.is_primary = true
-                    LEFT JOIN scheduling_metadata sm ON a.id = sm.asset_id
-                    WHERE a.content_type = %s
-                    AND a.analysis_completed = true
-                    ORDER BY a.id
+                mtime_select = ", sm.castus_metadata_modified_at" if incremental else ""
+                mtime_join = "LEFT JOIN scheduling_metadata sm ON sm.asset_id = sa.asset_id" if incremental else ""
+                cursor.execute(f"""
+                    SELECT sa.asset_id as id, sa.file_path, sa.file_name, sa.content_title, sa.encoded_date,
+                           sa.content_expiry_date as current_expiry, sa.go_live_date as current_go_live
+                           {mtime_select}
+                    FROM {self.db_manager.schedulable_assets_relation()} sa
+                    {mtime_join}
+                    WHERE sa.content_type = %s
+                    ORDER BY sa.asset_id
                 """, (ct_lower,))
                 
                 assets = cursor.fetchall()
                 logger.info(f"Found {len(assets)} {content_type} assets to sync")
+                # Don't hold the read transaction open across the FTP reads
+                conn.commit()
                 
+                # Read Castus metadata up front, one download per file. With
+                # incremental sync, folder listings tell which metadata changed
+                # since the last run and only those files are downloaded. Files
+                # without metadata are not read at all; their folder's modify
+                # time is recorded so they are skipped until the folder changes.
+                castus_windows = {}
+                remote_mtimes = {}
+                if expiration_days == 0 and ftp:
+                    handler = CastusMetadataHandler(ftp)
+                    file_paths = [asset['file_path'] or asset['file_name'] for asset in assets]
+                    to_read = file_paths
+                    if incremental:
+                        remote_mtimes, without_metadata = handler.get_metadata_modify_times(file_paths)
+                        to_read = [
+                            asset['file_path'] or asset['file_name'] for asset in assets
+                            if (asset['file_path'] or asset['file_name']) not in without_metadata
+                            and (asset['castus_metadata_modified_at'] is None
+                                 or remote_mtimes.get(asset['file_path'] or asset['file_name']) != asset['castus_metadata_modified_at'])
+                        ]
+                        logger.info(f"{len(to_read)} of {len(file_paths)} {content_type} metadata files changed since last sync")
+                    castus_windows = handler.read_content_windows_batch(to_read)
+                
+                # Compute every change in memory first
+                updates = []  # (asset_id, expiry_date, go_live_date, metadata modify time)
+                audit_changes = []
                 for asset in assets:
                     asset_id = asset['id']
                     file_name = asset['file_name']
@@ -374,11 +421,21 @@ class SchedulerJobs:
                         go_live_date = None
                         source = None
                         
-                        if expiration_days == 0 and ftp:
+                        if expiration_days == 0 and ftp and file_path not in castus_windows:
+                            # Metadata unchanged since the last sync (or there is none),
+                            # keep the current dates
+                            expiry_date = current_expiry
+                            go_live_date = asset['current_go_live']
+                            source = "Castus metadata (unchanged)"
+                        elif expiration_days == 0 and ftp:
                             # Get from Castus metadata
-                            handler = CastusMetadataHandler(ftp)
-                            expiry_date = handler.get_content_window_close(file_path)
-                            go_live_date = handler.get_content_window_open(file_path)
+                            windows = castus_windows.get(file_path, {})
+                            if not windows.get('found'):
+                                # Keep the current dates and stored modify time so it is read again next run
+                                logger.debug(f"No Castus metadata read for {file_name}, leaving it unchanged")
+                                continue
+                            expiry_date = windows.get('close')
+                            go_live_date = windows.get('open')
                             source = "Castus metadata"
                         else:
                             # Calculate based on creation date
@@ -404,59 +461,30 @@ class SchedulerJobs:
                                 'new': new_expiry_str,
                                 'source': source
                             })
-                                
-                        # Update database
-                        with conn.cursor(cursor_factory=None) as update_cursor:
-                            # First get old values for audit logging
-                            update_cursor.execute("""
-                                SELECT content_expiry_date, go_live_date
-                                FROM scheduling_metadata
-                                WHERE asset_id = %s
-                            """, (asset_id,))
-                            old_row = update_cursor.fetchone()
-                            old_expiry_audit = old_row[0] if old_row else None
-                            old_go_live_audit = old_row[1] if old_row else None
-                            
-                            update_cursor.execute("""
-                                UPDATE scheduling_metadata 
-                                SET content_expiry_date = %s,
-                                    go_live_date = %s,
-                                    metadata_synced_at = CURRENT_TIMESTAMP
-                                WHERE asset_id = %s
-                            """, (expiry_date, go_live_date, asset_id))
-                            
-                            if update_cursor.rowcount == 0:
-                                # Create record if doesn't exist
-                                update_cursor.execute("""
-                                    INSERT INTO scheduling_metadata 
-                                    (asset_id, content_expiry_date, go_live_date, metadata_synced_at)
-                                    VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
-                                """, (asset_id, expiry_date, go_live_date))
-                                
-                        conn.commit()
                         
-                        # Log changes to audit trail
-                        if old_expiry_audit != expiry_date:
-                            self.db_manager.log_metadata_change(
-                                asset_id=asset_id,
-                                field_name='content_expiry_date',
-                                old_value=old_expiry_audit,
-                                new_value=expiry_date,
-                                changed_by='scheduler_job',
-                                change_source='scheduler_sync',
-                                change_reason=f'Scheduled sync from Castus metadata ({source})'
-                            )
+                        metadata_modified_at = remote_mtimes.get(file_path)
+                        if (as_utc(expiry_date) != as_utc(current_expiry)
+                                or as_utc(go_live_date) != as_utc(asset['current_go_live'])
+                                or (incremental and metadata_modified_at != asset['castus_metadata_modified_at'])):
+                            updates.append((asset_id, expiry_date, go_live_date, metadata_modified_at))
+                        
+                        # Audit rows; unchanged values are filtered out in SQL
+                        for field_name, old_value, new_value in (
+                            ('content_expiry_date', current_expiry, expiry_date),
+                            ('go_live_date', asset['current_go_live'], go_live_date)
+                        ):
+                            if old_value is None and new_value is None:
+                                continue
+                            audit_changes.append({
+                                'asset_id': asset_id,
+                                'field_name': field_name,
+                                'old_value': old_value,
+                                'new_value': new_value,
+                                'changed_by': 'scheduler_job',
+                                'change_source': 'scheduler_sync',
+                                'change_reason': f'Scheduled sync from Castus metadata ({source})'
+                            })
                         
-                        if old_go_live_audit != go_live_date:
-                            self.db_manager.log_metadata_change(
-                                asset_id=asset_id,
-                                field_name='go_live_date',
-                                old_value=old_go_live_audit,
-                                new_value=go_live_date,
-                                changed_by='scheduler_job',
-                                change_source='scheduler_sync',
-                                change_reason=f'Scheduled sync from Castus metadata ({source})'
-                            )
                         synced += 1
                         if expiry_date or go_live_date:
                             if changed:
@@ -466,6 +494,46 @@ class SchedulerJobs:
                         logger.error(f"Error syncing asset {asset_id} ({file_name}): {str(e)}")
                         errors += 1
                 
+                # Apply all updates, inserts and audit rows in one transaction
+                if updates:
+                    try:
+                        with conn.cursor(cursor_factory=None) as update_cursor:
+                            values_template = "(%s::integer, %s::timestamptz, %s::timestamptz, %s::timestamptz)"
+                            mtime_set = (",\n                                    castus_metadata_modified_at = v.metadata_modified_at"
+                                         if incremental else "")
+                            execute_values(update_cursor, f"""
+                                UPDATE scheduling_metadata sm
+                                SET content_expiry_date = v.expiry_date,
+                                    go_live_date = v.go_live_date,
+                                    metadata_synced_at = CURRENT_TIMESTAMP{mtime_set}
+                                FROM (VALUES %s) AS v(asset_id, expiry_date, go_live_date, metadata_modified_at)
+                                WHERE sm.asset_id = v.asset_id
+                            """, updates, template=values_template, page_size=len(updates))
+                            
+                            # Create records for assets that don't have one yet
+                            mtime_column = ", castus_metadata_modified_at" if incremental else ""
+                            mtime_value = ", v.metadata_modified_at" if incremental else ""
+                            execute_values(update_cursor, f"""
+                                INSERT INTO scheduling_metadata
+                                (asset_id, content_expiry_date, go_live_date, metadata_synced_at{mtime_column})
+                                SELECT v.asset_id, v.expiry_date, v.go_live_date, CURRENT_TIMESTAMP{mtime_value}
+                                FROM (VALUES %s) AS v(asset_id, expiry_date, go_live_date, metadata_modified_at)
+                                WHERE NOT EXISTS (
+                                    SELECT 1 FROM scheduling_metadata sm WHERE sm.asset_id = v.asset_id
+                                )
+                            """, updates, template=values_template, page_size=len(updates))
+                            
+                            audited = self.db_manager.log_metadata_changes(audit_changes, cursor=update_cursor)
+                        conn.commit()
+                        logger.info(f"{content_type}: wrote {len(updates)} scheduling_metadata rows and {audited} audit entries")
+                    except Exception as e:
+                        conn.rollback()
+                        logger.error(f"Error writing {content_type} expiration updates: {str(e)}")
+                        errors += len(updates)
+                        synced -= len(updates)
+                        updated = 0
+                        changes_made = []
+                
                 # Log summary for this content type        
                 logger.info(f"{content_type} Summary: {synced} synced, {updated} changed, {errors} errors")
                 if len(changes_made) > 0:
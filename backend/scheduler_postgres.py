@@ -7,14 +7,19 @@ import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 from database import db_manager
 import json
-import random
 from holiday_greeting_integration import HolidayGreetingIntegration
+from async_logging import LogChannel
+import parallel_schedule
+from schedule_seed import build_rng, tiebreak_sql
 
 logger = logging.getLogger(__name__)
 
+# get_available_content runs for every slot and delay factor, keep its chatter sampled
+availability_log = LogChannel(logger, max_per_second=10)
+
 
 class PostgreSQLScheduler:
     def __init__(self):
@@ -26,6 +31,25 @@ class PostgreSQLScheduler:
         
         # Defer holiday greeting integration initialization until database is ready
         self.holiday_integration = None
+        
+        # Random choices of the current build (seeded for reproducible builds)
+        self._begin_build()
+    
+    def _begin_build(self, seed: int = None, *scope):
+        """Start the random choices of a schedule build
+        
+        With a seed, tie breaks in the candidate queries, score jitter and
+        featured slot draws are derived from it, so the same seed and data
+        give the same schedule (see schedule_seed.py).
+        """
+        self.seed = seed
+        self.rng = build_rng(seed, *scope)
+        self._selection_slot = 0
+    
+    def _next_tiebreak(self, id_column: str, schedule_date: str = None) -> tuple:
+        """ORDER BY tie break term and parameters for the next candidate query"""
+        self._selection_slot += 1
+        return tiebreak_sql(id_column, self.seed, f"{schedule_date}:{self._selection_slot}")
     
     def _ensure_holiday_integration(self):
         """Initialize holiday integration if not already done"""
@@ -205,17 +229,15 @@ class PostgreSQLScheduler:
         Returns:
             True if featured content should be given priority
         """
-        import random
-        
         # Get daytime probability (default 75%)
         daytime_prob = config.get('daytime_probability', 0.75)
         
         # If we're in daytime, use the probability
         if self._is_daytime_slot(total_duration, config):
-            return random.random() < daytime_prob
+            return self.rng.random() < daytime_prob
         else:
             # Outside daytime, use inverse probability
-            return random.random() < (1 - daytime_prob)
+            return self.rng.random() < (1 - daytime_prob)
     
     def get_featured_content(self, exclude_ids: List[int] = None, schedule_date: str = None) -> List[Dict[str, Any]]:
         """Get available featured content (both manually marked and auto-featured)
@@ -337,12 +359,14 @@ class PostgreSQLScheduler:
                 params.extend(exclude_ids)
             
             # Order by last scheduled date and engagement score
-            query += """
+            tiebreak, tiebreak_params = self._next_tiebreak('a.id', schedule_date)
+            query += f"""
                 ORDER BY 
                     sm.last_scheduled_date ASC NULLS FIRST,
                     a.engagement_score DESC NULLS LAST,
-                    RANDOM()
+                    {tiebreak}
             """
+            params.extend(tiebreak_params)
             
             cursor.execute(query, params)
             results = cursor.fetchall()
@@ -413,16 +437,18 @@ class PostgreSQLScheduler:
                 
                 # Apply holiday greeting fair rotation filter if enabled
                 self._ensure_holiday_integration()
-                logger.warning(f"[HOLIDAY DEBUG] Before filter: {len(available_content)} items for {duration_category}")
+                availability_log.debug("[HOLIDAY DEBUG] Before filter: %d items for %s", len(available_content), duration_category)
                 if hasattr(self, 'holiday_integration'):
-                    logger.info(f"Holiday integration exists, enabled={self.holiday_integration.enabled}")
                     if self.holiday_integration.enabled:
-                        logger.info(f"Applying holiday greeting filter for {duration_category}")
-                        # Count holiday greetings before filtering - match the pattern used by holiday_greeting_scheduler
-                        import re
-                        greeting_pattern = re.compile(r'holiday\s*greeting', re.IGNORECASE)
-                        holiday_count_before = sum(1 for c in available_content if greeting_pattern.search(c.get('file_name', '')) or greeting_pattern.search(c.get('content_title', '')))
-                        logger.warning(f"[HOLIDAY DEBUG] Holiday greetings BEFORE filter: {holiday_count_before}")
+                        availability_log.debug("Applying holiday greeting filter for %s", duration_category)
+                        # Greetings are counted for the debug lines only, skip it when they are off
+                        count_greetings = availability_log.is_enabled_for(logging.DEBUG)
+                        if count_greetings:
+                            # Match the pattern used by holiday_greeting_scheduler
+                            import re
+                            greeting_pattern = re.compile(r'holiday\s*greeting', re.IGNORECASE)
+                            holiday_count_before = sum(1 for c in available_content if greeting_pattern.search(c.get('file_name', '')) or greeting_pattern.search(c.get('content_title', '')))
+                            availability_log.debug("[HOLIDAY DEBUG] Holiday greetings BEFORE filter: %d", holiday_count_before)
                         
                         available_content = self.holiday_integration.filter_available_content(
                             available_content, 
@@ -432,12 +458,11 @@ class PostgreSQLScheduler:
                             last_scheduled_theme
                         )
                         
-                        # Count holiday greetings after filtering - use same pattern
-                        holiday_count_after = sum(1 for c in available_content if greeting_pattern.search(c.get('file_name', '')) or greeting_pattern.search(c.get('content_title', '')))
-                        logger.warning(f"[HOLIDAY DEBUG] Holiday greetings AFTER filter: {holiday_count_after}")
-                        logger.warning(f"[HOLIDAY DEBUG] Total items after filter: {len(available_content)}")
-                    else:
-                        logger.info("Holiday integration is disabled")
+                        if count_greetings:
+                            # Count holiday greetings after filtering - use same pattern
+                            holiday_count_after = sum(1 for c in available_content if greeting_pattern.search(c.get('file_name', '')) or greeting_pattern.search(c.get('content_title', '')))
+                            availability_log.debug("[HOLIDAY DEBUG] Holiday greetings AFTER filter: %d, total items: %d",
+                                                   holiday_count_after, len(available_content))
                 else:
                     logger.warning("No holiday_integration attribute found")
                 
@@ -722,52 +747,29 @@ class PostgreSQLScheduler:
                     base_delay = 0
                     additional_delay = 0
                     if delay_reduction_factor < 1.0:
-                        logger.info(f"Ignoring delays for {duration_category} (reduction factor would have been {delay_reduction_factor})")
+                        availability_log.debug("Ignoring delays for %s (reduction factor would have been %s)",
+                                               duration_category, delay_reduction_factor)
                 else:
                     try:
                         from config_manager import ConfigManager
                         config_mgr = ConfigManager()
                         scheduling_config = config_mgr.get_scheduling_settings()
-                        replay_delays = scheduling_config.get('replay_delays', {})
-                        additional_delays = scheduling_config.get('additional_delay_per_airing', {})
                         featured_config = scheduling_config.get('featured_content', {})
                         featured_delay = featured_config.get('minimum_spacing', 2.0)
                         
-                        # Define default delays for content types
-                        content_type_defaults = {
-                            'an': 2,
-                            'atld': 2,
-                            'bmp': 3,
-                            'imow': 4,
-                            'im': 3,
-                            'ia': 4,
-                            'lm': 3,
-                            'mtg': 8,
-                            'maf': 4,
-                            'pkg': 3,
-                            'pmo': 3,
-                            'psa': 2,
-                            'szl': 3,
-                            'spp': 3
-                        }
-                        
-                        # Check if this is a content type or duration category
-                        if duration_category.lower() in content_type_defaults:
-                            # It's a content type, use content type defaults
-                            base_delay = replay_delays.get(duration_category.lower(), content_type_defaults.get(duration_category.lower(), 4))
-                            additional_delay = additional_delays.get(duration_category.lower(), 0.5)
-                        else:
-                            # It's a duration category, use regular defaults
-                            base_delay = replay_delays.get(duration_category, 24)
-                            additional_delay = additional_delays.get(duration_category, 2)
+                        # Content type or duration category delays, as the parallel builder uses
+                        base_delay, additional_delay = parallel_schedule.replay_delay_settings(
+                            duration_category, scheduling_config
+                        )
                         
                         if delay_reduction_factor < 1.0:
                             original_base = base_delay
                             original_additional = additional_delay
                             base_delay = base_delay * delay_reduction_factor
                             additional_delay = additional_delay * delay_reduction_factor
-                            logger.info(f"Reducing delays for {duration_category} by factor {delay_reduction_factor}: "
-                                      f"base {original_base}h -> {base_delay}h, additional {original_additional}h -> {additional_delay}h")
+                            availability_log.info("Reducing delays for %s by factor %s: base %sh -> %sh, additional %sh -> %sh",
+                                                  duration_category, delay_reduction_factor, original_base, base_delay,
+                                                  original_additional, additional_delay)
                     except Exception as e:
                         logger.warning(f"Could not load replay delay config, using defaults: {e}")
             
@@ -780,46 +782,34 @@ class PostgreSQLScheduler:
                 duration_category = duration_category.lower()
             
             # Build query using only positional parameters
-            query_parts = ["""
+            query_parts = [f"""
                 SELECT 
-                    a.id as asset_id,
-                    a.guid,
-                    a.content_type,
-                    a.content_title,
-                    a.duration_seconds,
-                    a.duration_category,
-                    a.engagement_score,
-                    a.theme,
-                    i.id as instance_id,
-                    i.file_name,
-                    i.file_path,
-                    i.encoded_date,
-                    sm.last_scheduled_date,
-                    sm.total_airings,
-                    CASE 
-                        WHEN EXISTS (
-                            SELECT 1 FROM information_schema.columns 
-                            WHERE table_name = 'scheduling_metadata' 
-                            AND column_name = 'featured'
-                        ) THEN COALESCE(sm.featured, FALSE)
-                        ELSE FALSE
-                    END as featured,
-                    COALESCE(sm.content_expiry_date, %s) as content_expiry_date,
-                    sm.go_live_date,
+                    sa.asset_id,
+                    sa.guid,
+                    sa.content_type,
+                    sa.content_title,
+                    sa.duration_seconds,
+                    sa.duration_category,
+                    sa.engagement_score,
+                    sa.theme,
+                    {db_manager.holiday_greeting_column('sa')},
+                    sa.instance_id,
+                    sa.file_name,
+                    sa.file_path,
+                    sa.encoded_date,
+                    sa.last_scheduled_date,
+                    sa.total_airings,
+                    sa.featured,
+                    COALESCE(sa.content_expiry_date, %s) as content_expiry_date,
+                    sa.go_live_date,
                     CASE 
-                        WHEN EXISTS (
-                            SELECT 1 FROM information_schema.columns 
-                            WHERE table_name = 'scheduling_metadata' 
-                            AND column_name = 'featured'
-                        ) AND COALESCE(sm.featured, FALSE) = TRUE THEN %s
-                        ELSE (%s + (COALESCE(sm.total_airings, 0) * %s))
+                        WHEN sa.featured THEN %s
+                        ELSE (%s + (COALESCE(sa.total_airings, 0) * %s))
                     END as required_delay_hours,
-                    EXTRACT(EPOCH FROM (%s - COALESCE(sm.last_scheduled_date, %s))) / 3600 as hours_since_last_scheduled
-                FROM assets a
-                JOIN instances i ON a.id = i.asset_id AND i.is_primary = TRUE
-                LEFT JOIN scheduling_metadata sm ON a.id = sm.asset_id
+                    EXTRACT(EPOCH FROM (%s - COALESCE(sa.last_scheduled_date, %s))) / 3600 as hours_since_last_scheduled
+                FROM {db_manager.schedulable_assets_relation()} sa
                 WHERE 
-                    a.analysis_completed = TRUE
+                    sa.analysis_completed = TRUE
             """]
             
             # Parameters for the main query
@@ -834,17 +824,17 @@ class PostgreSQLScheduler:
             
             # Add category filter
             if is_duration_category:
-                query_parts.append(" AND a.duration_category = %s")
+                query_parts.append(" AND sa.duration_category = %s")
             else:
-                query_parts.append(" AND a.content_type = %s")
+                query_parts.append(" AND sa.content_type = %s")
             params.append(duration_category)
             
             # Add remaining filters
             query_parts.append("""
-                AND COALESCE(sm.available_for_scheduling, TRUE) = TRUE
-                AND COALESCE(sm.content_expiry_date, %s) > %s
-                AND (sm.go_live_date IS NULL OR sm.go_live_date <= %s)
-                AND NOT (i.file_path LIKE %s)
+                AND sa.available_for_scheduling = TRUE
+                AND COALESCE(sa.content_expiry_date, %s) > %s
+                AND (sa.go_live_date IS NULL OR sa.go_live_date <= %s)
+                AND NOT (sa.file_path LIKE %s)
             """)
             params.extend([default_expiry_date, compare_date, compare_date, '%FILL%'])
             
@@ -852,71 +842,69 @@ class PostgreSQLScheduler:
             if not ignore_delays:
                 query_parts.append("""
                     AND (
-                        sm.last_scheduled_date IS NULL 
-                        OR sm.last_scheduled_date > %s  -- Content scheduled in the future is available
-                        OR EXTRACT(EPOCH FROM (%s - sm.last_scheduled_date)) / 3600 >= 
+                        sa.last_scheduled_date IS NULL 
+                        OR sa.last_scheduled_date > %s  -- Content scheduled in the future is available
+                        OR EXTRACT(EPOCH FROM (%s - sa.last_scheduled_date)) / 3600 >= 
                             CASE 
-                                WHEN EXISTS (
-                                    SELECT 1 FROM information_schema.columns 
-                                    WHERE table_name = 'scheduling_metadata' 
-                                    AND column_name = 'featured'
-                                ) AND COALESCE(sm.featured, FALSE) = TRUE THEN %s
-                                ELSE (%s + (COALESCE(sm.total_airings, 0) * %s))
+                                WHEN sa.featured THEN %s
+                                ELSE (%s + (COALESCE(sa.total_airings, 0) * %s))
                             END
                     )
                 """)
                 params.extend([compare_date, compare_date, featured_delay, base_delay, additional_delay])
             
             # Remove invalid existence check - scheduled_items doesn't have available_for_scheduling column
-            # The available_for_scheduling check is already done via scheduling_metadata table above
+            # The available_for_scheduling check is already done via schedulable_assets above
             
             # Handle exclude_ids
             if exclude_ids and len(exclude_ids) > 0:
                 placeholders = ','.join(['%s'] * len(exclude_ids))
-                query_parts.append(f" AND a.id NOT IN ({placeholders})")
+                query_parts.append(f" AND sa.asset_id NOT IN ({placeholders})")
                 params.extend(exclude_ids)
             
             # Add complex ordering with pre-calculated dates
-            query_parts.append("""
+            # (ties broken randomly, or by a seeded hash for reproducible builds)
+            tiebreak, tiebreak_params = self._next_tiebreak('sa.asset_id', schedule_date)
+            query_parts.append(f"""
                 ORDER BY 
                     (
                         CASE 
-                            WHEN i.encoded_date IS NULL THEN 0
-                            WHEN i.encoded_date >= %s THEN 100
-                            WHEN i.encoded_date >= %s THEN 90
-                            WHEN i.encoded_date >= %s THEN 80
-                            WHEN i.encoded_date >= %s THEN 60
-                            WHEN i.encoded_date >= %s THEN 40
-                            WHEN i.encoded_date >= %s THEN 20
+                            WHEN sa.encoded_date IS NULL THEN 0
+                            WHEN sa.encoded_date >= %s THEN 100
+                            WHEN sa.encoded_date >= %s THEN 90
+                            WHEN sa.encoded_date >= %s THEN 80
+                            WHEN sa.encoded_date >= %s THEN 60
+                            WHEN sa.encoded_date >= %s THEN 40
+                            WHEN sa.encoded_date >= %s THEN 20
                             ELSE 10
                         END * 0.35
                         
-                        + COALESCE(a.engagement_score, 50) * 0.25
+                        + COALESCE(sa.engagement_score, 50) * 0.25
                         
                         + CASE
-                            WHEN sm.total_airings IS NULL OR sm.total_airings = 0 THEN 100
-                            WHEN sm.total_airings <= 2 THEN 80
-                            WHEN sm.total_airings <= 5 THEN 60
-                            WHEN sm.total_airings <= 10 THEN 40
-                            WHEN sm.total_airings <= 20 THEN 20
+                            WHEN sa.total_airings IS NULL OR sa.total_airings = 0 THEN 100
+                            WHEN sa.total_airings <= 2 THEN 80
+                            WHEN sa.total_airings <= 5 THEN 60
+                            WHEN sa.total_airings <= 10 THEN 40
+                            WHEN sa.total_airings <= 20 THEN 20
                             ELSE 10
                         END * 0.20
                         
                         + CASE
-                            WHEN sm.last_scheduled_date IS NULL THEN 100
-                            WHEN EXTRACT(EPOCH FROM (%s - sm.last_scheduled_date)) / 3600 >= 24 THEN 100
-                            WHEN EXTRACT(EPOCH FROM (%s - sm.last_scheduled_date)) / 3600 >= 12 THEN 80
-                            WHEN EXTRACT(EPOCH FROM (%s - sm.last_scheduled_date)) / 3600 >= 6 THEN 60
-                            WHEN EXTRACT(EPOCH FROM (%s - sm.last_scheduled_date)) / 3600 >= 3 THEN 40
-                            WHEN EXTRACT(EPOCH FROM (%s - sm.last_scheduled_date)) / 3600 >= 1 THEN 20
+                            WHEN sa.last_scheduled_date IS NULL THEN 100
+                            WHEN EXTRACT(EPOCH FROM (%s - sa.last_scheduled_date)) / 3600 >= 24 THEN 100
+                            WHEN EXTRACT(EPOCH FROM (%s - sa.last_scheduled_date)) / 3600 >= 12 THEN 80
+                            WHEN EXTRACT(EPOCH FROM (%s - sa.last_scheduled_date)) / 3600 >= 6 THEN 60
+                            WHEN EXTRACT(EPOCH FROM (%s - sa.last_scheduled_date)) / 3600 >= 3 THEN 40
+                            WHEN EXTRACT(EPOCH FROM (%s - sa.last_scheduled_date)) / 3600 >= 1 THEN 20
                             ELSE 0
                         END * 0.20
                     ) DESC,
                     
-                    sm.last_scheduled_date ASC NULLS FIRST,
-                    sm.total_airings ASC NULLS FIRST,
-                    i.encoded_date DESC NULLS LAST,
-                    RANDOM()  -- Add randomization to break ties and avoid same content order
+                    sa.last_scheduled_date ASC NULLS FIRST,
+                    sa.total_airings ASC NULLS FIRST,
+                    sa.encoded_date DESC NULLS LAST,
+                    {tiebreak}
                 LIMIT 200  -- Increased to get more variety
             """)
             
@@ -934,6 +922,7 @@ class PostgreSQLScheduler:
                 compare_date,
                 compare_date
             ])
+            params.extend(tiebreak_params)
             
             # Combine query parts
             query = ''.join(query_parts)
@@ -959,8 +948,10 @@ class PostgreSQLScheduler:
         finally:
             db_manager._put_connection(conn)
     
-    def create_daily_schedule(self, schedule_date: str, schedule_name: str = None, max_errors: int = 100) -> Dict[str, Any]:
-        """Create a daily schedule for the specified date"""
+    def create_daily_schedule(self, schedule_date: str, schedule_name: str = None, max_errors: int = 100,
+                              seed: int = None) -> Dict[str, Any]:
+        """Create a daily schedule for the specified date (reproducible when seed is given)"""
+        self._begin_build(seed, schedule_date)
         try:
             # Force reload of configuration to ensure we have the latest rotation order
             self._config_loaded = False
@@ -1669,6 +1660,7 @@ class PostgreSQLScheduler:
                     asset['asset_id'], 
                     asset['file_name']
                 )
+                self.holiday_integration.flush_tracking()
             
             cursor.close()
             return True
@@ -1853,6 +1845,10 @@ class PostgreSQLScheduler:
             conn.commit()
             cursor.close()
             
+            # One write for all holiday greetings of the batch
+            if hasattr(self, 'holiday_integration'):
+                self.holiday_integration.flush_tracking()
+            
             return saved_count
             
         except Exception as e:
@@ -1907,6 +1903,193 @@ class PostgreSQLScheduler:
         finally:
             db_manager._put_connection(conn)
     
+    def _load_schedule_snapshot(self, start_date: datetime, days: int) -> parallel_schedule.ScheduleSnapshot:
+        """Read the content schedulable between start_date and the end of the range in one query"""
+        from config_manager import ConfigManager
+        scheduling_config = ConfigManager().get_scheduling_settings()
+        featured_config = scheduling_config.get('featured_content', {})
+        end_date = start_date + timedelta(days=days)
+        
+        conn = db_manager._get_connection()
+        try:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute(f"""
+                SELECT 
+                    sa.asset_id,
+                    sa.instance_id,
+                    sa.content_type,
+                    sa.content_title,
+                    sa.duration_seconds,
+                    sa.duration_category,
+                    sa.engagement_score,
+                    sa.theme,
+                    sa.file_name,
+                    sa.encoded_date,
+                    sa.last_scheduled_date,
+                    sa.total_airings,
+                    sa.featured,
+                    sa.content_expiry_date,
+                    sa.go_live_date
+                FROM {db_manager.schedulable_assets_relation()} sa
+                WHERE sa.analysis_completed = TRUE
+                AND sa.available_for_scheduling = TRUE
+                AND (sa.content_expiry_date IS NULL OR sa.content_expiry_date > %s)
+                AND (sa.go_live_date IS NULL OR sa.go_live_date <= %s)
+                AND NOT (sa.file_path LIKE %s)
+            """, (start_date, end_date, '%FILL%'))
+            candidates = [parallel_schedule.snapshot_row(row) for row in cursor.fetchall()]
+            cursor.close()
+        finally:
+            db_manager._put_connection(conn)
+        
+        featured_by_day = []
+        for day_index in range(days):
+            day = (start_date + timedelta(days=day_index)).strftime('%Y-%m-%d')
+            featured_by_day.append([parallel_schedule.snapshot_row(row)
+                                    for row in self.get_featured_content(exclude_ids=[], schedule_date=day)])
+        
+        self._load_config_if_needed()
+        replay_delays = {category: parallel_schedule.replay_delay_settings(category, scheduling_config)
+                         for category in self.duration_rotation}
+        
+        logger.info(f"Schedule snapshot: {len(candidates)} candidates for {days} days from {start_date.strftime('%Y-%m-%d')}")
+        return parallel_schedule.ScheduleSnapshot(
+            start_date=start_date,
+            days=days,
+            rotation=self.duration_rotation,
+            candidates=candidates,
+            featured_by_day=featured_by_day,
+            replay_delays=replay_delays,
+            featured_delay=featured_config.get('minimum_spacing', 2.0),
+            featured_config=featured_config,
+            seed=self.seed
+        )
+    
+    def _record_airings(self, airings: Dict[int, tuple]):
+        """Update last scheduled date and airing count of many assets in one statement
+        
+        Args:
+            airings: asset_id -> (last air time, number of airings)
+        """
+        if not airings:
+            return
+        conn = db_manager._get_connection()
+        try:
+            cursor = conn.cursor()
+            execute_values(cursor, """
+                INSERT INTO scheduling_metadata (asset_id, last_scheduled_date, total_airings)
+                VALUES %s
+                ON CONFLICT (asset_id) DO UPDATE SET
+                    last_scheduled_date = EXCLUDED.last_scheduled_date,
+                    total_airings = COALESCE(scheduling_metadata.total_airings, 0) + EXCLUDED.total_airings
+            """, [(asset_id, last_air, count) for asset_id, (last_air, count) in sorted(airings.items())],
+                page_size=1000)
+            conn.commit()
+            cursor.close()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error recording airings: {str(e)}")
+        finally:
+            db_manager._put_connection(conn)
+    
+    def _use_parallel_generation(self, parallel: Optional[bool]) -> bool:
+        """Resolve the parallel flag of a weekly/monthly build (None = configured default)"""
+        if parallel is None:
+            try:
+                from config_manager import ConfigManager
+                parallel = ConfigManager().get_scheduling_settings().get('parallel_generation', {}).get('enabled', False)
+            except Exception:
+                parallel = False
+        if parallel:
+            self._ensure_holiday_integration()
+            if self.holiday_integration and self.holiday_integration.enabled:
+                # Holiday greeting rotation is per-session database state, build in order
+                logger.info("Holiday greeting rotation is enabled, building days sequentially")
+                return False
+        return bool(parallel)
+    
+    def _create_parallel_schedule(self, schedule_id: int, start_date: datetime, days: int,
+                                  schedule_type: str, workers: int = None) -> Dict[str, Any]:
+        """Fill an existing weekly/monthly schedule record with days built in parallel"""
+        if workers is None:
+            try:
+                from config_manager import ConfigManager
+                workers = ConfigManager().get_scheduling_settings().get('parallel_generation', {}).get('workers') or None
+            except Exception:
+                workers = None
+        
+        snapshot = self._load_schedule_snapshot(start_date, days)
+        day_results = parallel_schedule.build_days(snapshot, workers)
+        stitched_days, stitch_stats = parallel_schedule.stitch(snapshot, day_results)
+        logger.info(f"Stitched {days} days: {stitch_stats['conflicts']} cross-day replay conflicts, "
+                    f"{stitch_stats['replaced']} replaced, {stitch_stats['kept']} kept")
+        
+        delay_reduction_stats = {'full_delays': 0, 'reduced_75': 0, 'reduced_50': 0,
+                                 'reduced_25': 0, 'no_delays': 0, 'resets': 0}
+        for result in day_results:
+            for key, count in result['stats'].items():
+                delay_reduction_stats[key] += count
+        
+        scheduled_items = []
+        airings = {}
+        sequence_number = 1
+        for day_index, items in enumerate(stitched_days):
+            day_start = snapshot.day_start(day_index)
+            hours_filled = sum(item['duration'] for item in items) / 3600
+            if hours_filled < 20:
+                day_name = day_start.strftime('%A %Y-%m-%d')
+                logger.error(f"❌ Critical failure: Only {hours_filled:.1f} hours of content for {day_name}")
+                self.delete_schedule(schedule_id)
+                return {
+                    'success': False,
+                    'message': f'Schedule creation failed: {day_name} could only be filled for {hours_filled:.1f} hours. '
+                             f'This indicates insufficient content. Please add more content or adjust replay delay settings.',
+                    'error': 'insufficient_content',
+                    'days_completed': day_index,
+                    'failed_day': day_name,
+                    'hours_filled': hours_filled
+                }
+            
+            for item in items:
+                scheduled_items.append({
+                    'schedule_id': schedule_id,
+                    'asset_id': item['asset_id'],
+                    'instance_id': item['instance_id'],
+                    'sequence_number': sequence_number,
+                    'scheduled_start_time': self._seconds_to_time(item['offset']),
+                    'scheduled_duration_seconds': item['duration'],
+                    'content_type': item['content_type'],
+                    'theme': item['theme'],
+                    'duration_category': item['duration_category'],
+                    'file_name': item['file_name']
+                })
+                sequence_number += 1
+                air_time = day_start + timedelta(seconds=item['offset'])
+                count = airings.get(item['asset_id'], (None, 0))[1]
+                airings[item['asset_id']] = (air_time, count + 1)
+            
+            logger.info(f"✅ Completed {day_start.strftime('%A %Y-%m-%d')} with {len(items)} items - "
+                        f"{hours_filled / 24 * 100:.1f}% filled")
+        
+        saved_count = self._save_scheduled_items(scheduled_items)
+        self._record_airings(airings)
+        total_duration = days * 24 * 60 * 60
+        self._update_schedule_duration(schedule_id, total_duration)
+        
+        logger.info(f"Created {schedule_type} schedule with {saved_count} items from {days} days built in parallel")
+        return {
+            'success': True,
+            'message': f'Successfully created {schedule_type} schedule starting {start_date.strftime("%Y-%m-%d")}',
+            'schedule_id': schedule_id,
+            'total_items': saved_count,
+            'total_duration_hours': total_duration / 3600,
+            'days_count': days,
+            'schedule_type': schedule_type,
+            'generation': 'parallel',
+            'stitch_stats': stitch_stats,
+            'delay_reduction_stats': delay_reduction_stats
+        }
+    
     def _seconds_to_time(self, total_seconds: float) -> str:
         """Convert seconds to HH:MM:SS.microseconds format"""
         hours = int(total_seconds // 3600)
@@ -2332,8 +2515,8 @@ class PostgreSQLScheduler:
         finally:
             db_manager._put_connection(conn)
     
-    def create_weekly_schedule(self, start_date: str) -> Dict[str, Any]:
-        """Create schedules for an entire week (7 days)"""
+    def create_weekly_schedule(self, start_date: str, seed: int = None) -> Dict[str, Any]:
+        """Create schedules for an entire week (7 days), reproducible when seed is given"""
         logger.info(f"Creating weekly schedule starting {start_date}")
         
         try:
@@ -2406,7 +2589,7 @@ class PostgreSQLScheduler:
                 
                 try:
                     # Create daily schedule
-                    result = self.create_daily_schedule(current_date_str)
+                    result = self.create_daily_schedule(current_date_str, seed=seed)
                     
                     if result['success']:
                         created_schedules.append({
@@ -2531,9 +2714,16 @@ class PostgreSQLScheduler:
         finally:
             db_manager._put_connection(conn)
     
-    def create_single_weekly_schedule(self, start_date: str, schedule_name: str = None, max_errors: int = 100) -> Dict[str, Any]:
-        """Create a single weekly schedule containing 7 days of content"""
+    def create_single_weekly_schedule(self, start_date: str, schedule_name: str = None, max_errors: int = 100,
+                                      parallel: bool = None, seed: int = None) -> Dict[str, Any]:
+        """Create a single weekly schedule containing 7 days of content
+        
+        With parallel (default from the parallel_generation setting) the days
+        are built in worker processes and stitched, see parallel_schedule.py.
+        The build is reproducible when seed is given.
+        """
         logger.info(f"Creating single weekly schedule starting {start_date}")
+        self._begin_build(seed, 'weekly', start_date)
         
         try:
             # Parse start date and ensure it's a Sunday
@@ -2575,6 +2765,9 @@ class PostgreSQLScheduler:
                 self.holiday_integration.set_current_schedule(schedule_id)
                 logger.info(f"Holiday integration schedule_id set to: {schedule_id}")
             
+            if self._use_parallel_generation(parallel):
+                return self._create_parallel_schedule(schedule_id, start_date_obj, 7, 'weekly')
+            
             # Build the weekly schedule (7 days of content)
             scheduled_items = []
             total_duration = 0
@@ -2849,7 +3042,7 @@ class PostgreSQLScheduler:
                             
                             # Start with base score from SQL query (already calculated)
                             # Add small random component to break ties between similar content
-                            score = 100 + random.uniform(-5, 5)  # Base score with small random variation
+                            score = 100 + self.rng.uniform(-5, 5)  # Base score with small random variation
                             
                             # Boost score for featured content
                             if candidate.get('featured', False):
@@ -3245,9 +3438,16 @@ class PostgreSQLScheduler:
                 'message': f'Error creating weekly schedule: {str(e)}'
             }
     
-    def create_monthly_schedule(self, year: int, month: int, max_errors: int = 100) -> Dict[str, Any]:
-        """Create a monthly schedule for the specified year and month"""
+    def create_monthly_schedule(self, year: int, month: int, max_errors: int = 100,
+                                parallel: bool = None, seed: int = None) -> Dict[str, Any]:
+        """Create a monthly schedule for the specified year and month
+        
+        With parallel (default from the parallel_generation setting) the days
+        are built in worker processes and stitched, see parallel_schedule.py.
+        The build is reproducible when seed is given.
+        """
         logger.info(f"Creating monthly schedule for {year}-{month:02d}")
+        self._begin_build(seed, 'monthly', year, month)
         
         try:
             # Force reload of configuration to ensure we have the latest rotation order
@@ -3292,6 +3492,9 @@ class PostgreSQLScheduler:
                     'message': 'Failed to create schedule record'
                 }
             
+            if self._use_parallel_generation(parallel):
+                return self._create_parallel_schedule(schedule_id, start_date, days_in_month, 'monthly')
+            
             # Build the monthly schedule
             scheduled_items = []
             total_duration = 0
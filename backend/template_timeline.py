@@ -0,0 +1,134 @@
+"""
+Sorted timeline of the items already in a template.
+
+fill_template_gaps asks the same few questions about the original template
+items over and over: which item ends where a gap starts, what would a new
+item overlap, which live meeting ended last before a position. Walking the
+item list for each of those is quadratic over a weekly or monthly fill with
+many live inputs, so the items are indexed once per template in arrays
+sorted by start and end, and each question is answered with bisect.
+
+Answers are the same as the linear scans they replace: when several items
+qualify, the one earliest in template order wins.
+"""
+
+import bisect
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def is_live_title(title):
+    """Live Input and SDI placeholders, as recognized by their title"""
+    return 'Live Input' in title or 'SDI' in title
+
+
+class IntervalIndex:
+    """Intervals ({'start', 'end', ...} dicts) with stabbing, overlap and neighbor queries"""
+
+    def __init__(self, items):
+        # (position, template order) so ties resolve to the earliest item
+        by_start = sorted((item['start'], order) for order, item in enumerate(items))
+        by_end = sorted((item['end'], order) for order, item in enumerate(items))
+
+        self._items = items
+        self._starts = [start for start, _ in by_start]
+        self._start_order = [order for _, order in by_start]
+        self._ends = [end for end, _ in by_end]
+        self._end_order = [order for _, order in by_end]
+
+        # Running maximum of the end over start order, to skip items that end
+        # before an overlap query without looking at them
+        self._max_end = []
+        running = float('-inf')
+        for _, order in by_start:
+            running = max(running, items[order]['end'])
+            self._max_end.append(running)
+
+    def __len__(self):
+        return len(self._items)
+
+    def _in_template_order(self, orders):
+        return [self._items[order] for order in sorted(orders)]
+
+    def overlapping(self, lo, hi):
+        """Items with start < hi and end > lo, in template order"""
+        first = bisect.bisect_right(self._max_end, lo)
+        last = bisect.bisect_left(self._starts, hi)
+        return self._in_template_order(
+            self._start_order[i] for i in range(first, last)
+            if self._items[self._start_order[i]]['end'] > lo
+        )
+
+    def stabbing(self, position):
+        """Items covering position (start <= position < end), in template order"""
+        first = bisect.bisect_right(self._max_end, position)
+        last = bisect.bisect_right(self._starts, position)
+        return self._in_template_order(
+            self._start_order[i] for i in range(first, last)
+            if self._items[self._start_order[i]]['end'] > position
+        )
+
+    def first_overlapping(self, lo, hi):
+        """Earliest item in template order with start < hi and end > lo, or None"""
+        items = self.overlapping(lo, hi)
+        return items[0] if items else None
+
+    def ending_near(self, position, tolerance):
+        """Earliest item in template order ending strictly within tolerance of position, or None"""
+        first = bisect.bisect_right(self._ends, position - tolerance)
+        last = bisect.bisect_left(self._ends, position + tolerance)
+        orders = [order for order, end in zip(self._end_order[first:last], self._ends[first:last])
+                  if abs(position - end) < tolerance]
+        return self._items[min(orders)] if orders else None
+
+    def starting_near(self, position, tolerance):
+        """Earliest item in template order starting strictly within tolerance of position, or None"""
+        first = bisect.bisect_right(self._starts, position - tolerance)
+        last = bisect.bisect_left(self._starts, position + tolerance)
+        orders = [order for order, start in zip(self._start_order[first:last], self._starts[first:last])
+                  if abs(position - start) < tolerance]
+        return self._items[min(orders)] if orders else None
+
+    def closest_ending(self, position, max_distance):
+        """Item whose end is closest to position and at most max_distance away, or None"""
+        first = bisect.bisect_left(self._ends, position - max_distance)
+        last = bisect.bisect_right(self._ends, position + max_distance)
+        candidates = [(abs(position - end), order)
+                      for order, end in zip(self._end_order[first:last], self._ends[first:last])
+                      if abs(position - end) <= max_distance]
+        return self._items[min(candidates)[1]] if candidates else None
+
+    def last_ending_before(self, position, max_distance):
+        """
+        Item ending latest at or before position, if it ended less than
+        max_distance before it. None otherwise.
+        """
+        i = bisect.bisect_right(self._ends, position) - 1
+        if i < 0:
+            return None
+        end = self._ends[i]
+        if position - end >= max_distance:
+            return None
+        # Several items may end at the same time, take the earliest one
+        return self._items[self._end_order[bisect.bisect_left(self._ends, end)]]
+
+
+class TemplateTimeline:
+    """Indexes over the original items of a template, built once per fill"""
+
+    def __init__(self, original_items):
+        self.items = original_items
+        self.all = IntervalIndex(original_items)
+        self.content = IntervalIndex([item for item in original_items if not item.get('is_gap', False)])
+        self.live = IntervalIndex([item for item in original_items if item.get('is_live_input')])
+        self.live_titled = IntervalIndex([item for item in original_items if is_live_title(item.get('title', ''))])
+
+        logger.info(f"Template timeline: {len(self.all)} items, {len(self.content)} content, "
+                    f"{len(self.live)} live inputs")
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Test that a meeting recording right after the same live meeting is blocked
+
+Runs should_block_meeting_after_live against a small template timeline with
+the database lookup disabled, so the live meeting name comes from the
+Committee Room title fallback.
+"""
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+from template_timeline import TemplateTimeline
+
+
+def test_meeting_block_after_live():
+    print("=== Testing meeting block after live input ===")
+
+    # Use the title fallback instead of the meetings table
+    app.db_manager.connected = False
+
+    timeline = TemplateTimeline([
+        {'start': 0, 'end': 3600, 'title': 'Opening', 'start_time': '12:00:00 am'},
+        {'start': 3600, 'end': 10800, 'title': 'Live Input - Committee Room 1',
+         'start_time': '1:00:00 am', 'is_live_input': True},
+    ])
+    recording = {'duration_category': 'long_form', 'content_title': '2025-01-15 Committee'}
+    other = {'duration_category': 'long_form', 'content_title': '2025-01-15 Zoning Review Board'}
+    base_date = datetime(2025, 1, 15)
+
+    # Right after the live meeting: blocked
+    blocked, reason = app.should_block_meeting_after_live(recording, timeline, 10800 + 60, 'daily', base_date)
+    print(f"Recording 1 min after live meeting: blocked={blocked} ({reason})")
+    assert blocked, "Recording right after the same live meeting was not blocked"
+
+    # A different meeting right after: allowed
+    blocked, _ = app.should_block_meeting_after_live(other, timeline, 10800 + 60, 'daily', base_date)
+    print(f"Different meeting 1 min after live meeting: blocked={blocked}")
+    assert not blocked, "Different meeting was blocked"
+
+    # More than two hours later: allowed
+    blocked, _ = app.should_block_meeting_after_live(recording, timeline, 10800 + 7300, 'daily', base_date)
+    print(f"Recording 2 h after live meeting: blocked={blocked}")
+    assert not blocked, "Recording more than two hours later was blocked"
+
+    print("\n✓ Meeting block after live input works")
+
+
+if __name__ == '__main__':
+    test_meeting_block_after_live()
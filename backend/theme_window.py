@@ -0,0 +1,187 @@
+"""
+Theme separation for short-form content during gap fills.
+
+Short-form items (spots, IDs, short_form) sharing a theme must be separated
+by long_form content. The old check walked back through everything added so
+far and re-extracted themes from titles for every candidate. ThemeWindow
+instead caches each asset's normalized themes and keeps running counts of
+the themes aired since the last long_form item, so a candidate is checked
+by set lookups and only the decision is logged.
+"""
+
+import logging
+from collections import Counter, deque
+
+logger = logging.getLogger(__name__)
+
+SHORT_FORM_CATEGORIES = frozenset(['spots', 'id', 'short_form'])
+
+# Common theme keywords to look for in titles
+THEME_PATTERNS = (
+    'gun', 'firearm', 'weapon', 'shooting',
+    'safety', 'violence', 'crime', 'police',
+    'health', 'medical', 'covid', 'vaccine',
+    'education', 'school', 'student', 'teacher',
+    'housing', 'homeless', 'affordable', 'rent',
+    'environment', 'climate', 'green', 'pollution',
+    'election', 'vote', 'campaign', 'political',
+    'budget', 'tax', 'finance', 'money',
+    'transport', 'traffic', 'transit', 'road',
+    'community', 'neighborhood', 'resident',
+    'business', 'economy', 'job', 'employment',
+    'arts', 'culture', 'music', 'festival',
+    'park', 'recreation', 'sport', 'fitness'
+)
+
+STRONG_THEMES = frozenset(['gun', 'firearm', 'weapon', 'violence', 'crime', 'covid', 'election', 'political'])
+
+
+def extract_theme_from_title(title):
+    """Extract theme keywords from content title"""
+    if not title:
+        return set()
+
+    title_lower = title.lower()
+    themes = {pattern for pattern in THEME_PATTERNS if pattern in title_lower}
+
+    # Also check for compound themes
+    if 'gun' in title_lower and 'safe' in title_lower:
+        themes.add('gun_safety')
+    if 'public' in title_lower and 'safe' in title_lower:
+        themes.add('public_safety')
+
+    return themes
+
+
+def is_strong_theme(theme):
+    """Check if a theme is considered 'strong' (should have stricter spacing)"""
+    return theme.lower() in STRONG_THEMES
+
+
+def is_meeting_item(item, title):
+    """Meetings (live inputs and MTG recordings) don't take part in theme separation"""
+    return ('SDI' in title or
+            'Live Input' in title or
+            item.get('content_type', '') == 'MTG' or
+            '_MTG_' in item.get('file_name', ''))
+
+
+class ThemeWindow:
+    """
+    Themes of the short-form items scheduled since the last long_form item
+
+    The window follows the list of added items (appended to only) and
+    catches up with it on each check.
+    """
+
+    def __init__(self, theme_logger=None):
+        self.theme_logger = theme_logger or logger
+        self._content_themes = {}  # cache key -> frozenset of candidate themes
+        self._item_themes = {}  # (title, theme) -> frozenset of scheduled item themes
+        self._reset()
+
+    def _reset(self):
+        self._counts = Counter()
+        self._window = deque()  # (title, category, themes) since the last long_form item
+        self._consumed = 0
+
+    def content_themes(self, content):
+        """Themes of a candidate: database theme, tag topics and title keywords"""
+        title = content.get('content_title', content.get('file_name', ''))
+        key = content.get('id') or title
+        themes = self._content_themes.get(key)
+        if themes is None:
+            themes = set()
+            db_theme = content.get('theme')
+            if db_theme:
+                themes.add(db_theme.lower().strip())
+            tags = content.get('tags', {})
+            topics = tags.get('topics', []) if isinstance(tags, dict) else []
+            if topics:
+                themes.update(topic.lower() for topic in topics)
+            themes.update(extract_theme_from_title(title))
+            themes = self._content_themes[key] = frozenset(themes)
+        return themes
+
+    def _scheduled_themes(self, item, title):
+        """Themes of an already scheduled item: database theme and title keywords"""
+        db_theme = item.get('theme')
+        key = (title, db_theme)
+        themes = self._item_themes.get(key)
+        if themes is None:
+            themes = extract_theme_from_title(title)
+            if db_theme:
+                themes.add(db_theme.lower().strip())
+            themes = self._item_themes[key] = frozenset(themes)
+        return themes
+
+    def push(self, item):
+        """Slide the window over one newly scheduled item"""
+        category = item.get('duration_category', '')
+        title = item.get('title', item.get('content_title', ''))
+
+        if category == 'long_form':
+            # Long-form content separates everything before it
+            self._counts.clear()
+            self._window.clear()
+            return
+        if is_meeting_item(item, title) or category not in SHORT_FORM_CATEGORIES:
+            return
+
+        themes = self._scheduled_themes(item, title)
+        if themes:
+            self._window.append((title, category, themes))
+            self._counts.update(themes)
+
+    def sync(self, recent_items):
+        """Catch up with items appended to recent_items since the last call"""
+        if len(recent_items) < self._consumed:
+            # A different list, start over
+            self._reset()
+        for item in recent_items[self._consumed:]:
+            self.push(item)
+        self._consumed = len(recent_items)
+
+    def _latest_with(self, themes):
+        for title, category, item_themes in reversed(self._window):
+            matching = themes & item_themes
+            if matching:
+                return title, category, matching
+        return None
+
+    def check(self, content, recent_items, current_position, remaining_seconds=None):
+        """
+        Check if content should be blocked due to theme conflicts with recent items.
+        Only applies to spots, ID and short_form content.
+
+        Returns tuple: (should_block, reason)
+        """
+        try:
+            if content.get('duration_category', '') not in SHORT_FORM_CATEGORIES:
+                return False, None
+
+            # If we're within 2 hours of end-of-day, relax theme conflict requirements
+            # This prevents infinite loops when trying to fill end-of-day gaps
+            if remaining_seconds is not None and remaining_seconds < 7200:
+                return False, None
+
+            self.sync(recent_items)
+            themes = self.content_themes(content)
+            if not themes or not any(self._counts[theme] for theme in themes):
+                if self.theme_logger.isEnabledFor(logging.DEBUG):
+                    self.theme_logger.debug(f"Decision at {current_position/3600:.2f}h: ACCEPTED - "
+                                            f"'{content.get('content_title', content.get('file_name', ''))}'")
+                return False, None
+
+            # Report the most recent item sharing a theme, as the backwards scan did
+            title, category, matching = self._latest_with(themes)
+            content_title = content.get('content_title', content.get('file_name', ''))
+            reason = (f"Short-form theme conflict: '{content_title}' has theme '{next(iter(matching))}' "
+                      f"matching recent {category} item '{title}' - must be separated by long_form content")
+            self.theme_logger.info(f"Decision at {current_position/3600:.2f}h: REJECTED - {reason}")
+            return True, reason
+
+        except Exception as e:
+            self.theme_logger.error(f"Error checking theme conflicts: {str(e)}")
+            logger.error(f"Error in ThemeWindow.check: {str(e)}")
+            return False, None
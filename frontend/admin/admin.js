@@ -294,6 +294,153 @@ function adminDisplayLogs(logs) {
     }
 }
 
+// Load the slowest endpoints / N+1 suspects report
+async function adminLoadQueryReport() {
+    try {
+        const response = await window.API.get('/admin/query-report');
+        if (response.success) {
+            adminDisplayQueryReport(response.report);
+        }
+    } catch (error) {
+        window.showNotification('Failed to load query report', 'error');
+    }
+}
+
+// Clear the query report
+async function adminClearQueryReport() {
+    try {
+        const response = await window.API.delete('/admin/query-report');
+        if (response.success) {
+            adminDisplayQueryReport(response.report);
+            window.showNotification('Query report reset', 'info');
+        }
+    } catch (error) {
+        window.showNotification('Failed to reset query report', 'error');
+    }
+}
+
+// Display query report
+function adminDisplayQueryReport(report) {
+    const viewer = document.getElementById('queryReportViewer');
+    if (!viewer) return;
+    
+    const lines = [`Requests in window: ${report.requests}`, '', 'Slowest endpoints (total DB time)'];
+    report.endpoints.forEach(endpoint => {
+        lines.push(`${endpoint.endpoint}`);
+        lines.push(`  ${endpoint.requests} requests, ${endpoint.db_ms} ms DB total, ` +
+                   `avg ${endpoint.avg_queries} queries / ${endpoint.avg_db_ms} ms DB / ${endpoint.avg_request_ms} ms request, ` +
+                   `max ${endpoint.max_queries} queries`);
+        if (endpoint.slowest) {
+            lines.push(`  slowest: ${endpoint.slowest.ms} ms ${endpoint.slowest.statement}`);
+        }
+    });
+    
+    lines.push('', `N+1 suspects (statement run ${report.threshold}+ times in one request)`);
+    if (report.n_plus_one.length === 0) {
+        lines.push('  none');
+    }
+    report.n_plus_one.forEach(suspect => {
+        lines.push(`${suspect.endpoint}: up to ${suspect.max_repeats}x in ${suspect.requests} requests`);
+        lines.push(`  ${suspect.statement}`);
+    });
+    
+    // textContent, so statement text is never interpreted as HTML
+    viewer.textContent = lines.join('\n');
+    viewer.style.display = 'block';
+}
+
+// Arm the sampling profiler for the next run of a request or job
+async function adminArmProfiler() {
+    const target = document.getElementById('profileTarget').value.trim();
+    const runs = parseInt(document.getElementById('profileRuns').value, 10) || 1;
+    if (!target) {
+        window.showNotification('Enter a route, request:<id> or job:<name> to profile', 'warning');
+        return;
+    }
+    
+    try {
+        const response = await window.API.post('/admin/profiles', { target, runs });
+        if (response.success) {
+            adminDisplayProfiles(response);
+            window.showNotification(`Profiler armed for ${target}`, 'success');
+        } else {
+            window.showNotification(response.message || 'Failed to arm profiler', 'error');
+        }
+    } catch (error) {
+        window.showNotification('Failed to arm profiler', 'error');
+    }
+}
+
+// Disarm all profiler targets
+async function adminDisarmProfiler() {
+    try {
+        const response = await window.API.delete('/admin/profiles');
+        if (response.success) {
+            adminDisplayProfiles(response);
+            window.showNotification('Profiler disarmed', 'info');
+        }
+    } catch (error) {
+        window.showNotification('Failed to disarm profiler', 'error');
+    }
+}
+
+// Load profiler status and recent profiles
+async function adminLoadProfiles() {
+    try {
+        const response = await window.API.get('/admin/profiles');
+        if (response.success) {
+            adminDisplayProfiles(response);
+        }
+    } catch (error) {
+        window.showNotification('Failed to load profiles', 'error');
+    }
+}
+
+// Display profiler status and recent profiles
+function adminDisplayProfiles(response) {
+    const status = response.status;
+    const baseURL = window.APIConfig ? window.APIConfig.baseURL : 
+        (window.location.port === '8000' ? 'http://127.0.0.1:5000/api' : '/api');
+    
+    const jobList = document.getElementById('profileJobs');
+    if (jobList) {
+        jobList.innerHTML = '';
+        status.jobs.forEach(job => {
+            const option = document.createElement('option');
+            option.value = `job:${job}`;
+            jobList.appendChild(option);
+        });
+    }
+    
+    const statusEl = document.getElementById('profilerStatus');
+    if (statusEl) {
+        const armed = status.armed.map(a => `${a.target} (${a.runs} run${a.runs === 1 ? '' : 's'})`).join(', ');
+        const active = status.active.map(a => `${a.label} (${a.samples} samples)`).join(', ');
+        statusEl.textContent = `Armed: ${armed || 'none'} | Running: ${active || 'none'}`;
+    }
+    
+    const list = document.getElementById('profileList');
+    if (!list) return;
+    list.innerHTML = '';
+    response.profiles.forEach(profile => {
+        const item = document.createElement('li');
+        const link = document.createElement('a');
+        link.href = `${baseURL}/admin/profiles/${encodeURIComponent(profile.name)}`;
+        link.textContent = profile.label || profile.name;
+        item.appendChild(link);
+        const details = profile.samples !== undefined
+            ? ` ${profile.started ? new Date(profile.started).toLocaleString() : ''}, ${profile.seconds}s, ${profile.samples} samples${profile.truncated ? ' (truncated)' : ''}`
+            : '';
+        item.appendChild(document.createTextNode(details));
+        list.appendChild(item);
+    });
+    if (response.profiles.length === 0) {
+        const item = document.createElement('li');
+        item.textContent = 'No profiles yet';
+        list.appendChild(item);
+    }
+}
+
 // Export functions to global scope
 window.adminInit = adminInit;
 window.adminLoadConfig = adminLoadConfig;
@@ -302,6 +449,11 @@ window.adminCreateSampleConfig = adminCreateSampleConfig;
 window.adminResetForm = adminResetForm;
 window.adminClearAllAnalyses = adminClearAllAnalyses;
 window.adminViewLogs = adminViewLogs;
+window.adminLoadQueryReport = adminLoadQueryReport;
+window.adminClearQueryReport = adminClearQueryReport;
+window.adminArmProfiler = adminArmProfiler;
+window.adminDisarmProfiler = adminDisarmProfiler;
+window.adminLoadProfiles = adminLoadProfiles;
 
 // Legacy support
 window.loadConfig = adminLoadConfig;
@@ -4155,6 +4155,7 @@ const SCHEDULING_CONFIG = {
 
 // Global variables for scheduling
 let availableContent = [];
+let availableContentFilters = null;  // Content panel filters that loaded availableContent
 let currentSchedule = null;
 let scheduleConfig = SCHEDULING_CONFIG;
 
@@ -5667,15 +5668,25 @@ function saveFeaturedContentConfig() {
 }
 
 // Content Loading and Filtering Functions
+function getContentFilterCriteria() {
+    return {
+        content_type: document.getElementById('contentTypeFilter')?.value || '',
+        duration_category: document.getElementById('durationCategoryFilter')?.value || '',
+        search: document.getElementById('contentSearchFilter')?.value?.toLowerCase() || '',
+        featured_filter: document.getElementById('featuredFilter')?.value || ''
+    };
+}
+
 async function loadAvailableContent() {
     log('📺 Loading available content for scheduling...');
     
     try {
         // Get filter values
-        const contentTypeFilter = document.getElementById('contentTypeFilter')?.value || '';
-        const durationCategoryFilter = document.getElementById('durationCategoryFilter')?.value || '';
-        const searchFilter = document.getElementById('contentSearchFilter')?.value?.toLowerCase() || '';
-        const featuredFilter = document.getElementById('featuredFilter')?.value || '';
+        const filters = getContentFilterCriteria();
+        const contentTypeFilter = filters.content_type;
+        const durationCategoryFilter = filters.duration_category;
+        const searchFilter = filters.search;
+        const featuredFilter = filters.featured_filter;
         
         log(`🔍 Applying filters - Type: ${contentTypeFilter || 'All'}, Duration: ${durationCategoryFilter || 'All'}, Featured: ${featuredFilter || 'All'}, Search: ${searchFilter || 'None'}`);
         
@@ -5699,6 +5710,7 @@ async function loadAvailableContent() {
         
         if (result.success) {
             availableContent = result.content || [];
+            availableContentFilters = filters;
             // Debug: Log the first content item to see its structure
             if (availableContent.length > 0) {
                 console.log('Sample content item structure:', availableContent[0]);
@@ -10774,6 +10786,13 @@ async function fillScheduleGaps(postMeetingDelay = 0) {
                 
                 if (result.success && result.content && result.content.length > 0) {
                     availableContent = result.content;
+                    // Loaded with empty filters, so the server can rebuild the same set
+                    availableContentFilters = {
+                        content_type: '',
+                        duration_category: '',
+                        search: '',
+                        featured_filter: ''
+                    };
                     log(`fillScheduleGaps: Loaded ${availableContent.length} available content items`, 'success');
                 } else {
                     log('fillScheduleGaps: No analyzed content available', 'warning');
@@ -11259,11 +11278,16 @@ async function fillScheduleGaps(postMeetingDelay = 0) {
                 try {
                     requestBody = {
                         template: sanitizeForJSON(cleanTemplate),
-                        available_content: sanitizeForJSON(availableContent),
                         gaps: sanitizeForJSON(manuallySplitGaps),  // Use manually split gaps
                         schedule_date: scheduleDate,
                         post_meeting_delay: postMeetingDelay
                     };
+                    if (availableContentFilters) {
+                        // The server rebuilds the panel's candidate set from the filters that loaded it
+                        requestBody.content_filters = availableContentFilters;
+                    } else {
+                        requestBody.available_content = sanitizeForJSON(availableContent);
+                    }
                     
                     // Test JSON serialization before sending
                     const testStringify = JSON.stringify(requestBody);